@@ -0,0 +1,47 @@
+"""add price chunks and missing bar columns
+
+Revision ID: 14dc0842b29b
+Revises: 6329c90e4549
+Create Date: 2026-10-19 09:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '14dc0842b29b'
+down_revision: Union[str, None] = '6329c90e4549'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('historical_data') as batch_op:
+        batch_op.add_column(sa.Column('low', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('close', sa.Float(), nullable=True))
+    op.create_index('ix_historical_data_stock_id_date', 'historical_data', ['stock_id', 'date'], unique=False)
+    op.create_table('price_chunks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('bar_count', sa.Integer(), nullable=False),
+    sa.Column('first_date', sa.DateTime(), nullable=False),
+    sa.Column('last_date', sa.DateTime(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stock_id', 'year')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('price_chunks')
+    op.drop_index('ix_historical_data_stock_id_date', table_name='historical_data')
+    with op.batch_alter_table('historical_data') as batch_op:
+        batch_op.drop_column('close')
+        batch_op.drop_column('low')
@@ -0,0 +1,32 @@
+"""add user id allocations
+
+Revision ID: a4c7e2d19b63
+Revises: e81a5d3f90c2
+Create Date: 2026-10-19 23:05:41.207716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c7e2d19b63'
+down_revision: Union[str, None] = 'e81a5d3f90c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_id_allocations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('allocated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_id_allocations')
@@ -0,0 +1,55 @@
+"""add splits, dividends and adjustment factors
+
+Revision ID: b7e2d4a91c35
+Revises: 14dc0842b29b
+Create Date: 2026-10-19 11:04:27.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4a91c35'
+down_revision: Union[str, None] = '14dc0842b29b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('splits',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('ex_date', sa.DateTime(), nullable=False),
+    sa.Column('ratio', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stock_id', 'ex_date')
+    )
+    op.create_table('dividends',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('ex_date', sa.DateTime(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stock_id', 'ex_date')
+    )
+    op.create_table('adjustment_factors',
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('ex_date', sa.DateTime(), nullable=False),
+    sa.Column('price_factor', sa.Float(), nullable=False),
+    sa.Column('volume_factor', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('stock_id', 'ex_date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('adjustment_factors')
+    op.drop_table('dividends')
+    op.drop_table('splits')
@@ -0,0 +1,37 @@
+"""add stock currency and fx rates
+
+Revision ID: c62f0b8e4d17
+Revises: 9d4e2a7c1b63
+Create Date: 2026-10-19 20:27:45.630192
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c62f0b8e4d17'
+down_revision: Union[str, None] = '9d4e2a7c1b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fx_rates',
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.Column('rate', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('currency', 'date')
+    )
+    with op.batch_alter_table('stocks') as batch_op:
+        batch_op.add_column(sa.Column('currency', sa.String(length=3), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('stocks') as batch_op:
+        batch_op.drop_column('currency')
+    op.drop_table('fx_rates')
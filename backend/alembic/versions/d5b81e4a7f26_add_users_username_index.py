@@ -0,0 +1,28 @@
+"""add users username index
+
+Revision ID: d5b81e4a7f26
+Revises: a4c7e2d19b63
+Create Date: 2026-10-19 23:58:12.604917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b81e4a7f26'
+down_revision: Union[str, None] = 'a4c7e2d19b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_username'), table_name='users')
@@ -0,0 +1,46 @@
+"""add user row version and price series stamps
+
+Revision ID: e41a6b8c0f52
+Revises: 5c9e1f3a7d20
+Create Date: 2026-10-19 14:02:48.390157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a6b8c0f52'
+down_revision: Union[str, None] = '5c9e1f3a7d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.create_table('price_series_stamps',
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('last_bar_date', sa.DateTime(), nullable=True),
+    sa.Column('modified_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('stock_id')
+    )
+    # Bestehende Kursreihen erhalten einen Startstempel, damit sie sofort ETags liefern.
+    op.execute(
+        "INSERT INTO price_series_stamps (stock_id, version, last_bar_date, modified_at) "
+        "SELECT stock_id, 1, MAX(date), CURRENT_TIMESTAMP FROM historical_data GROUP BY stock_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('price_series_stamps')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('version')
+        batch_op.drop_column('updated_at')
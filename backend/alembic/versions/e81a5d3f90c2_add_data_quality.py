@@ -0,0 +1,51 @@
+"""add data quality issues and watermarks
+
+Revision ID: e81a5d3f90c2
+Revises: c62f0b8e4d17
+Create Date: 2026-10-19 21:42:10.318554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81a5d3f90c2'
+down_revision: Union[str, None] = 'c62f0b8e4d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('data_quality_issues',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.Column('check', sa.String(), nullable=False),
+    sa.Column('details', sa.String(), nullable=True),
+    sa.Column('detected_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_data_quality_issues_detected_at'), 'data_quality_issues', ['detected_at'], unique=False)
+    op.create_index('ix_data_quality_issues_stock_id_date', 'data_quality_issues', ['stock_id', 'date'],
+                    unique=False)
+    op.create_table('data_quality_watermarks',
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('last_bar_id', sa.Integer(), nullable=False),
+    sa.Column('last_bar_date', sa.DateTime(), nullable=True),
+    sa.Column('checked_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('stock_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('data_quality_watermarks')
+    op.drop_index('ix_data_quality_issues_stock_id_date', table_name='data_quality_issues')
+    op.drop_index(op.f('ix_data_quality_issues_detected_at'), table_name='data_quality_issues')
+    op.drop_table('data_quality_issues')
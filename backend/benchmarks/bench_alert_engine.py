@@ -0,0 +1,73 @@
+"""
+Alert evaluation throughput: sorted-threshold index versus a naive scan.
+
+Builds N random alerts spread over S stocks and replays random-walk tick
+batches through the AlertIndex (via AlertEngine.on_ticks, without a
+database). The naive baseline checks every alert of the ticked stock per
+tick and is only run on a small sample of ticks.
+
+    python benchmarks/bench_alert_engine.py --alerts 1000000 --stocks 5000 --ticks 200000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from alert_engine import AlertEngine
+from alert_index import ABOVE, BELOW, AlertIndex
+from quote_hub import Quote
+from portfolio_pilot_backend.repositories.price_alert_repository import PriceAlertRepositoryFactory
+
+
+def run(alerts: int, stocks: int, ticks: int, batch: int) -> None:
+    rng = np.random.default_rng(11)
+    stock_ids = rng.integers(0, stocks, alerts)
+    directions = np.where(rng.random(alerts) < 0.5, ABOVE, BELOW)
+    thresholds = 100 * np.exp(rng.normal(0, 0.05, alerts))
+    rows = list(zip(range(alerts), rng.integers(0, alerts // 10, alerts).tolist(), stock_ids.tolist(),
+                    directions.tolist(), thresholds.tolist()))
+
+    began = time.perf_counter()
+    engine = AlertEngine(PriceAlertRepositoryFactory(), session_factory=None)
+    engine.index = AlertIndex.from_rows(rows)
+    print(f"index build  {time.perf_counter() - began:8.2f} s for {alerts} alerts on {stocks} stocks")
+
+    tick_stocks = rng.integers(0, stocks, ticks).tolist()
+    prices = np.full(stocks, 100.0)
+    quotes = []
+    for i, stock_id in enumerate(tick_stocks):
+        prices[stock_id] *= np.exp(rng.normal(0, 0.002))
+        quotes.append(Quote(stock_id, float(prices[stock_id]), 100, float(i)))
+    engine.on_ticks([Quote(stock_id, 100.0, 0, -1.0) for stock_id in range(stocks)])
+
+    began = time.perf_counter()
+    fired = 0
+    for start in range(0, ticks, batch):
+        fired += len(engine.on_ticks(quotes[start:start + batch]))
+    elapsed = time.perf_counter() - began
+    print(f"index        {ticks / elapsed:10.0f} ticks/s  {fired} alerts fired")
+
+    by_stock = {}
+    for alert_id, user_id, stock_id, direction, threshold in rows:
+        by_stock.setdefault(stock_id, []).append((alert_id, direction, threshold))
+    sample = quotes[:min(ticks, 5000)]
+    last = {}
+    began = time.perf_counter()
+    for quote in sample:
+        previous = last.get(quote.stock_id, 100.0)
+        last[quote.stock_id] = quote.price
+        [alert_id for alert_id, direction, threshold in by_stock.get(quote.stock_id, ())
+         if (direction == ABOVE and previous < threshold <= quote.price)
+         or (direction == BELOW and quote.price <= threshold < previous)]
+    elapsed = time.perf_counter() - began
+    print(f"naive scan   {len(sample) / elapsed:10.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=1_000_000)
+    parser.add_argument("--stocks", type=int, default=5000)
+    parser.add_argument("--ticks", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    run(args.alerts, args.stocks, args.ticks, args.batch)
@@ -0,0 +1,66 @@
+"""
+Series alignment: session-index lookup on a trading calendar versus a date join.
+
+Builds S stocks x D XETRA sessions of closes with random gaps as flat bar
+columns, then aligns them into a dense, forward-filled (stocks x dates)
+matrix three ways: AlignedPrices.on_calendar (one table lookup per bar),
+AlignedPrices.from_flat (np.unique over all bar dates) and a per-bar
+dictionary join on the dates.
+
+    python benchmarks/bench_calendar.py --stocks 500 --days 5000
+"""
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from aligned_prices import AlignedPrices
+from trading_calendar import TradingCalendar
+
+
+def run(stocks: int, days: int) -> None:
+    rng = np.random.default_rng(9)
+    began = time.perf_counter()
+    calendar = TradingCalendar.build("XETRA", 1990, 2040)
+    print(f"calendar build {time.perf_counter() - began:8.3f} s  ({len(calendar)} sessions)")
+    sessions = calendar.sessions[-days:].astype("datetime64[s]")
+    present = rng.random((stocks, days)) > 0.02
+    bar_stock_ids, positions = np.nonzero(present)
+    bar_dates = sessions[positions]
+    closes = {"close": 100 * np.exp(rng.normal(0, 0.01, len(positions)))}
+    stock_ids = np.arange(stocks)
+    print(f"{len(positions)} bars")
+
+    began = time.perf_counter()
+    on_calendar = AlignedPrices.on_calendar(stock_ids, bar_stock_ids, bar_dates, closes, calendar).filled()
+    elapsed = time.perf_counter() - began
+    print(f"on_calendar    {elapsed:8.3f} s  {len(positions) / elapsed:12.0f} bars/s")
+
+    began = time.perf_counter()
+    joined = AlignedPrices.from_flat(stock_ids, bar_stock_ids, bar_dates, closes).filled()
+    elapsed = time.perf_counter() - began
+    print(f"from_flat      {elapsed:8.3f} s  {len(positions) / elapsed:12.0f} bars/s")
+    assert np.array_equal(on_calendar.columns["close"], joined.columns["close"], equal_nan=True)
+
+    bar_list = bar_dates.astype(datetime).tolist()
+    row_list, value_list = bar_stock_ids.tolist(), closes["close"].tolist()
+    began = time.perf_counter()
+    date_index = {day: i for i, day in enumerate(sorted(set(bar_list)))}
+    matrix = [[None] * len(date_index) for _ in range(stocks)]
+    for row, day, value in zip(row_list, bar_list, value_list):
+        matrix[row][date_index[day]] = value
+    for values in matrix:
+        for i in range(1, len(values)):
+            if values[i] is None:
+                values[i] = values[i - 1]
+    elapsed = time.perf_counter() - began
+    print(f"dict join      {elapsed:8.3f} s  {len(positions) / elapsed:12.0f} bars/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=500)
+    parser.add_argument("--days", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.stocks, args.days)
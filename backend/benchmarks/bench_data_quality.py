@@ -0,0 +1,72 @@
+"""
+Data-quality scan time: the first full scan versus incremental scans after daily ingestion.
+
+Fills a SQLite file database with S stocks x D sessions of bars, runs a
+full scan, then appends one new bar per stock (the daily ingestion) and
+scans again; the incremental scan reads only the new ids plus the context
+window of every stock.
+
+    python benchmarks/bench_data_quality.py --stocks 50000 --days 250
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from data_quality_service import DataQualityService
+from trading_calendar_service import TradingCalendarService
+from portfolio_pilot_backend.models import Base, HistoricalData, Stock
+from portfolio_pilot_backend.repositories.data_quality_repository import DataQualityRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+
+
+def insert_bars(engine, stocks: int, sessions: np.ndarray, closes: np.ndarray) -> None:
+    dates = sessions.astype("datetime64[s]").tolist()
+    with engine.begin() as connection:
+        for stock in range(stocks):
+            connection.execute(insert(HistoricalData), [
+                {"stock_id": stock + 1, "date": date, "open": close, "high": close, "low": close, "close": close,
+                 "adj_close": close, "volume": 1} for date, close in zip(dates, closes[stock].tolist())])
+
+
+def run(stocks: int, days: int) -> None:
+    rng = np.random.default_rng(4)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'quality.db')}")
+        Base.metadata.create_all(engine)
+        calendar_service = TradingCalendarService(StockRepositoryFactory())
+        sessions = calendar_service.get("XETRA").sessions
+        sessions = sessions[np.searchsorted(sessions, np.datetime64("2020-01-02")):][:days + 1]
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (stocks, days + 1)), axis=1))
+        with engine.begin() as connection:
+            connection.execute(insert(Stock), [{"symbol": f"S{i}", "name": f"Stock {i}", "exchange": "XETRA"}
+                                               for i in range(stocks)])
+        began = time.perf_counter()
+        insert_bars(engine, stocks, sessions[:days], closes[:, :days])
+        print(f"load           {time.perf_counter() - began:8.2f} s  ({stocks * days} bars)")
+
+        service = DataQualityService(DataQualityRepositoryFactory(), calendar_service)
+        with sessionmaker(bind=engine)() as session:
+            began = time.perf_counter()
+            report, _ = service.scan(session)
+            print(f"full scan      {time.perf_counter() - began:8.2f} s  {report}")
+            insert_bars(engine, stocks, sessions[days:], closes[:, days:])
+            began = time.perf_counter()
+            report, _ = service.scan(session)
+            print(f"incremental    {time.perf_counter() - began:8.2f} s  {report}")
+            began = time.perf_counter()
+            report, _ = service.scan(session)
+            print(f"nothing new    {time.perf_counter() - began:8.2f} s  {report}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=250)
+    args = parser.parse_args()
+    run(args.stocks, args.days)
@@ -0,0 +1,74 @@
+"""
+Peak memory of a full history export: streamed CSV versus an in-memory JSON body.
+
+Fills a temporary SQLite file with N daily bars spread over a few stocks,
+then exports all of them once through ExportService.stream_history and
+once the way a jsonify endpoint would (all rows loaded, one JSON string),
+reporting bytes produced, wall time and the tracemalloc peak of each.
+
+    python benchmarks/bench_export.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from export_service import CSV, ExportService
+from price_series import SERIES_FIELDS
+from portfolio_pilot_backend.models import Base, HistoricalData, Stock
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.holding_repository import HoldingRepositoryFactory
+
+
+def run(rows: int, stocks: int, batch_size: int) -> None:
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    days = np.busday_offset("1990-01-02", np.arange(rows // stocks), roll="forward").astype(datetime).tolist()
+    with session_factory() as session:
+        session.execute(insert(Stock), [{"symbol": f"SYM{i}", "name": f"Company {i}"} for i in range(stocks)])
+        symbols = dict(session.execute(select(Stock.id, Stock.symbol)).all())
+        for stock_id in symbols:
+            session.execute(insert(HistoricalData), [
+                {"stock_id": stock_id, "date": day, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0,
+                 "adj_close": 1.0, "volume": 1} for day in days])
+        session.commit()
+    service = ExportService(session_factory, HistoricalDataRepositoryFactory(), HoldingRepositoryFactory(), batch_size)
+
+    def streamed() -> int:
+        return sum(len(chunk) for chunk in service.stream_history(CSV, symbols, SERIES_FIELDS))
+
+    def in_memory() -> int:
+        with session_factory() as session:
+            result = session.execute(select(HistoricalData.stock_id, *HistoricalData.__table__.c[2:9])).all()
+            return len(json.dumps([[value.isoformat() if isinstance(value, datetime) else value for value in row]
+                                   for row in result]))
+
+    for label, export in (("streamed csv", streamed), ("in-memory json", in_memory)):
+        tracemalloc.start()
+        began = time.perf_counter()
+        size = export()
+        elapsed = time.perf_counter() - began
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<15} {size / 1e6:8.1f} MB out  {elapsed:6.2f} s  peak {peak / 1e6:8.1f} MB")
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--stocks", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.rows, args.stocks, args.batch_size)
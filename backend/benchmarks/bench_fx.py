@@ -0,0 +1,67 @@
+"""
+Currency conversion of an aligned price matrix: one grid multiply versus per-bar lookups.
+
+Builds S stocks x D trading days of closes quoted in a handful of
+currencies plus daily EUR reference rates, then converts everything into
+EUR with FxMatrix.grid (one searchsorted per date, one row per currency)
+and with a per-bar dictionary lookup of the last known rate.
+
+    python benchmarks/bench_fx.py --stocks 500 --days 5000
+"""
+import argparse
+import bisect
+import time
+
+import numpy as np
+
+from fx_matrix import FxMatrix
+
+CURRENCIES = ("USD", "GBP", "CHF", "JPY", "GBX", "EUR")
+
+
+def run(stocks: int, days: int) -> None:
+    rng = np.random.default_rng(5)
+    dates = np.busday_offset("2005-01-03", np.arange(days), roll="forward").astype("datetime64[s]")
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (stocks, days)), axis=1))
+    sources = [CURRENCIES[i % len(CURRENCIES)] for i in range(stocks)]
+    rows = [(code, date, float(rate)) for code in ("USD", "GBP", "CHF", "JPY")
+            for date, rate in zip(dates.tolist(), np.exp(rng.normal(0, 0.1, days)).tolist())]
+
+    began = time.perf_counter()
+    matrix = FxMatrix.from_rows(rows)
+    print(f"matrix build  {time.perf_counter() - began:8.3f} s  ({len(rows)} rates)")
+
+    began = time.perf_counter()
+    converted = closes * matrix.grid(sources, "EUR", dates)
+    vectorized = time.perf_counter() - began
+    print(f"grid multiply {vectorized:8.3f} s  {closes.size / vectorized:12.0f} bars/s")
+
+    series = {}
+    for code, date, rate in rows:
+        series.setdefault(code, ([], []))
+        series[code][0].append(date)
+        series[code][1].append(rate)
+    minor = {"GBX": ("GBP", 0.01)}
+    sample = min(stocks, 50)
+    day_list = dates.tolist()
+    began = time.perf_counter()
+    for i in range(sample):
+        major, scale = minor.get(sources[i], (sources[i], 1.0))
+        for j, date in enumerate(day_list):
+            rate = 1.0
+            if major != "EUR":
+                days_of, rates_of = series[major]
+                rate = rates_of[bisect.bisect_right(days_of, date) - 1]
+            value = closes[i, j] * scale / rate
+    per_bar = (time.perf_counter() - began) / (sample * days)
+    print(f"per bar       {per_bar * closes.size:8.3f} s  {1 / per_bar:12.0f} bars/s "
+          f"(extrapolated from {sample} stocks)")
+    assert np.isclose(value, converted[sample - 1, -1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=500)
+    parser.add_argument("--days", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.stocks, args.days)
@@ -0,0 +1,72 @@
+"""
+Dashboard load: one history request per symbol versus one batch request.
+
+Creates an app on a temporary SQLite file with synthetic daily bars and
+fetches one year of closes for N symbols, once with N calls to
+GET /stocks/<id>/history and once with a single POST /stocks/history/batch,
+counting HTTP requests, SQL statements and wall time.
+
+    python benchmarks/bench_history_batch.py --symbols 100 --years 5
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import event, insert, text
+
+from app import AppFactory
+from portfolio_pilot_backend.models import HistoricalData, Stock
+
+
+def run(symbols: int, years: int, rounds: int) -> None:
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    factory = AppFactory({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "REFERENCE_CACHE_PRELOAD": False})
+    rng = np.random.default_rng(3)
+    days = np.busday_offset("2019-01-02", np.arange(years * 252), roll="forward").astype(datetime)
+    with factory.session_factory() as session:
+        session.execute(insert(Stock), [{"symbol": f"SYM{i}", "name": f"Company {i}"} for i in range(symbols)])
+        stock_ids = list(session.execute(text("SELECT id FROM stocks ORDER BY id")).scalars())
+        for stock_id in stock_ids:
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))
+            session.execute(insert(HistoricalData), [
+                {"stock_id": stock_id, "date": day, "open": c, "high": c, "low": c, "close": c, "adj_close": c,
+                 "volume": 1000} for day, c in zip(days, close.tolist())])
+        session.commit()
+    factory.reference_cache.preload(factory.session_factory())
+
+    client = factory.create_app().test_client()
+    statements = []
+    event.listen(factory.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    start, end = f"{2019 + years - 1}-01-01", f"{2019 + years - 1}-12-31"
+
+    def per_symbol():
+        for stock_id in stock_ids:
+            client.get(f"/stocks/{stock_id}/history?start={start}&end={end}&fields=close")
+
+    def batch():
+        client.post("/stocks/history/batch", json={"symbols": [f"SYM{i}" for i in range(symbols)],
+                                                   "start": start, "end": end, "fields": ["close"]})
+
+    for label, fetch, requests in (("per symbol", per_symbol, symbols), ("batch", batch, 1)):
+        statements.clear()
+        began = time.perf_counter()
+        for _ in range(rounds):
+            fetch()
+        elapsed = (time.perf_counter() - began) / rounds
+        print(f"{label:<11} {requests:4d} requests  {len(statements) // rounds:4d} statements  "
+              f"{elapsed * 1000:8.1f} ms")
+    factory.engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    run(args.symbols, args.years, args.rounds)
@@ -0,0 +1,75 @@
+"""
+Incremental mover ranking under a tick stream, against sorting on every query.
+
+Ranks N stocks spread over exchanges and industries, applies random tick
+batches and times top-k queries per group on the maintained sorted arrays
+and, for comparison, by sorting the group's current changes per query.
+
+    python benchmarks/bench_movers.py --stocks 20000 --ticks 200000 --k 10
+"""
+import argparse
+import time
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from movers import GAINERS, MOST_TRADED, MoverRanking, group_key
+from quote_hub import Quote
+
+EXCHANGES = ["XETRA", "NYSE", "NASDAQ", "LSE", "TSE"]
+INDUSTRIES = [f"Industry {i}" for i in range(40)]
+
+
+def run(stocks: int, ticks: int, batch: int, k: int, queries: int) -> None:
+    rng = np.random.default_rng(2)
+    exchanges = rng.integers(0, len(EXCHANGES), stocks)
+    industries = rng.integers(0, len(INDUSTRIES), stocks)
+    closes = rng.uniform(5, 500, stocks)
+    ranking = MoverRanking()
+    began = time.perf_counter()
+    for stock_id in range(stocks):
+        ranking.set_groups(stock_id, EXCHANGES[exchanges[stock_id]], INDUSTRIES[industries[stock_id]])
+        ranking.set_bars(stock_id, date(2024, 6, 3), float(closes[stock_id] * rng.uniform(0.95, 1.05)),
+                         float(closes[stock_id]), int(rng.integers(1_000, 1_000_000)))
+    print(f"{stocks} stocks ranked in {time.perf_counter() - began:.2f} s")
+
+    start = datetime(2024, 6, 4, 9, tzinfo=timezone.utc).timestamp()
+    stock_ids = rng.integers(0, stocks, ticks).tolist()
+    prices = (closes[stock_ids] * rng.uniform(0.9, 1.1, ticks)).tolist()
+    began = time.perf_counter()
+    for offset in range(0, ticks, batch):
+        ranking.apply_ticks([Quote(stock_id, price, 100, start + (offset + i) * 0.001) for i, (stock_id, price)
+                             in enumerate(zip(stock_ids[offset:offset + batch], prices[offset:offset + batch]))])
+    elapsed = time.perf_counter() - began
+    print(f"ticks         {elapsed / ticks * 1e6:7.2f} us per tick ({ticks} ticks in batches of {batch})")
+
+    groups = [(None, None), ("XETRA", None), (None, "Industry 7"), ("NYSE", "Industry 3")]
+    movers = [ranking.get(stock_id) for stock_id in range(stocks)]
+    for exchange, industry in groups:
+        label = f"{exchange or '*'}/{industry or '*'}"
+        began = time.perf_counter()
+        for _ in range(queries):
+            ranking.top(GAINERS, k, exchange, industry)
+            ranking.top(MOST_TRADED, k, exchange, industry)
+        maintained = (time.perf_counter() - began) / queries * 1e6
+        key = group_key(exchange, industry)
+        members = [mover for stock_id, mover in enumerate(movers)
+                   if key[0] in (None, EXCHANGES[exchanges[stock_id]].casefold())
+                   and key[1] in (None, INDUSTRIES[industries[stock_id]].casefold())]
+        began = time.perf_counter()
+        for _ in range(max(1, queries // 100)):
+            sorted(members, key=lambda mover: mover.change, reverse=True)[:k]
+            sorted(members, key=lambda mover: mover.volume, reverse=True)[:k]
+        sorting = (time.perf_counter() - began) / max(1, queries // 100) * 1e6
+        print(f"top-{k} {label:<22} {len(members):6d} stocks  ranked {maintained:7.1f} us  sorted {sorting:9.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=20_000)
+    parser.add_argument("--ticks", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.stocks, args.ticks, args.batch, args.k, args.queries)
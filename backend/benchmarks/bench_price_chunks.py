@@ -0,0 +1,95 @@
+"""
+Storage size and range-read latency: historical_data rows versus price chunks.
+
+Writes synthetic daily bars for a number of stocks into a SQLite file,
+converts them with PriceHistoryService.convert_all and compares the bytes
+per bar (row table plus index via dbstat versus chunk payload) and the
+latency of random one-year range reads from both layouts.
+
+    python benchmarks/bench_price_chunks.py --stocks 50 --years 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from price_history_service import PriceHistoryService
+from portfolio_pilot_backend.models import Base, HistoricalData, Stock
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+
+
+def synthetic_bars(stock_id: int, years: int, rng: np.random.Generator) -> list[dict]:
+    days = np.busday_offset("2000-01-03", np.arange(years * 252), roll="forward")
+    close = np.round(50 * np.exp(np.cumsum(rng.normal(0, 0.015, len(days)))), 2)
+    return [{"stock_id": stock_id, "date": day.astype(datetime), "open": round(c * 0.995, 2),
+             "high": round(c * 1.01, 2), "low": round(c * 0.99, 2), "close": float(c), "adj_close": float(c),
+             "volume": int(v)}
+            for day, c, v in zip(days, close, rng.integers(10_000, 5_000_000, len(days)))]
+
+
+def table_bytes(session, *names: str) -> int:
+    rows = session.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")).all()
+    return sum(size for name, size in rows if name in names)
+
+
+def time_reads(session, service: PriceHistoryService, stock_ids: list[int], years: int, reads: int) -> list[float]:
+    random.seed(7)
+    timings = []
+    for _ in range(reads):
+        start = datetime(2000 + random.randrange(years - 1), random.randint(1, 12), 1)
+        began = time.perf_counter()
+        service.get_series(session, random.choice(stock_ids), start, start + timedelta(days=365))
+        timings.append((time.perf_counter() - began) * 1000)
+    return sorted(timings)
+
+
+def run(stocks: int, years: int, reads: int) -> None:
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    rng = np.random.default_rng(42)
+    try:
+        with session_factory() as session:
+            session.execute(insert(Stock), [{"symbol": f"SYM{i}", "name": f"Company {i}"} for i in range(stocks)])
+            stock_ids = list(session.execute(text("SELECT id FROM stocks")).scalars())
+            for stock_id in stock_ids:
+                session.execute(insert(HistoricalData), synthetic_bars(stock_id, years, rng))
+            session.commit()
+
+            row_service = PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory())
+            chunk_service = PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory(),
+                                                read_from_chunks=True)
+            report = row_service.convert_all(session)
+            bars = report["bars"]
+            row_bytes = table_bytes(session, "historical_data", "ix_historical_data_stock_id_date")
+            chunk_bytes = table_bytes(session, "price_chunks", "sqlite_autoindex_price_chunks_1")
+            print(f"bars                {bars}")
+            print(f"rows + index        {row_bytes / bars:8.1f} bytes/bar")
+            print(f"chunk tables        {chunk_bytes / bars:8.1f} bytes/bar")
+            print(f"chunk payload       {report['bytes_per_bar']:8.1f} bytes/bar")
+
+            for label, service in (("rows", row_service), ("chunks", chunk_service)):
+                timings = time_reads(session, service, stock_ids, years, reads)
+                print(f"{label:<8} 1y read  p50 {timings[len(timings) // 2]:6.2f} ms  "
+                      f"p99 {timings[int(len(timings) * 0.99)]:6.2f} ms")
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=50)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+    run(args.stocks, args.years, args.reads)
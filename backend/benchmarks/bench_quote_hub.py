@@ -0,0 +1,64 @@
+"""
+Fan-out of live quotes to many slow and fast stream clients.
+
+Subscribes N in-process clients (each to a random watchlist) to a QuoteHub,
+runs a consumer task per client that drains its queue with a configurable
+delay, and publishes synthetic tick batches. Reports publish time per batch,
+delivered versus conflated quotes and the peak number of pending quotes,
+which stays bounded by the watchlist sizes no matter how slow clients are.
+
+    python benchmarks/bench_quote_hub.py --clients 10000 --symbols 500 --batches 200
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from quote_feed import SyntheticQuoteFeed
+from quote_hub import QuoteHub
+
+
+async def run(clients: int, symbols: int, watchlist: int, batches: int, ticks: int, slow_share: float) -> None:
+    hub = QuoteHub(max_clients=clients)
+    rng = np.random.default_rng(7)
+    queues = [hub.subscribe(rng.choice(symbols, watchlist, replace=False).tolist()) for _ in range(clients)]
+    slow = set(range(int(clients * slow_share)))
+
+    async def consume(index, queue):
+        while not queue.closed:
+            await queue.get_batch()
+            await asyncio.sleep(0.05 if index in slow else 0)
+
+    consumers = [asyncio.create_task(consume(i, queue)) for i, queue in enumerate(queues)]
+    feed = SyntheticQuoteFeed(list(range(symbols)), interval=0, ticks_per_batch=ticks, seed=1, batches=batches)
+    publish_time = 0.0
+    peak_pending = 0
+    async for quotes in feed.ticks():
+        began = time.perf_counter()
+        hub.publish(quotes)
+        publish_time += time.perf_counter() - began
+        peak_pending = max(peak_pending, sum(len(queue._pending) for queue in queues[:100]))
+        await asyncio.sleep(0)
+
+    hub.close_all()
+    await asyncio.gather(*consumers)
+    delivered = sum(queue.delivered for queue in queues)
+    conflated = sum(queue.conflated for queue in queues)
+    print(f"clients {clients}  symbols {symbols}  watchlist {watchlist}  batches {batches} x {ticks} ticks")
+    print(f"publish      {publish_time / batches * 1000:8.3f} ms per batch")
+    print(f"delivered    {delivered:10d}")
+    print(f"conflated    {conflated:10d}")
+    print(f"peak pending {peak_pending:10d} (first 100 clients, bound {100 * watchlist})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--watchlist", type=int, default=20)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--slow-share", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.symbols, args.watchlist, args.batches, args.ticks, args.slow_share))
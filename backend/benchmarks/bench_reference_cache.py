@@ -0,0 +1,63 @@
+"""
+Memory per record: ORM instances versus ReferenceDataCache records.
+
+Loads the same synthetic stocks and users once as ORM entities and once
+through ReferenceDataCache.preload and reports the traced allocation per
+record, together with the cache's own memory_report().
+
+    python benchmarks/bench_reference_cache.py --stocks 50000 --users 50000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from reference_data_cache import ReferenceDataCache
+from portfolio_pilot_backend.models import Base, Stock, User
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+from portfolio_pilot_backend.repositories.user_repository import UserRepositoryFactory
+
+
+def traced(load) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def run(stocks: int, users: int) -> None:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as session:
+        session.execute(insert(Stock), [{"symbol": f"SYM{i}", "name": f"Company {i} AG", "isin": f"DE{i:010d}",
+                                         "wkn": f"{i:06d}", "exchange": "XETRA", "industry": "Industrials"}
+                                        for i in range(stocks)])
+        session.execute(insert(User), [{"username": f"user{i}", "email": f"user{i}@example.com",
+                                        "password_hash": "x" * 64} for i in range(users)])
+        session.commit()
+
+    with session_factory() as session:
+        entities, orm_bytes = traced(lambda: session.query(Stock).all() + session.query(User).all())
+        print(f"ORM entities        {orm_bytes / len(entities):8.1f} bytes/record")
+        del entities
+
+    cache = ReferenceDataCache(StockRepositoryFactory(), UserRepositoryFactory())
+    with session_factory() as session:
+        _, cache_bytes = traced(lambda: cache.preload(session))
+    print(f"cache records       {cache_bytes / (stocks + users):8.1f} bytes/record (incl. dict slots)")
+    print(json.dumps(cache.memory_report(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    args = parser.parse_args()
+    run(args.stocks, args.users)
@@ -0,0 +1,91 @@
+"""
+Database round trips and latency per request through the RequestHandler.
+
+Runs typical routes against a file-backed SQLite app and counts, per
+request, the pool checkouts, statements, and the COMMITs and ROLLBACKs
+(including the pool's reset on return) that a driver with implicit
+transactions, such as psycopg2 on PostgreSQL, sends to the server. On a
+networked database each of them is a round trip.
+
+    python benchmarks/bench_request_roundtrips.py --iterations 200
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+
+from sqlalchemy import event
+
+from app import AppFactory
+
+
+def run(iterations: int) -> None:
+    handle, path = tempfile.mkstemp(suffix=".db")
+    app_factory = AppFactory({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{path}",
+                              'AUTH_SECRET_KEY': "bench-secret-bench-secret-bench-secret!"})
+    client = app_factory.create_app().test_client()
+    user_id = client.post("/users", json={"username": "anna", "email": "anna@example.com",
+                                          "password_hash": "passwort"}).get_json()["id"]
+    stock_id = client.post("/stocks", json={"symbol": "SAP", "name": "SAP SE", "exchange": "XETRA"}).get_json()["id"]
+
+    counts = Counter()
+    engine = app_factory.engine
+    # Gezählt wird wie bei einem Treiber mit impliziten Transaktionen (psycopg2): das erste Statement öffnet
+    # eine Transaktion, COMMIT/ROLLBACK kosten nur dann einen Round Trip; im Autocommit-Modus gar nicht.
+    open_transactions = set()
+
+    def statement(connection, *args):
+        counts.update(["statements"])
+        if connection.get_execution_options().get("isolation_level") != "AUTOCOMMIT":
+            open_transactions.add(id(connection.connection.dbapi_connection))
+
+    def ending(name):
+        def count(dbapi_connection):
+            if id(dbapi_connection) in open_transactions:
+                open_transactions.discard(id(dbapi_connection))
+                counts.update([name])
+        return count
+
+    listeners = [(engine, "before_cursor_execute", statement),
+                 (engine, "commit", lambda connection: ending("commits")(connection.connection.dbapi_connection)),
+                 (engine, "rollback", lambda connection: ending("rollbacks")(connection.connection.dbapi_connection)),
+                 (engine.pool, "checkout", lambda *args: counts.update(["checkouts"])),
+                 (engine.pool, "reset", lambda dbapi_connection, *args: ending("resets")(dbapi_connection))]
+    for target, name, listener in listeners:
+        event.listen(target, name, listener)
+
+    scenarios = [
+        ("POST /users (400, missing fields)", lambda i: client.post("/users", json={"username": "x"})),
+        ("POST /users (400, name taken)", lambda i: client.post("/users", json={
+            "username": "anna", "email": "other@example.com", "password_hash": "x"})),
+        ("GET /users/<id>", lambda i: client.get(f"/users/{user_id}")),
+        ("PUT /users/<id>", lambda i: client.put(f"/users/{user_id}", json={"email": f"anna{i}@example.com"})),
+        ("GET /stocks/<id>", lambda i: client.get(f"/stocks/{stock_id}")),
+        ("GET /stocks/movers", lambda i: client.get("/stocks/movers")),
+    ]
+    print(f"{'route':<36} {'us':>8} {'checkout':>9} {'stmts':>6} {'commit':>7} {'rollback':>9} {'reset':>6}")
+    try:
+        for label, call in scenarios:
+            counts.clear()
+            began = time.perf_counter()
+            for i in range(iterations):
+                call(i)
+            elapsed = (time.perf_counter() - began) / iterations * 1e6
+            print(f"{label:<36} {elapsed:8.0f} {counts['checkouts'] / iterations:9.2f} "
+                  f"{counts['statements'] / iterations:6.2f} {counts['commits'] / iterations:7.2f} "
+                  f"{counts['rollbacks'] / iterations:9.2f} {counts['resets'] / iterations:6.2f}")
+    finally:
+        for target, name, listener in listeners:
+            event.remove(target, name, listener)
+        app_factory.shutdown()
+        engine.dispose()
+        os.close(handle)
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    run(args.iterations)
@@ -0,0 +1,70 @@
+"""
+User list serialization: ORM entities with hand-built dicts and jsonify versus
+column-only Row tuples with the compiled schema encoder and orjson.
+
+Loads N users into an in-memory SQLite database and times the whole path of
+GET /users minus HTTP: query, dict building and JSON encoding. The stdlib
+line is the serializer without orjson.
+
+    python benchmarks/bench_serializers.py --users 100000
+"""
+import argparse
+import time
+
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import serializers
+from serializers import USER_SCHEMA, dumps
+from portfolio_pilot_backend.models import Base, User
+from portfolio_pilot_backend.repositories.user_repository import UserRepository
+
+
+def timed(label: str, function, repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        size = len(function())
+        best = min(best, time.perf_counter() - began)
+    print(f"{label:<24}{best * 1000:10.1f} ms  ({size} bytes)")
+
+
+def run(users: int, repeat: int) -> None:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{"username": f"user{i}", "email": f"user{i}@example.com",
+                                           "password_hash": "x", "version": 1} for i in range(users)])
+    app = Flask(__name__)
+    session_factory = sessionmaker(bind=engine)
+
+    def entities_jsonify() -> bytes:
+        with session_factory() as session, app.app_context():
+            entities = UserRepository(session).list_all()
+            return jsonify([{"id": user.id, "username": user.username, "email": user.email}
+                            for user in entities]).get_data()
+
+    def rows_schema() -> bytes:
+        with session_factory() as session:
+            return dumps(USER_SCHEMA.dump_many(UserRepository(session).list_profile_rows()))
+
+    def rows_schema_stdlib() -> bytes:
+        orjson, serializers.orjson = serializers.orjson, None
+        try:
+            return rows_schema()
+        finally:
+            serializers.orjson = orjson
+
+    timed("entities + jsonify", entities_jsonify, repeat)
+    timed("rows + schema", rows_schema, repeat)
+    timed("rows + schema (stdlib)", rows_schema_stdlib, repeat)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.users, args.repeat)
@@ -0,0 +1,77 @@
+"""
+Type-ahead latency of the in-memory stock search index.
+
+Builds an index over synthetic instruments and reports build time plus
+p50/p99 latency for prefix, ISIN, and typo queries, and for incremental
+upserts.
+
+    python benchmarks/bench_stock_search.py --stocks 100000
+"""
+import argparse
+import random
+import string
+import time
+
+from stock_search_index import InMemoryStockSearchIndex
+from portfolio_pilot_backend.models import Stock
+
+WORDS = ["Global", "Energy", "Motors", "Systems", "Holdings", "Bank", "Pharma", "Capital", "Digital",
+         "Industries", "Technologies", "Resources", "Networks", "Foods", "Retail", "Mining", "Solar"]
+
+
+def make_stocks(count: int, rng: random.Random) -> list[Stock]:
+    stocks = []
+    for stock_id in range(1, count + 1):
+        symbol = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 5))) + str(stock_id)
+        name = " ".join(rng.sample(WORDS, 3)) + f" {stock_id} AG"
+        stock = Stock(symbol=symbol, name=name, isin=f"DE{stock_id:010d}", wkn=f"{stock_id:06d}")
+        stock.id = stock_id
+        stocks.append(stock)
+    return stocks
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(count: int, queries: int, seed: int) -> None:
+    rng = random.Random(seed)
+    stocks = make_stocks(count, rng)
+    index = InMemoryStockSearchIndex()
+
+    started = time.perf_counter()
+    index.rebuild(stocks)
+    print(f"build       {count:>7} stocks   {time.perf_counter() - started:8.2f} s")
+
+    samples = {
+        "symbol":  lambda s: s.symbol[:rng.randint(1, 3)],
+        "name":    lambda s: s.name.split()[rng.randint(0, 2)][:rng.randint(3, 6)],
+        "isin":    lambda s: s.isin[:rng.randint(4, 10)],
+        "typo":    lambda s: s.name.split()[0][:-2] + "xq",
+    }
+    for label, make_query in samples.items():
+        latencies = []
+        for _ in range(queries):
+            query = make_query(rng.choice(stocks))
+            started = time.perf_counter()
+            index.search(query, 10)
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(f"search {label:<7} p50 {percentile(latencies, 0.5):6.3f} ms   p99 {percentile(latencies, 0.99):6.3f} ms")
+
+    latencies = []
+    for stock in rng.sample(stocks, min(queries, count)):
+        stock.name = stock.name + " SE"
+        started = time.perf_counter()
+        index.upsert(stock)
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(f"upsert         p50 {percentile(latencies, 0.5):6.3f} ms   p99 {percentile(latencies, 0.99):6.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.stocks, args.queries, args.seed)
@@ -0,0 +1,85 @@
+"""
+Caller identification cost: in-memory token verification versus a user lookup.
+
+Compares TokenService.verify on an access token with the per-request
+`UserRepository.get_by_id` round trip it replaces, then fires a burst of
+concurrent logins' worth of KDF verifications at the bounded hasher pool
+and reports how many were served and how many were shed with
+HasherBusyError.
+
+    python benchmarks/bench_token_auth.py --iterations 20000 --burst 64
+"""
+import argparse
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from password_hasher import HasherBusyError, PasswordHasher
+from revocation_list import RevocationList
+from token_service import TokenService
+from portfolio_pilot_backend.models import Base, User
+from portfolio_pilot_backend.repositories.revoked_token_repository import RevokedTokenRepositoryFactory
+from portfolio_pilot_backend.repositories.user_repository import UserRepositoryFactory
+
+
+def per_call_us(fn, iterations: int) -> float:
+    began = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - began) / iterations * 1e6
+
+
+def run(iterations: int, burst: int, workers: int, pending: int) -> None:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as session:
+        session.add(User("anna", "anna@example.com", "x"))
+        session.commit()
+
+    token_service = TokenService(b"s" * 32, RevocationList(RevokedTokenRepositoryFactory(), session_factory))
+    token, claims = token_service.issue(1, "access")
+    print(f"token verify        {per_call_us(lambda: token_service.verify(token), iterations):8.1f} us/request")
+    with session_factory() as session:
+        repository = UserRepositoryFactory().create(session)
+
+        def lookup():
+            repository.get_by_id(claims.user_id)
+            session.expire_all()
+        print(f"user lookup (ORM)   {per_call_us(lookup, iterations):8.1f} us/request")
+
+    hasher = PasswordHasher(max_workers=workers, max_pending=pending)
+    stored = hasher.hash("passwort")
+    served, shed = [], []
+
+    def login():
+        try:
+            began = time.perf_counter()
+            hasher.verify(stored, "passwort")
+            served.append(time.perf_counter() - began)
+        except HasherBusyError:
+            shed.append(1)
+
+    began = time.perf_counter()
+    threads = [threading.Thread(target=login) for _ in range(burst)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    served.sort()
+    print(f"login burst         {len(served)} served, {len(shed)} shed in {elapsed:.2f} s, "
+          f"p99 wait {served[int(len(served) * 0.99) - 1] * 1000:.0f} ms" if served else "no login served")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--burst", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--pending", type=int, default=16)
+    args = parser.parse_args()
+    run(args.iterations, args.burst, args.workers, args.pending)
@@ -0,0 +1,111 @@
+"""
+Small-write throughput: one commit per write versus write-behind group commits.
+
+T threads each issue W writes against a SQLite file database, cycling
+through a watchlist edit (sync durability), a last-seen timestamp and an
+audit event (both async). The baseline applies every write in its own
+session and commit; the queue groups whatever is pending into one commit.
+
+    python benchmarks/bench_write_behind.py --threads 8 --writes 500 --users 1000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from activity_service import ActivityService
+from watchlist_service import WatchlistEdit, WatchlistService
+from write_behind import WriteBehindQueue
+from portfolio_pilot_backend.models import Base, Stock, User
+from portfolio_pilot_backend.repositories.audit_event_repository import AuditEventRepositoryFactory
+from portfolio_pilot_backend.repositories.user_repository import UserRepositoryFactory
+from portfolio_pilot_backend.repositories.watchlist_repository import WatchlistRepositoryFactory
+
+
+def make_database(path: str, users: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{"username": f"user{i}", "email": f"user{i}@example.com",
+                                           "password_hash": "x", "version": 1} for i in range(users)])
+        connection.execute(insert(Stock), [{"symbol": f"S{i}", "name": f"Stock {i}"} for i in range(50)])
+    return engine, sessionmaker(bind=engine)
+
+
+def workload(thread: int, writes: int, users: int):
+    for i in range(writes):
+        user_id = (thread * writes + i) % users + 1
+        yield i % 3, user_id, i % 50 + 1
+
+
+def run_threads(threads: int, target) -> float:
+    workers = [threading.Thread(target=target, args=(thread,)) for thread in range(threads)]
+    began = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - began
+
+
+def run(threads: int, writes: int, users: int, flush_ms: float) -> None:
+    total = threads * writes
+    with tempfile.TemporaryDirectory() as directory:
+        engine, session_factory = make_database(os.path.join(directory, "direct.db"), users)
+        watchlists = WatchlistService(WatchlistRepositoryFactory())
+        # Die Queue wird nur für die Registrierung gebraucht, geschrieben wird direkt über apply_*.
+        activity = ActivityService(UserRepositoryFactory(), AuditEventRepositoryFactory(),
+                                   WriteBehindQueue(session_factory))
+
+        def direct(thread: int) -> None:
+            for kind, user_id, stock_id in workload(thread, writes, users):
+                with session_factory() as session:
+                    if kind == 0:
+                        watchlists.apply_edits(session, [WatchlistEdit(user_id, stock_id, True)])
+                    elif kind == 1:
+                        activity.apply_last_seen(session, [{"user_id": user_id, "seen_at": activity._now()}])
+                    else:
+                        activity.apply_audit_events(session, [{"user_id": user_id, "action": "bench",
+                                                               "details": None, "created_at": activity._now()}])
+                    session.commit()
+
+        elapsed = run_threads(threads, direct)
+        print(f"commit per write  {total / elapsed:10.0f} writes/s  {total} commits")
+        engine.dispose()
+
+        engine, session_factory = make_database(os.path.join(directory, "queued.db"), users)
+        queue = WriteBehindQueue(session_factory, flush_ms / 1000)
+        watchlists = WatchlistService(WatchlistRepositoryFactory(), queue)
+        # Ohne Drosselung, damit jeder Zeitstempel tatsächlich in die Queue geht.
+        activity = ActivityService(UserRepositoryFactory(), AuditEventRepositoryFactory(), queue,
+                                   last_seen_resolution=0)
+
+        def queued(thread: int) -> None:
+            with session_factory() as session:
+                for kind, user_id, stock_id in workload(thread, writes, users):
+                    if kind == 0:
+                        watchlists.add_stock(session, user_id, stock_id)
+                    elif kind == 1:
+                        activity.touch_last_seen(user_id)
+                    else:
+                        activity.record_event(user_id, "bench")
+
+        elapsed = run_threads(threads, queued)
+        queue.close()
+        print(f"write-behind      {total / elapsed:10.0f} writes/s  {queue.commits} commits, "
+              f"{queue.committed} rows after coalescing, {queue.failed} failed")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--flush-ms", type=float, default=50)
+    args = parser.parse_args()
+    run(args.threads, args.writes, args.users, args.flush_ms)
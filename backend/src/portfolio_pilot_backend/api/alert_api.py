@@ -0,0 +1,71 @@
+from flask import Flask, g, request, jsonify
+from sqlalchemy.orm import Session
+
+from alert_service import AlertService
+from handle_request import IRequestHandler
+from interface_api import IApi
+from stock_service import StockService
+
+
+class AlertAPI(IApi):
+    def __init__(self, alert_service: AlertService, stock_service: StockService, request_handler: IRequestHandler):
+        """
+        Initializes the AlertAPI class.
+
+        Args:
+            alert_service: The price alert service.
+            stock_service: The stock service, used to resolve stocks.
+            request_handler: The request handler for database session management.
+        """
+        self.alert_service = alert_service
+        self.stock_service = stock_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/alerts", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_alerts, authenticated=True))
+        app.add_url_rule("/alerts", methods=["POST"],
+                         view_func=self.request_handler.handle(self.create_alert, authenticated=True))
+        app.add_url_rule("/alerts/<int:alert_id>", methods=["DELETE"],
+                         view_func=self.request_handler.handle(self.delete_alert, authenticated=True))
+
+    @staticmethod
+    def _alert_data(alert) -> dict:
+        return {"id": alert.id, "stock_id": alert.stock_id, "direction": alert.direction,
+                "threshold": alert.threshold, "created_at": alert.created_at.isoformat(),
+                "triggered_at": alert.triggered_at.isoformat() if alert.triggered_at else None,
+                "triggered_price": alert.triggered_price}
+
+    def get_alerts(self, db: Session):
+        """
+        Lists the caller's active and triggered price alerts.
+        """
+        alerts = self.alert_service.list_alerts(db, g.token_claims.user_id)
+        return jsonify([self._alert_data(alert) for alert in alerts]), 200
+
+    def create_alert(self, db: Session):
+        """
+        Creates a price alert (`{"stock_id": 1, "direction": "above", "threshold": 150.0}`).
+        """
+        data = request.get_json(silent=True) or {}
+        try:
+            stock_id = int(data.get("stock_id"))
+            threshold = float(data.get("threshold"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "stock_id and a numeric threshold are required."}), 400
+        if self.stock_service.get_stock_reference(db, stock_id) is None:
+            return jsonify({"error": "Stock not found."}), 404
+
+        alert, error_msg = self.alert_service.create_alert(db, g.token_claims.user_id, stock_id,
+                                                           data.get("direction"), threshold)
+        if alert:
+            return jsonify(self._alert_data(alert)), 201
+        return jsonify({"error": error_msg}), 400
+
+    def delete_alert(self, db: Session, alert_id: int):
+        """
+        Deletes one of the caller's price alerts.
+        """
+        if self.alert_service.delete_alert(db, g.token_claims.user_id, alert_id):
+            return jsonify({"message": "Alert deleted."}), 200
+        return jsonify({"error": "Alert not found."}), 404
@@ -0,0 +1,45 @@
+import numpy as np
+from flask import Flask, request, jsonify
+from sqlalchemy.orm import Session
+
+from handle_request import IRequestHandler
+from interface_api import IApi
+from price_api import PriceAPI
+from trading_calendar_service import TradingCalendarService
+
+
+class CalendarAPI(IApi):
+    def __init__(self, calendar_service: TradingCalendarService, request_handler: IRequestHandler):
+        """
+        Initializes the CalendarAPI class.
+
+        Args:
+            calendar_service: The trading calendar service.
+            request_handler: The request handler for database session management.
+        """
+        self.calendar_service = calendar_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/calendars", methods=["GET"], view_func=self.request_handler.handle(self.list_calendars))
+        app.add_url_rule("/calendars/<name>/sessions", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_sessions))
+
+    def list_calendars(self, db: Session):
+        return jsonify({"calendars": self.calendar_service.list_calendars()}), 200
+
+    def get_sessions(self, db: Session, name: str):
+        """
+        Returns the session days of an exchange calendar (`?start=&end=`, both inclusive).
+        """
+        calendar = self.calendar_service.find(name)
+        if calendar is None:
+            return jsonify({"error": "Unsupported calendar."}), 400
+        try:
+            start = PriceAPI.parse_date(request.args.get("start"))
+            end = PriceAPI.parse_date(request.args.get("end"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        lo, hi = calendar.bounds(start, end)
+        return jsonify({"calendar": calendar.name,
+                        "sessions": np.datetime_as_string(calendar.sessions[lo:hi], unit="D").tolist()}), 200
@@ -0,0 +1,45 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from flask import Request, Response
+
+
+class EntityVersion(NamedTuple):
+    """
+    Cheap validator of a resource: `tag` changes whenever its representation changes.
+    """
+    tag: str
+    last_modified: datetime | None = None
+
+
+def make_etag(version: EntityVersion, variant: str) -> str:
+    """
+    Builds a strong entity tag from the version and the request variant (path and query string).
+    """
+    return hashlib.blake2b(f"{version.tag}|{variant}".encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Die Datenbank liefert naive UTC-Zeitstempel; HTTP-Daten haben Sekundenauflösung.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def is_not_modified(request: Request, etag: str, version: EntityVersion) -> bool:
+    """
+    Evaluates If-None-Match, or If-Modified-Since when no entity tags were sent.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and version.last_modified is not None:
+        return _as_utc(version.last_modified) <= request.if_modified_since
+    return False
+
+
+def set_validators(response: Response, etag: str, version: EntityVersion) -> Response:
+    response.set_etag(etag)
+    if version.last_modified is not None:
+        response.last_modified = _as_utc(version.last_modified)
+    return response
@@ -0,0 +1,88 @@
+from flask import Flask, request, jsonify
+from sqlalchemy.orm import Session
+
+from conditional_request import EntityVersion
+from corporate_action_service import CorporateActionService
+from handle_request import IRequestHandler
+from interface_api import IApi
+from price_api import PriceAPI
+from stock_service import StockService
+
+
+class CorporateActionAPI(IApi):
+    def __init__(self, corporate_action_service: CorporateActionService, stock_service: StockService,
+                 request_handler: IRequestHandler):
+        """
+        Initializes the CorporateActionAPI class.
+
+        Args:
+            corporate_action_service: The corporate action service.
+            stock_service: The stock service, used to resolve stocks.
+            request_handler: The request handler for database session management.
+        """
+        self.corporate_action_service = corporate_action_service
+        self.stock_service = stock_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/stocks/<int:stock_id>/corporate-actions", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_corporate_actions, coalesce=True,
+                                                               validator=self.corporate_actions_version))
+        app.add_url_rule("/stocks/<int:stock_id>/splits", methods=["POST"],
+                         view_func=self.request_handler.handle(self.add_split))
+        app.add_url_rule("/stocks/<int:stock_id>/dividends", methods=["POST"],
+                         view_func=self.request_handler.handle(self.add_dividend))
+
+    def corporate_actions_version(self, db: Session, stock_id: int) -> EntityVersion | None:
+        """
+        Validator of the listing: every corporate action bumps the stock's series stamp.
+        """
+        stamp = self.corporate_action_service.price_history_service.get_stamp(db, stock_id)
+        return EntityVersion(f"corporate-actions:{stock_id}:{stamp.version}", stamp.modified_at) if stamp else None
+
+    def get_corporate_actions(self, db: Session, stock_id: int):
+        """
+        Lists the splits, dividends and cumulative adjustment factors of a stock.
+        """
+        if self.stock_service.get_stock_reference(db, stock_id) is None:
+            return jsonify({"error": "Stock not found."}), 404
+        splits, dividends = self.corporate_action_service.list_actions(db, stock_id)
+        factors = self.corporate_action_service.get_factors(db, stock_id)
+        return jsonify({
+            "splits": [{"id": split.id, "ex_date": split.ex_date.date().isoformat(), "ratio": split.ratio}
+                       for split in splits],
+            "dividends": [{"id": dividend.id, "ex_date": dividend.ex_date.date().isoformat(),
+                           "amount": dividend.amount} for dividend in dividends],
+            "factors": [{"ex_date": row["ex_date"].date().isoformat(), "price_factor": row["price_factor"],
+                         "volume_factor": row["volume_factor"]} for row in factors.to_rows()],
+        }), 200
+
+    def add_split(self, db: Session, stock_id: int):
+        """
+        Records a split (`{"ex_date": ..., "ratio": 4}` for a 4:1 split).
+        """
+        return self._add_action(db, stock_id, "ratio", self.corporate_action_service.add_split)
+
+    def add_dividend(self, db: Session, stock_id: int):
+        """
+        Records a cash dividend (`{"ex_date": ..., "amount": 1.5}`).
+        """
+        return self._add_action(db, stock_id, "amount", self.corporate_action_service.add_dividend)
+
+    def _add_action(self, db: Session, stock_id: int, value_field: str, add):
+        if self.stock_service.get_stock_reference(db, stock_id) is None:
+            return jsonify({"error": "Stock not found."}), 404
+        data = request.get_json()
+        if not data or data.get("ex_date") is None or data.get(value_field) is None:
+            return jsonify({"error": f"ex_date and {value_field} are required."}), 400
+        try:
+            ex_date = PriceAPI.parse_date(data.get("ex_date"))
+            value = float(data.get(value_field))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid corporate action: {e}"}), 400
+
+        action, error_msg = add(db, stock_id, ex_date, value)
+        if action:
+            return jsonify({"id": action.id, "ex_date": action.ex_date.date().isoformat(),
+                            value_field: value}), 201
+        return jsonify({"error": error_msg}), 400
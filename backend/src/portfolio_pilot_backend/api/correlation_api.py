@@ -0,0 +1,130 @@
+from flask import Flask, g, request, jsonify
+from sqlalchemy.orm import Session
+
+from correlation import CORRELATION
+from correlation_service import CorrelationService
+from handle_request import IRequestHandler
+from interface_api import IApi
+from price_api import PriceAPI
+from stock_service import StockService
+
+
+class CorrelationAPI(IApi):
+    MAX_K = 500
+    MAX_SUGGESTIONS = 50
+
+    def __init__(self, correlation_service: CorrelationService, stock_service: StockService,
+                 request_handler: IRequestHandler):
+        """
+        Initializes the CorrelationAPI class.
+
+        Args:
+            correlation_service: The correlation matrix and clustering service.
+            stock_service: The stock service, used to resolve symbols.
+            request_handler: The request handler for database session management.
+        """
+        self.correlation_service = correlation_service
+        self.stock_service = stock_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/correlations", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_info))
+        app.add_url_rule("/correlations/build", methods=["POST"],
+                         view_func=self.request_handler.handle(self.build))
+        app.add_url_rule("/stocks/<int:stock_id>/correlated", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_correlated))
+        app.add_url_rule("/watchlist/clusters", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_watchlist_clusters, authenticated=True))
+
+    def _stock_data(self, db: Session, stock_id: int, **values) -> dict:
+        stock = self.stock_service.get_stock_reference(db, stock_id)
+        return {"stock_id": stock_id, "symbol": stock.symbol if stock else None, **values}
+
+    def get_info(self, db: Session):
+        """
+        Returns the metadata of the stored matrix.
+        """
+        matrix = self.correlation_service.get_matrix()
+        if matrix is None:
+            return jsonify({"error": "No correlation matrix has been built yet."}), 404
+        return jsonify(matrix.meta), 200
+
+    def build(self, db: Session):
+        """
+        Computes the matrix (`{"symbols": [...], "lookback_days": 750, "end": "2024-06-28", "kind": "correlation"}`).
+
+        Without symbols the matrix covers all stocks.
+        """
+        data = request.get_json(silent=True) or {}
+        symbols = data.get("symbols")
+        stock_ids = None
+        if symbols is not None:
+            if not isinstance(symbols, list):
+                return jsonify({"error": "symbols must be a list."}), 400
+            stocks = self.stock_service.get_stock_references_by_symbols(db, [str(symbol) for symbol in symbols])
+            missing = [symbol for symbol in symbols if str(symbol) not in stocks]
+            if missing:
+                return jsonify({"error": f"Unknown symbols: {', '.join(map(str, missing))}"}), 404
+            stock_ids = [stock.id for stock in stocks.values()]
+        try:
+            lookback_days = int(data.get("lookback_days", 750))
+            end = PriceAPI.parse_date(data.get("end"))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid parameter: {e}"}), 400
+
+        meta, error_msg = self.correlation_service.build(db, stock_ids, lookback_days, end,
+                                                         data.get("kind", CORRELATION))
+        if error_msg:
+            return jsonify({"error": error_msg}), 400
+        return jsonify(meta), 200
+
+    def get_correlated(self, db: Session, stock_id: int):
+        """
+        Lists the k stocks most correlated with a stock (`?k=10&absolute=false`).
+        """
+        try:
+            k = int(request.args.get("k", 10))
+        except ValueError as e:
+            return jsonify({"error": f"Invalid parameter: {e}"}), 400
+        if not 1 <= k <= self.MAX_K:
+            return jsonify({"error": f"k must be between 1 and {self.MAX_K}."}), 400
+        if self.stock_service.get_stock_reference(db, stock_id) is None:
+            return jsonify({"error": "Stock not found."}), 404
+        absolute = request.args.get("absolute", "false").lower() in ("1", "true", "yes")
+
+        result, error_msg = self.correlation_service.get_most_correlated(stock_id, k, absolute)
+        if result is None:
+            return jsonify({"error": error_msg}), 404
+        return jsonify({"stock_id": stock_id, "kind": result.kind,
+                        "stocks": [self._stock_data(db, other, **{result.kind: round(value, 6)})
+                                   for other, value in result.stocks]}), 200
+
+    def get_watchlist_clusters(self, db: Session):
+        """
+        Groups the caller's watchlist into clusters of correlated stocks and suggests diversifying stocks.
+
+        Query parameters: min_correlation (0.5), lookback (daily returns, 750), suggestions (5) and as_of.
+        """
+        try:
+            min_correlation = float(request.args.get("min_correlation", 0.5))
+            lookback_days = int(request.args.get("lookback", 750))
+            suggestions = int(request.args.get("suggestions", 5))
+            end = PriceAPI.parse_date(request.args.get("as_of"))
+        except ValueError as e:
+            return jsonify({"error": f"Invalid parameter: {e}"}), 400
+        if not 0 <= suggestions <= self.MAX_SUGGESTIONS:
+            return jsonify({"error": f"suggestions must be between 0 and {self.MAX_SUGGESTIONS}."}), 400
+
+        result, error_msg = self.correlation_service.get_watchlist_clusters(
+            db, g.token_claims.user_id, min_correlation, lookback_days, suggestions, end)
+        if result is None:
+            return jsonify({"error": error_msg}), 400
+        return jsonify({
+            "observations": result.observations,
+            "clusters": [{"mean_correlation": None if cluster.mean_correlation is None
+                          else round(cluster.mean_correlation, 6),
+                          "stocks": [self._stock_data(db, stock_id) for stock_id in cluster.members]}
+                         for cluster in result.clusters],
+            "suggestions": [self._stock_data(db, stock_id, mean_correlation=round(value, 6))
+                            for stock_id, value in result.suggestions]}), 200
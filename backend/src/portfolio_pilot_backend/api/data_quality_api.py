@@ -0,0 +1,89 @@
+import json
+
+from flask import Flask, request, jsonify
+from sqlalchemy.orm import Session
+
+from data_quality import CHECKS
+from data_quality_service import DataQualityService
+from handle_request import IRequestHandler
+from interface_api import IApi
+from price_api import PriceAPI
+from stock_service import StockService
+
+
+class DataQualityAPI(IApi):
+    MAX_ISSUES = 1000
+
+    def __init__(self, data_quality_service: DataQualityService, stock_service: StockService,
+                 request_handler: IRequestHandler):
+        """
+        Initializes the DataQualityAPI class.
+
+        Args:
+            data_quality_service: The price history data-quality service.
+            stock_service: The stock service, used to resolve symbols.
+            request_handler: The request handler for database session management.
+        """
+        self.data_quality_service = data_quality_service
+        self.stock_service = stock_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/data-quality/report", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_report))
+        app.add_url_rule("/data-quality/scan", methods=["POST"],
+                         view_func=self.request_handler.handle(self.scan))
+
+    @staticmethod
+    def _issue_data(row) -> dict:
+        return {"id": row.id, "stock_id": row.stock_id, "symbol": row.symbol, "date": row.date.date().isoformat(),
+                "check": row.check, "details": json.loads(row.details) if row.details else None,
+                "detected_at": row.detected_at.isoformat()}
+
+    def get_report(self, db: Session):
+        """
+        Returns issue counts per check and the newest issues (`?symbol=&check=&start=&end=&limit=`).
+        """
+        stock_id = None
+        symbol = request.args.get("symbol")
+        if symbol:
+            stock = self.stock_service.get_stock_reference_by_symbol(db, symbol)
+            if stock is None:
+                return jsonify({"error": "Stock not found."}), 404
+            stock_id = stock.id
+        check = request.args.get("check")
+        if check is not None and check not in CHECKS:
+            return jsonify({"error": f"Check must be one of {', '.join(CHECKS)}."}), 400
+        try:
+            start = PriceAPI.parse_date(request.args.get("start"))
+            end = PriceAPI.parse_date(request.args.get("end"))
+            limit = int(request.args.get("limit", 100))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not 1 <= limit <= self.MAX_ISSUES:
+            return jsonify({"error": f"Limit must be between 1 and {self.MAX_ISSUES}."}), 400
+
+        issues = self.data_quality_service.list_issues(db, stock_id, check, start, end, limit)
+        return jsonify({"summary": self.data_quality_service.get_summary(db, stock_id),
+                        "issues": [self._issue_data(row) for row in issues]}), 200
+
+    def scan(self, db: Session):
+        """
+        Scans the bars added since the last scan (`{"symbols": [...], "full": false}`; no symbols: all stocks).
+        """
+        data = request.get_json(silent=True) or {}
+        symbols = data.get("symbols")
+        stock_ids = None
+        if symbols is not None:
+            if not isinstance(symbols, list):
+                return jsonify({"error": "symbols must be a list."}), 400
+            stocks = self.stock_service.get_stock_references_by_symbols(db, [str(symbol) for symbol in symbols])
+            missing = [symbol for symbol in symbols if str(symbol) not in stocks]
+            if missing:
+                return jsonify({"error": f"Unknown symbols: {', '.join(map(str, missing))}"}), 404
+            stock_ids = [stock.id for stock in stocks.values()]
+
+        report, error_msg = self.data_quality_service.scan(db, stock_ids, bool(data.get("full")))
+        if error_msg:
+            return jsonify({"error": error_msg}), 400
+        return jsonify(report), 200
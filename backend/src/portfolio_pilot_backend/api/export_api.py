@@ -0,0 +1,91 @@
+from flask import Flask, Response, g, request, jsonify
+from sqlalchemy.orm import Session
+
+from export_service import CSV, FORMATS, MEDIA_TYPES, PARQUET, ExportService, parquet_available
+from fx_matrix import parse_currency
+from handle_request import IRequestHandler
+from interface_api import IApi
+from price_api import PriceAPI
+from stock_service import StockService
+
+
+class ExportAPI(IApi):
+    def __init__(self, export_service: ExportService, stock_service: StockService, request_handler: IRequestHandler):
+        """
+        Initializes the ExportAPI class.
+
+        Args:
+            export_service: Streams exports with their own database sessions.
+            stock_service: The stock service, used to resolve stocks.
+            request_handler: The request handler for database session management.
+        """
+        self.export_service = export_service
+        self.stock_service = stock_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/stocks/<int:stock_id>/history/export", methods=["GET"],
+                         view_func=self.request_handler.handle(self.export_history))
+        app.add_url_rule("/portfolio/export", methods=["GET"],
+                         view_func=self.request_handler.handle(self.export_valuation, authenticated=True))
+
+    @staticmethod
+    def _parse_format():
+        export_format = request.args.get("format", CSV).lower()
+        if export_format not in FORMATS:
+            return None, (jsonify({"error": f"format must be one of {', '.join(FORMATS)}."}), 400)
+        if export_format == PARQUET and not parquet_available():
+            return None, (jsonify({"error": "Parquet export requires the pyarrow package."}), 501)
+        return export_format, None
+
+    @staticmethod
+    def _stream(chunks, export_format: str, name: str) -> Response:
+        # Kein jsonify: die Antwort wird erst beim Senden erzeugt und der Worker hält nie den ganzen Export.
+        return Response(chunks, mimetype=MEDIA_TYPES[export_format],
+                        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'})
+
+    def export_history(self, db: Session, stock_id: int):
+        """
+        Streams the daily bars of a stock as CSV or Parquet (`?format=&start=&end=&fields=`).
+        """
+        stock = self.stock_service.get_stock_reference(db, stock_id)
+        if stock is None:
+            return jsonify({"error": "Stock not found."}), 404
+        export_format, error = self._parse_format()
+        if error:
+            return error
+        try:
+            start = PriceAPI.parse_date(request.args.get("start"))
+            end = PriceAPI.parse_date(request.args.get("end"))
+            fields = PriceAPI.parse_fields(request.args.get("fields"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return self._stream(self.export_service.stream_history(export_format, {stock.id: stock.symbol}, fields,
+                                                               start, end),
+                            export_format, f"{stock.symbol}_history")
+
+    def export_valuation(self, db: Session):
+        """
+        Streams the daily market value of the caller's holdings as CSV or Parquet (`?format=&start=&end=&currency=`).
+        """
+        export_format, error = self._parse_format()
+        if error:
+            return error
+        try:
+            start = PriceAPI.parse_date(request.args.get("start"))
+            end = PriceAPI.parse_date(request.args.get("end"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        currency = None
+        if "currency" in request.args:
+            currency = parse_currency(request.args["currency"])
+            if currency is None:
+                return jsonify({"error": "Unsupported currency."}), 400
+        # Zu viele Positionen oder fehlende Kurse müssen vor dem ersten gesendeten Byte auffallen,
+        # danach gibt es keinen Statuscode mehr.
+        error_msg = self.export_service.validate_valuation(db, g.token_claims.user_id, currency)
+        if error_msg:
+            return jsonify({"error": error_msg}), 400
+        return self._stream(self.export_service.stream_valuation(export_format, g.token_claims.user_id, start, end,
+                                                                 currency),
+                            export_format, "portfolio_valuation")
@@ -0,0 +1,60 @@
+from flask import Flask, request, jsonify
+from sqlalchemy.orm import Session
+
+from fx_matrix import parse_currency
+from fx_service import FxService
+from handle_request import IRequestHandler
+from interface_api import IApi
+from price_api import PriceAPI
+
+
+class FxAPI(IApi):
+    def __init__(self, fx_service: FxService, request_handler: IRequestHandler):
+        """
+        Initializes the FxAPI class.
+
+        Args:
+            fx_service: The FX rate service.
+            request_handler: The request handler for database session management.
+        """
+        self.fx_service = fx_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/fx/rates/<currency>", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_rates))
+        app.add_url_rule("/fx/rates/<currency>", methods=["POST"],
+                         view_func=self.request_handler.handle(self.add_rates))
+
+    def get_rates(self, db: Session, currency: str):
+        """
+        Returns the stored daily rates of a currency, in units per 1 EUR (`?start=&end=`).
+        """
+        code = parse_currency(currency)
+        if code is None:
+            return jsonify({"error": "Unsupported currency."}), 400
+        try:
+            start = PriceAPI.parse_date(request.args.get("start"))
+            end = PriceAPI.parse_date(request.args.get("end"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        rows = self.fx_service.list_rates(db, code, start, end)
+        return jsonify({"currency": code, "dates": [row.date.date().isoformat() for row in rows],
+                        "rates": [row.rate for row in rows]}), 200
+
+    def add_rates(self, db: Session, currency: str):
+        """
+        Stores daily rates of a currency; expects a JSON list of `{"date": ..., "rate": ...}` objects.
+        """
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            return jsonify({"error": "A list of rates is required."}), 400
+        try:
+            rates = [{"date": PriceAPI.parse_date(item.get("date")), "rate": item.get("rate")} for item in data]
+        except (AttributeError, TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid rate: {e}"}), 400
+
+        count, error_msg = self.fx_service.set_rates(db, parse_currency(currency), rates)
+        if error_msg:
+            return jsonify({"error": error_msg}), 400
+        return jsonify({"message": "Rates stored successfully.", "count": count}), 201
@@ -1,35 +1,124 @@
-from flask import request, jsonify
-from sqlalchemy.orm import Session
+from flask import Response, current_app, g, request, jsonify
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
 from sqlalchemy.exc import SQLAlchemyError
 from functools import wraps
 from abc import ABC, abstractmethod
 from typing import Callable
 
+from activity_service import ActivityService
+from conditional_request import EntityVersion, is_not_modified, make_etag, set_validators
+from rate_limiter import IRateLimiter, retry_after_header
+from shard_router import route_session
+from single_flight import SingleFlight
+from token_service import TokenClaims, TokenService
+
+READ_ONLY_KEY = "read_only"
+READ_ONLY_METHODS = ("GET", "HEAD")
+
+
+class ReadOnlySessionError(SQLAlchemyError):
+    pass
+
+
+@event.listens_for(Session, "before_flush")
+def _refuse_read_only_flush(session: Session, flush_context, instances) -> None:
+    if session.info.get(READ_ONLY_KEY):
+        raise ReadOnlySessionError("The session of a GET request is read-only.")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _refuse_read_only_dml(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.session.info.get(READ_ONLY_KEY) and \
+            (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        raise ReadOnlySessionError("The session of a GET request is read-only.")
+
+
+class LazySession:
+    """
+    Stands in for a request's Session and only creates it on first use.
+
+    Requests rejected before any query, or answered from memory, never
+    create a session, so the handler has nothing to commit or close for
+    them. `prepare` runs once on the new session, before the view gets it.
+    """
+
+    def __init__(self, session_factory, prepare: Callable[[Session], None] | None = None):
+        self._session_factory = session_factory
+        self._prepare = prepare
+        self._session: Session | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None
+
+    def _open(self) -> Session:
+        if self._session is None:
+            session = self._session_factory()
+            if self._prepare is not None:
+                self._prepare(session)
+            self._session = session
+        return self._session
+
+    def __getattr__(self, name: str):
+        return getattr(self._open(), name)
+
+    def __contains__(self, instance) -> bool:
+        return instance in self._open()
+
+    def __iter__(self):
+        return iter(self._open())
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+
+
 class IRequestHandler(ABC):
     @abstractmethod
-    def handle(self, api_method: Callable):
+    def handle(self, api_method: Callable, coalesce: bool = False, rate_limited: bool = True,
+               authenticated: bool = False, validator: Callable | None = None):
         """
         Should wrap the given API method with any processing logic.
         """
         pass
 
 class RequestHandler(IRequestHandler):
-    def __init__(self, session_factory):
+    def __init__(self, session_factory, rate_limiter: IRateLimiter | None = None,
+                 single_flight: SingleFlight | None = None, token_service: TokenService | None = None,
+                 activity_service: ActivityService | None = None, read_only_session_factory=None):
         """
         Initializes the RequestHandler with a session factory.
 
         Args:
             session_factory: A callable that returns a new SQLAlchemy Session.
+            rate_limiter: Optional per-client token bucket limiter.
+            single_flight: Collapses concurrent identical GETs of coalesced routes.
+            token_service: Verifies bearer tokens of authenticated routes.
+            activity_service: Records the last-seen time of authenticated callers (write-behind).
+            read_only_session_factory: Sessions for GET and HEAD requests, e.g. on an autocommit engine;
+                defaults to session_factory.
         """
         self.session_factory = session_factory
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight if single_flight is not None else SingleFlight()
+        self.token_service = token_service
+        self.activity_service = activity_service
+        self.read_only_session_factory = read_only_session_factory
 
-    def handle(self, api_method):
+    def handle(self, api_method, coalesce: bool = False, rate_limited: bool = True, authenticated: bool = False,
+               validator: Callable[..., EntityVersion | None] | None = None):
         """
         A decorator that handles database session management and error handling
         for API methods.
 
         Args:
             api_method: The API method to be wrapped.
+            coalesce: Share one execution between concurrent identical GET requests.
+            rate_limited: Apply the configured rate limiter to this route.
+            authenticated: Require a valid bearer access token; its claims are stored in `g.token_claims`.
+            validator: Returns the EntityVersion of a GET route's resource (same arguments as the
+                view). Enables ETag/Last-Modified and 304 answers that skip the view.
 
         Returns:
             The wrapped function.
@@ -37,18 +126,125 @@ class RequestHandler(IRequestHandler):
 
         @wraps(api_method)
         def wrapper(*args, **kwargs):
-            db: Session = self.session_factory()
-            try:
-                # Call the API method, passing the database session as the first argument
-                result = api_method(db, *args, **kwargs)
+            if authenticated:
+                claims = self.authenticate()
+                if claims is None:
+                    response = jsonify({"error": "Invalid or missing access token."})
+                    response.status_code = 401
+                    response.headers["WWW-Authenticate"] = "Bearer"
+                    return response
+                g.token_claims = claims
+                if self.activity_service is not None:
+                    self.activity_service.touch_last_seen(claims.user_id)
+
+            if rate_limited and self.rate_limiter is not None:
+                decision = self.rate_limiter.consume(self.rate_limit_key())
+                if not decision.allowed:
+                    response = jsonify({"error": "Rate limit exceeded."})
+                    response.status_code = 429
+                    response.headers["Retry-After"] = retry_after_header(decision)
+                    return response
+
+            if coalesce and request.method == "GET":
+                body, status, headers = self.single_flight.do(
+                    self.coalesce_key(),
+                    lambda: self._freeze(self._execute(api_method, args, kwargs, validator)))[0]
+                return Response(body, status=status, headers=headers)
+            return self._execute(api_method, args, kwargs, validator)
+        return wrapper
+
+    def authenticate(self) -> TokenClaims | None:
+        """
+        Verifies the request's bearer access token in memory; returns None if it is missing or invalid.
+        """
+        if self.token_service is None:
+            return None
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer":
+            return None
+        return self.token_service.verify(token.strip())[0]
+
+    def rate_limit_key(self) -> str:
+        """
+        Identifies the caller for rate limiting: the user of a verified access token, else the client address.
+        """
+        # Die user_id der URL wählt der Aufrufer selbst und taugt daher nicht als Schlüssel.
+        claims = g.get("token_claims")
+        if claims is not None:
+            return f"user:{claims.user_id}"
+        return f"addr:{request.remote_addr}"
+
+    def route(self, db: Session, view_args: dict) -> None:
+        """
+        Routes a sharded session to the route's user, else to the authenticated caller; no-op without shards.
+        """
+        user_id = view_args.get("user_id")
+        if user_id is None:
+            claims = g.get("token_claims")
+            user_id = claims.user_id if claims is not None else None
+        if user_id is not None:
+            route_session(db, user_id)
+
+    def prepare_session(self, db: Session, view_args: dict, read_only: bool) -> None:
+        """
+        Sets up a request's session when the view first uses it.
+        """
+        # Was ein Service bereits committet hat, wird beim Serialisieren nicht erneut geladen;
+        # sonst öffnete das Nachladen eine zweite Transaktion, die der Handler noch einmal committen müsste.
+        db.expire_on_commit = False
+        if read_only:
+            db.info[READ_ONLY_KEY] = True
+        self.route(db, view_args)
+
+    def coalesce_key(self) -> tuple:
+        # Der Authorization-Header gehört zum Schlüssel, damit nie Antworten zwischen Nutzern geteilt werden;
+        # die Bedingungs-Header, damit ein 304 nur an Aufrufer mit passendem ETag geht.
+        return (request.method, request.full_path, request.headers.get("Authorization"),
+                request.headers.get("If-None-Match"), request.headers.get("If-Modified-Since"))
+
+    @staticmethod
+    def _freeze(result) -> tuple[bytes, int, list]:
+        # Antwortobjekte sind nicht threadsicher teilbar; geteilt werden nur Body, Status und Header.
+        response = current_app.make_response(result)
+        return response.get_data(), response.status_code, list(response.headers.items())
+
+    def _execute(self, api_method, args, kwargs, validator=None):
+        read_only = request.method in READ_ONLY_METHODS
+        session_factory = self.read_only_session_factory if read_only and self.read_only_session_factory \
+            else self.session_factory
+        db = LazySession(session_factory, lambda session: self.prepare_session(session, kwargs, read_only))
+        try:
+            version = None
+            if validator is not None and read_only:
+                # Die Version wird vor den Daten gelesen: ein paralleler Schreiber führt schlimmstenfalls
+                # zu einem veralteten ETag und damit zu einem unnötigen Neuladen, nie zu einem falschen 304.
+                version = validator(db, *args, **kwargs)
+            if version is not None:
+                etag = make_etag(version, request.full_path)
+                if is_not_modified(request, etag, version):
+                    return set_validators(Response(status=304), etag, version)
+
+            # Call the API method, passing the database session as the first argument
+            result = api_method(db, *args, **kwargs)
+            if read_only and db.is_open:
+                # Lesende Anfragen committen nicht, close() beendet ihre Transaktion. Das Flush schreibt nichts,
+                # lässt aber eine versehentlich geänderte Entität am Schreibschutz scheitern, statt sie zu verwerfen.
+                db.flush()
+            elif db.is_open and db.in_transaction():
                 db.commit()
-                return result
-            except SQLAlchemyError as e:
+            if version is not None:
+                response = current_app.make_response(result)
+                if response.status_code == 200:
+                    set_validators(response, etag, version)
+                return response
+            return result
+        except SQLAlchemyError as e:
+            if db.is_open:
                 db.rollback()
-                return jsonify({"error": f"Database error: {str(e)}"}), 500
-            except Exception as e:
+            return jsonify({"error": f"Database error: {str(e)}"}), 500
+        except Exception as e:
+            if db.is_open:
                 db.rollback()
-                return jsonify({"error": str(e)}), 500
-            finally:
-                db.close()
-        return wrapper
\ No newline at end of file
+            return jsonify({"error": str(e)}), 500
+        finally:
+            db.close()
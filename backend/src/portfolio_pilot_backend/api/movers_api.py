@@ -0,0 +1,58 @@
+from flask import Flask, request, jsonify
+from sqlalchemy.orm import Session
+
+from handle_request import IRequestHandler
+from interface_api import IApi
+from mover_service import MoverService
+from movers import METRICS, Mover
+from stock_service import StockService
+
+
+class MoversAPI(IApi):
+    MAX_K = 100
+
+    def __init__(self, mover_service: MoverService, stock_service: StockService, request_handler: IRequestHandler):
+        """
+        Initializes the MoversAPI class.
+
+        Args:
+            mover_service: The in-memory ranking of gainers, losers and most traded stocks.
+            stock_service: The stock service, used to resolve symbols.
+            request_handler: The request handler for database session management.
+        """
+        self.mover_service = mover_service
+        self.stock_service = stock_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/stocks/movers", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_movers))
+
+    def _mover_data(self, db: Session, mover: Mover) -> dict:
+        stock = self.stock_service.get_stock_reference(db, mover.stock_id)
+        return {"stock_id": mover.stock_id, "symbol": stock.symbol if stock else None, "price": mover.price,
+                "previous_close": mover.previous_close,
+                "change": None if mover.change is None else round(mover.change, 6), "volume": mover.volume,
+                "as_of": mover.as_of.isoformat()}
+
+    def get_movers(self, db: Session):
+        """
+        Lists the top gainers, losers and most traded stocks (`?exchange=&industry=&k=10&metric=`).
+
+        Without exchange and industry the ranking covers all stocks; metric limits the answer to one list.
+        """
+        try:
+            k = int(request.args.get("k", 10))
+        except ValueError as e:
+            return jsonify({"error": f"Invalid parameter: {e}"}), 400
+        if not 1 <= k <= self.MAX_K:
+            return jsonify({"error": f"k must be between 1 and {self.MAX_K}."}), 400
+        metric = request.args.get("metric")
+        if metric is not None and metric not in METRICS:
+            return jsonify({"error": f"metric must be one of {', '.join(METRICS)}."}), 400
+        exchange, industry = request.args.get("exchange"), request.args.get("industry")
+
+        movers = self.mover_service.get_movers(k, exchange, industry, (metric,) if metric else METRICS)
+        return jsonify({"exchange": exchange, "industry": industry,
+                        **{name: [self._mover_data(db, mover) for mover in ranked]
+                           for name, ranked in movers.items()}}), 200
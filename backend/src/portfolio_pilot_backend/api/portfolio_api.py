@@ -0,0 +1,104 @@
+from flask import Flask, g, request, jsonify
+from sqlalchemy.orm import Session
+
+from fx_matrix import parse_currency
+from handle_request import IRequestHandler
+from holding_service import HoldingService
+from interface_api import IApi
+from price_api import PriceAPI
+from risk_service import RiskService
+from stock_service import StockService
+
+
+class PortfolioAPI(IApi):
+    def __init__(self, holding_service: HoldingService, risk_service: RiskService, stock_service: StockService,
+                 request_handler: IRequestHandler):
+        """
+        Initializes the PortfolioAPI class.
+
+        Args:
+            holding_service: The holding service.
+            risk_service: Estimates VaR and expected shortfall of the holdings.
+            stock_service: The stock service, used to resolve stocks.
+            request_handler: The request handler for database session management.
+        """
+        self.holding_service = holding_service
+        self.risk_service = risk_service
+        self.stock_service = stock_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/portfolio/holdings", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_holdings, authenticated=True))
+        app.add_url_rule("/portfolio/holdings/<int:stock_id>", methods=["PUT"],
+                         view_func=self.request_handler.handle(self.set_holding, authenticated=True))
+        app.add_url_rule("/portfolio/holdings/<int:stock_id>", methods=["DELETE"],
+                         view_func=self.request_handler.handle(self.delete_holding, authenticated=True))
+        app.add_url_rule("/portfolio/risk", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_risk, authenticated=True))
+
+    @staticmethod
+    def _holding_data(holding) -> dict:
+        return {"stock_id": holding.stock_id, "quantity": holding.quantity,
+                "purchase_price": holding.purchase_price}
+
+    def get_holdings(self, db: Session):
+        """
+        Lists the caller's positions.
+        """
+        holdings = self.holding_service.list_holdings(db, g.token_claims.user_id)
+        return jsonify([self._holding_data(holding) for holding in holdings]), 200
+
+    def set_holding(self, db: Session, stock_id: int):
+        """
+        Creates or replaces a position (`{"quantity": 10, "purchase_price": 123.4}`).
+        """
+        if self.stock_service.get_stock_reference(db, stock_id) is None:
+            return jsonify({"error": "Stock not found."}), 404
+        data = request.get_json(silent=True) or {}
+        try:
+            quantity = float(data.get("quantity"))
+            purchase_price = float(data.get("purchase_price"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "Numeric quantity and purchase_price are required."}), 400
+
+        holding, error_msg = self.holding_service.set_holding(db, g.token_claims.user_id, stock_id, quantity,
+                                                              purchase_price)
+        if holding:
+            return jsonify(self._holding_data(holding)), 200
+        return jsonify({"error": error_msg}), 400
+
+    def delete_holding(self, db: Session, stock_id: int):
+        """
+        Removes a position.
+        """
+        if self.holding_service.delete_holding(db, g.token_claims.user_id, stock_id):
+            return jsonify({"message": "Holding deleted."}), 200
+        return jsonify({"error": "Holding not found."}), 404
+
+    def get_risk(self, db: Session):
+        """
+        Estimates Value-at-Risk and expected shortfall of the caller's holdings.
+
+        Query parameters: method (bootstrap|normal), confidence, horizon (days),
+        paths, lookback (daily returns), seed, as_of (ISO date) and currency.
+        """
+        try:
+            parameters = {"method": request.args.get("method", "bootstrap"),
+                          "confidence": float(request.args.get("confidence", 0.99)),
+                          "horizon_days": int(request.args.get("horizon", 1)),
+                          "paths": int(request.args.get("paths", 100_000)),
+                          "lookback_days": int(request.args.get("lookback", 750)),
+                          "seed": int(request.args["seed"]) if "seed" in request.args else None,
+                          "as_of": PriceAPI.parse_date(request.args.get("as_of"))}
+        except ValueError as e:
+            return jsonify({"error": f"Invalid parameter: {e}"}), 400
+        if "currency" in request.args:
+            parameters["currency"] = parse_currency(request.args["currency"])
+            if parameters["currency"] is None:
+                return jsonify({"error": "Invalid parameter: currency"}), 400
+
+        estimate, error_msg = self.risk_service.estimate_risk(db, g.token_claims.user_id, **parameters)
+        if estimate is None:
+            return jsonify({"error": error_msg}), 400
+        return jsonify(estimate._asdict()), 200
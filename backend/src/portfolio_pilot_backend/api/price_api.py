@@ -0,0 +1,210 @@
+from datetime import datetime
+
+from flask import Flask, request, jsonify
+from sqlalchemy.orm import Session
+
+from conditional_request import EntityVersion
+from corporate_action_service import CorporateActionService
+from data_quality_service import DataQualityService
+from fx_matrix import parse_currency
+from fx_service import FxService
+from handle_request import IRequestHandler
+from interface_api import IApi
+from mover_service import MoverService
+from price_history_service import PriceHistoryService
+from price_series import SERIES_FIELDS
+from stock_service import StockService
+from trading_calendar import DAILY, FREQUENCIES, period_ends
+from trading_calendar_service import TradingCalendarService
+
+
+class PriceAPI(IApi):
+    MAX_BATCH_SYMBOLS = 200
+
+    def __init__(self, price_history_service: PriceHistoryService, stock_service: StockService,
+                 request_handler: IRequestHandler, corporate_action_service: CorporateActionService | None = None,
+                 fx_service: FxService | None = None, calendar_service: TradingCalendarService | None = None,
+                 data_quality_service: DataQualityService | None = None, mover_service: MoverService | None = None):
+        """
+        Initializes the PriceAPI class.
+
+        Args:
+            price_history_service: The price history service.
+            stock_service: The stock service, used to resolve stocks.
+            request_handler: The request handler for database session management.
+            corporate_action_service: Optional service for split/dividend adjusted reads.
+            fx_service: Optional service converting batch prices into another currency.
+            calendar_service: Optional service aligning batches on exchange trading calendars.
+            data_quality_service: Optional service scanning new bars right after they are stored.
+            mover_service: Optional ranking of the day's movers, updated with the new last bars.
+        """
+        self.price_history_service = price_history_service
+        self.stock_service = stock_service
+        self.request_handler = request_handler
+        self.corporate_action_service = corporate_action_service
+        self.fx_service = fx_service
+        self.calendar_service = calendar_service
+        self.data_quality_service = data_quality_service
+        self.mover_service = mover_service
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/stocks/<int:stock_id>/history", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_history, coalesce=True,
+                                                               validator=self.history_version))
+        app.add_url_rule("/stocks/history/batch", methods=["POST"],
+                         view_func=self.request_handler.handle(self.get_history_batch))
+        app.add_url_rule("/stocks/<int:stock_id>/history", methods=["POST"],
+                         view_func=self.request_handler.handle(self.add_history))
+
+    @staticmethod
+    def parse_date(value: str | None) -> datetime | None:
+        """
+        Parses an ISO date; raises ValueError for malformed input.
+        """
+        return datetime.fromisoformat(value) if value else None
+
+    @staticmethod
+    def parse_fields(value: str | None) -> tuple[str, ...]:
+        """
+        Parses a comma separated field list; raises ValueError for unknown fields.
+        """
+        if not value:
+            return SERIES_FIELDS
+        fields = tuple(field.strip() for field in value.split(",") if field.strip())
+        unknown = [field for field in fields if field not in SERIES_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}.")
+        return fields
+
+    def history_version(self, db: Session, stock_id: int) -> EntityVersion | None:
+        """
+        Validator of the history endpoint: the series stamp, plus the symbol that is part of the body.
+        """
+        stock = self.stock_service.get_stock_reference(db, stock_id)
+        stamp = self.price_history_service.get_stamp(db, stock_id) if stock else None
+        if stamp is None:
+            return None
+        return EntityVersion(f"prices:{stock.symbol}:{stamp.version}", stamp.modified_at)
+
+    def get_history(self, db: Session, stock_id: int):
+        """
+        Returns the daily bars of a stock in columnar form (`?start=&end=&fields=&adjusted=`).
+        """
+        stock = self.stock_service.get_stock_reference(db, stock_id)
+        if stock is None:
+            return jsonify({"error": "Stock not found."}), 404
+        try:
+            start = self.parse_date(request.args.get("start"))
+            end = self.parse_date(request.args.get("end"))
+            fields = self.parse_fields(request.args.get("fields"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        adjusted = self.corporate_action_service is not None \
+            and request.args.get("adjusted", "false").lower() in ("1", "true")
+        if adjusted:
+            series = self.corporate_action_service.get_adjusted_series(db, stock_id, start, end)
+        else:
+            series = self.price_history_service.get_series(db, stock_id, start, end)
+        return jsonify({"stock_id": stock.id, "symbol": stock.symbol, "adjusted": adjusted,
+                         **series.to_columns(fields)}), 200
+
+    def get_history_batch(self, db: Session):
+        """
+        Returns the bars of many stocks aligned on one date axis.
+
+        Expects `{"symbols": [...], "start": ..., "end": ..., "fields": [...], "adjusted": false,
+        "currency": "EUR", "calendar": "XETRA", "frequency": "D", "fill": true}`; unknown symbols are
+        listed under "missing". Without a currency every stock keeps its own. With a calendar (an
+        exchange, or "auto" for the stocks' own exchanges) the dates are its sessions, gaps are
+        forward-filled unless "fill" is false, and "frequency" W or M keeps the last session of
+        every week or month.
+        """
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get("symbols"), list) or not data["symbols"]:
+            return jsonify({"error": "A non-empty list of symbols is required."}), 400
+        symbols = list(dict.fromkeys(str(symbol) for symbol in data["symbols"]))
+        if len(symbols) > self.MAX_BATCH_SYMBOLS:
+            return jsonify({"error": f"At most {self.MAX_BATCH_SYMBOLS} symbols per request."}), 400
+        try:
+            start = self.parse_date(data.get("start"))
+            end = self.parse_date(data.get("end"))
+            fields = data.get("fields")
+            fields = self.parse_fields(",".join(fields) if isinstance(fields, list) else fields)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        currency = data.get("currency")
+        if currency is not None:
+            currency = parse_currency(currency)
+            if currency is None or self.fx_service is None:
+                return jsonify({"error": "Unsupported currency."}), 400
+        calendar_name = data.get("calendar")
+        frequency = data.get("frequency", DAILY)
+        if frequency not in FREQUENCIES:
+            return jsonify({"error": f"Frequency must be one of {', '.join(FREQUENCIES)}."}), 400
+        if frequency != DAILY and calendar_name is None:
+            calendar_name = "auto"
+        if calendar_name is not None and (not isinstance(calendar_name, str) or self.calendar_service is None):
+            return jsonify({"error": "Unsupported calendar."}), 400
+
+        stocks = self.stock_service.get_stock_references_by_symbols(db, symbols)
+        found = [stocks[symbol] for symbol in symbols if symbol in stocks]
+        stock_ids = [stock.id for stock in found]
+        calendar = None
+        if calendar_name is not None:
+            calendar = self.calendar_service.for_stocks(db, stock_ids) if calendar_name == "auto" \
+                else self.calendar_service.find(calendar_name)
+            if calendar is None:
+                return jsonify({"error": "Unsupported calendar."}), 400
+        adjusted = self.corporate_action_service is not None and bool(data.get("adjusted"))
+        if adjusted:
+            aligned = self.corporate_action_service.get_adjusted_aligned(db, stock_ids, fields, start, end, calendar)
+        else:
+            aligned = self.price_history_service.get_aligned(db, stock_ids, fields, start, end, calendar)
+        # Erst nach der Bereinigung auffüllen, sonst würden Kurse vor einem Split mit dem Faktor danach bereinigt.
+        if calendar is not None and data.get("fill", True):
+            aligned = aligned.filled()
+        if currency is not None:
+            aligned, error_msg = self.fx_service.convert_aligned(db, aligned, currency)
+            if aligned is None:
+                return jsonify({"error": error_msg}), 400
+        if frequency != DAILY:
+            aligned = aligned.take(period_ends(aligned.dates, frequency))
+        payload = aligned.to_payload([stock.symbol for stock in found])
+        payload["missing"] = [symbol for symbol in symbols if symbol not in stocks]
+        payload["adjusted"] = adjusted
+        payload["currency"] = currency
+        payload["calendar"] = calendar.name if calendar is not None else None
+        return jsonify(payload), 200
+
+    def add_history(self, db: Session, stock_id: int):
+        """
+        Stores daily bars for a stock; expects a JSON list of bar objects.
+        """
+        if self.stock_service.get_stock_reference(db, stock_id) is None:
+            return jsonify({"error": "Stock not found."}), 404
+        data = request.get_json()
+        if not isinstance(data, list):
+            return jsonify({"error": "A list of bars is required."}), 400
+        try:
+            bars = [dict(bar, date=self.parse_date(bar.get("date"))) for bar in data]
+        except (AttributeError, TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid bar: {e}"}), 400
+
+        count, error_msg = self.price_history_service.add_bars(db, stock_id, bars)
+        if error_msg:
+            return jsonify({"error": error_msg}), 400
+        if self.corporate_action_service is not None:
+            self.corporate_action_service.bars_changed(db, stock_id)
+        # Rangliste und Prüfung sehen nur committete Bars; ein Rollback der Prüfung trifft nur ihre eigenen Daten.
+        db.commit()
+        if self.mover_service is not None:
+            self.mover_service.bars_changed(db, stock_id)
+        if self.data_quality_service is not None:
+            report, error_msg = self.data_quality_service.scan(db, [stock_id])
+            if report is None:
+                return jsonify({"message": "Bars stored, but the data-quality scan failed.", "count": count,
+                                "scan_error": error_msg}), 201
+            return jsonify({"message": "Bars stored successfully.", "count": count,
+                            "issues": report["issues"]}), 201
+        return jsonify({"message": "Bars stored successfully.", "count": count}), 201
@@ -0,0 +1,31 @@
+from flask import Flask, request, jsonify
+from sqlalchemy.orm import Session
+
+from handle_request import IRequestHandler
+from interface_api import IApi
+from query_plans import QueryPlanRecorder
+
+
+class QueryPlanAPI(IApi):
+    def __init__(self, query_plan_recorder: QueryPlanRecorder, request_handler: IRequestHandler):
+        """
+        Initializes the QueryPlanAPI class.
+
+        Args:
+            query_plan_recorder: Recorder attached to the application's engines.
+            request_handler: The request handler for database session management.
+        """
+        self.query_plan_recorder = query_plan_recorder
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/diagnostics/query-plans", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_query_plans))
+
+    def get_query_plans(self, db: Session):
+        """
+        Lists the captured plan of every distinct repository statement (`?flagged=true`: full scans only).
+        """
+        flagged = request.args.get("flagged", "false").lower() in ("1", "true", "yes")
+        plans = self.query_plan_recorder.flagged() if flagged else self.query_plan_recorder.plans()
+        return jsonify({"plans": [plan._asdict() for plan in plans]}), 200
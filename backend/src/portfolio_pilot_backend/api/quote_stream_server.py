@@ -0,0 +1,134 @@
+import asyncio
+import json
+import time
+from concurrent.futures import Executor
+from typing import Callable
+from urllib.parse import parse_qs, urlsplit
+
+from quote_hub import QuoteHub
+from token_service import TokenService
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+               503: "Service Unavailable"}
+
+
+class QuoteStreamServer:
+    """
+    Minimal asyncio HTTP/1.1 server in front of a QuoteHub.
+
+    GET /quotes/stream
+        Server-Sent Events with the quotes of the caller's watchlist. The
+        bearer access token goes into the Authorization header or, for
+        browser EventSource clients, the `access_token` query parameter.
+        The stream ends when the token expires; clients reconnect with a
+        fresh one.
+    GET /quotes/latest?stock_ids=1,2
+        JSON snapshot of the newest quotes.
+
+    One coroutine per connection instead of one WSGI worker per connection
+    keeps 10k idle streams cheap; blocking work (token revocation sync,
+    watchlist queries) runs in the executor.
+    """
+
+    def __init__(self, hub: QuoteHub, token_service: TokenService, subscription_loader: Callable[[int], list[int]],
+                 heartbeat: float = 15.0, resubscribe_interval: float = 60.0, header_timeout: float = 10.0,
+                 executor: Executor | None = None):
+        """
+        Args:
+            hub: The quote hub, running on the same event loop.
+            token_service: Verifies access tokens.
+            subscription_loader: Returns the subscribed stock ids of a user (blocking, runs in the executor).
+            heartbeat: Seconds without quotes after which a keep-alive comment is sent.
+            resubscribe_interval: Seconds after which a stream reloads its watchlist.
+            header_timeout: Seconds a client may take to send its request head.
+            executor: Executor for blocking calls (default: the loop's default executor).
+        """
+        self.hub = hub
+        self.token_service = token_service
+        self.subscription_loader = subscription_loader
+        self.heartbeat = heartbeat
+        self.resubscribe_interval = resubscribe_interval
+        self.header_timeout = header_timeout
+        self.executor = executor
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_connection, host, port, backlog=4096)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.header_timeout)
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = request_line.split(" ", 2)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError,
+                ValueError):
+            writer.close()
+            return
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+
+        try:
+            if method != "GET":
+                await self._respond(writer, 405, {"error": "Method not allowed."})
+            elif url.path == "/quotes/stream":
+                await self._stream(writer, headers, query)
+            elif url.path == "/quotes/latest":
+                await self._latest(writer, query)
+            else:
+                await self._respond(writer, 404, {"error": "Not found."})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    async def _latest(self, writer: asyncio.StreamWriter, query: dict) -> None:
+        try:
+            stock_ids = [int(value) for value in query.get("stock_ids", [""])[0].split(",") if value]
+        except ValueError:
+            await self._respond(writer, 400, {"error": "stock_ids must be a comma separated list of ids."})
+            return
+        await self._respond(writer, 200, [quote._asdict() for quote in self.hub.snapshot(stock_ids)])
+
+    async def _stream(self, writer: asyncio.StreamWriter, headers: dict, query: dict) -> None:
+        loop = asyncio.get_running_loop()
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        token = token.strip() if scheme.lower() == "bearer" else query.get("access_token", [None])[0]
+        claims, _ = await loop.run_in_executor(self.executor, self.token_service.verify, token)
+        if claims is None:
+            await self._respond(writer, 401, {"error": "Invalid or missing access token."})
+            return
+        stock_ids = await loop.run_in_executor(self.executor, self.subscription_loader, claims.user_id)
+        try:
+            queue = self.hub.subscribe(stock_ids)
+        except OverflowError:
+            await self._respond(writer, 503, {"error": "Too many quote streams."})
+            return
+
+        # Kleiner Sendepuffer: langsame Clients stauen sich in der konflatierenden Queue, nicht im Socket.
+        writer.transport.set_write_buffer_limits(high=64 * 1024)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                         b"Connection: keep-alive\r\nX-Accel-Buffering: no\r\n\r\nretry: 3000\n\n")
+            next_resubscribe = loop.time() + self.resubscribe_interval
+            while True:
+                batch = await queue.get_batch(self.heartbeat)
+                if queue.closed or claims.expires_at <= time.time():
+                    break
+                writer.write(b"".join(batch) if batch else b": keepalive\n\n")
+                await writer.drain()
+                if loop.time() >= next_resubscribe:
+                    stock_ids = await loop.run_in_executor(self.executor, self.subscription_loader, claims.user_id)
+                    self.hub.update_subscription(queue, stock_ids)
+                    next_resubscribe = loop.time() + self.resubscribe_interval
+        finally:
+            self.hub.unsubscribe(queue)
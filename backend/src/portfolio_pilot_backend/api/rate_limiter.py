@@ -0,0 +1,125 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, NamedTuple
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+class IRateLimiter(ABC):
+    @abstractmethod
+    def consume(self, key: str, cost: float = 1.0) -> RateLimitDecision:
+        """
+        Takes `cost` tokens from the bucket of `key` if enough are available.
+        """
+        pass
+
+
+class InMemoryTokenBucketLimiter(IRateLimiter):
+    """
+    Token buckets kept in process memory; suitable for a single worker process.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float, clock: Callable[[], float] = time.monotonic,
+                 max_keys: int = 100_000):
+        """
+        Args:
+            rate_per_second: Tokens added to every bucket per second.
+            capacity: Maximum tokens per bucket (the allowed burst).
+            clock: Monotonic time source, replaceable in tests.
+            max_keys: Bucket count that triggers pruning of full (idle) buckets.
+        """
+        if rate_per_second <= 0 or capacity <= 0:
+            raise ValueError("rate_per_second and capacity must be positive.")
+        self.rate = float(rate_per_second)
+        self.capacity = float(capacity)
+        self.clock = clock
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: dict[str, list[float]] = {}
+
+    def consume(self, key: str, cost: float = 1.0) -> RateLimitDecision:
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self._buckets[key] = [self.capacity, now]
+            tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return RateLimitDecision(True, bucket[0], 0.0)
+            bucket[0] = tokens
+            return RateLimitDecision(False, tokens, (cost - tokens) / self.rate)
+
+    def _prune(self, now: float) -> None:
+        # Volle Buckets verhalten sich wie neue und können gefahrlos verworfen werden.
+        refill_time = self.capacity / self.rate
+        for key in [key for key, (tokens, last) in self._buckets.items() if now - last >= refill_time]:
+            del self._buckets[key]
+
+
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RedisTokenBucketLimiter(IRateLimiter):
+    """
+    Token buckets shared by all workers through a Redis-compatible server.
+
+    Each decision is one atomic EVAL of a Lua script, so concurrent workers
+    cannot overdraw a bucket. Buckets expire once they would be full again.
+    """
+
+    def __init__(self, client, rate_per_second: float, capacity: float, prefix: str = "ratelimit:",
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            client: A redis-py compatible client (anything providing `eval`).
+            rate_per_second: Tokens added to every bucket per second.
+            capacity: Maximum tokens per bucket (the allowed burst).
+            prefix: Key prefix for the bucket hashes.
+            clock: Wall-clock time source shared by all workers.
+        """
+        if rate_per_second <= 0 or capacity <= 0:
+            raise ValueError("rate_per_second and capacity must be positive.")
+        self.client = client
+        self.rate = float(rate_per_second)
+        self.capacity = float(capacity)
+        self.prefix = prefix
+        self.clock = clock
+
+    def consume(self, key: str, cost: float = 1.0) -> RateLimitDecision:
+        allowed, remaining, retry_after = self.client.eval(
+            _TOKEN_BUCKET_LUA, 1, f"{self.prefix}{key}", self.rate, self.capacity, self.clock(), cost)
+        return RateLimitDecision(bool(int(allowed)), float(remaining), float(retry_after))
+
+
+def retry_after_header(decision: RateLimitDecision) -> str:
+    return str(max(1, math.ceil(decision.retry_after)))
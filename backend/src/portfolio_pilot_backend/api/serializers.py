@@ -0,0 +1,118 @@
+"""
+Schema-driven JSON encoding of API resources.
+
+A Schema lists the public fields of a resource, the attribute each one is
+read from and an optional converter (e.g. datetimes to ISO strings). For
+every requested fieldset it compiles, once, an encoder function that
+builds the dict of one row with plain attribute reads and no per-row
+introspection. The same encoder serves SQLAlchemy Row tuples from
+column-only selects, NamedTuple records and ORM entities alike.
+
+Sparse fieldsets (`?fields=id,username`) pick a subset of the fields; the
+output keeps the schema order. JSON bytes come from orjson, a declared
+dependency; the standard library only serves as fallback where it is
+missing.
+"""
+import json
+from datetime import date
+from typing import Any, Callable, Iterable, NamedTuple, Sequence
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def isoformat(value: date | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def _default(value: Any):
+    # Nur für den Fallback ohne orjson: Datumswerte und NumPy-Skalare/-Arrays.
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+class Field(NamedTuple):
+    name: str
+    attribute: str | None = None  # Standard: gleichnamiges Attribut
+    convert: Callable[[Any], Any] | None = None
+
+
+class Schema:
+    def __init__(self, fields: Sequence[Field | str]):
+        """
+        Args:
+            fields: The resource's fields in output order; a plain name reads the attribute of that name.
+        """
+        self.fields = {field.name: field for field in
+                       (Field(field) if isinstance(field, str) else field for field in fields)}
+        for field in self.fields.values():
+            if not field.name.isidentifier() or not (field.attribute or field.name).isidentifier():
+                raise ValueError(f"Invalid field: {field.name}")
+        self._encoders: dict[tuple[str, ...] | None, Callable[[Any], dict]] = {}
+
+    def parse_fields(self, value: str | None) -> tuple[str, ...] | None:
+        """
+        Parses a sparse fieldset such as "id,username"; None for all fields, ValueError for unknown ones.
+        """
+        if not value:
+            return None
+        names = {name.strip() for name in value.split(",") if name.strip()}
+        if not names:
+            raise ValueError(f"No fields requested. Available: {', '.join(self.fields)}.")
+        unknown = names - self.fields.keys()
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. "
+                             f"Available: {', '.join(self.fields)}.")
+        return tuple(name for name in self.fields if name in names)
+
+    def encoder(self, fields: tuple[str, ...] | None = None) -> Callable[[Any], dict]:
+        """
+        Returns the compiled row -> dict function of a fieldset (from parse_fields), cached per fieldset.
+        """
+        encoder = self._encoders.get(fields)
+        if encoder is None:
+            encoder = self._compile(self.fields if fields is None else fields)
+            self._encoders[fields] = encoder
+        return encoder
+
+    def _compile(self, names: Iterable[str]) -> Callable[[Any], dict]:
+        namespace = {}
+        items = []
+        for i, name in enumerate(names):
+            field = self.fields[name]
+            value = f"row.{field.attribute or field.name}"
+            if field.convert is not None:
+                namespace[f"convert_{i}"] = field.convert
+                value = f"convert_{i}({value})"
+            items.append(f"{name!r}: {value}")
+        # Feldnamen sind geprüfte Bezeichner aus dem Schema, nie Eingaben der Anfrage.
+        exec(f"def encode(row):\n    return {{{', '.join(items)}}}\n", namespace)
+        return namespace["encode"]
+
+    def dump(self, row: Any, fields: tuple[str, ...] | None = None) -> dict:
+        return self.encoder(fields)(row)
+
+    def dump_many(self, rows: Iterable[Any], fields: tuple[str, ...] | None = None) -> list[dict]:
+        encode = self.encoder(fields)
+        return [encode(row) for row in rows]
+
+
+USER_SCHEMA = Schema(("id", "username", "email"))
+CURRENT_USER_SCHEMA = Schema(("id", "username", "email", "token_expires_at"))
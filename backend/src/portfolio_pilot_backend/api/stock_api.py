@@ -0,0 +1,115 @@
+from flask import Flask, request, jsonify
+from sqlalchemy.orm import Session
+
+from handle_request import IRequestHandler
+from interface_api import IApi
+from stock_service import StockService
+
+
+class StockAPI(IApi):
+    MAX_SEARCH_LIMIT = 50
+
+    def __init__(self, stock_service: StockService, request_handler: IRequestHandler):
+        """
+        Initializes the StockAPI class.
+
+        Args:
+            stock_service: The stock service.
+            request_handler: The request handler for database session management.
+        """
+        self.stock_service = stock_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/stocks", methods=["POST"], view_func=self.request_handler.handle(self.create_stock))
+        app.add_url_rule("/stocks", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_all_stocks, coalesce=True))
+        app.add_url_rule("/stocks/search", methods=["GET"],
+                         view_func=self.request_handler.handle(self.search_stocks, coalesce=True))
+        app.add_url_rule("/stocks/<int:stock_id>", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_stock, coalesce=True))
+        app.add_url_rule("/stocks/<int:stock_id>", methods=["PUT"],
+                         view_func=self.request_handler.handle(self.update_stock))
+        app.add_url_rule("/stocks/<int:stock_id>", methods=["DELETE"],
+                         view_func=self.request_handler.handle(self.delete_stock))
+
+    @staticmethod
+    def _stock_data(stock) -> dict:
+        return {"id": stock.id, "symbol": stock.symbol, "name": stock.name, "isin": stock.isin,
+                "wkn": stock.wkn, "exchange": stock.exchange, "industry": stock.industry,
+                "currency": stock.currency}
+
+    def create_stock(self, db: Session):
+        """
+        Creates a new stock.
+        """
+        data = request.get_json()
+        if not data or not all([data.get("symbol"), data.get("name")]):
+            return jsonify({"error": "Symbol and name are required."}), 400
+
+        new_stock, error_msg = self.stock_service.create_new_stock(
+            db, data.get("symbol"), data.get("name"), data.get("isin"), data.get("wkn"),
+            data.get("exchange"), data.get("industry"), data.get("currency"))
+        if new_stock:
+            return jsonify(self._stock_data(new_stock)), 201
+        else:
+            return jsonify({"error": error_msg}), 400
+
+    def get_stock(self, db: Session, stock_id: int):
+        """
+        Retrieves a single stock by ID.
+        """
+        stock = self.stock_service.get_stock_by_id(db, stock_id)
+        if stock:
+            return jsonify(self._stock_data(stock)), 200
+        else:
+            return jsonify({"error": "Stock not found."}), 404
+
+    def get_all_stocks(self, db: Session):
+        """
+        Retrieves all stocks.
+        """
+        stocks = self.stock_service.get_all_stocks(db)
+        return jsonify([self._stock_data(stock) for stock in stocks]), 200
+
+    def update_stock(self, db: Session, stock_id: int):
+        """
+        Updates an existing stock.
+        """
+        data = request.get_json() or {}
+        updated_stock, error_msg = self.stock_service.update_stock(
+            db, stock_id, data.get("symbol"), data.get("name"), data.get("isin"), data.get("wkn"),
+            data.get("exchange"), data.get("industry"), data.get("currency"))
+        if updated_stock:
+            return jsonify(self._stock_data(updated_stock)), 200
+        elif self.stock_service.get_stock_by_id(db, stock_id) is None:
+            return jsonify({"error": error_msg}), 404
+        else:
+            return jsonify({"error": error_msg}), 400
+
+    def delete_stock(self, db: Session, stock_id: int):
+        """
+        Deletes a stock.
+        """
+        success, error_msg = self.stock_service.delete_stock(db, stock_id)
+        if success:
+            return jsonify({"message": "Stock deleted successfully."}), 200
+        elif error_msg:
+            return jsonify({"error": error_msg}), 409
+        else:
+            return jsonify({"error": "Stock not found."}), 404
+
+    def search_stocks(self, db: Session):
+        """
+        Type-ahead search over symbol, name, ISIN and WKN (`/stocks/search?q=...&limit=...`).
+        """
+        query = request.args.get("q", "").strip()
+        if not query:
+            return jsonify({"error": "Query parameter 'q' is required."}), 400
+        limit = min(request.args.get("limit", 10, type=int), self.MAX_SEARCH_LIMIT)
+
+        hits = self.stock_service.search_stocks(query, limit)
+        results = [{"id": hit.stock_id, "symbol": hit.symbol, "name": hit.name, "isin": hit.isin,
+                    "wkn": hit.wkn, "exchange": hit.exchange, "score": hit.score,
+                    "matched_field": hit.matched_field} for hit in hits]
+        return jsonify(results), 200
@@ -1,14 +1,32 @@
-from flask import Flask, request, jsonify
+import logging
+from typing import NamedTuple
+
+from flask import Flask, g, request, jsonify
 from sqlalchemy.orm import Session
 
+from activity_service import ActivityService
 from auth_service import IAuthService
+from conditional_request import EntityVersion
 from handle_request import IRequestHandler
 from interface_api import IApi
+from password_hasher import HasherBusyError
+from serializers import CURRENT_USER_SCHEMA, USER_SCHEMA, Schema, json_response
+from token_service import REFRESH, TokenService
 from user_service import UserService
 
+logger = logging.getLogger(__name__)
+
+
+class CurrentUser(NamedTuple):
+    id: int
+    username: str
+    email: str
+    token_expires_at: int
+
 
 class UserAPI(IApi):
-    def __init__(self, user_service: UserService, auth_service: IAuthService, request_handler: IRequestHandler):
+    def __init__(self, user_service: UserService, auth_service: IAuthService, request_handler: IRequestHandler,
+                 token_service: TokenService | None = None, activity_service: ActivityService | None = None):
         """
         Initializes the UserAPI class.
 
@@ -16,21 +34,54 @@ class UserAPI(IApi):
             user_service: The user service.
             auth_service: The authentication service.
             request_handler: The request handler for database session management.
+            token_service: Issues access and refresh tokens on login; without it login only checks credentials.
+            activity_service: Records logins, failed logins and logouts as audit events.
         """
         self.user_service = user_service
         self.auth_service = auth_service
         self.request_handler = request_handler
+        self.token_service = token_service
+        self.activity_service = activity_service
 
     def register_routes(self, app: Flask) -> None:
         app.add_url_rule("/users", methods=["POST"], view_func=self.request_handler.handle(self.create_user))
-        app.add_url_rule("/users/<int:user_id>", methods=["GET"], view_func=self.request_handler.handle(self.get_user))
+        app.add_url_rule("/users/<int:user_id>", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_user, validator=self.user_version))
         app.add_url_rule("/users", methods=["GET"], view_func=self.request_handler.handle(self.get_all_users))
         app.add_url_rule("/users/<int:user_id>", methods=["PUT"],
                          view_func=self.request_handler.handle(self.update_user))
         app.add_url_rule("/users/<int:user_id>", methods=["DELETE"],
                          view_func=self.request_handler.handle(self.delete_user))
         app.add_url_rule("/auth/login", methods=["POST"], view_func=self.request_handler.handle(self.login))
-
+        if self.token_service is not None:
+            app.add_url_rule("/auth/refresh", methods=["POST"],
+                             view_func=self.request_handler.handle(self.refresh_token))
+            app.add_url_rule("/auth/logout", methods=["POST"],
+                             view_func=self.request_handler.handle(self.logout, authenticated=True))
+            app.add_url_rule("/auth/me", methods=["GET"],
+                             view_func=self.request_handler.handle(self.get_current_user, authenticated=True))
+
+    @staticmethod
+    def _busy_response():
+        response = jsonify({"error": "Too many concurrent password operations, please retry."})
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+        return response
+
+    @staticmethod
+    def _parse_fields(schema: Schema) -> tuple[tuple[str, ...] | None, str | None]:
+        try:
+            return schema.parse_fields(request.args.get("fields")), None
+        except ValueError as e:
+            return None, str(e)
+
+    def _record(self, user_id: int | None, action: str, details: dict | None = None) -> None:
+        if self.activity_service is not None:
+            try:
+                self.activity_service.record_event(user_id, action, details)
+            except (RuntimeError, TimeoutError):
+                # Volle, geschlossene oder gescheiterte Schreib-Queue: das Ereignis fehlt, die Anfrage gelingt trotzdem.
+                logger.warning("Audit event %s of user %s was not recorded", action, user_id, exc_info=True)
 
     def create_user(self, db: Session):
         """
@@ -44,31 +95,43 @@ class UserAPI(IApi):
         if not all([username, email, password_hash]):
             return jsonify({"error": "Username, email, and password are required."}), 400
 
-        new_user, error_msg = self.user_service.create_new_user(db, username, email, password_hash)
+        try:
+            new_user, error_msg = self.user_service.create_new_user(db, username, email, password_hash)
+        except HasherBusyError:
+            return self._busy_response()
         if new_user:
-            user_data = {"id": new_user.id, "username": new_user.username, "email": new_user.email}
-            return jsonify(user_data), 201
+            return json_response(USER_SCHEMA.dump(new_user), 201)
         else:
             return jsonify({"error": error_msg}), 400
 
+    def user_version(self, db: Session, user_id: int) -> EntityVersion | None:
+        """
+        Validator of GET /users/<id>: the user's row version.
+        """
+        row = self.user_service.get_user_version(db, user_id)
+        return EntityVersion(f"user:{user_id}:{row.version}", row.updated_at) if row else None
+
     def get_user(self, db: Session, user_id: int):
         """
-        Retrieves a single user by ID.
+        Retrieves a single user by ID (`?fields=id,username` limits the returned fields).
         """
-        user = self.user_service.get_user_by_id(db, user_id)
+        fields, error_msg = self._parse_fields(USER_SCHEMA)
+        if error_msg:
+            return jsonify({"error": error_msg}), 400
+        user = self.user_service.get_user_profile(db, user_id)
         if user:
-            user_data = {"id": user.id, "username": user.username, "email": user.email}
-            return jsonify(user_data), 200
+            return json_response(USER_SCHEMA.dump(user, fields))
         else:
             return jsonify({"error": "User not found."}), 404
 
     def get_all_users(self, db: Session):
         """
-        Retrieves all users.
+        Retrieves all users (`?fields=id,username` limits the returned fields).
         """
-        users = self.user_service.get_all_users(db)
-        user_list = [{"id": user.id, "username": user.username, "email": user.email} for user in users]
-        return jsonify(user_list), 200
+        fields, error_msg = self._parse_fields(USER_SCHEMA)
+        if error_msg:
+            return jsonify({"error": error_msg}), 400
+        return json_response(USER_SCHEMA.dump_many(self.user_service.get_all_users(db), fields))
 
     def update_user(self, db: Session, user_id: int):
         """
@@ -79,10 +142,12 @@ class UserAPI(IApi):
         email = data.get("email")
         password_hash = data.get("password_hash")
 
-        updated_user, error_msg = self.user_service.update_user(db, user_id, username, email, password_hash)
+        try:
+            updated_user, error_msg = self.user_service.update_user(db, user_id, username, email, password_hash)
+        except HasherBusyError:
+            return self._busy_response()
         if updated_user:
-            user_data = {"id": updated_user.id, "username": updated_user.username, "email": updated_user.email}
-            return jsonify(user_data), 200
+            return json_response(USER_SCHEMA.dump(updated_user))
         else:
             return jsonify({"error": error_msg}), 404
 
@@ -107,9 +172,58 @@ class UserAPI(IApi):
         if not all([username, password_hash]):
             return jsonify({"error": "Username and password are required."}), 400
 
-        user = self.user_service.get_user_by_username(db, username)
-        if user and self.auth_service.authenticate(user, password_hash):
+        try:
+            user = self.user_service.authenticate_user(db, username, password_hash)
+        except HasherBusyError:
+            return self._busy_response()
+        if user:
             user_data = {"message": "Login successful.", "user_id": user.id, "username": user.username}
+            if self.token_service is not None:
+                user_data.update(self.token_service.issue_pair(user.id))
+            self._record(user.id, "login", {"remote_addr": request.remote_addr})
             return jsonify(user_data), 200
         else:
-            return jsonify({"error": "Invalid credentials."}), 401
\ No newline at end of file
+            self._record(None, "login_failed", {"username": username, "remote_addr": request.remote_addr})
+            return jsonify({"error": "Invalid credentials."}), 401
+
+    def refresh_token(self, db: Session):
+        """
+        Exchanges a refresh token for a new token pair; the used refresh token is revoked.
+        """
+        data = request.get_json(silent=True) or {}
+        claims, _ = self.token_service.verify(data.get("refresh_token"), REFRESH)
+        # Nur beim seltenen Refresh wird geprüft, ob der Benutzer noch existiert.
+        if claims is None or self.user_service.get_user_profile(db, claims.user_id) is None:
+            return jsonify({"error": "Invalid refresh token."}), 401
+        # Die Sperrliste im Speicher kennt Sperren anderer Worker erst nach dem Abgleich; der Insert
+        # auf den Primärschlüssel lässt jeden Refresh-Token genau einmal zu, auch bei parallelen Anfragen.
+        if not self.token_service.revoke(db, claims):
+            return jsonify({"error": "Invalid refresh token."}), 401
+        return jsonify(self.token_service.issue_pair(claims.user_id)), 200
+
+    def logout(self, db: Session):
+        """
+        Revokes the current access token and, if given, the caller's refresh token.
+        """
+        claims = g.token_claims
+        self.token_service.revoke(db, claims)
+        data = request.get_json(silent=True) or {}
+        refresh_claims, _ = self.token_service.verify(data.get("refresh_token"), REFRESH)
+        if refresh_claims is not None and refresh_claims.user_id == claims.user_id:
+            self.token_service.revoke(db, refresh_claims)
+        self._record(claims.user_id, "logout")
+        return jsonify({"message": "Logout successful."}), 200
+
+    def get_current_user(self, db: Session):
+        """
+        Returns the profile of the authenticated caller (`?fields=` limits the returned fields).
+        """
+        fields, error_msg = self._parse_fields(CURRENT_USER_SCHEMA)
+        if error_msg:
+            return jsonify({"error": error_msg}), 400
+        claims = g.token_claims
+        user = self.user_service.get_user_profile(db, claims.user_id)
+        if user is None:
+            return jsonify({"error": "User not found."}), 404
+        return json_response(CURRENT_USER_SCHEMA.dump(
+            CurrentUser(user.id, user.username, user.email, claims.expires_at), fields))
\ No newline at end of file
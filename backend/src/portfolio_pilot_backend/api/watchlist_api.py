@@ -0,0 +1,84 @@
+import logging
+
+from flask import Flask, g, jsonify
+from sqlalchemy.orm import Session
+
+from handle_request import IRequestHandler
+from interface_api import IApi
+from stock_service import StockService
+from watchlist_service import WatchlistService
+from write_behind import WriteQueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+class WatchlistAPI(IApi):
+    def __init__(self, watchlist_service: WatchlistService, stock_service: StockService,
+                 request_handler: IRequestHandler):
+        """
+        Initializes the WatchlistAPI class.
+
+        Args:
+            watchlist_service: The watchlist service.
+            stock_service: The stock service, used to resolve stocks.
+            request_handler: The request handler for database session management.
+        """
+        self.watchlist_service = watchlist_service
+        self.stock_service = stock_service
+        self.request_handler = request_handler
+
+    def register_routes(self, app: Flask) -> None:
+        app.add_url_rule("/watchlist", methods=["GET"],
+                         view_func=self.request_handler.handle(self.get_watchlist, authenticated=True))
+        app.add_url_rule("/watchlist/<int:stock_id>", methods=["PUT"],
+                         view_func=self.request_handler.handle(self.add_stock, authenticated=True))
+        app.add_url_rule("/watchlist/<int:stock_id>", methods=["DELETE"],
+                         view_func=self.request_handler.handle(self.remove_stock, authenticated=True))
+
+    @staticmethod
+    def _busy_response():
+        response = jsonify({"error": "Too many pending writes, please retry."})
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+        return response
+
+    @staticmethod
+    def _write_failed_response(action: str, stock_id: int):
+        # Gescheiterter Gruppen-Commit, Timeout oder geschlossene Queue: die Änderung ist nicht gespeichert.
+        logger.warning("Watchlist %s of stock %s was not written", action, stock_id, exc_info=True)
+        response = jsonify({"error": "Die Watchlist konnte nicht gespeichert werden, bitte erneut versuchen."})
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+        return response
+
+    def get_watchlist(self, db: Session):
+        """
+        Lists the stock ids on the caller's watchlist.
+        """
+        return jsonify({"stock_ids": self.watchlist_service.get_stock_ids(db, g.token_claims.user_id)}), 200
+
+    def add_stock(self, db: Session, stock_id: int):
+        """
+        Puts a stock on the caller's watchlist; adding it twice is not an error.
+        """
+        if self.stock_service.get_stock_reference(db, stock_id) is None:
+            return jsonify({"error": "Stock not found."}), 404
+        try:
+            self.watchlist_service.add_stock(db, g.token_claims.user_id, stock_id)
+        except WriteQueueFullError:
+            return self._busy_response()
+        except (RuntimeError, TimeoutError):
+            return self._write_failed_response("add", stock_id)
+        return jsonify({"stock_id": stock_id, "watched": True}), 200
+
+    def remove_stock(self, db: Session, stock_id: int):
+        """
+        Takes a stock off the caller's watchlist; removing a stock that is not on it is not an error.
+        """
+        try:
+            self.watchlist_service.remove_stock(db, g.token_claims.user_id, stock_id)
+        except WriteQueueFullError:
+            return self._busy_response()
+        except (RuntimeError, TimeoutError):
+            return self._write_failed_response("remove", stock_id)
+        return jsonify({"stock_id": stock_id, "watched": False}), 200
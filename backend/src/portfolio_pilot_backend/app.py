@@ -1,45 +1,215 @@
+import atexit
+import logging
+import os
+import secrets
+
 from flask import Flask
 from sqlalchemy import create_engine, Engine
 from sqlalchemy.orm import sessionmaker
 
+from activity_service import ActivityService
+from alert_api import AlertAPI
+from alert_service import AlertService
 from auth_service import AuthService
+from calendar_api import CalendarAPI
+from corporate_action_api import CorporateActionAPI
+from corporate_action_service import CorporateActionService
+from correlation_api import CorrelationAPI
+from correlation_service import CorrelationService
+from data_quality_api import DataQualityAPI
+from data_quality_service import DataQualityService
+from export_api import ExportAPI
+from export_service import ExportService
 from handle_request import RequestHandler
 from interface_api import IApi
+from fx_api import FxAPI
+from fx_service import FxService
+from holding_service import HoldingService
+from mover_service import MoverService
+from movers_api import MoversAPI
+from password_hasher import PasswordHasher
+from portfolio_api import PortfolioAPI
+from price_api import PriceAPI
+from price_history_service import PriceHistoryService
+from query_plan_api import QueryPlanAPI
+from query_plans import LARGE_TABLES, QueryPlanRecorder
+from rate_limiter import InMemoryTokenBucketLimiter, IRateLimiter, RedisTokenBucketLimiter
+from reference_data_cache import ReferenceDataCache
+from revocation_list import RevocationList
+from risk_service import RiskService
+from shard_router import ShardRouter
+from sharded_user_service import ShardedUserService
+from portfolio_pilot_backend.repositories.audit_event_repository import AuditEventRepositoryFactory
+from portfolio_pilot_backend.repositories.corporate_action_repository import CorporateActionRepositoryFactory
+from portfolio_pilot_backend.repositories.data_quality_repository import DataQualityRepositoryFactory
+from portfolio_pilot_backend.repositories.fx_rate_repository import FxRateRepositoryFactory
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.holding_repository import HoldingRepositoryFactory
+from portfolio_pilot_backend.repositories.price_alert_repository import PriceAlertRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+from portfolio_pilot_backend.repositories.revoked_token_repository import RevokedTokenRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
 from portfolio_pilot_backend.repositories.user_repository import UserRepositoryFactory
+from portfolio_pilot_backend.repositories.watchlist_repository import WatchlistRepositoryFactory
+from stock_api import StockAPI
+from stock_search_index import DatabaseStockSearch, InMemoryStockSearchIndex, IStockSearchIndex
+from stock_service import StockService
+from token_service import TokenService
+from trading_calendar_service import TradingCalendarService
 from user_service import UserService
 from portfolio_pilot_backend.models import Base
 from user_api import UserAPI
+from watchlist_api import WatchlistAPI
+from watchlist_service import WatchlistService
+from write_behind import WriteBehindQueue
+
+logger = logging.getLogger(__name__)
 
 class AppFactory:
     def __init__(self, config: dict = None):
         self.config = config if config is not None else self._load_default_config()
         self.app = self._create_app(config)
         self.engine = create_engine(self.config['SQLALCHEMY_DATABASE_URI'])
-        session_factory = self._create_session_factory(self.engine)
-        request_handler = self._create_request_handler(session_factory)
+        self.shard_router = self._create_shard_router()
+        self.query_plan_recorder = self._create_query_plan_recorder()
+        self.session_factory = self._create_session_factory(self.engine)
+        self.reference_cache = self._create_reference_cache()
+        self.token_service = self._create_token_service()
+        self.write_queue = self._create_write_queue()
+        self.activity_service = self._create_activity_service()
+        self.price_history_service = self._create_price_history_service()
+        self.corporate_action_service = self._create_corporate_action_service(self.price_history_service)
+        self.mover_service = self._create_mover_service()
+        request_handler = self._create_request_handler(self.session_factory)
         apis = self._create_apis(request_handler)
         for api in apis:
             api.register_routes(self.app)
+        self._configure_write_durability()
+        # Gepufferte Schreibzugriffe beim Beenden des Prozesses noch committen.
+        atexit.register(self.shutdown)
 
     def _create_session_factory(self, engine: Engine):
+        if self.shard_router is not None:
+            self.shard_router.create_all()
+            return self.shard_router
         Base.metadata.create_all(bind=self.engine)
         return sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
+    def _create_shard_router(self) -> ShardRouter | None:
+        # SHARD_DATABASE_URIS verteilt die Benutzerdaten auf mehrere Datenbanken,
+        # SQLALCHEMY_DATABASE_URI hält dann nur noch die Referenzdaten.
+        uris = self.config.get('SHARD_DATABASE_URIS')
+        if not uris:
+            return None
+        return ShardRouter(self.engine, [create_engine(uri) for uri in uris])
+
+    def _create_query_plan_recorder(self) -> QueryPlanRecorder | None:
+        # QUERY_PLAN_CAPTURE erklärt jede neue Repository-Abfrage einmal und meldet Full Scans großer Tabellen.
+        if not self.config.get('QUERY_PLAN_CAPTURE', False):
+            return None
+        recorder = QueryPlanRecorder(self.config.get('QUERY_PLAN_LARGE_TABLES', LARGE_TABLES))
+        for engine in [self.engine, *(self.shard_router.shard_engines if self.shard_router is not None else [])]:
+            recorder.attach(engine)
+        return recorder
+
     def _create_apis(self, request_handler: RequestHandler) -> list[IApi]:
         apis = []
         apis.append(self._create_user_api(request_handler))
+        stock_service = self._create_stock_service(self._create_stock_repository_factory(),
+                                                   self._create_stock_search_index(), self.reference_cache)
+        price_history_service = self.price_history_service
+        corporate_action_service = self.corporate_action_service
+        fx_service = self._create_fx_service()
+        calendar_service = self._create_calendar_service()
+        data_quality_service = self._create_data_quality_service(calendar_service)
+        stock_service.add_listener(self.mover_service.stock_changed)
+        corporate_action_service.add_listener(self.mover_service.corporate_action_added)
+        apis.append(self._create_stock_api(request_handler, stock_service))
+        apis.append(self._create_price_api(request_handler, stock_service, price_history_service,
+                                           corporate_action_service, fx_service, calendar_service,
+                                           data_quality_service))
+        apis.append(MoversAPI(self.mover_service, stock_service, request_handler))
+        apis.append(FxAPI(fx_service, request_handler))
+        apis.append(CalendarAPI(calendar_service, request_handler))
+        apis.append(DataQualityAPI(data_quality_service, stock_service, request_handler))
+        apis.append(CorporateActionAPI(corporate_action_service, stock_service, request_handler))
+        apis.append(AlertAPI(self._create_alert_service(), stock_service, request_handler))
+        self.risk_service = self._create_risk_service(price_history_service, fx_service, calendar_service,
+                                                      corporate_action_service)
+        apis.append(PortfolioAPI(HoldingService(HoldingRepositoryFactory()), self.risk_service, stock_service,
+                                 request_handler))
+        apis.append(ExportAPI(self._create_export_service(fx_service), stock_service, request_handler))
+        apis.append(WatchlistAPI(WatchlistService(WatchlistRepositoryFactory(), self.write_queue), stock_service,
+                                 request_handler))
+        correlation_service = self._create_correlation_service(price_history_service, calendar_service,
+                                                               corporate_action_service)
+        corporate_action_service.add_listener(correlation_service.corporate_action_added)
+        apis.append(CorrelationAPI(correlation_service, stock_service, request_handler))
+        if self.query_plan_recorder is not None:
+            apis.append(QueryPlanAPI(self.query_plan_recorder, request_handler))
         return apis
 
     def _create_user_api(self, request_handler: RequestHandler) -> UserAPI:
         auth_service = self._create_auth_service()
         user_repository_factory = self._create_user_repository_factory()
-        user_service = self._create_user_service(user_repository_factory, auth_service)
-        return UserAPI(user_service, auth_service, request_handler)
+        user_service = self._create_user_service(user_repository_factory, auth_service, self.reference_cache)
+        return UserAPI(user_service, auth_service, request_handler, self.token_service, self.activity_service)
+
+    def _create_stock_api(self, request_handler: RequestHandler, stock_service: StockService) -> StockAPI:
+        with self.session_factory() as db:
+            stock_service.rebuild_search_index(db)
+        return StockAPI(stock_service, request_handler)
+
+    def _create_price_api(self, request_handler: RequestHandler, stock_service: StockService,
+                          price_history_service: PriceHistoryService,
+                          corporate_action_service: CorporateActionService,
+                          fx_service: FxService | None = None,
+                          calendar_service: TradingCalendarService | None = None,
+                          data_quality_service: DataQualityService | None = None) -> PriceAPI:
+        # DATA_QUALITY_ON_INGEST prüft neue Bars gleich beim Speichern statt erst beim nächsten Scan.
+        if not self.config.get('DATA_QUALITY_ON_INGEST', False):
+            data_quality_service = None
+        return PriceAPI(price_history_service, stock_service, request_handler, corporate_action_service, fx_service,
+                        calendar_service, data_quality_service, self.mover_service)
+
+    def _create_reference_cache(self) -> ReferenceDataCache:
+        # Schreibzugriffe anderer Worker sind nach spätestens REFERENCE_CACHE_TTL_SECONDS sichtbar.
+        reference_cache = ReferenceDataCache(self._create_stock_repository_factory(),
+                                             self._create_user_repository_factory(),
+                                             self.config.get('REFERENCE_CACHE_TTL_SECONDS', 60))
+        if self.config.get('REFERENCE_CACHE_PRELOAD', True):
+            user_rows = None
+            if self.shard_router is not None:
+                user_repository_factory = self._create_user_repository_factory()
+                user_rows = [row for rows in self.shard_router.scatter(
+                    lambda shard: user_repository_factory.create(shard).list_profile_rows()) for row in rows]
+            with self.session_factory() as db:
+                reference_cache.preload(db, user_rows)
+            logger.info("Reference data cache preloaded: %s", reference_cache.memory_report())
+        return reference_cache
 
     def _load_default_config(self):
         return {
             'SQLALCHEMY_DATABASE_URI': "sqlite:///./app.db",
-            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'STOCK_SEARCH_BACKEND': "memory",
+            'REFERENCE_CACHE_PRELOAD': True,
+            'REFERENCE_CACHE_TTL_SECONDS': 60,
+            'RATE_LIMIT_BACKEND': None,
+            'RATE_LIMIT_PER_SECOND': 10,
+            'RATE_LIMIT_BURST': 20,
+            'PRICE_STORAGE': "rows",
+            'AUTH_SECRET_KEY': None,
+            'AUTH_ACCESS_TOKEN_TTL': 900,
+            'AUTH_REFRESH_TOKEN_TTL': 14 * 24 * 3600,
+            'PASSWORD_HASH_ALGORITHM': "scrypt",
+            'PASSWORD_HASH_WORKERS': 2,
+            'RISK_WORKERS': 0,
+            'CORRELATION_DIRECTORY': "./correlations",
+            'QUERY_PLAN_CAPTURE': False,
+            'MOVERS_SNAPSHOT_PATH': "./movers.json",
+            'WRITE_BEHIND_FLUSH_MS': 50,
+            'WRITE_BEHIND_MAX_BATCH': 500
         }
 
     def _create_app(self, config: dict) -> Flask:
@@ -48,16 +218,158 @@ class AppFactory:
         return app
 
     def _create_request_handler(self, session_local):
-        return RequestHandler(session_local)
+        return RequestHandler(session_local, self._create_rate_limiter(), token_service=self.token_service,
+                              activity_service=self.activity_service,
+                              read_only_session_factory=self._create_read_only_session_factory())
+
+    def _create_read_only_session_factory(self):
+        # GET-Anfragen lesen im Autocommit-Modus, ohne COMMIT/ROLLBACK pro Anfrage; Schreiben verweigert der
+        # RequestHandler. Im Shard-Betrieb lesen sie in normalen Transaktionen der ShardRouter-Sessions.
+        if self.shard_router is not None or not self.config.get('READ_ONLY_AUTOCOMMIT', True):
+            return None
+        return sessionmaker(autocommit=False, autoflush=False,
+                            bind=self.engine.execution_options(isolation_level="AUTOCOMMIT"))
+
+    def _create_rate_limiter(self) -> IRateLimiter | None:
+        backend = self.config.get('RATE_LIMIT_BACKEND')
+        if not backend:
+            return None
+        rate = self.config.get('RATE_LIMIT_PER_SECOND', 10)
+        burst = self.config.get('RATE_LIMIT_BURST', 20)
+        if backend == "memory":
+            return InMemoryTokenBucketLimiter(rate, burst)
+        if backend == "redis":
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("RATE_LIMIT_BACKEND 'redis' requires the redis package.") from e
+            client = redis.Redis.from_url(self.config.get('RATE_LIMIT_REDIS_URL', "redis://localhost:6379/0"))
+            return RedisTokenBucketLimiter(client, rate, burst)
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
 
     def _create_auth_service(self):
-        return AuthService()
+        password_hasher = PasswordHasher(self.config.get('PASSWORD_HASH_ALGORITHM', "scrypt"),
+                                         max_workers=self.config.get('PASSWORD_HASH_WORKERS', 2),
+                                         max_pending=self.config.get('PASSWORD_HASH_MAX_PENDING', 16))
+        return AuthService(password_hasher)
+
+    def _create_token_service(self) -> TokenService:
+        secret = self.config.get('AUTH_SECRET_KEY')
+        if not secret:
+            # Ohne festen Schlüssel werden Tokens bei jedem Neustart ungültig und nicht zwischen Prozessen geteilt.
+            logger.warning("AUTH_SECRET_KEY is not set, using a random per-process token secret.")
+            secret = secrets.token_bytes(32)
+        revocation_list = RevocationList(RevokedTokenRepositoryFactory(), self.session_factory,
+                                         self.config.get('AUTH_REVOCATION_SYNC_SECONDS', 30))
+        return TokenService(secret.encode("utf-8") if isinstance(secret, str) else secret, revocation_list,
+                            self.config.get('AUTH_ACCESS_TOKEN_TTL', 900),
+                            self.config.get('AUTH_REFRESH_TOKEN_TTL', 14 * 24 * 3600))
 
     def _create_user_repository_factory(self):
         return UserRepositoryFactory()
 
-    def _create_user_service(self, user_repository_factory, auth_service):
-        return UserService(user_repository_factory, auth_service)
+    def _create_user_service(self, user_repository_factory, auth_service, reference_cache=None):
+        if self.shard_router is not None:
+            return ShardedUserService(user_repository_factory, auth_service, self.shard_router, reference_cache)
+        return UserService(user_repository_factory, auth_service, reference_cache)
+
+    def _create_stock_repository_factory(self):
+        return StockRepositoryFactory()
+
+    def _create_stock_search_index(self) -> IStockSearchIndex:
+        # "database" nutzt SQLite FTS5 bzw. PostgreSQL pg_trgm statt des In-Memory-Index.
+        if self.config.get('STOCK_SEARCH_BACKEND', "memory") == "database":
+            # Die Suche ist Text-SQL auf der Referenzdatenbank, auch im Shard-Betrieb.
+            search = DatabaseStockSearch(self.engine, sessionmaker(bind=self.engine))
+            search.ensure_schema()
+            return search
+        return InMemoryStockSearchIndex()
+
+    def _create_stock_service(self, stock_repository_factory, search_index, reference_cache=None):
+        return StockService(stock_repository_factory, search_index, reference_cache)
+
+    def _create_price_history_service(self):
+        # "chunks" liest konvertierte Symbole aus price_chunks (siehe convert_price_chunks).
+        read_from_chunks = self.config.get('PRICE_STORAGE', "rows") == "chunks"
+        return PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory(), read_from_chunks)
+
+    def _create_corporate_action_service(self, price_history_service):
+        return CorporateActionService(CorporateActionRepositoryFactory(), price_history_service)
+
+    def _create_alert_service(self):
+        return AlertService(PriceAlertRepositoryFactory())
+
+    def _create_fx_service(self):
+        return FxService(FxRateRepositoryFactory(), StockRepositoryFactory(), self.config.get('FX_CACHE_SECONDS', 300))
+
+    def _create_calendar_service(self):
+        return TradingCalendarService(StockRepositoryFactory(), self.config.get('CALENDAR_FIRST_YEAR', 1970))
+
+    def _create_data_quality_service(self, calendar_service):
+        return DataQualityService(DataQualityRepositoryFactory(), calendar_service,
+                                  self.config.get('DATA_QUALITY_WINDOW', 60),
+                                  self.config.get('DATA_QUALITY_Z_THRESHOLD', 6.0))
+
+    def _create_risk_service(self, price_history_service, fx_service=None, calendar_service=None,
+                             corporate_action_service=None):
+        # RISK_WORKERS > 1 verteilt große Simulationen auf einen Prozesspool.
+        return RiskService(HoldingRepositoryFactory(), price_history_service,
+                           self.config.get('RISK_WORKERS', 0), self.config.get('RISK_CHUNK_PATHS', 50_000), fx_service,
+                           calendar_service, corporate_action_service)
+
+    def _create_correlation_service(self, price_history_service, calendar_service, corporate_action_service=None):
+        # Die Matrix liegt als Memmap in CORRELATION_DIRECTORY; die Blöcke rechnen standardmäßig auf allen Kernen.
+        return CorrelationService(price_history_service, StockRepositoryFactory(), WatchlistRepositoryFactory(),
+                                  calendar_service, self.config.get('CORRELATION_DIRECTORY', "correlations"),
+                                  self.config.get('CORRELATION_BLOCK_SIZE', 512),
+                                  self.config.get('CORRELATION_WORKERS', os.cpu_count() or 1),
+                                  corporate_action_service=corporate_action_service)
+
+    def _create_mover_service(self) -> MoverService:
+        # Die Rangliste lebt im Speicher; MOVERS_SNAPSHOT_PATH erspart dem Neustart das Laden aller Aktien.
+        mover_service = MoverService(HistoricalDataRepositoryFactory(), StockRepositoryFactory(), self.session_factory,
+                                     self.config.get('MOVERS_SNAPSHOT_PATH'),
+                                     self.config.get('MOVERS_SNAPSHOT_SECONDS', 60),
+                                     self.config.get('MOVERS_SYNC_SECONDS', 30),
+                                     corporate_action_service=self.corporate_action_service)
+        with self.session_factory() as db:
+            logger.info("Mover ranking loaded: %d stocks", mover_service.load(db))
+        return mover_service
+
+    def _create_export_service(self, fx_service=None):
+        return ExportService(self.session_factory, HistoricalDataRepositoryFactory(), HoldingRepositoryFactory(),
+                             self.config.get('EXPORT_BATCH_ROWS', 5000), fx_service, self.corporate_action_service)
+
+    def _create_write_queue(self) -> WriteBehindQueue:
+        return WriteBehindQueue(self.session_factory, self.config.get('WRITE_BEHIND_FLUSH_MS', 50) / 1000,
+                                self.config.get('WRITE_BEHIND_MAX_BATCH', 500),
+                                self.config.get('WRITE_BEHIND_MAX_PENDING', 10_000),
+                                shard_for=self.shard_router.shard_for if self.shard_router is not None else None)
+
+    def _create_activity_service(self) -> ActivityService:
+        return ActivityService(UserRepositoryFactory(), AuditEventRepositoryFactory(), self.write_queue,
+                               self.config.get('LAST_SEEN_RESOLUTION_SECONDS', 60))
+
+    def _configure_write_durability(self) -> None:
+        # z. B. {"audit_event": "sync"}, wenn kein Audit-Ereignis verloren gehen darf.
+        for name, durability in self.config.get('WRITE_BEHIND_DURABILITY', {}).items():
+            self.write_queue.set_durability(name, durability)
+
+    def shutdown(self) -> None:
+        """
+        Commits pending write-behind writes, saves the movers snapshot, stops the risk process pool and closes the
+        shard engines; called on interpreter exit.
+        """
+        self.write_queue.close()
+        self.risk_service.shutdown()
+        try:
+            self.mover_service.save_snapshot()
+        except OSError:
+            logger.exception("Could not save the movers snapshot")
+        if self.query_plan_recorder is not None:
+            self.query_plan_recorder.detach()
+        if self.shard_router is not None:
+            self.shard_router.close()
 
     def create_app(self) -> Flask:
         return self.app
@@ -0,0 +1,39 @@
+"""
+Converts the historical_data row table into compressed price chunks.
+
+    python -m portfolio_pilot_backend.convert_price_chunks --database-uri sqlite:///./app.db [--stock-id 1 ...]
+
+The row table stays untouched and remains the source for re-encoding; set
+PRICE_STORAGE = "chunks" in the app config to serve reads from the chunks.
+"""
+import argparse
+import json
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from price_history_service import PriceHistoryService
+from portfolio_pilot_backend.models import Base
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="Convert historical_data rows into price_chunks.")
+    parser.add_argument("--database-uri", default="sqlite:///./app.db")
+    parser.add_argument("--stock-id", type=int, action="append", dest="stock_ids",
+                        help="Convert only this stock; may be repeated.")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_uri)
+    Base.metadata.create_all(bind=engine)
+    service = PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory())
+    with sessionmaker(bind=engine)() as session:
+        report = service.convert_all(session, args.stock_ids)
+    engine.dispose()
+    print(json.dumps(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()
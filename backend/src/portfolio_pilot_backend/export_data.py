@@ -0,0 +1,110 @@
+"""
+Exports price history or a user's portfolio valuation as CSV or Parquet.
+
+    python -m portfolio_pilot_backend.export_data --database-uri sqlite:///./app.db \\
+        [--format csv|parquet] [--output prices.csv] [--start 2020-01-01] [--end ...] \\
+        history [--symbol AAPL ...] [--fields close,volume]
+    python -m portfolio_pilot_backend.export_data [--format ...] [--output ...] valuation --user-id 1 \\
+        [--currency EUR]
+
+Rows are streamed with the same generators as the export endpoints, so
+memory stays flat for any export size. Without --output CSV goes to
+stdout. Parquet requires pyarrow.
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from corporate_action_service import CorporateActionService
+from export_service import CSV, FORMATS, PARQUET, ExportService, parquet_available
+from fx_matrix import parse_currency
+from fx_service import FxService
+from price_history_service import PriceHistoryService
+from price_series import SERIES_FIELDS
+from portfolio_pilot_backend.models import Base, Stock
+from portfolio_pilot_backend.repositories.corporate_action_repository import CorporateActionRepositoryFactory
+from portfolio_pilot_backend.repositories.fx_rate_repository import FxRateRepositoryFactory
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.holding_repository import HoldingRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+
+
+def parse_fields(value: str) -> tuple[str, ...]:
+    fields = tuple(field.strip() for field in value.split(",") if field.strip())
+    unknown = [field for field in fields if field not in SERIES_FIELDS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def parse_currency_argument(value: str) -> str:
+    currency = parse_currency(value)
+    if currency is None:
+        raise argparse.ArgumentTypeError(f"not a currency code: {value}")
+    return currency
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Stream price history or portfolio valuations to CSV/Parquet.")
+    parser.add_argument("--database-uri", default="sqlite:///./app.db")
+    parser.add_argument("--format", choices=FORMATS, default=CSV)
+    parser.add_argument("--output", help="Target file (default: stdout).")
+    parser.add_argument("--start", type=datetime.fromisoformat)
+    parser.add_argument("--end", type=datetime.fromisoformat)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    commands = parser.add_subparsers(dest="command", required=True)
+    history = commands.add_parser("history", help="Daily bars, all stocks unless --symbol is given.")
+    history.add_argument("--symbol", action="append", dest="symbols")
+    history.add_argument("--fields", type=parse_fields, default=SERIES_FIELDS)
+    valuation = commands.add_parser("valuation", help="Daily market value of a user's holdings.")
+    valuation.add_argument("--user-id", type=int, required=True)
+    valuation.add_argument("--currency", type=parse_currency_argument, help="Convert into this currency (ISO code).")
+    args = parser.parse_args(argv)
+    if args.format == PARQUET and not parquet_available():
+        parser.error("--format parquet requires the pyarrow package.")
+
+    engine = create_engine(args.database_uri)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    service = ExportService(session_factory, HistoricalDataRepositoryFactory(), HoldingRepositoryFactory(),
+                            args.batch_size, FxService(FxRateRepositoryFactory(), StockRepositoryFactory()),
+                            CorporateActionService(CorporateActionRepositoryFactory(),
+                                                   PriceHistoryService(HistoricalDataRepositoryFactory(),
+                                                                       PriceChunkRepositoryFactory())))
+    if args.command == "history":
+        query = select(Stock.id, Stock.symbol).order_by(Stock.id)
+        if args.symbols:
+            query = query.where(Stock.symbol.in_(args.symbols))
+        with session_factory() as session:
+            symbols = dict(session.execute(query).all())
+        missing = set(args.symbols or ()) - set(symbols.values())
+        if missing:
+            parser.error(f"unknown symbols: {', '.join(sorted(missing))}")
+        chunks = service.stream_history(args.format, symbols, args.fields, args.start, args.end)
+    else:
+        with session_factory() as session:
+            error_msg = service.validate_valuation(session, args.user_id, args.currency)
+        if error_msg:
+            parser.error(error_msg)
+        chunks = service.stream_valuation(args.format, args.user_id, args.start, args.end, args.currency)
+
+    written = 0
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            output.close()
+        engine.dispose()
+    print(f"{written} bytes written", file=sys.stderr)
+    return written
+
+
+if __name__ == "__main__":
+    main()
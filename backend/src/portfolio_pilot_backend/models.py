@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Float
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Float, LargeBinary, Index, \
+    UniqueConstraint
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
 
@@ -8,14 +9,21 @@ class User(Base):
     __tablename__ = 'users'
 
     id = Column(Integer, primary_key=True)
-    username = Column(String, nullable=False)
+    username = Column(String, nullable=False, index=True)
     email = Column(String, unique=True, nullable=False)
     password_hash = Column(String, nullable=False)
     created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    version = Column(Integer, nullable=False)  # Zeilenversion, von SQLAlchemy bei jedem UPDATE erhöht
+    last_seen_at = Column(DateTime, nullable=True)  # Gepuffert geschrieben, ändert weder version noch updated_at
 
     # Beziehung zur Watchlist (One-to-many über die Watchlist-Tabelle)
     watchlists = relationship("Watchlist", back_populates="user")
 
+    __mapper_args__ = {
+        "version_id_col": version,
+    }
+
     def __init__(self, username, email, password_hash):
         self.username = username
         self.email = email
@@ -31,6 +39,7 @@ class Stock(Base):
     wkn = Column(String, unique=True, nullable=True)   # Optional, kann auch Null sein
     exchange = Column(String, nullable=True)  # Optional
     industry = Column(String, nullable=True)  # Optional
+    currency = Column(String(3), nullable=True)  # ISO 4217 der Notierung, "GBX" für Pence; Null = unbekannt
 
     # Beziehung zu Kursdaten (One-to-many)
     historical_data = relationship("HistoricalData", back_populates="stock")
@@ -38,13 +47,14 @@ class Stock(Base):
      # Beziehung zur Watchlist (One-to-many über die Watchlist-Tabelle)
     watchlists = relationship("Watchlist", back_populates="stock")
 
-    def __init__(self, symbol, name, isin=None, wkn=None, exchange=None, industry=None):
+    def __init__(self, symbol, name, isin=None, wkn=None, exchange=None, industry=None, currency=None):
         self.symbol = symbol
         self.name = name
         self.isin = isin
         self.wkn = wkn
         self.exchange = exchange
         self.industry = industry
+        self.currency = currency
 
 class HistoricalData(Base):
     __tablename__ = 'historical_data'
@@ -54,12 +64,18 @@ class HistoricalData(Base):
     date = Column(DateTime, nullable=False)
     open = Column(Float, nullable=False)
     high = Column(Float, nullable=False)
+    low = Column(Float, nullable=True)  # Nachträglich ergänzt, Altdaten können Null sein
+    close = Column(Float, nullable=True)  # Nachträglich ergänzt, Altdaten können Null sein
     adj_close = Column(Float, nullable=False)
     volume = Column(Integer, nullable=False)
 
     # Beziehung zur Aktie (Many-to-one)
     stock = relationship("Stock", back_populates="historical_data")
 
+    __table_args__ = (
+        Index('ix_historical_data_stock_id_date', 'stock_id', 'date'),
+    )
+
     def __init__(self, stock_id, date, open, high, low, close, adj_close, volume):
         self.stock_id = stock_id
         self.date = date
@@ -83,4 +99,244 @@ class Watchlist(Base):
 
     def __init__(self, user_id, stock_id):
         self.user_id = user_id
-        self.stock_id = stock_id
\ No newline at end of file
+        self.stock_id = stock_id
+
+class PriceChunk(Base):
+    """
+    Compressed price history of one stock for one calendar year (see price_chunk_codec).
+    """
+    __tablename__ = 'price_chunks'
+
+    id = Column(Integer, primary_key=True)
+    stock_id = Column(Integer, ForeignKey('stocks.id'), nullable=False)
+    year = Column(Integer, nullable=False)
+    bar_count = Column(Integer, nullable=False)
+    first_date = Column(DateTime, nullable=False)
+    last_date = Column(DateTime, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('stock_id', 'year'),
+    )
+
+    def __init__(self, stock_id, year, bar_count, first_date, last_date, data):
+        self.stock_id = stock_id
+        self.year = year
+        self.bar_count = bar_count
+        self.first_date = first_date
+        self.last_date = last_date
+        self.data = data
+
+class Split(Base):
+    __tablename__ = 'splits'
+
+    id = Column(Integer, primary_key=True)
+    stock_id = Column(Integer, ForeignKey('stocks.id'), nullable=False)
+    ex_date = Column(DateTime, nullable=False)
+    ratio = Column(Float, nullable=False)  # Neue Aktien je alter Aktie, 4:1 -> 4.0
+
+    __table_args__ = (
+        UniqueConstraint('stock_id', 'ex_date'),
+    )
+
+    def __init__(self, stock_id, ex_date, ratio):
+        self.stock_id = stock_id
+        self.ex_date = ex_date
+        self.ratio = ratio
+
+class Dividend(Base):
+    __tablename__ = 'dividends'
+
+    id = Column(Integer, primary_key=True)
+    stock_id = Column(Integer, ForeignKey('stocks.id'), nullable=False)
+    ex_date = Column(DateTime, nullable=False)
+    amount = Column(Float, nullable=False)  # Bardividende je Aktie in Kurswährung
+
+    __table_args__ = (
+        UniqueConstraint('stock_id', 'ex_date'),
+    )
+
+    def __init__(self, stock_id, ex_date, amount):
+        self.stock_id = stock_id
+        self.ex_date = ex_date
+        self.amount = amount
+
+class AdjustmentFactor(Base):
+    """
+    Cumulative adjustment for all bars of a stock dated before `ex_date`.
+
+    Derived from splits and dividends by CorporateActionService; one row per
+    ex-date, so a new corporate action rewrites these few rows instead of the
+    price history.
+    """
+    __tablename__ = 'adjustment_factors'
+
+    stock_id = Column(Integer, ForeignKey('stocks.id'), primary_key=True, nullable=False)
+    ex_date = Column(DateTime, primary_key=True, nullable=False)
+    price_factor = Column(Float, nullable=False)
+    volume_factor = Column(Float, nullable=False)
+
+    def __init__(self, stock_id, ex_date, price_factor, volume_factor):
+        self.stock_id = stock_id
+        self.ex_date = ex_date
+        self.price_factor = price_factor
+        self.volume_factor = volume_factor
+
+class RevokedToken(Base):
+    __tablename__ = 'revoked_tokens'
+
+    jti = Column(String, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)  # Danach ist das Token ohnehin ungültig und der Eintrag entfällt
+    revoked_at = Column(DateTime, nullable=False, index=True)
+
+    def __init__(self, jti, user_id, expires_at, revoked_at):
+        self.jti = jti
+        self.user_id = user_id
+        self.expires_at = expires_at
+        self.revoked_at = revoked_at
+
+class PriceSeriesStamp(Base):
+    """
+    Change stamp of a stock's price series: bumped on every new bar or corporate action.
+    """
+    __tablename__ = 'price_series_stamps'
+
+    stock_id = Column(Integer, ForeignKey('stocks.id'), primary_key=True, nullable=False)
+    version = Column(Integer, nullable=False)
+    last_bar_date = Column(DateTime, nullable=True)
+    modified_at = Column(DateTime, nullable=False)
+
+    def __init__(self, stock_id, version, last_bar_date, modified_at):
+        self.stock_id = stock_id
+        self.version = version
+        self.last_bar_date = last_bar_date
+        self.modified_at = modified_at
+
+class PriceAlert(Base):
+    """
+    "Notify me when the price crosses `threshold`" on one stock; fires once, then stays as history.
+    """
+    __tablename__ = 'price_alerts'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    stock_id = Column(Integer, ForeignKey('stocks.id'), nullable=False)
+    direction = Column(String, nullable=False)  # "above": Kurs steigt über die Schwelle, "below": fällt darunter
+    threshold = Column(Float, nullable=False)
+    created_at = Column(DateTime, nullable=False, index=True)
+    triggered_at = Column(DateTime, nullable=True)  # Null, solange der Alarm aktiv ist
+    triggered_price = Column(Float, nullable=True)
+
+    def __init__(self, user_id, stock_id, direction, threshold, created_at):
+        self.user_id = user_id
+        self.stock_id = stock_id
+        self.direction = direction
+        self.threshold = threshold
+        self.created_at = created_at
+
+class Holding(Base):
+    __tablename__ = 'holdings'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    stock_id = Column(Integer, ForeignKey('stocks.id'), nullable=False)
+    quantity = Column(Float, nullable=False)  # Bruchstücke erlaubt, z. B. aus Sparplänen
+    purchase_price = Column(Float, nullable=False)  # Durchschnittlicher Einstandskurs je Stück
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'stock_id'),
+    )
+
+    def __init__(self, user_id, stock_id, quantity, purchase_price):
+        self.user_id = user_id
+        self.stock_id = stock_id
+        self.quantity = quantity
+        self.purchase_price = purchase_price
+
+class AuditEvent(Base):
+    """
+    Append-only log of account activity such as logins and logouts.
+    """
+    __tablename__ = 'audit_events'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=True, index=True)  # Ohne Fremdschlüssel: Ereignisse überdauern den Benutzer
+    action = Column(String, nullable=False)
+    details = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)  # Zeitpunkt des Ereignisses, nicht des gepufferten Schreibens
+
+    def __init__(self, user_id, action, created_at, details=None):
+        self.user_id = user_id
+        self.action = action
+        self.created_at = created_at
+        self.details = details
+
+class FxRate(Base):
+    """
+    Daily reference rate of a currency against the pivot currency (EUR): units of `currency` per 1 EUR.
+    """
+    __tablename__ = 'fx_rates'
+
+    currency = Column(String(3), primary_key=True, nullable=False)
+    date = Column(DateTime, primary_key=True, nullable=False)
+    rate = Column(Float, nullable=False)
+
+    def __init__(self, currency, date, rate):
+        self.currency = currency
+        self.date = date
+        self.rate = rate
+
+class DataQualityIssue(Base):
+    """
+    A suspicious bar found by the data-quality scanner: duplicate date, missing sessions, OHLC mismatch or spike.
+    """
+    __tablename__ = 'data_quality_issues'
+
+    id = Column(Integer, primary_key=True)
+    stock_id = Column(Integer, ForeignKey('stocks.id'), nullable=False)
+    date = Column(DateTime, nullable=False)  # Datum des betroffenen Bars, bei Lücken des ersten Bars danach
+    check = Column(String, nullable=False)
+    details = Column(String, nullable=True)  # JSON mit den Kennzahlen der Prüfung
+    detected_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        Index('ix_data_quality_issues_stock_id_date', 'stock_id', 'date'),
+    )
+
+    def __init__(self, stock_id, date, check, detected_at, details=None):
+        self.stock_id = stock_id
+        self.date = date
+        self.check = check
+        self.detected_at = detected_at
+        self.details = details
+
+class DataQualityWatermark(Base):
+    """
+    Highest historical_data id already scanned per stock; later scans only look at bars above it.
+    """
+    __tablename__ = 'data_quality_watermarks'
+
+    stock_id = Column(Integer, ForeignKey('stocks.id'), primary_key=True)
+    last_bar_id = Column(Integer, nullable=False)
+    last_bar_date = Column(DateTime, nullable=True)  # Letztes bekanntes Datum, für Lücken vor neuen Bars
+    checked_at = Column(DateTime, nullable=False)
+
+    def __init__(self, stock_id, last_bar_id, checked_at, last_bar_date=None):
+        self.stock_id = stock_id
+        self.last_bar_id = last_bar_id
+        self.checked_at = checked_at
+        self.last_bar_date = last_bar_date
+
+class UserIdAllocation(Base):
+    """
+    Hands out globally unique user ids in sharded mode, where every shard's own autoincrement would collide.
+    """
+    __tablename__ = 'user_id_allocations'
+
+    id = Column(Integer, primary_key=True)
+    allocated_at = Column(DateTime, nullable=False)
+
+    def __init__(self, allocated_at, id=None):
+        self.id = id
+        self.allocated_at = allocated_at
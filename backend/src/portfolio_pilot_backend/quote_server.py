@@ -0,0 +1,97 @@
+"""
+Runs the live quote hub with its Server-Sent Events endpoint.
+
+    python -m portfolio_pilot_backend.quote_server --database-uri sqlite:///./app.db \\
+        --secret "$AUTH_SECRET_KEY" (--replay ticks.csv [--speed 10] | --synthetic [--interval 0.1])
+
+The hub runs next to the Flask app, not inside it: WSGI workers would tie
+up one thread per open stream. Use the same database and AUTH_SECRET_KEY
+as the app so that its access tokens, watchlists and price alerts are
+honoured. Alerts are evaluated by an AlertEngine on the hub's event loop.
+"""
+import argparse
+import asyncio
+import logging
+import os
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from alert_engine import AlertEngine
+from quote_feed import IQuoteFeed, ReplayQuoteFeed, SyntheticQuoteFeed
+from quote_hub import QuoteHub
+from quote_stream_server import QuoteStreamServer
+from revocation_list import RevocationList
+from token_service import TokenService
+from watchlist_service import WatchlistService
+from portfolio_pilot_backend.models import Base, Stock
+from portfolio_pilot_backend.repositories.price_alert_repository import PriceAlertRepositoryFactory
+from portfolio_pilot_backend.repositories.revoked_token_repository import RevokedTokenRepositoryFactory
+from portfolio_pilot_backend.repositories.watchlist_repository import WatchlistRepositoryFactory
+
+logger = logging.getLogger(__name__)
+
+
+def create_feed(args, session_factory) -> IQuoteFeed:
+    if args.replay:
+        return ReplayQuoteFeed(args.replay, args.speed, loop_forever=args.loop)
+    with session_factory() as session:
+        stock_ids = list(session.scalars(select(Stock.id)))
+    return SyntheticQuoteFeed(stock_ids, interval=args.interval)
+
+
+async def serve(args) -> None:
+    engine = create_engine(args.database_uri)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    watchlist_service = WatchlistService(WatchlistRepositoryFactory())
+
+    def load_subscriptions(user_id: int) -> list[int]:
+        with session_factory() as session:
+            return watchlist_service.get_stock_ids(session, user_id)
+
+    token_service = TokenService(args.secret.encode("utf-8"),
+                                 RevocationList(RevokedTokenRepositoryFactory(), session_factory))
+    hub = QuoteHub(args.max_clients)
+    alert_engine = AlertEngine(PriceAlertRepositoryFactory(), session_factory)
+    logger.info("Loaded %d active price alerts", alert_engine.load())
+    hub.add_listener(alert_engine.on_ticks)
+    alert_task = asyncio.create_task(alert_engine.run())
+    server = QuoteStreamServer(hub, token_service, load_subscriptions)
+    listener = await server.start(args.host, args.port)
+    logger.info("Quote stream listening on %s:%s", args.host, args.port)
+    feed_task = asyncio.create_task(hub.run(create_feed(args, session_factory)))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        feed_task.cancel()
+        alert_task.cancel()
+        await asyncio.gather(alert_task, return_exceptions=True)
+        hub.close_all()
+        engine.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve live quotes over Server-Sent Events.")
+    parser.add_argument("--database-uri", default="sqlite:///./app.db")
+    parser.add_argument("--secret", default=os.environ.get("AUTH_SECRET_KEY"),
+                        help="Token secret of the app (default: $AUTH_SECRET_KEY).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--max-clients", type=int, default=10_000)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--replay", help="CSV file with timestamp,stock_id,price[,volume] rows.")
+    source.add_argument("--synthetic", action="store_true", help="Random-walk quotes for all stocks.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor (0 = no pauses).")
+    parser.add_argument("--loop", action="store_true", help="Restart the replay at the end of the file.")
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between synthetic batches.")
+    args = parser.parse_args(argv)
+    if not args.secret:
+        parser.error("--secret or AUTH_SECRET_KEY is required.")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
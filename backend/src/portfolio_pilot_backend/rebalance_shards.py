@@ -0,0 +1,45 @@
+"""
+Moves users to the shard their id hashes to, e.g. after shards were added to SHARD_DATABASE_URIS.
+
+    python -m portfolio_pilot_backend.rebalance_shards --database-uri sqlite:///./app.db
+        --shard-uri sqlite:///./shard0.db --shard-uri sqlite:///./shard1.db --shard-uri sqlite:///./shard2.db
+
+Pass the shard URIs in the same order as the application's configuration
+and run it while the application is stopped. To turn a single database into
+a sharded one, keep it as the reference database and name it once more with
+--drain-uri: its users and their rows move to the shards, and new user ids
+continue above the highest existing one.
+"""
+import argparse
+import json
+
+from sqlalchemy import create_engine
+
+from shard_router import ShardRouter
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="Move users to the shard their id hashes to.")
+    parser.add_argument("--database-uri", default="sqlite:///./app.db", help="Reference database.")
+    parser.add_argument("--shard-uri", action="append", dest="shard_uris", required=True,
+                        help="Shard database, in configuration order; repeat for every shard.")
+    parser.add_argument("--drain-uri", action="append", dest="drain_uris", default=[],
+                        help="Database whose users all move to the shards; may be repeated.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users moved per transaction.")
+    args = parser.parse_args(argv)
+
+    reference_engine = create_engine(args.database_uri)
+    router = ShardRouter(reference_engine, [create_engine(uri) for uri in args.shard_uris])
+    router.create_all()
+    drain = [create_engine(uri) for uri in args.drain_uris]
+    report = router.rebalance(args.batch_size, drain)
+    router.close()
+    for engine in drain:
+        engine.dispose()
+    reference_engine.dispose()
+    print(json.dumps(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from portfolio_pilot_backend.models import AuditEvent
+
+class AuditEventRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def add_many(self, rows: list[dict]) -> None:
+        """
+        Inserts many events with one executemany INSERT.
+
+        Args:
+            rows: Dicts with user_id, action, details and created_at.
+        """
+        if rows:
+            self.session.execute(insert(AuditEvent), rows)
+            self.session.flush()
+
+    def list_for_user(self, user_id: int, limit: int = 100) -> list[AuditEvent]:
+        return list(self.session.scalars(
+            select(AuditEvent).where(AuditEvent.user_id == user_id)
+            .order_by(AuditEvent.created_at.desc(), AuditEvent.id.desc()).limit(limit)))
+
+class AuditEventRepositoryFactory():
+    def create(self, session) -> AuditEventRepository:
+        return AuditEventRepository(session)
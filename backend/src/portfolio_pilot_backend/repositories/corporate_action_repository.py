@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from sqlalchemy import Row, delete, insert, select
+from sqlalchemy.orm import Session
+from portfolio_pilot_backend.models import AdjustmentFactor, Dividend, Split
+
+class CorporateActionRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def list_splits(self, stock_id: int) -> list[Split]:
+        return list(self.session.scalars(select(Split).where(Split.stock_id == stock_id).order_by(Split.ex_date)))
+
+    def list_dividends(self, stock_id: int) -> list[Dividend]:
+        return list(self.session.scalars(
+            select(Dividend).where(Dividend.stock_id == stock_id).order_by(Dividend.ex_date)))
+
+    def get_split(self, stock_id: int, ex_date: datetime) -> Split | None:
+        return self.session.execute(
+            select(Split).where(Split.stock_id == stock_id, Split.ex_date == ex_date)).scalar_one_or_none()
+
+    def get_dividend(self, stock_id: int, ex_date: datetime) -> Dividend | None:
+        return self.session.execute(
+            select(Dividend).where(Dividend.stock_id == stock_id, Dividend.ex_date == ex_date)).scalar_one_or_none()
+
+    def has_dividends(self, stock_id: int) -> bool:
+        return self.session.execute(
+            select(Dividend.id).where(Dividend.stock_id == stock_id).limit(1)).first() is not None
+
+    def add(self, action: Split | Dividend) -> Split | Dividend:
+        self.session.add(action)
+        self.session.flush()
+        return action
+
+    def get_factor_rows(self, stock_id: int) -> list[Row]:
+        query = select(AdjustmentFactor.ex_date, AdjustmentFactor.price_factor, AdjustmentFactor.volume_factor) \
+            .where(AdjustmentFactor.stock_id == stock_id).order_by(AdjustmentFactor.ex_date)
+        return list(self.session.execute(query))
+
+    def get_factor_rows_for_stocks(self, stock_ids: list[int]) -> list[Row]:
+        query = select(AdjustmentFactor.stock_id, AdjustmentFactor.ex_date, AdjustmentFactor.price_factor,
+                       AdjustmentFactor.volume_factor) \
+            .where(AdjustmentFactor.stock_id.in_(stock_ids)) \
+            .order_by(AdjustmentFactor.stock_id, AdjustmentFactor.ex_date)
+        return list(self.session.execute(query))
+
+    def replace_factors(self, stock_id: int, factors: list[dict]) -> None:
+        self.session.execute(delete(AdjustmentFactor).where(AdjustmentFactor.stock_id == stock_id))
+        if factors:
+            self.session.execute(insert(AdjustmentFactor), [dict(factor, stock_id=stock_id) for factor in factors])
+        self.session.flush()
+
+class CorporateActionRepositoryFactory():
+    def create(self, session) -> CorporateActionRepository:
+        return CorporateActionRepository(session)
@@ -0,0 +1,137 @@
+from datetime import datetime
+
+from sqlalchemy import Row, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from portfolio_pilot_backend.models import DataQualityIssue, DataQualityWatermark, HistoricalData, Stock
+
+BAR_COLUMNS = (HistoricalData.stock_id, HistoricalData.id, HistoricalData.date, HistoricalData.open,
+               HistoricalData.high, HistoricalData.low, HistoricalData.close)
+
+class DataQualityRepository:
+    # Obergrenze für IN-Listen, bleibt unter dem Parameterlimit älterer SQLite-Versionen.
+    MAX_IN_IDS = 500
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def list_stock_ids(self) -> list[int]:
+        return list(self.session.scalars(select(Stock.id).order_by(Stock.id)))
+
+    def get_max_bar_id(self) -> int:
+        return self.session.scalar(select(func.max(HistoricalData.id))) or 0
+
+    def get_watermarks(self, stock_ids: list[int] | None = None) -> dict[int, Row]:
+        """
+        Returns (last_bar_id, last_bar_date) per scanned stock, of all stocks without ids.
+        """
+        query = select(DataQualityWatermark.stock_id, DataQualityWatermark.last_bar_id,
+                       DataQualityWatermark.last_bar_date)
+        if stock_ids is None:
+            return {row.stock_id: row for row in self.session.execute(query)}
+        watermarks = {}
+        for offset in range(0, len(stock_ids), self.MAX_IN_IDS):
+            watermarks.update((row.stock_id, row) for row in self.session.execute(
+                query.where(DataQualityWatermark.stock_id.in_(stock_ids[offset:offset + self.MAX_IN_IDS]))))
+        return watermarks
+
+    def get_bars_after(self, low_id: int, high_id: int) -> list[Row]:
+        """
+        Returns the bars of all stocks with low_id < id <= high_id, a range scan over the primary key.
+        """
+        return list(self.session.execute(select(*BAR_COLUMNS).where(HistoricalData.id > low_id,
+                                                                    HistoricalData.id <= high_id)))
+
+    def get_bars_for_stocks(self, stock_ids: list[int], high_id: int, since: datetime | None = None) -> list[Row]:
+        """
+        Returns the bars of the given stocks with id <= high_id (and date >= since), via the stock/date index.
+        """
+        rows = []
+        for offset in range(0, len(stock_ids), self.MAX_IN_IDS):
+            query = select(*BAR_COLUMNS).where(HistoricalData.stock_id.in_(stock_ids[offset:offset + self.MAX_IN_IDS]),
+                                               HistoricalData.id <= high_id)
+            if since is not None:
+                query = query.where(HistoricalData.date >= since)
+            rows.extend(self.session.execute(query))
+        return rows
+
+    def add_issues(self, rows: list[dict]) -> None:
+        """
+        Inserts many issues with one executemany INSERT.
+
+        Args:
+            rows: Dicts with stock_id, date, check, details and detected_at.
+        """
+        if rows:
+            self.session.execute(insert(DataQualityIssue), rows)
+            self.session.flush()
+
+    def set_watermarks(self, rows: list[dict]) -> None:
+        """
+        Replaces the watermarks of the given stocks.
+
+        Args:
+            rows: Dicts with stock_id, last_bar_id, last_bar_date and checked_at.
+        """
+        stock_ids = [row["stock_id"] for row in rows]
+        for offset in range(0, len(stock_ids), self.MAX_IN_IDS):
+            self.session.execute(delete(DataQualityWatermark).where(
+                DataQualityWatermark.stock_id.in_(stock_ids[offset:offset + self.MAX_IN_IDS])))
+        if rows:
+            self.session.execute(insert(DataQualityWatermark), rows)
+        self.session.flush()
+
+    def advance_watermarks(self, stock_ids: list[int], last_bar_id: int, checked_at: datetime) -> None:
+        """
+        Moves existing watermarks without new bars up to last_bar_id, keeping their last bar date.
+        """
+        for offset in range(0, len(stock_ids), self.MAX_IN_IDS):
+            self.session.execute(update(DataQualityWatermark).where(
+                DataQualityWatermark.stock_id.in_(stock_ids[offset:offset + self.MAX_IN_IDS]),
+                DataQualityWatermark.last_bar_id < last_bar_id).values(last_bar_id=last_bar_id, checked_at=checked_at))
+        self.session.flush()
+
+    def reset(self, stock_ids: list[int] | None = None) -> None:
+        """
+        Deletes issues and watermarks, of all stocks without ids, so they are scanned from scratch.
+        """
+        if stock_ids is None:
+            self.session.execute(delete(DataQualityIssue))
+            self.session.execute(delete(DataQualityWatermark))
+        for offset in range(0, len(stock_ids or ()), self.MAX_IN_IDS):
+            chunk = stock_ids[offset:offset + self.MAX_IN_IDS]
+            self.session.execute(delete(DataQualityIssue).where(DataQualityIssue.stock_id.in_(chunk)))
+            self.session.execute(delete(DataQualityWatermark).where(DataQualityWatermark.stock_id.in_(chunk)))
+        self.session.flush()
+
+    def list_issues(self, stock_id: int | None = None, check: str | None = None, start: datetime | None = None,
+                    end: datetime | None = None, limit: int = 100) -> list[Row]:
+        """
+        Returns (id, stock_id, symbol, date, check, details, detected_at) rows, newest bars first.
+        """
+        query = select(DataQualityIssue.id, DataQualityIssue.stock_id, Stock.symbol, DataQualityIssue.date,
+                       DataQualityIssue.check, DataQualityIssue.details, DataQualityIssue.detected_at) \
+            .join(Stock, Stock.id == DataQualityIssue.stock_id)
+        if stock_id is not None:
+            query = query.where(DataQualityIssue.stock_id == stock_id)
+        if check is not None:
+            query = query.where(DataQualityIssue.check == check)
+        if start is not None:
+            query = query.where(DataQualityIssue.date >= start)
+        if end is not None:
+            query = query.where(DataQualityIssue.date <= end)
+        return list(self.session.execute(
+            query.order_by(DataQualityIssue.date.desc(), DataQualityIssue.id.desc()).limit(limit)))
+
+    def count_issues(self, stock_id: int | None = None) -> list[Row]:
+        """
+        Returns (check, issues, stocks) per check.
+        """
+        query = select(DataQualityIssue.check, func.count(DataQualityIssue.id).label("issues"),
+                       func.count(func.distinct(DataQualityIssue.stock_id)).label("stocks"))
+        if stock_id is not None:
+            query = query.where(DataQualityIssue.stock_id == stock_id)
+        return list(self.session.execute(query.group_by(DataQualityIssue.check).order_by(DataQualityIssue.check)))
+
+class DataQualityRepositoryFactory():
+    def create(self, session) -> DataQualityRepository:
+        return DataQualityRepository(session)
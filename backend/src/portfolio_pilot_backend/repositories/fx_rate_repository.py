@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from sqlalchemy import Row, delete, insert, select
+from sqlalchemy.orm import Session
+from portfolio_pilot_backend.models import FxRate
+
+class FxRateRepository:
+    # Obergrenze für IN-Listen, bleibt unter dem Parameterlimit älterer SQLite-Versionen.
+    MAX_IN_DATES = 500
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def list_rows(self) -> list[Row]:
+        """
+        Returns (currency, date, rate) of all stored rates.
+        """
+        return list(self.session.execute(select(FxRate.currency, FxRate.date, FxRate.rate)))
+
+    def get_range_rows(self, currency: str, start: datetime | None = None, end: datetime | None = None) -> list[Row]:
+        query = select(FxRate.date, FxRate.rate).where(FxRate.currency == currency)
+        if start is not None:
+            query = query.where(FxRate.date >= start)
+        if end is not None:
+            query = query.where(FxRate.date <= end)
+        return list(self.session.execute(query.order_by(FxRate.date)))
+
+    def replace_rates(self, currency: str, rows: list[dict]) -> int:
+        """
+        Stores rates of one currency; existing rates on the same dates are overwritten.
+
+        Args:
+            rows: Dicts with date and rate.
+        """
+        dates = [row["date"] for row in rows]
+        for offset in range(0, len(dates), self.MAX_IN_DATES):
+            self.session.execute(delete(FxRate).where(FxRate.currency == currency,
+                                                      FxRate.date.in_(dates[offset:offset + self.MAX_IN_DATES])))
+        if rows:
+            self.session.execute(insert(FxRate), [dict(row, currency=currency) for row in rows])
+        self.session.flush()
+        return len(rows)
+
+class FxRateRepositoryFactory():
+    def create(self, session) -> FxRateRepository:
+        return FxRateRepository(session)
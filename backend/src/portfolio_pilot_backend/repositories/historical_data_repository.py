@@ -0,0 +1,144 @@
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import Row, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+from portfolio_pilot_backend.models import HistoricalData, PriceSeriesStamp
+
+class HistoricalDataRepository:
+    BAR_COLUMNS = (HistoricalData.date, HistoricalData.open, HistoricalData.high, HistoricalData.low,
+                   HistoricalData.close, HistoricalData.adj_close, HistoricalData.volume)
+    # Obergrenze für IN-Listen, bleibt unter dem Parameterlimit älterer SQLite-Versionen.
+    MAX_IN_IDS = 500
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_range_rows(self, stock_id: int, start: datetime | None = None, end: datetime | None = None) -> list[Row]:
+        query = select(*self.BAR_COLUMNS).where(HistoricalData.stock_id == stock_id)
+        if start is not None:
+            query = query.where(HistoricalData.date >= start)
+        if end is not None:
+            query = query.where(HistoricalData.date <= end)
+        return list(self.session.execute(query.order_by(HistoricalData.date)))
+
+    def get_range_rows_for_stocks(self, stock_ids: list[int], fields: tuple[str, ...],
+                                  start: datetime | None = None, end: datetime | None = None) -> list[Row]:
+        """
+        Returns (stock_id, date, *fields) rows of several stocks, ordered by stock and date.
+
+        Uses one `stock_id IN (...)` range scan per MAX_IN_IDS stocks.
+        """
+        columns = [HistoricalData.stock_id, HistoricalData.date] + [getattr(HistoricalData, field) for field in fields]
+        rows = []
+        ordered_ids = sorted(set(stock_ids))
+        for offset in range(0, len(ordered_ids), self.MAX_IN_IDS):
+            query = select(*columns).where(HistoricalData.stock_id.in_(ordered_ids[offset:offset + self.MAX_IN_IDS]))
+            if start is not None:
+                query = query.where(HistoricalData.date >= start)
+            if end is not None:
+                query = query.where(HistoricalData.date <= end)
+            rows.extend(self.session.execute(query.order_by(HistoricalData.stock_id, HistoricalData.date)))
+        return rows
+
+    def iter_range_partitions(self, stock_ids: list[int], fields: tuple[str, ...], start: datetime | None = None,
+                              end: datetime | None = None, batch_size: int = 5000) -> Iterator[list[Row]]:
+        """
+        Streams (stock_id, date, *fields) rows ordered by stock and date in lists of at most `batch_size`.
+
+        Rows are fetched with yield_per (a server-side cursor where the driver
+        supports it), so only one batch is held in memory at a time.
+        """
+        columns = [HistoricalData.stock_id, HistoricalData.date] + [getattr(HistoricalData, field) for field in fields]
+        ordered_ids = sorted(set(stock_ids))
+        for offset in range(0, len(ordered_ids), self.MAX_IN_IDS):
+            query = select(*columns).where(HistoricalData.stock_id.in_(ordered_ids[offset:offset + self.MAX_IN_IDS]))
+            if start is not None:
+                query = query.where(HistoricalData.date >= start)
+            if end is not None:
+                query = query.where(HistoricalData.date <= end)
+            query = query.order_by(HistoricalData.stock_id, HistoricalData.date).execution_options(yield_per=batch_size)
+            yield from self.session.execute(query).partitions()
+
+    def iter_closes_by_date(self, stock_ids: list[int], start: datetime | None = None, end: datetime | None = None,
+                            batch_size: int = 5000) -> Iterator[list[Row]]:
+        """
+        Streams (date, stock_id, close) rows of several stocks ordered by date; close falls back to adj_close.
+
+        All ids go into one IN list to keep the date order, so at most MAX_IN_IDS stocks are supported.
+        """
+        if len(stock_ids) > self.MAX_IN_IDS:
+            raise ValueError(f"At most {self.MAX_IN_IDS} stocks can be streamed in date order.")
+        query = select(HistoricalData.date, HistoricalData.stock_id,
+                       func.coalesce(HistoricalData.close, HistoricalData.adj_close)) \
+            .where(HistoricalData.stock_id.in_(stock_ids))
+        if start is not None:
+            query = query.where(HistoricalData.date >= start)
+        if end is not None:
+            query = query.where(HistoricalData.date <= end)
+        query = query.order_by(HistoricalData.date, HistoricalData.stock_id).execution_options(yield_per=batch_size)
+        yield from self.session.execute(query).partitions()
+
+    def get_years(self, stock_id: int) -> list[int]:
+        year = func.extract("year", HistoricalData.date)
+        rows = self.session.execute(select(year).where(HistoricalData.stock_id == stock_id).distinct())
+        return sorted(int(value) for (value,) in rows)
+
+    def list_stock_ids(self) -> list[int]:
+        return list(self.session.scalars(select(HistoricalData.stock_id).distinct().order_by(HistoricalData.stock_id)))
+
+    def add_bars(self, stock_id: int, bars: list[dict]) -> None:
+        if not bars:
+            return
+        self.session.execute(insert(HistoricalData), [dict(bar, stock_id=stock_id) for bar in bars])
+        self.session.flush()
+
+    def get_last_bar_date(self, stock_id: int) -> datetime | None:
+        return self.session.execute(
+            select(func.max(HistoricalData.date)).where(HistoricalData.stock_id == stock_id)).scalar()
+
+    def get_stamp_row(self, stock_id: int) -> Row | None:
+        return self.session.execute(
+            select(PriceSeriesStamp.version, PriceSeriesStamp.last_bar_date, PriceSeriesStamp.modified_at)
+            .where(PriceSeriesStamp.stock_id == stock_id)).first()
+
+    def touch_stamp(self, stock_id: int, last_bar_date: datetime | None, modified_at: datetime) -> None:
+        # Atomares Hochzählen, damit parallele Schreiber keine Version verlieren.
+        result = self.session.execute(
+            update(PriceSeriesStamp).where(PriceSeriesStamp.stock_id == stock_id)
+            .values(version=PriceSeriesStamp.version + 1, last_bar_date=last_bar_date, modified_at=modified_at))
+        if result.rowcount == 0:
+            self.session.add(PriceSeriesStamp(stock_id, 1, last_bar_date, modified_at))
+        self.session.flush()
+
+    def list_latest_bars(self, stock_ids: list[int] | None = None) -> list[Row]:
+        """
+        Returns (stock_id, date, adj_close, volume) of the last two bars of the given or all stamped stocks.
+
+        The last bar date comes from the series stamp and the one before
+        from an index lookup per stock, so no history is scanned.
+        """
+        earlier = aliased(HistoricalData)
+        previous_date = select(func.max(earlier.date)).where(
+            earlier.stock_id == PriceSeriesStamp.stock_id, earlier.date < PriceSeriesStamp.last_bar_date) \
+            .scalar_subquery()
+        query = select(HistoricalData.stock_id, HistoricalData.date, HistoricalData.adj_close, HistoricalData.volume) \
+            .join(PriceSeriesStamp, PriceSeriesStamp.stock_id == HistoricalData.stock_id) \
+            .where(HistoricalData.date.in_([PriceSeriesStamp.last_bar_date, previous_date])) \
+            .order_by(HistoricalData.stock_id, HistoricalData.date, HistoricalData.id)
+        if stock_ids is None:
+            return list(self.session.execute(query))
+        rows = []
+        ordered_ids = sorted(set(stock_ids))
+        for offset in range(0, len(ordered_ids), self.MAX_IN_IDS):
+            rows.extend(self.session.execute(
+                query.where(PriceSeriesStamp.stock_id.in_(ordered_ids[offset:offset + self.MAX_IN_IDS]))))
+        return rows
+
+    def list_stamped_since(self, modified_since: datetime) -> list[int]:
+        return list(self.session.scalars(
+            select(PriceSeriesStamp.stock_id).where(PriceSeriesStamp.modified_at > modified_since)))
+
+class HistoricalDataRepositoryFactory():
+    def create(self, session) -> HistoricalDataRepository:
+        return HistoricalDataRepository(session)
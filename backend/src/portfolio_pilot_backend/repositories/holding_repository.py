@@ -0,0 +1,36 @@
+from sqlalchemy import Row, select
+from sqlalchemy.orm import Session
+from portfolio_pilot_backend.models import Holding
+
+class HoldingRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get(self, user_id: int, stock_id: int) -> Holding | None:
+        return self.session.execute(
+            select(Holding).where(Holding.user_id == user_id, Holding.stock_id == stock_id)).scalar_one_or_none()
+
+    def list_for_user(self, user_id: int) -> list[Holding]:
+        return list(self.session.scalars(
+            select(Holding).where(Holding.user_id == user_id).order_by(Holding.stock_id)))
+
+    def list_rows_for_user(self, user_id: int) -> list[Row]:
+        """
+        Returns (stock_id, quantity, purchase_price) of the user's positions.
+        """
+        return list(self.session.execute(
+            select(Holding.stock_id, Holding.quantity, Holding.purchase_price)
+            .where(Holding.user_id == user_id).order_by(Holding.stock_id)))
+
+    def add(self, holding: Holding) -> Holding:
+        self.session.add(holding)
+        self.session.flush()
+        return holding
+
+    def delete(self, holding: Holding) -> None:
+        self.session.delete(holding)
+        self.session.flush()
+
+class HoldingRepositoryFactory():
+    def create(self, session) -> HoldingRepository:
+        return HoldingRepository(session)
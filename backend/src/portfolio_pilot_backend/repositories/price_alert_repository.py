@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from sqlalchemy import Row, bindparam, func, select, update
+from sqlalchemy.orm import Session
+from portfolio_pilot_backend.models import PriceAlert
+
+class PriceAlertRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def add(self, alert: PriceAlert) -> PriceAlert:
+        self.session.add(alert)
+        self.session.flush()
+        return alert
+
+    def get_by_id(self, alert_id: int) -> PriceAlert | None:
+        return self.session.get(PriceAlert, alert_id)
+
+    def delete(self, alert: PriceAlert) -> None:
+        self.session.delete(alert)
+        self.session.flush()
+
+    def list_for_user(self, user_id: int) -> list[PriceAlert]:
+        return list(self.session.scalars(
+            select(PriceAlert).where(PriceAlert.user_id == user_id).order_by(PriceAlert.id)))
+
+    def count_active_for_user(self, user_id: int) -> int:
+        return self.session.scalar(select(func.count()).select_from(PriceAlert)
+                                   .where(PriceAlert.user_id == user_id, PriceAlert.triggered_at.is_(None)))
+
+    def list_active_rows(self, created_since: datetime | None = None) -> list[Row]:
+        """
+        Returns (id, user_id, stock_id, direction, threshold) of all untriggered alerts.
+        """
+        query = select(PriceAlert.id, PriceAlert.user_id, PriceAlert.stock_id, PriceAlert.direction,
+                       PriceAlert.threshold).where(PriceAlert.triggered_at.is_(None))
+        if created_since is not None:
+            query = query.where(PriceAlert.created_at >= created_since)
+        return list(self.session.execute(query))
+
+    def mark_triggered(self, rows: list[dict]) -> int:
+        """
+        Marks many alerts as triggered with one executemany UPDATE.
+
+        Args:
+            rows: Dicts with alert_id, fired_at and fired_price.
+
+        Returns:
+            The number of alerts that were still active (deleted or already triggered ones are skipped).
+        """
+        if not rows:
+            return 0
+        table = PriceAlert.__table__
+        statement = update(table).where(table.c.id == bindparam("alert_id"), table.c.triggered_at.is_(None)) \
+            .values(triggered_at=bindparam("fired_at"), triggered_price=bindparam("fired_price"))
+        result = self.session.execute(statement, rows)
+        self.session.flush()
+        return result.rowcount
+
+class PriceAlertRepositoryFactory():
+    def create(self, session) -> PriceAlertRepository:
+        return PriceAlertRepository(session)
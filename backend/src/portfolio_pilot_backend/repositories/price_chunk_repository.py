@@ -0,0 +1,55 @@
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from portfolio_pilot_backend.models import PriceChunk
+
+class PriceChunkRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_chunks(self, stock_id: int, first_year: int | None = None, last_year: int | None = None) -> list[PriceChunk]:
+        query = select(PriceChunk).where(PriceChunk.stock_id == stock_id)
+        if first_year is not None:
+            query = query.where(PriceChunk.year >= first_year)
+        if last_year is not None:
+            query = query.where(PriceChunk.year <= last_year)
+        return list(self.session.scalars(query.order_by(PriceChunk.year)))
+
+    def get_chunks_for_stocks(self, stock_ids: list[int], first_year: int | None = None,
+                              last_year: int | None = None) -> list[PriceChunk]:
+        query = select(PriceChunk).where(PriceChunk.stock_id.in_(stock_ids))
+        if first_year is not None:
+            query = query.where(PriceChunk.year >= first_year)
+        if last_year is not None:
+            query = query.where(PriceChunk.year <= last_year)
+        return list(self.session.scalars(query.order_by(PriceChunk.stock_id, PriceChunk.year)))
+
+    def list_converted_stock_ids(self, stock_ids: list[int]) -> set[int]:
+        return set(self.session.scalars(
+            select(PriceChunk.stock_id).where(PriceChunk.stock_id.in_(stock_ids)).distinct()))
+
+    def has_chunks(self, stock_id: int) -> bool:
+        return self.session.execute(
+            select(PriceChunk.id).where(PriceChunk.stock_id == stock_id).limit(1)).first() is not None
+
+    def save(self, chunk: PriceChunk) -> PriceChunk:
+        existing = self.session.execute(
+            select(PriceChunk).where(PriceChunk.stock_id == chunk.stock_id, PriceChunk.year == chunk.year)
+        ).scalar_one_or_none()
+        if existing is None:
+            self.session.add(chunk)
+            existing = chunk
+        else:
+            existing.bar_count = chunk.bar_count
+            existing.first_date = chunk.first_date
+            existing.last_date = chunk.last_date
+            existing.data = chunk.data
+        self.session.flush()
+        return existing
+
+    def delete_for_stock(self, stock_id: int) -> None:
+        self.session.execute(delete(PriceChunk).where(PriceChunk.stock_id == stock_id))
+        self.session.flush()
+
+class PriceChunkRepositoryFactory():
+    def create(self, session) -> PriceChunkRepository:
+        return PriceChunkRepository(session)
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import Row, delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from portfolio_pilot_backend.models import RevokedToken
+
+class RevokedTokenRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def add(self, revoked_token: RevokedToken) -> bool:
+        """
+        Inserts the revocation in a savepoint; returns False if the token id is already revoked.
+        """
+        try:
+            with self.session.begin_nested():
+                self.session.add(revoked_token)
+        except IntegrityError:
+            return False
+        return True
+
+    def list_active_rows(self, now: datetime, revoked_since: datetime | None = None) -> list[Row]:
+        query = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at) \
+            .where(RevokedToken.expires_at > now)
+        if revoked_since is not None:
+            query = query.where(RevokedToken.revoked_at >= revoked_since)
+        return list(self.session.execute(query))
+
+    def purge_expired(self, now: datetime) -> int:
+        result = self.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        self.session.flush()
+        return result.rowcount
+
+class RevokedTokenRepositoryFactory():
+    def create(self, session) -> RevokedTokenRepository:
+        return RevokedTokenRepository(session)
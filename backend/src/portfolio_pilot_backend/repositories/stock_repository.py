@@ -0,0 +1,94 @@
+from typing import Iterable
+
+from sqlalchemy import Row, Table, delete, literal, select
+from sqlalchemy.orm import Session
+from portfolio_pilot_backend.models import Base, Stock
+
+# Alle Tabellen mit Fremdschlüssel auf eine Aktie, in Abhängigkeitsreihenfolge.
+STOCK_REFERENCES: tuple[Table, ...] = tuple(
+    table for table in Base.metadata.sorted_tables
+    if any(foreign_key.references(Stock.__table__) for foreign_key in table.foreign_keys))
+
+class StockRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_by_id(self, stock_id: int) -> Stock | None:
+        return self.session.query(Stock).filter(Stock.id == stock_id).first()
+
+    def get_by_symbol(self, symbol: str) -> Stock | None:
+        return self.session.query(Stock).filter(Stock.symbol == symbol).first()
+
+    def get_by_isin(self, isin: str) -> Stock | None:
+        return self.session.query(Stock).filter(Stock.isin == isin).first()
+
+    def get_by_wkn(self, wkn: str) -> Stock | None:
+        return self.session.query(Stock).filter(Stock.wkn == wkn).first()
+
+    def get_by_ids(self, stock_ids: list[int]) -> list[Stock]:
+        if not stock_ids:
+            return []
+        return self.session.query(Stock).filter(Stock.id.in_(stock_ids)).all()
+
+    def create(self, stock: Stock) -> Stock:
+        self.session.add(stock)
+        self.session.flush()
+        return stock
+
+    def update(self, stock: Stock) -> Stock:
+        self.session.merge(stock)
+        self.session.flush()
+        return stock
+
+    def delete(self, stock: Stock) -> None:
+        # Direkt statt über die Beziehungen, die sonst auch Watchlists (ggf. auf den Shards) laden würden.
+        self.session.execute(delete(Stock).where(Stock.id == stock.id))
+        self.session.flush()
+
+    def list_referencing_tables(self, stock_id: int, tables: Iterable[Table] = STOCK_REFERENCES) -> list[str]:
+        """
+        Returns the names of the given tables that still have rows of the stock.
+        """
+        return [table.name for table in tables
+                if self.session.execute(select(literal(1)).select_from(table)
+                                        .where(table.c.stock_id == stock_id).limit(1)).first() is not None]
+
+    def list_all(self) -> list[Stock]:
+        return self.session.query(Stock).all()
+
+    def list_ids(self) -> list[int]:
+        return list(self.session.scalars(select(Stock.id).order_by(Stock.id)))
+
+    def _reference_select(self):
+        return select(Stock.id, Stock.symbol, Stock.name, Stock.isin, Stock.wkn, Stock.exchange, Stock.industry,
+                      Stock.currency)
+
+    def get_reference_row(self, stock_id: int) -> Row | None:
+        return self.session.execute(self._reference_select().where(Stock.id == stock_id)).first()
+
+    def get_reference_row_by_symbol(self, symbol: str) -> Row | None:
+        return self.session.execute(self._reference_select().where(Stock.symbol == symbol)).first()
+
+    def list_reference_rows_by_symbols(self, symbols: list[str]) -> list[Row]:
+        if not symbols:
+            return []
+        return list(self.session.execute(self._reference_select().where(Stock.symbol.in_(symbols))))
+
+    def get_currencies(self, stock_ids: list[int]) -> dict[int, str | None]:
+        if not stock_ids:
+            return {}
+        return {row.id: row.currency for row in self.session.execute(
+            select(Stock.id, Stock.currency).where(Stock.id.in_(stock_ids)))}
+
+    def get_exchanges(self, stock_ids: list[int]) -> dict[int, str | None]:
+        if not stock_ids:
+            return {}
+        return {row.id: row.exchange for row in self.session.execute(
+            select(Stock.id, Stock.exchange).where(Stock.id.in_(stock_ids)))}
+
+    def list_reference_rows(self) -> list[Row]:
+        return list(self.session.execute(self._reference_select()))
+
+class StockRepositoryFactory():
+    def create(self, session) -> StockRepository:
+        return StockRepository(session)
@@ -1,5 +1,8 @@
+from datetime import datetime
+
+from sqlalchemy import Row, bindparam, or_, select, update
 from sqlalchemy.orm import Session
-from portfolio_pilot_backend.models import User
+from portfolio_pilot_backend.models import User, UserIdAllocation
 
 class UserRepository:
     def __init__(self, session: Session):
@@ -28,9 +31,49 @@ class UserRepository:
         self.session.delete(user)
         self.session.flush()
 
+    def allocate_id(self, allocated_at: datetime) -> int:
+        """
+        Draws a new user id from the allocator table (sharded mode, see shard_router).
+        """
+        allocation = UserIdAllocation(allocated_at)
+        self.session.add(allocation)
+        self.session.flush()
+        return allocation.id
+
     def list_all(self) -> list[User]:
         return self.session.query(User).all()
 
+    def get_profile_row(self, user_id: int) -> Row | None:
+        return self.session.execute(
+            select(User.id, User.username, User.email, User.version).where(User.id == user_id)).first()
+
+    def get_version_row(self, user_id: int) -> Row | None:
+        return self.session.execute(select(User.version, User.updated_at).where(User.id == user_id)).first()
+
+    def list_profile_rows(self) -> list[Row]:
+        return list(self.session.execute(select(User.id, User.username, User.email, User.version)))
+
+    def set_last_seen(self, rows: list[dict]) -> int:
+        """
+        Stores many last-seen timestamps with one executemany UPDATE.
+
+        Bypasses the ORM so neither the row version nor updated_at change and
+        ETags of the user stay valid; older timestamps never overwrite newer ones.
+
+        Args:
+            rows: Dicts with user_id and seen_at.
+        """
+        if not rows:
+            return 0
+        table = User.__table__
+        statement = update(table) \
+            .where(table.c.id == bindparam("user_id"),
+                   or_(table.c.last_seen_at.is_(None), table.c.last_seen_at < bindparam("seen_at"))) \
+            .values(last_seen_at=bindparam("seen_at"), updated_at=table.c.updated_at)
+        result = self.session.execute(statement, rows)
+        self.session.flush()
+        return result.rowcount
+
 class UserRepositoryFactory():
     def create(self, session) -> UserRepository:
         return UserRepository(session)
\ No newline at end of file
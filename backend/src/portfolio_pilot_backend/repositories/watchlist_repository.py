@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.orm import Session
+from portfolio_pilot_backend.models import Watchlist
+
+class WatchlistRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def list_stock_ids(self, user_id: int) -> list[int]:
+        return list(self.session.scalars(
+            select(Watchlist.stock_id).where(Watchlist.user_id == user_id).order_by(Watchlist.stock_id)))
+
+    def add_pairs(self, pairs: list[tuple[int, int]], added_at: datetime) -> int:
+        """
+        Adds many (user_id, stock_id) entries at once; entries that already exist are kept.
+
+        Returns:
+            The number of inserted entries.
+        """
+        if not pairs:
+            return 0
+        existing = {(row.user_id, row.stock_id) for row in self.session.execute(
+            select(Watchlist.user_id, Watchlist.stock_id)
+            .where(tuple_(Watchlist.user_id, Watchlist.stock_id).in_(pairs)))}
+        rows = [{"user_id": user_id, "stock_id": stock_id, "added_at": added_at}
+                for user_id, stock_id in dict.fromkeys(pairs) if (user_id, stock_id) not in existing]
+        if rows:
+            self.session.execute(insert(Watchlist), rows)
+            self.session.flush()
+        return len(rows)
+
+    def remove_pairs(self, pairs: list[tuple[int, int]]) -> int:
+        """
+        Removes many (user_id, stock_id) entries with one DELETE; returns the number removed.
+        """
+        if not pairs:
+            return 0
+        result = self.session.execute(
+            delete(Watchlist).where(tuple_(Watchlist.user_id, Watchlist.stock_id).in_(pairs)))
+        self.session.flush()
+        return result.rowcount
+
+class WatchlistRepositoryFactory():
+    def create(self, session) -> WatchlistRepository:
+        return WatchlistRepository(session)
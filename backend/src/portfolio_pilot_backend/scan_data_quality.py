@@ -0,0 +1,45 @@
+"""
+Scans the price history for duplicates, calendar gaps, OHLC errors and return spikes.
+
+    python -m portfolio_pilot_backend.scan_data_quality --database-uri sqlite:///./app.db [--stock-id 1 ...] [--full]
+
+Only bars added since the previous scan are checked, so it can run after
+every ingestion; the issues are listed by GET /data-quality/report.
+"""
+import argparse
+import json
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from data_quality_service import DataQualityService
+from trading_calendar_service import TradingCalendarService
+from portfolio_pilot_backend.models import Base
+from portfolio_pilot_backend.repositories.data_quality_repository import DataQualityRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description="Scan historical_data for data-quality issues.")
+    parser.add_argument("--database-uri", default="sqlite:///./app.db")
+    parser.add_argument("--stock-id", type=int, action="append", dest="stock_ids",
+                        help="Scan only this stock; may be repeated.")
+    parser.add_argument("--full", action="store_true", help="Forget earlier results and scan the whole history.")
+    parser.add_argument("--z-threshold", type=float, default=6.0)
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_uri)
+    Base.metadata.create_all(bind=engine)
+    service = DataQualityService(DataQualityRepositoryFactory(), TradingCalendarService(StockRepositoryFactory()),
+                                 z_threshold=args.z_threshold)
+    with sessionmaker(bind=engine)() as session:
+        report, error_msg = service.scan(session, args.stock_ids, args.full)
+    engine.dispose()
+    if error_msg:
+        raise SystemExit(error_msg)
+    print(json.dumps(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()
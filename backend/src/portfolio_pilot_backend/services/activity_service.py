@@ -0,0 +1,75 @@
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from write_behind import ASYNC, WriteBehindQueue, WriteType
+from portfolio_pilot_backend.repositories.audit_event_repository import AuditEventRepositoryFactory
+from portfolio_pilot_backend.repositories.user_repository import UserRepositoryFactory
+
+logger = logging.getLogger(__name__)
+
+LAST_SEEN = "last_seen"
+AUDIT_EVENT = "audit_event"
+
+
+class ActivityService:
+    """
+    Records last-seen timestamps and audit events through the write-behind queue.
+
+    Neither write is needed by the request that causes it, so both default
+    to async durability and never add a commit to the request's latency.
+    """
+
+    def __init__(self, user_repository_factory: UserRepositoryFactory,
+                 audit_event_repository_factory: AuditEventRepositoryFactory, write_queue: WriteBehindQueue,
+                 last_seen_resolution: float = 60.0, last_seen_durability: str = ASYNC,
+                 audit_durability: str = ASYNC):
+        """
+        Args:
+            user_repository_factory: Factory for the user repository.
+            audit_event_repository_factory: Factory for the audit event repository.
+            write_queue: Queue both write types are registered with.
+            last_seen_resolution: Seconds within which further requests of a user do not queue a new timestamp.
+            last_seen_durability: Durability of last-seen writes.
+            audit_durability: Durability of audit events.
+        """
+        self.user_repository_factory = user_repository_factory
+        self.audit_event_repository_factory = audit_event_repository_factory
+        self.write_queue = write_queue
+        self.last_seen_resolution = last_seen_resolution
+        self._last_touched: dict[int, float] = {}
+        # Pro Benutzer wird nur der neueste Zeitstempel geschrieben.
+        write_queue.register(WriteType(LAST_SEEN, self.apply_last_seen, last_seen_durability,
+                                       lambda row: row["user_id"], lambda row: row["user_id"]))
+        write_queue.register(WriteType(AUDIT_EVENT, self.apply_audit_events, audit_durability))
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def touch_last_seen(self, user_id: int) -> None:
+        now = time.monotonic()
+        touched = self._last_touched.get(user_id)
+        if touched is not None and now - touched < self.last_seen_resolution:
+            return
+        self._last_touched[user_id] = now
+        try:
+            self.write_queue.submit(LAST_SEEN, {"user_id": user_id, "seen_at": self._now()})
+        except (RuntimeError, TimeoutError):
+            # Ein verlorener Zeitstempel wird mit der nächsten Anfrage nachgeholt, die Anfrage soll nicht scheitern.
+            self._last_touched.pop(user_id, None)
+            logger.warning("Skipped last-seen update of user %s", user_id, exc_info=True)
+
+    def record_event(self, user_id: int | None, action: str, details: dict | None = None) -> None:
+        self.write_queue.submit(AUDIT_EVENT, {"user_id": user_id, "action": action,
+                                              "details": json.dumps(details) if details else None,
+                                              "created_at": self._now()})
+
+    def apply_last_seen(self, session: Session, rows: list[dict]) -> None:
+        self.user_repository_factory.create(session).set_last_seen(rows)
+
+    def apply_audit_events(self, session: Session, rows: list[dict]) -> None:
+        self.audit_event_repository_factory.create(session).add_many(rows)
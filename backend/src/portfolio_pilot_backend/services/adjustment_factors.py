@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from price_series import PriceSeries
+
+
+@dataclass(frozen=True)
+class AdjustmentFactors:
+    """
+    Cumulative split/dividend factors of one stock, sorted by ex-date.
+
+    A bar dated d is multiplied by the factor of the first ex-date after d,
+    i.e. by the product of all events that happened after the bar. Bars on
+    or after the last ex-date stay unchanged.
+    """
+    ex_dates: np.ndarray
+    price: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ex_dates)
+
+    @classmethod
+    def identity(cls) -> "AdjustmentFactors":
+        return cls(np.empty(0, dtype="datetime64[s]"), np.empty(0), np.empty(0))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence) -> "AdjustmentFactors":
+        """
+        Builds the factors from (ex_date, price_factor, volume_factor) rows.
+        """
+        if not rows:
+            return cls.identity()
+        ex_dates, price, volume = zip(*rows)
+        return cls(np.array(ex_dates, dtype="datetime64[s]"), np.array(price, dtype=np.float64),
+                   np.array(volume, dtype=np.float64))
+
+    @classmethod
+    def from_events(cls, ex_dates: np.ndarray, price: np.ndarray, volume: np.ndarray) -> "AdjustmentFactors":
+        """
+        Accumulates per-event factors (sorted, one per distinct ex-date) from the newest event backwards.
+        """
+        return cls(ex_dates, np.cumprod(price[::-1])[::-1], np.cumprod(volume[::-1])[::-1])
+
+    def to_rows(self) -> list[dict]:
+        return [{"ex_date": ex_date, "price_factor": float(price), "volume_factor": float(volume)}
+                for ex_date, price, volume in zip(self.ex_dates.astype(object), self.price, self.volume)]
+
+    def factors_for(self, dates: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the price and volume factor of every date via one binary search over the ex-dates.
+        """
+        index = np.searchsorted(self.ex_dates, dates, side="right")
+        return np.append(self.price, 1.0)[index], np.append(self.volume, 1.0)[index]
+
+    def apply_to_row(self, dates: np.ndarray, columns: dict, row: int) -> None:
+        """
+        Adjusts one stock's row of aligned matrices in place (see AlignedPrices).
+
+        adj_close needs the close matrix in `columns`; it is recomputed like in `apply`.
+        """
+        if not len(self):
+            return
+        price, volume = self.factors_for(dates)
+        for field in ("open", "high", "low", "close"):
+            if field in columns:
+                columns[field][row] *= price
+        if "adj_close" in columns:
+            close = columns["close"][row]
+            columns["adj_close"][row] = np.where(np.isnan(close), columns["adj_close"][row], close)
+        if "volume" in columns:
+            columns["volume"][row] = np.rint(columns["volume"][row] * volume)
+
+    def apply(self, series: PriceSeries) -> PriceSeries:
+        """
+        Returns the series with split- and dividend-adjusted OHLC, adj_close and volume.
+
+        adj_close is recomputed from close; legacy bars without close keep their stored adj_close.
+        """
+        if not len(self) or not len(series):
+            return series
+        price, volume = self.factors_for(series.dates)
+        close = series.close * price
+        return PriceSeries(series.dates, series.open * price, series.high * price, series.low * price, close,
+                           np.where(np.isnan(close), series.adj_close, close),
+                           np.rint(series.volume * volume).astype(np.int64))
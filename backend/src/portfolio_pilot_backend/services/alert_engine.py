@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from alert_index import AlertIndex, FiredAlert
+from quote_hub import Quote
+from revocation_list import to_datetime
+from portfolio_pilot_backend.repositories.price_alert_repository import PriceAlertRepositoryFactory
+
+logger = logging.getLogger(__name__)
+
+
+class AlertEngine:
+    """
+    Evaluates price alerts against live tick batches and persists firings in batches.
+
+    Runs on the quote hub's event loop (see QuoteHub.add_listener). The
+    first tick of a stock only sets its reference price; from then on every
+    tick fires the alerts crossed since the previous one. Fired alerts are
+    buffered and written with one UPDATE per flush, every `flush_interval`
+    seconds or as soon as `flush_size` are pending; database work runs in
+    the default executor so ticks are never blocked by it.
+
+    New alerts are picked up by an incremental reload every `sync_interval`
+    seconds. Alerts deleted through the API stay indexed until they fire;
+    their UPDATE then matches no row.
+    """
+
+    def __init__(self, price_alert_repository_factory: PriceAlertRepositoryFactory, session_factory,
+                 flush_size: int = 1000, flush_interval: float = 1.0, sync_interval: float = 5.0, clock=time.time):
+        self.price_alert_repository_factory = price_alert_repository_factory
+        self.session_factory = session_factory
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self.index = AlertIndex()
+        self.fired = 0
+        self.persisted = 0
+        self._last_prices: dict[int, float] = {}
+        self._pending: list[FiredAlert] = []
+        self._recently_fired: dict[int, float] = {}
+        self._flush_requested = asyncio.Event()
+        self._synced_until: datetime | None = None
+        self._last_sync: float | None = None
+
+    def load(self) -> int:
+        """
+        Builds the index from all active alerts; returns their number.
+        """
+        now = self.clock()
+        with self.session_factory() as session:
+            rows = self.price_alert_repository_factory.create(session).list_active_rows()
+        self.index = AlertIndex.from_rows(rows)
+        self._synced_until, self._last_sync = to_datetime(now), now
+        return len(rows)
+
+    def fetch_new_rows(self) -> tuple[list, float]:
+        """
+        Reads alerts created since the last sync; touches no engine state, so it may run in a thread.
+        """
+        now = self.clock()
+        # Überlappendes Fenster wie bei der RevocationList: spät committete Alarme gehen nicht verloren.
+        since = self._synced_until - timedelta(seconds=self.sync_interval) if self._synced_until else None
+        with self.session_factory() as session:
+            return self.price_alert_repository_factory.create(session).list_active_rows(since), now
+
+    def apply_rows(self, rows: Iterable, synced_at: float) -> int:
+        cutoff = synced_at - 2 * self.sync_interval
+        self._recently_fired = {alert_id: at for alert_id, at in self._recently_fired.items() if at > cutoff}
+        added = 0
+        for alert_id, user_id, stock_id, direction, threshold in rows:
+            # Bereits ausgelöste, aber noch nicht gespeicherte Alarme nicht erneut aufnehmen.
+            if alert_id not in self._recently_fired:
+                added += self.index.add(alert_id, user_id, stock_id, direction, threshold)
+        self._synced_until, self._last_sync = to_datetime(synced_at), synced_at
+        return added
+
+    def sync(self) -> int:
+        return self.apply_rows(*self.fetch_new_rows())
+
+    def on_ticks(self, quotes: Iterable[Quote]) -> list[FiredAlert]:
+        """
+        Evaluates one tick batch; returns the alerts it fired.
+        """
+        fired = []
+        last_prices = self._last_prices
+        evaluate = self.index.evaluate
+        for quote in quotes:
+            previous = last_prices.get(quote.stock_id)
+            last_prices[quote.stock_id] = quote.price
+            if previous is not None and previous != quote.price:
+                crossed = evaluate(quote.stock_id, previous, quote.price, quote.timestamp)
+                if crossed:
+                    fired.extend(crossed)
+        if fired:
+            now = self.clock()
+            self._pending.extend(fired)
+            self._recently_fired.update((alert.alert_id, now) for alert in fired)
+            self.fired += len(fired)
+            if len(self._pending) >= self.flush_size:
+                self._flush_requested.set()
+        return fired
+
+    def take_pending(self) -> list[FiredAlert]:
+        pending, self._pending = self._pending, []
+        return pending
+
+    def persist(self, fired: list[FiredAlert]) -> int:
+        """
+        Writes a batch of firings in one transaction; returns the number of alerts that were still active.
+        """
+        if not fired:
+            return 0
+        with self.session_factory() as session:
+            updated = self.price_alert_repository_factory.create(session).mark_triggered(
+                [{"alert_id": alert.alert_id, "fired_at": to_datetime(alert.timestamp), "fired_price": alert.price}
+                 for alert in fired])
+            session.commit()
+        self.persisted += updated
+        return updated
+
+    def flush(self) -> int:
+        batch = self.take_pending()
+        try:
+            return self.persist(batch)
+        except Exception:
+            logger.exception("Persisting %d fired alerts failed", len(batch))
+            self._pending[:0] = batch
+            return 0
+
+    async def run(self) -> None:
+        """
+        Flushes and syncs until cancelled; remaining firings are flushed on the way out.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_requested.clear()
+                batch = self.take_pending()
+                try:
+                    await loop.run_in_executor(None, self.persist, batch)
+                except Exception:
+                    logger.exception("Persisting %d fired alerts failed", len(batch))
+                    self._pending[:0] = batch
+                if self._last_sync is None or self.clock() - self._last_sync >= self.sync_interval:
+                    try:
+                        self.apply_rows(*await loop.run_in_executor(None, self.fetch_new_rows))
+                    except Exception:
+                        logger.exception("Alert sync failed")
+                        self._last_sync = self.clock()
+        finally:
+            self.flush()
@@ -0,0 +1,149 @@
+"""
+Sorted threshold arrays for evaluating price alerts per tick.
+
+Per stock and direction the index holds the thresholds of all active alerts
+as one sorted float64 array, with alert and user ids in parallel arrays. A
+price move from `previous` to `current` crosses exactly the thresholds in
+one contiguous slice of that array, so a tick costs two binary searches no
+matter how many alerts the stock has, and firing removes that slice at once:
+
+    above:  previous <  threshold <= current   (price rises through it)
+    below:  current  <= threshold <  previous  (price falls through it)
+"""
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+ABOVE = "above"
+BELOW = "below"
+DIRECTIONS = (ABOVE, BELOW)
+
+
+class FiredAlert(NamedTuple):
+    alert_id: int
+    user_id: int
+    stock_id: int
+    direction: str
+    threshold: float
+    price: float
+    timestamp: float
+
+
+class _Book:
+    __slots__ = ("thresholds", "alert_ids", "user_ids")
+
+    def __init__(self, thresholds: np.ndarray, alert_ids: np.ndarray, user_ids: np.ndarray):
+        self.thresholds = thresholds
+        self.alert_ids = alert_ids
+        self.user_ids = user_ids
+
+    def __len__(self) -> int:
+        return len(self.thresholds)
+
+    def insert(self, threshold: float, alert_id: int, user_id: int) -> None:
+        position = int(self.thresholds.searchsorted(threshold, side="right"))
+        self.thresholds = np.insert(self.thresholds, position, threshold)
+        self.alert_ids = np.insert(self.alert_ids, position, alert_id)
+        self.user_ids = np.insert(self.user_ids, position, user_id)
+
+    def cut(self, start: int, stop: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        taken = self.thresholds[start:stop], self.alert_ids[start:stop], self.user_ids[start:stop]
+        self.thresholds = np.concatenate((self.thresholds[:start], self.thresholds[stop:]))
+        self.alert_ids = np.concatenate((self.alert_ids[:start], self.alert_ids[stop:]))
+        self.user_ids = np.concatenate((self.user_ids[:start], self.user_ids[stop:]))
+        return taken
+
+
+class AlertIndex:
+    """
+    Active alerts of all stocks; not thread-safe, owned by one event loop or thread.
+    """
+
+    def __init__(self):
+        self._books: dict[str, dict[int, _Book]] = {ABOVE: {}, BELOW: {}}
+
+    def __len__(self) -> int:
+        return sum(len(book) for books in self._books.values() for book in books.values())
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> "AlertIndex":
+        """
+        Builds the index from (id, user_id, stock_id, direction, threshold) rows with one sort per direction.
+        """
+        index = cls()
+        rows = list(rows)
+        if not rows:
+            return index
+        alert_ids, user_ids, stock_ids, directions, thresholds = zip(*rows)
+        alert_ids = np.array(alert_ids, dtype=np.int64)
+        user_ids = np.array(user_ids, dtype=np.int64)
+        stock_ids = np.array(stock_ids, dtype=np.int64)
+        thresholds = np.array(thresholds, dtype=np.float64)
+        directions = np.array(directions)
+        for direction in DIRECTIONS:
+            selected = np.flatnonzero(directions == direction)
+            if not len(selected):
+                continue
+            order = selected[np.lexsort((thresholds[selected], stock_ids[selected]))]
+            books_stock_ids, starts = np.unique(stock_ids[order], return_index=True)
+            for stock_id, part in zip(books_stock_ids.tolist(), np.split(order, starts[1:])):
+                index._books[direction][stock_id] = _Book(thresholds[part], alert_ids[part], user_ids[part])
+        return index
+
+    def contains(self, alert_id: int, stock_id: int, direction: str) -> bool:
+        book = self._books[direction].get(stock_id)
+        return book is not None and bool((book.alert_ids == alert_id).any())
+
+    def add(self, alert_id: int, user_id: int, stock_id: int, direction: str, threshold: float) -> bool:
+        """
+        Adds an alert; returns False if it is already indexed.
+        """
+        books = self._books[direction]
+        book = books.get(stock_id)
+        if book is None:
+            books[stock_id] = _Book(np.array([threshold], dtype=np.float64), np.array([alert_id], dtype=np.int64),
+                                    np.array([user_id], dtype=np.int64))
+            return True
+        if (book.alert_ids == alert_id).any():
+            return False
+        book.insert(threshold, alert_id, user_id)
+        return True
+
+    def remove(self, alert_id: int, stock_id: int, direction: str) -> bool:
+        books = self._books[direction]
+        book = books.get(stock_id)
+        if book is None:
+            return False
+        positions = np.flatnonzero(book.alert_ids == alert_id)
+        if not len(positions):
+            return False
+        book.cut(int(positions[0]), int(positions[0]) + 1)
+        if not len(book):
+            del books[stock_id]
+        return True
+
+    def evaluate(self, stock_id: int, previous: float, current: float, timestamp: float) -> list[FiredAlert]:
+        """
+        Fires and removes every alert of the stock whose threshold lies between the two prices.
+        """
+        if current > previous:
+            direction = ABOVE
+            book = self._books[ABOVE].get(stock_id)
+            if book is None:
+                return []
+            start, stop = book.thresholds.searchsorted((previous, current), side="right")
+        elif current < previous:
+            direction = BELOW
+            book = self._books[BELOW].get(stock_id)
+            if book is None:
+                return []
+            start, stop = book.thresholds.searchsorted((current, previous), side="left")
+        else:
+            return []
+        if start == stop:
+            return []
+        thresholds, alert_ids, user_ids = book.cut(int(start), int(stop))
+        if not len(book):
+            del self._books[direction][stock_id]
+        return [FiredAlert(alert_id, user_id, stock_id, direction, threshold, current, timestamp)
+                for alert_id, user_id, threshold in zip(alert_ids.tolist(), user_ids.tolist(), thresholds.tolist())]
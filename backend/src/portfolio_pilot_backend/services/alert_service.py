@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from alert_index import DIRECTIONS
+from portfolio_pilot_backend.models import PriceAlert
+from portfolio_pilot_backend.repositories.price_alert_repository import PriceAlertRepository, \
+    PriceAlertRepositoryFactory
+
+MAX_ACTIVE_ALERTS_PER_USER = 200
+
+class AlertService:
+    def __init__(self, price_alert_repository_factory: PriceAlertRepositoryFactory):
+        self.price_alert_repository_factory = price_alert_repository_factory
+
+    def create_price_alert_repository(self, session: Session) -> PriceAlertRepository:
+        return self.price_alert_repository_factory.create(session)
+
+    def list_alerts(self, session: Session, user_id: int) -> list[PriceAlert]:
+        return self.create_price_alert_repository(session).list_for_user(user_id)
+
+    def validate_alert(self, direction: str | None, threshold: float | None) -> str | None:
+        if direction not in DIRECTIONS:
+            return f"Richtung muss eine von {', '.join(DIRECTIONS)} sein."
+        if threshold is None or not threshold > 0:
+            return "Schwelle muss größer als 0 sein."
+        return None
+
+    def create_alert(self, session: Session, user_id: int, stock_id: int, direction: str | None,
+                     threshold: float | None) -> tuple[PriceAlert | None, str | None]:
+        validation_msg = self.validate_alert(direction, threshold)
+        if validation_msg:
+            return None, validation_msg
+        repository = self.create_price_alert_repository(session)
+        if repository.count_active_for_user(user_id) >= MAX_ACTIVE_ALERTS_PER_USER:
+            return None, f"Es sind höchstens {MAX_ACTIVE_ALERTS_PER_USER} aktive Alarme erlaubt."
+        # created_at kommt von der Anwendung, der Quote-Server synchronisiert inkrementell darüber.
+        alert = PriceAlert(user_id, stock_id, direction, threshold, datetime.now(timezone.utc).replace(tzinfo=None))
+        try:
+            repository.add(alert)
+            session.commit()
+            return alert, None
+        except Exception as e:
+            session.rollback()
+            return None, f"Fehler beim Speichern des Alarms: {e}"
+
+    def delete_alert(self, session: Session, user_id: int, alert_id: int) -> bool:
+        repository = self.create_price_alert_repository(session)
+        alert = repository.get_by_id(alert_id)
+        if alert is None or alert.user_id != user_id:
+            return False
+        repository.delete(alert)
+        session.commit()
+        return True
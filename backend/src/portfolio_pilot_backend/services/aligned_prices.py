@@ -0,0 +1,114 @@
+from dataclasses import dataclass, replace
+from typing import Sequence
+
+import numpy as np
+
+from price_series import PRICE_FIELDS
+from trading_calendar import TradingCalendar
+
+
+def forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """
+    Fills NaN gaps of every row with the last value before them (leading NaNs stay).
+    """
+    positions = np.where(np.isnan(matrix), 0, np.arange(matrix.shape[1]))
+    np.maximum.accumulate(positions, axis=1, out=positions)
+    return matrix[np.arange(matrix.shape[0])[:, None], positions]
+
+
+@dataclass(frozen=True)
+class AlignedPrices:
+    """
+    Bars of several stocks on one shared date axis.
+
+    `dates` is the sorted union of all bar dates (datetime64[s]), or the
+    sessions of a trading calendar; every column is a float64 matrix of
+    shape (len(stock_ids), len(dates)) with NaN where a stock has no bar on
+    that date.
+    """
+    stock_ids: np.ndarray
+    dates: np.ndarray
+    columns: dict
+
+    @classmethod
+    def from_flat(cls, stock_ids: Sequence[int], bar_stock_ids: np.ndarray, bar_dates: np.ndarray,
+                  bar_columns: dict) -> "AlignedPrices":
+        """
+        Scatters flat bar columns (one entry per bar of any stock) into the aligned matrices.
+
+        Args:
+            stock_ids: Row order of the result.
+            bar_stock_ids: Stock id of every bar.
+            bar_dates: Date of every bar as datetime64[s].
+            bar_columns: Field name to the values of every bar.
+        """
+        stock_ids = np.asarray(stock_ids, dtype=np.int64)
+        dates, date_index = np.unique(bar_dates, return_inverse=True)
+        order = np.argsort(stock_ids, kind="stable")
+        row_index = order[np.searchsorted(stock_ids, bar_stock_ids, sorter=order)]
+        columns = {}
+        for field, values in bar_columns.items():
+            matrix = np.full((len(stock_ids), len(dates)), np.nan)
+            matrix[row_index, date_index] = values
+            columns[field] = matrix
+        return cls(stock_ids, dates.astype("datetime64[s]"), columns)
+
+    @classmethod
+    def on_calendar(cls, stock_ids: Sequence[int], bar_stock_ids: np.ndarray, bar_dates: np.ndarray,
+                    bar_columns: dict, calendar: TradingCalendar, start=None, end=None) -> "AlignedPrices":
+        """
+        Scatters flat bar columns onto the sessions of a calendar between start and end.
+
+        Every bar's column is its session index, so no dates are sorted or
+        joined. Without start or end the range of the bars is used; bars on
+        days the calendar has no session for are dropped.
+        """
+        stock_ids = np.asarray(stock_ids, dtype=np.int64)
+        if len(bar_dates):
+            start = bar_dates.min() if start is None else start
+            end = bar_dates.max() if end is None else end
+        if start is None or end is None:
+            lo = hi = 0
+        else:
+            lo, hi = calendar.bounds(start, end)
+        order = np.argsort(stock_ids, kind="stable")
+        row_index = order[np.searchsorted(stock_ids, bar_stock_ids, sorter=order)]
+        columns = {field: calendar.scatter(row_index, bar_dates, values, len(stock_ids), lo, hi)
+                   for field, values in bar_columns.items()}
+        return cls(stock_ids, calendar.sessions[lo:hi].astype("datetime64[s]"), columns)
+
+    def filled(self) -> "AlignedPrices":
+        """
+        Carries every price forward over sessions without a bar; volume is 0 on those sessions.
+        """
+        return replace(self, columns={field: forward_fill(matrix) if field in PRICE_FIELDS
+                                      else np.nan_to_num(matrix) for field, matrix in self.columns.items()})
+
+    def take(self, positions: np.ndarray) -> "AlignedPrices":
+        """
+        Keeps only the given date positions, e.g. the last session of every week or month.
+        """
+        return replace(self, dates=self.dates[positions],
+                       columns={field: matrix[:, positions] for field, matrix in self.columns.items()})
+
+    def scaled(self, factors: np.ndarray) -> "AlignedPrices":
+        """
+        Multiplies every price column by a (stocks x dates) factor matrix, e.g. FX rates; volumes are kept.
+        """
+        return replace(self, columns={field: matrix * factors if field in PRICE_FIELDS else matrix
+                                      for field, matrix in self.columns.items()})
+
+    def to_payload(self, symbols: Sequence[str]) -> dict:
+        """
+        Converts to a JSON-ready columnar dict: field -> one list per symbol, gaps as None.
+        """
+        fields = {}
+        for field, matrix in self.columns.items():
+            missing = np.isnan(matrix)
+            if field in PRICE_FIELDS:
+                values = matrix
+            else:
+                values = np.nan_to_num(matrix).astype(np.int64)
+            fields[field] = np.where(missing, None, values).tolist() if missing.any() else values.tolist()
+        return {"dates": np.datetime_as_string(self.dates, unit="D").tolist(), "symbols": list(symbols),
+                "fields": fields}
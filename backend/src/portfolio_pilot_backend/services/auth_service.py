@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+
+from password_hasher import PasswordHasher
 from portfolio_pilot_backend.models import User
 
 class IAuthService(ABC):
@@ -10,10 +12,19 @@ class IAuthService(ABC):
     def hash_password(self, param: str) -> str:
         pass
 
+    @abstractmethod
+    def needs_rehash(self, user: User) -> bool:
+        pass
+
 class AuthService(IAuthService):
+    def __init__(self, password_hasher: PasswordHasher | None = None):
+        self.password_hasher = password_hasher if password_hasher is not None else PasswordHasher()
+
     def hash_password(self, param: str) -> str:
-        return param
+        return self.password_hasher.hash(param)
 
     def authenticate(self, user, password_hash: str) -> bool:
-        return user.password_hash == password_hash
+        return self.password_hasher.verify(user.password_hash, password_hash)
 
+    def needs_rehash(self, user) -> bool:
+        return self.password_hasher.needs_rehash(user.password_hash)
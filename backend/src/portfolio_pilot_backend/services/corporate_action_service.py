@@ -0,0 +1,187 @@
+import threading
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from adjustment_factors import AdjustmentFactors
+from aligned_prices import AlignedPrices
+from price_history_service import PriceHistoryService
+from price_series import PriceSeries
+from trading_calendar import TradingCalendar
+from portfolio_pilot_backend.models import Dividend, Split
+from portfolio_pilot_backend.repositories.corporate_action_repository import CorporateActionRepository, \
+    CorporateActionRepositoryFactory
+
+class CorporateActionService:
+    """
+    Records splits and dividends and adjusts price history on read.
+
+    The stored bars stay unadjusted. Every corporate action recomputes the
+    stock's few cumulative adjustment_factors rows; reads multiply the bars
+    with those factors. Factor vectors are cached per stock and versioned
+    like the ReferenceDataCache, so a slow read never caches stale factors.
+    """
+
+    def __init__(self, corporate_action_repository_factory: CorporateActionRepositoryFactory,
+                 price_history_service: PriceHistoryService):
+        self.corporate_action_repository_factory = corporate_action_repository_factory
+        self.price_history_service = price_history_service
+        self._lock = threading.Lock()
+        self._factors: dict[int, AdjustmentFactors] = {}
+        self._versions: dict[int, int] = {}
+        self._listeners: list = []
+
+    def add_listener(self, listener) -> None:
+        """
+        Registers a callable(action) notified after every committed split or dividend.
+        """
+        self._listeners.append(listener)
+
+    def create_corporate_action_repository(self, session: Session) -> CorporateActionRepository:
+        return self.corporate_action_repository_factory.create(session)
+
+    def list_actions(self, session: Session, stock_id: int) -> tuple[list[Split], list[Dividend]]:
+        repository = self.create_corporate_action_repository(session)
+        return repository.list_splits(stock_id), repository.list_dividends(stock_id)
+
+    def get_factors(self, session: Session, stock_id: int) -> AdjustmentFactors:
+        factors = self._factors.get(stock_id)
+        if factors is not None:
+            return factors
+        version = self._versions.get(stock_id, 0)
+        factors = AdjustmentFactors.from_rows(
+            self.create_corporate_action_repository(session).get_factor_rows(stock_id))
+        with self._lock:
+            if self._versions.get(stock_id, 0) == version:
+                self._factors[stock_id] = factors
+        return factors
+
+    def get_factors_for_stocks(self, session: Session, stock_ids: list[int]) -> dict[int, AdjustmentFactors]:
+        """
+        Returns the factors of several stocks; all cache misses are loaded with a single query.
+        """
+        result = {stock_id: self._factors[stock_id] for stock_id in stock_ids if stock_id in self._factors}
+        missing = [stock_id for stock_id in stock_ids if stock_id not in result]
+        if not missing:
+            return result
+        versions = {stock_id: self._versions.get(stock_id, 0) for stock_id in missing}
+        rows = self.create_corporate_action_repository(session).get_factor_rows_for_stocks(missing)
+        loaded = {stock_id: AdjustmentFactors.from_rows([row[1:] for row in group])
+                  for stock_id, group in groupby(rows, key=itemgetter(0))}
+        with self._lock:
+            for stock_id in missing:
+                factors = loaded.get(stock_id, AdjustmentFactors.identity())
+                if self._versions.get(stock_id, 0) == versions[stock_id]:
+                    self._factors[stock_id] = factors
+                result[stock_id] = factors
+        return result
+
+    def invalidate(self, stock_id: int) -> None:
+        with self._lock:
+            self._versions[stock_id] = self._versions.get(stock_id, 0) + 1
+            self._factors.pop(stock_id, None)
+
+    def get_adjusted_series(self, session: Session, stock_id: int, start: datetime | None = None,
+                            end: datetime | None = None) -> PriceSeries:
+        series = self.price_history_service.get_series(session, stock_id, start, end)
+        return self.get_factors(session, stock_id).apply(series)
+
+    def get_adjusted_aligned(self, session: Session, stock_ids: list[int], fields: tuple[str, ...],
+                             start: datetime | None = None, end: datetime | None = None,
+                             calendar: TradingCalendar | None = None) -> AlignedPrices:
+        # Für adj_close wird close mitgeladen, weil der bereinigte Wert daraus berechnet wird.
+        load_fields = fields + ("close",) if "adj_close" in fields and "close" not in fields else fields
+        aligned = self.price_history_service.get_aligned(session, stock_ids, load_fields, start, end, calendar)
+        factors = self.get_factors_for_stocks(session, list(stock_ids))
+        for row, stock_id in enumerate(aligned.stock_ids.tolist()):
+            factors[stock_id].apply_to_row(aligned.dates, aligned.columns, row)
+        if load_fields is not fields:
+            aligned.columns.pop("close")
+        return aligned
+
+    def add_split(self, session: Session, stock_id: int, ex_date: datetime | None,
+                  ratio: float | None) -> tuple[Split | None, str | None]:
+        if ex_date is None:
+            return None, "Ex-Datum muss angegeben werden."
+        if ratio is None or ratio <= 0:
+            return None, "Das Split-Verhältnis muss größer als 0 sein."
+        repository = self.create_corporate_action_repository(session)
+        if repository.get_split(stock_id, ex_date):
+            return None, "Für dieses Datum ist bereits ein Split erfasst."
+        return self._add_action(session, repository, Split(stock_id, ex_date, ratio), "des Splits")
+
+    def add_dividend(self, session: Session, stock_id: int, ex_date: datetime | None,
+                     amount: float | None) -> tuple[Dividend | None, str | None]:
+        if ex_date is None:
+            return None, "Ex-Datum muss angegeben werden."
+        if amount is None or amount <= 0:
+            return None, "Der Dividendenbetrag muss größer als 0 sein."
+        repository = self.create_corporate_action_repository(session)
+        if repository.get_dividend(stock_id, ex_date):
+            return None, "Für dieses Datum ist bereits eine Dividende erfasst."
+        return self._add_action(session, repository, Dividend(stock_id, ex_date, amount), "der Dividende")
+
+    def _add_action(self, session: Session, repository: CorporateActionRepository, action: Split | Dividend,
+                    label: str) -> tuple[Split | Dividend | None, str | None]:
+        try:
+            repository.add(action)
+            self.recompute_factors(session, action.stock_id)
+            self.price_history_service.touch_series(session, action.stock_id)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            return None, f"Fehler beim Speichern {label}: {e}"
+        # Der Cache wird erst nach dem Commit verworfen, damit er nie ungespeicherte Faktoren lädt.
+        self.invalidate(action.stock_id)
+        for listener in self._listeners:
+            listener(action)
+        return action, None
+
+    def bars_changed(self, session: Session, stock_id: int) -> None:
+        """
+        Refreshes the factors after new bars; dividend factors depend on the close before the ex-date.
+        """
+        if not self.create_corporate_action_repository(session).has_dividends(stock_id):
+            return
+        self.recompute_factors(session, stock_id)
+        session.commit()
+        self.invalidate(stock_id)
+
+    def recompute_factors(self, session: Session, stock_id: int) -> AdjustmentFactors:
+        """
+        Rebuilds the cumulative adjustment_factors rows of a stock from its splits and dividends.
+
+        A split with ratio r scales earlier prices by 1/r and volumes by r. A
+        dividend D scales earlier prices by 1 - D / close, using the last close
+        before the ex-date; without such a bar the dividend is ignored until
+        history is added.
+        """
+        repository = self.create_corporate_action_repository(session)
+        events: dict[np.datetime64, list[float]] = {}
+        for split in repository.list_splits(stock_id):
+            event = events.setdefault(np.datetime64(split.ex_date, "s"), [1.0, 1.0])
+            event[0] /= split.ratio
+            event[1] *= split.ratio
+
+        dividends = repository.list_dividends(stock_id)
+        if dividends:
+            ex_dates = np.array([dividend.ex_date for dividend in dividends], dtype="datetime64[s]")
+            history = self.price_history_service.get_series(session, stock_id, None, dividends[-1].ex_date)
+            closes = np.where(np.isnan(history.close), history.adj_close, history.close)
+            previous = np.searchsorted(history.dates, ex_dates, side="left") - 1
+            prior_close = np.where(previous >= 0, np.append(closes, np.nan)[previous], np.nan)
+            factors = 1.0 - np.array([dividend.amount for dividend in dividends]) / prior_close
+            for ex_date, factor in zip(ex_dates, factors):
+                if 0.0 < factor < 1.0:
+                    events.setdefault(ex_date, [1.0, 1.0])[0] *= factor
+
+        ordered = sorted(events)
+        factors = AdjustmentFactors.from_events(
+            np.array(ordered, dtype="datetime64[s]"),
+            np.array([events[ex_date][0] for ex_date in ordered], dtype=np.float64),
+            np.array([events[ex_date][1] for ex_date in ordered], dtype=np.float64))
+        repository.replace_factors(stock_id, factors.to_rows())
+        return factors
@@ -0,0 +1,259 @@
+"""
+Blockwise correlation and covariance of many return series, stored as a memory-mapped matrix.
+
+The N x N result of a universe of thousands of stocks is the large part, not
+the N x T returns: it is written block by block into a float32 .npy file
+opened with np.lib.format.open_memmap and later read back with mmap_mode="r",
+so neither building nor querying holds the whole matrix in memory. Every
+block pair (rows a, rows b) is computed with a handful of matrix products,
+which numpy runs outside the GIL; a thread pool therefore spreads the
+blocks over all cores while sharing the returns and the output file.
+
+Stocks have histories of different lengths, so statistics are
+pairwise-complete: for every pair only the sessions where both returns exist
+count. With X the returns (0 where missing) and M the masks of present
+values, the pair sums are products of X, X * X and M:
+
+    n = Ma Mb'   sx = Xa Mb'   sy = Ma Xb'   sxx = Xa² Mb'   syy = Ma Xb²'   sxy = Xa Xb'
+
+Pairs with fewer than `min_observations` common returns are NaN.
+
+Hierarchical clustering groups a few stocks (e.g. a watchlist) by average
+linkage on the correlation distance sqrt((1 - rho) / 2); merging stops at
+the distance of `min_correlation`, so every cluster is a group of stocks
+that move together and a watchlist with few, large clusters is poorly
+diversified.
+"""
+import json
+import os
+from concurrent.futures import Executor
+from datetime import datetime, timezone
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+CORRELATION = "correlation"
+COVARIANCE = "covariance"
+KINDS = (CORRELATION, COVARIANCE)
+
+MATRIX_FILE = "matrix.npy"
+STOCK_IDS_FILE = "stock_ids.npy"
+META_FILE = "meta.json"
+
+
+def log_returns(closes: np.ndarray) -> np.ndarray:
+    """
+    Daily log returns of a (stocks x sessions) close matrix; NaN where either close is missing.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(closes), axis=1)
+    returns[~np.isfinite(returns)] = np.nan
+    return returns
+
+
+def block_statistic(a: np.ndarray, b: np.ndarray, kind: str = CORRELATION, min_observations: int = 20) -> np.ndarray:
+    """
+    Pairwise-complete correlation or covariance between the rows of two return blocks.
+    """
+    mask_a, mask_b = (~np.isnan(a)).astype(np.float64), (~np.isnan(b)).astype(np.float64)
+    x, y = np.nan_to_num(a.astype(np.float64)), np.nan_to_num(b.astype(np.float64))
+    n = mask_a @ mask_b.T
+    sx, sy = x @ mask_b.T, mask_a @ y.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = (x @ y.T - sx * sy / n) / (n - 1)
+        if kind == COVARIANCE:
+            result = covariance
+        else:
+            var_x = ((x * x) @ mask_b.T - sx * sx / n) / (n - 1)
+            var_y = (mask_a @ (y * y).T - sy * sy / n) / (n - 1)
+            result = np.clip(covariance / np.sqrt(var_x * var_y), -1.0, 1.0)
+    result[(n < max(min_observations, 2)) | ~np.isfinite(result)] = np.nan
+    return result
+
+
+def compute_blockwise(returns: np.ndarray, out: np.ndarray, kind: str = CORRELATION, block_size: int = 512,
+                      min_observations: int = 20, executor: Executor | None = None) -> None:
+    """
+    Fills the symmetric (stocks x stocks) `out`, e.g. a memmap, one block pair at a time.
+
+    Only pairs on and above the diagonal are computed, each block is
+    mirrored into its transposed position. Blocks write disjoint regions of
+    `out`, so they can run in parallel on a thread pool.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind: {kind}")
+    starts = range(0, len(returns), block_size)
+    pairs = [(i, j) for i in starts for j in starts if j >= i]
+
+    def run(pair: tuple[int, int]) -> None:
+        i, j = pair
+        block = block_statistic(returns[i:i + block_size], returns[j:j + block_size], kind, min_observations)
+        out[i:i + block_size, j:j + block_size] = block
+        if i != j:
+            out[j:j + block_size, i:i + block_size] = block.T
+
+    if executor is None:
+        for pair in pairs:
+            run(pair)
+    else:
+        # list() holt Ausnahmen der Blöcke in den aufrufenden Thread.
+        list(executor.map(run, pairs))
+
+
+class CorrelationMatrix(NamedTuple):
+    """
+    A stored matrix: row and column i belong to stock_ids[i]; `values` is a read-only memmap.
+    """
+    stock_ids: np.ndarray
+    values: np.ndarray
+    meta: dict
+
+    @classmethod
+    def open(cls, directory: str) -> "CorrelationMatrix | None":
+        if not os.path.exists(os.path.join(directory, META_FILE)):
+            return None
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as file:
+            meta = json.load(file)
+        return cls(np.load(os.path.join(directory, STOCK_IDS_FILE)),
+                   np.load(os.path.join(directory, MATRIX_FILE), mmap_mode="r"), meta)
+
+    @staticmethod
+    def create(directory: str, stock_ids: Sequence[int], returns: np.ndarray, meta: dict, kind: str = CORRELATION,
+               block_size: int = 512, min_observations: int = 20, executor: Executor | None = None) -> dict:
+        """
+        Computes the matrix of `returns` (one row per stock id) into `directory`.
+
+        The files are written under temporary names and renamed at the end,
+        the metadata last, so readers only ever open a complete matrix.
+
+        Returns:
+            The stored metadata.
+        """
+        os.makedirs(directory, exist_ok=True)
+        meta = dict(meta, kind=kind, stocks=len(stock_ids), min_observations=min_observations,
+                    built_at=datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds"))
+        paths = {name: os.path.join(directory, name) for name in (MATRIX_FILE, STOCK_IDS_FILE, META_FILE)}
+        out = np.lib.format.open_memmap(paths[MATRIX_FILE] + ".tmp", mode="w+", dtype=np.float32,
+                                        shape=(len(stock_ids), len(stock_ids)))
+        compute_blockwise(returns, out, kind, block_size, min_observations, executor)
+        out.flush()
+        del out
+        with open(paths[STOCK_IDS_FILE] + ".tmp", "wb") as file:
+            np.save(file, np.asarray(stock_ids, dtype=np.int64))
+        with open(paths[META_FILE] + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        for path in paths.values():
+            os.replace(path + ".tmp", path)
+        return meta
+
+    @staticmethod
+    def mark_stale(directory: str) -> None:
+        """
+        Flags the stored matrix as outdated in its metadata; the next build writes fresh metadata.
+        """
+        path = os.path.join(directory, META_FILE)
+        with open(path, encoding="utf-8") as file:
+            meta = json.load(file)
+        meta["stale"] = True
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        os.replace(path + ".tmp", path)
+
+    def positions(self, stock_ids: Sequence[int]) -> np.ndarray:
+        """
+        Row of every stock id, -1 for stocks that are not in the matrix.
+        """
+        ids = np.asarray(stock_ids, dtype=np.int64)
+        if not len(self.stock_ids):
+            return np.full(len(ids), -1)
+        order = np.argsort(self.stock_ids, kind="stable")
+        rows = order[np.minimum(np.searchsorted(self.stock_ids, ids, sorter=order), len(order) - 1)]
+        return np.where(self.stock_ids[rows] == ids, rows, -1)
+
+    def top_k(self, stock_id: int, k: int = 10, absolute: bool = False) -> list[tuple[int, float]] | None:
+        """
+        The k stocks with the highest (absolute) value against `stock_id`; None if it is not in the matrix.
+
+        Reads one row of the memmap and selects with argpartition, O(N).
+        """
+        row = int(self.positions([stock_id])[0])
+        if row < 0:
+            return None
+        values = np.array(self.values[row], dtype=np.float64)
+        values[row] = np.nan
+        keys = np.abs(values) if absolute else values.copy()
+        keys[np.isnan(keys)] = -np.inf
+        k = min(k, int(np.isfinite(keys).sum()))
+        if k <= 0:
+            return []
+        best = np.argpartition(-keys, k - 1)[:k]
+        best = best[np.argsort(-keys[best], kind="stable")]
+        return [(int(self.stock_ids[i]), float(values[i])) for i in best]
+
+    def least_correlated(self, stock_ids: Sequence[int], k: int = 5) -> list[tuple[int, float]]:
+        """
+        The k stocks outside `stock_ids` with the lowest mean value against them, e.g. diversification candidates.
+        """
+        rows = self.positions(stock_ids)
+        rows = rows[rows >= 0]
+        if not len(rows):
+            return []
+        values = np.asarray(self.values[np.sort(rows)], dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.nansum(values, axis=0) / (~np.isnan(values)).sum(axis=0)
+        mean[rows] = np.nan
+        keys = np.where(np.isnan(mean), np.inf, mean)
+        k = min(k, int(np.isfinite(keys).sum()))
+        if k <= 0:
+            return []
+        best = np.argpartition(keys, k - 1)[:k]
+        best = best[np.argsort(keys[best], kind="stable")]
+        return [(int(self.stock_ids[i]), float(mean[i])) for i in best]
+
+
+class Cluster(NamedTuple):
+    members: list[int]  # Positionen in der Eingabe
+    mean_correlation: float | None  # Mittlere paarweise Korrelation, None bei Einzelwerten
+
+
+def correlation_distance(correlation: np.ndarray) -> np.ndarray:
+    """
+    sqrt((1 - rho) / 2): 0 for identical, 1 for opposite moves; unknown pairs count as uncorrelated.
+    """
+    return np.sqrt((1.0 - np.nan_to_num(np.clip(correlation, -1.0, 1.0), nan=0.0)) / 2.0)
+
+
+def hierarchical_clusters(correlation: np.ndarray, min_correlation: float = 0.5) -> list[Cluster]:
+    """
+    Average-linkage clustering of a small correlation matrix, largest clusters first.
+
+    Merges the two closest clusters until the closest pair is less
+    correlated than `min_correlation`; O(m³) for m stocks.
+    """
+    count = len(correlation)
+    distance = correlation_distance(correlation)
+    np.fill_diagonal(distance, np.inf)
+    limit = float(correlation_distance(np.array(min_correlation)))
+    members = {i: [i] for i in range(count)}
+    while len(members) > 1:
+        i, j = np.unravel_index(np.argmin(distance), distance.shape)
+        if distance[i, j] > limit + 1e-12:
+            break
+        i, j = min(i, j), max(i, j)
+        size_i, size_j = len(members[i]), len(members[j])
+        # Lance-Williams für average linkage: Abstand zum vereinigten Cluster als gewichtetes Mittel.
+        merged = (size_i * distance[i] + size_j * distance[j]) / (size_i + size_j)
+        distance[i], distance[:, i] = merged, merged
+        distance[i, i] = np.inf
+        distance[j], distance[:, j] = np.inf, np.inf
+        members[i] += members.pop(j)
+    clusters = []
+    for group in members.values():
+        group = sorted(group)
+        mean = None
+        if len(group) > 1:
+            block = correlation[np.ix_(group, group)]
+            pairs = block[np.triu_indices(len(group), 1)]
+            mean = float(np.nanmean(pairs)) if not np.isnan(pairs).all() else None
+        clusters.append(Cluster(group, mean))
+    return sorted(clusters, key=lambda cluster: (-len(cluster.members), cluster.members[0]))
@@ -0,0 +1,233 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import date, datetime
+from typing import NamedTuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from correlation import CORRELATION, KINDS, Cluster, CorrelationMatrix, META_FILE, block_statistic, \
+    hierarchical_clusters, log_returns
+from corporate_action_service import CorporateActionService
+from price_history_service import PriceHistoryService
+from trading_calendar_service import TradingCalendarService
+from portfolio_pilot_backend.models import Dividend, Split
+from portfolio_pilot_backend.repositories.stock_repository import StockRepository, StockRepositoryFactory
+from portfolio_pilot_backend.repositories.watchlist_repository import WatchlistRepository, \
+    WatchlistRepositoryFactory
+
+MIN_OBSERVATIONS = 20
+MAX_LOOKBACK_DAYS = 5000
+
+
+class CorrelatedStocks(NamedTuple):
+    kind: str
+    stocks: list[tuple[int, float]]  # (Aktie, Wert), absteigend
+
+
+class WatchlistClusters(NamedTuple):
+    clusters: list[Cluster]  # members sind hier Aktien-IDs
+    suggestions: list[tuple[int, float]]  # (Aktie, mittlere Korrelation zur Watchlist)
+    observations: int
+
+
+class CorrelationService:
+    """
+    Builds the correlation or covariance matrix of the whole stock universe and answers queries against it.
+
+    A build loads the adjusted closes of `load_batch` stocks at a time on
+    the union calendar of all their exchanges, keeps only their float32 log
+    returns and computes the matrix block by block into a memory-mapped
+    file under `directory` (see correlation). Queries open the stored matrix
+    read-only and reload it when a newer build replaced it.
+
+    A split or dividend inside the window of the stored matrix marks it
+    stale: queries refuse it until the next build.
+    """
+
+    def __init__(self, price_history_service: PriceHistoryService, stock_repository_factory: StockRepositoryFactory,
+                 watchlist_repository_factory: WatchlistRepositoryFactory, calendar_service: TradingCalendarService,
+                 directory: str, block_size: int = 512, workers: int = 0, load_batch: int = 500,
+                 min_observations: int = MIN_OBSERVATIONS,
+                 corporate_action_service: CorporateActionService | None = None):
+        """
+        Args:
+            price_history_service: Source of the aligned price history.
+            stock_repository_factory: Factory for the stock repository, lists the universe.
+            watchlist_repository_factory: Factory for the watchlist repository.
+            calendar_service: Supplies the sessions the returns are aligned on.
+            directory: Where the matrix, its stock ids and metadata are stored.
+            block_size: Stocks per block; a block pair needs about 8 x block_size² bytes per matrix product.
+            workers: Threads computing blocks; 0 or 1 computes in the calling thread.
+            load_batch: Stocks whose prices are loaded per query.
+            min_observations: Common returns a pair needs, otherwise its value is NaN.
+            corporate_action_service: Adjusts the stored bars for splits and dividends; without it they are used as
+                stored.
+        """
+        self.price_history_service = price_history_service
+        self.stock_repository_factory = stock_repository_factory
+        self.watchlist_repository_factory = watchlist_repository_factory
+        self.calendar_service = calendar_service
+        self.directory = directory
+        self.block_size = block_size
+        self.workers = workers
+        self.load_batch = load_batch
+        self.min_observations = min_observations
+        self.corporate_action_service = corporate_action_service
+        self._build_lock = threading.Lock()
+        self._matrix_lock = threading.Lock()
+        self._matrix: CorrelationMatrix | None = None
+        self._matrix_version: tuple[int, int] | None = None
+
+    def create_stock_repository(self, session: Session) -> StockRepository:
+        return self.stock_repository_factory.create(session)
+
+    def create_watchlist_repository(self, session: Session) -> WatchlistRepository:
+        return self.watchlist_repository_factory.create(session)
+
+    def validate_lookback(self, lookback_days: int) -> str | None:
+        if not self.min_observations <= lookback_days <= MAX_LOOKBACK_DAYS:
+            return f"Beobachtungszeitraum muss zwischen {self.min_observations} und {MAX_LOOKBACK_DAYS} Tagen liegen."
+        return None
+
+    def load_returns(self, session: Session, stock_ids: list[int], lookback_days: int,
+                     end: datetime | None = None) -> np.ndarray:
+        """
+        Daily log returns of the stocks over the last `lookback_days` sessions up to `end`, float32, NaN gaps.
+
+        Gaps are not filled: a carried-forward price would add zero returns
+        and pull every correlation towards 0, pairs are compared on their
+        common sessions instead.
+        """
+        end = end or datetime.now()
+        calendar = self.calendar_service.for_stocks(session, stock_ids)
+        hi = calendar.bounds(None, end)[1]
+        start = calendar.sessions[max(0, hi - lookback_days - 1)].astype("datetime64[s]").astype(datetime) \
+            if hi else end
+        sessions = max(0, min(hi, lookback_days + 1) - 1)
+        returns = np.full((len(stock_ids), sessions), np.nan, dtype=np.float32)
+        for offset in range(0, len(stock_ids), self.load_batch):
+            batch = stock_ids[offset:offset + self.load_batch]
+            if self.corporate_action_service is not None:
+                aligned = self.corporate_action_service.get_adjusted_aligned(session, batch, ("adj_close",), start,
+                                                                             end, calendar)
+            else:
+                aligned = self.price_history_service.get_aligned(session, batch, ("adj_close",), start, end, calendar)
+            closes = aligned.columns["adj_close"]
+            returns[offset:offset + len(batch)] = log_returns(closes)
+        return returns
+
+    def build(self, session: Session, stock_ids: list[int] | None = None, lookback_days: int = 750,
+              end: datetime | None = None, kind: str = CORRELATION) -> tuple[dict | None, str | None]:
+        """
+        Computes and stores the matrix of all stocks, or of the given ones; replaces the previous build.
+
+        Returns:
+            The metadata of the new matrix.
+        """
+        if kind not in KINDS:
+            return None, f"Art muss eine von {', '.join(KINDS)} sein."
+        validation_msg = self.validate_lookback(lookback_days)
+        if validation_msg:
+            return None, validation_msg
+        if not self._build_lock.acquire(blocking=False):
+            return None, "Die Matrix wird bereits berechnet."
+        try:
+            stock_ids = self.create_stock_repository(session).list_ids() if stock_ids is None \
+                else sorted(set(stock_ids))
+            if len(stock_ids) < 2:
+                return None, "Für eine Korrelationsmatrix sind mindestens zwei Aktien nötig."
+            returns = self.load_returns(session, stock_ids, lookback_days, end)
+            meta = {"lookback_days": lookback_days, "end": (end or datetime.now()).date().isoformat(),
+                    "sessions": returns.shape[1]}
+            with self._create_executor() as executor:
+                meta = CorrelationMatrix.create(self.directory, stock_ids, returns, meta, kind, self.block_size,
+                                                self.min_observations, executor)
+        except Exception as e:
+            return None, f"Fehler bei der Berechnung der Matrix: {e}"
+        finally:
+            self._build_lock.release()
+        return meta, None
+
+    def _create_executor(self) -> ThreadPoolExecutor | nullcontext:
+        # Threads statt Prozesse: die Matrixprodukte laufen ohne GIL und alle teilen Renditen und Memmap.
+        if self.workers <= 1:
+            return nullcontext()
+        return ThreadPoolExecutor(self.workers, thread_name_prefix="correlation")
+
+    def get_matrix(self) -> CorrelationMatrix | None:
+        """
+        The stored matrix, reopened whenever a newer build replaced it.
+        """
+        try:
+            status = os.stat(os.path.join(self.directory, META_FILE))
+        except FileNotFoundError:
+            return None
+        # os.replace legt eine neue Datei an, die Inode erkennt auch Builds innerhalb derselben Zeitauflösung.
+        version = (status.st_ino, status.st_mtime_ns)
+        with self._matrix_lock:
+            if version != self._matrix_version:
+                self._matrix = CorrelationMatrix.open(self.directory)
+                self._matrix_version = version
+            return self._matrix
+
+    def corporate_action_added(self, action: Split | Dividend) -> None:
+        """
+        CorporateActionService listener: marks the stored matrix stale if the action moves returns in its window.
+        """
+        matrix = self.get_matrix()
+        if matrix is None or matrix.meta.get("stale") or matrix.positions([action.stock_id])[0] < 0:
+            return
+        # Nach dem Ende des Fensters skaliert die Maßnahme alle Kurse darin gleich, die Renditen bleiben.
+        if action.ex_date.date() > date.fromisoformat(matrix.meta["end"]):
+            return
+        CorrelationMatrix.mark_stale(self.directory)
+
+    def get_most_correlated(self, stock_id: int, k: int = 10,
+                            absolute: bool = False) -> tuple[CorrelatedStocks | None, str | None]:
+        """
+        The k stocks with the highest correlation (or covariance) to `stock_id` in the stored matrix.
+
+        Args:
+            absolute: Ranks by absolute value, so strongly anti-correlated stocks count too.
+        """
+        matrix = self.get_matrix()
+        if matrix is None:
+            return None, "Es wurde noch keine Korrelationsmatrix berechnet."
+        if matrix.meta.get("stale"):
+            return None, "Die Korrelationsmatrix ist nach einer Kapitalmaßnahme veraltet, bitte neu berechnen."
+        result = matrix.top_k(stock_id, k, absolute)
+        if result is None:
+            return None, "Die Aktie ist nicht in der Korrelationsmatrix enthalten."
+        return CorrelatedStocks(matrix.meta.get("kind", CORRELATION), result), None
+
+    def get_watchlist_clusters(self, session: Session, user_id: int, min_correlation: float = 0.5,
+                               lookback_days: int = 750, suggestions: int = 5,
+                               end: datetime | None = None) -> tuple[WatchlistClusters | None, str | None]:
+        """
+        Groups the stocks of a watchlist into clusters that move together and suggests diversifying stocks.
+
+        The watchlist's correlations are computed from current prices, so no
+        build is needed; suggestions are the stocks of the stored correlation
+        matrix with the lowest mean correlation to the watchlist.
+        """
+        if not -1 <= min_correlation <= 1:
+            return None, "Mindestkorrelation muss zwischen -1 und 1 liegen."
+        validation_msg = self.validate_lookback(lookback_days)
+        if validation_msg:
+            return None, validation_msg
+        stock_ids = sorted(self.create_watchlist_repository(session).list_stock_ids(user_id))
+        if not stock_ids:
+            return None, "Die Watchlist ist leer."
+        returns = self.load_returns(session, stock_ids, lookback_days, end)
+        correlation = block_statistic(returns, returns, CORRELATION, self.min_observations)
+        clusters = [Cluster([stock_ids[i] for i in cluster.members], cluster.mean_correlation)
+                    for cluster in hierarchical_clusters(correlation, min_correlation)]
+        matrix = self.get_matrix()
+        candidates = matrix.least_correlated(stock_ids, suggestions) \
+            if matrix is not None and matrix.meta.get("kind") == CORRELATION and not matrix.meta.get("stale") \
+            and suggestions > 0 else []
+        return WatchlistClusters(clusters, candidates, returns.shape[1]), None
+
@@ -0,0 +1,184 @@
+"""
+Vectorized data-quality checks over the price history of many stocks at once.
+
+The scanner gets the bars added since the last scan ("new") together with
+the older bars right before them ("context") as flat arrays of any number
+of stocks, sorts them once by (stock, date, bar id) and runs every check
+as array operations over the whole batch; stock boundaries are masks, not
+loops. Only new bars produce issues, the context supplies the previous
+session and the return history they are judged against:
+
+    duplicate  a bar on the same stock and date as an earlier one
+    gap        sessions of the stock's trading calendar missing between
+               the previous bar and a new one
+    ohlc       non-positive prices, high below open/low/close or low
+               above open/high/close (missing low/close are ignored)
+    spike      a close-to-close log return more than `z_threshold`
+               standard deviations away from the mean of the previous
+               `window` returns of the stock (at least `min_observations`)
+
+Duplicates are left out of the gap and spike checks, which see the first
+bar of every date only.
+"""
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+from trading_calendar import TradingCalendar
+
+DUPLICATE = "duplicate"
+GAP = "gap"
+OHLC = "ohlc"
+SPIKE = "spike"
+CHECKS = (DUPLICATE, GAP, OHLC, SPIKE)
+
+
+class Bars(NamedTuple):
+    stock_ids: np.ndarray
+    bar_ids: np.ndarray
+    dates: np.ndarray  # datetime64[s]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray  # NaN bei Altdaten ohne Wert
+    close: np.ndarray
+    new: np.ndarray  # bool: seit dem letzten Scan hinzugekommen
+
+    @classmethod
+    def from_rows(cls, rows: list, new: bool) -> "Bars":
+        """
+        Builds the arrays from (stock_id, bar_id, date, open, high, low, close) rows.
+        """
+        columns = list(zip(*rows)) if rows else [()] * 7
+        prices = [np.array(column, dtype=np.float64) for column in columns[3:]]
+        return cls(np.array(columns[0], dtype=np.int64), np.array(columns[1], dtype=np.int64),
+                   np.array(columns[2], dtype="datetime64[s]"), *prices, np.full(len(rows), new))
+
+    @classmethod
+    def concat(cls, parts: list["Bars"]) -> "Bars":
+        return cls(*(np.concatenate(arrays) for arrays in zip(*parts)))
+
+    def take(self, index: np.ndarray) -> "Bars":
+        return Bars(*(array[index] for array in self))
+
+
+class Issue(NamedTuple):
+    stock_id: int
+    date: datetime
+    check: str
+    details: dict
+
+
+def _value(value: float) -> float | None:
+    return None if np.isnan(value) else round(float(value), 6)
+
+
+def _issues(bars: Bars, mask: np.ndarray, check: str, details) -> list[Issue]:
+    positions = np.flatnonzero(mask)
+    return [Issue(int(bars.stock_ids[i]), bars.dates[i].astype(datetime), check, details(i)) for i in positions]
+
+
+def _group_starts(stock_ids: np.ndarray) -> np.ndarray:
+    """
+    Position of the first row of every row's stock in stock-sorted arrays.
+    """
+    first = np.ones(len(stock_ids), dtype=bool)
+    first[1:] = stock_ids[1:] != stock_ids[:-1]
+    return np.maximum.accumulate(np.where(first, np.arange(len(stock_ids)), 0))
+
+
+def check_duplicates(bars: Bars) -> tuple[np.ndarray, list[Issue]]:
+    """
+    Returns the mask of the first bar of every (stock, date) and the issues of new duplicates.
+    """
+    repeated = np.zeros(len(bars.dates), dtype=bool)
+    repeated[1:] = (bars.stock_ids[1:] == bars.stock_ids[:-1]) & (bars.dates[1:] == bars.dates[:-1])
+    first_of_date = np.maximum.accumulate(np.where(repeated, 0, np.arange(len(repeated))))
+    issues = _issues(bars, repeated & bars.new, DUPLICATE,
+                     lambda i: {"bar_id": int(bars.bar_ids[i]), "first_bar_id": int(bars.bar_ids[first_of_date[i]])})
+    return ~repeated, issues
+
+
+def check_ohlc(bars: Bars) -> list[Issue]:
+    prices = np.stack([bars.open, bars.high, bars.low, bars.close])
+    with np.errstate(invalid="ignore"):
+        bad = (prices <= 0).any(axis=0)
+        bad |= bars.high < np.fmax(np.fmax(bars.open, bars.low), bars.close)
+        bad |= bars.low > np.fmin(np.fmin(bars.open, bars.high), bars.close)
+    return _issues(bars, bad & bars.new, OHLC, lambda i: {
+        "open": _value(bars.open[i]), "high": _value(bars.high[i]), "low": _value(bars.low[i]),
+        "close": _value(bars.close[i])})
+
+
+def check_gaps(bars: Bars, calendars: dict[int, TradingCalendar]) -> list[Issue]:
+    """
+    Reports missing sessions before every new bar; expects one bar per (stock, date).
+    """
+    follows = np.zeros(len(bars.dates), dtype=bool)
+    follows[1:] = bars.stock_ids[1:] == bars.stock_ids[:-1]
+    candidates = follows & bars.new
+    days = bars.dates.astype("datetime64[D]")
+    missing = np.zeros(len(days), dtype=np.int64)
+    first_missing = np.zeros(len(days), dtype=np.int64)
+    calendar_of = np.array([id(calendars[stock_id]) for stock_id in bars.stock_ids.tolist()], dtype=np.int64)
+    for calendar in {id(calendar): calendar for calendar in calendars.values()}.values():
+        rows = np.flatnonzero(candidates & (calendar_of == id(calendar)) & (days <= calendar.sessions[-1]))
+        before = calendar.locate(days[rows - 1])
+        missing[rows] = calendar.locate(days[rows] - np.timedelta64(1, "D")) - before
+        first_missing[rows] = before + 1
+    return _issues(bars, missing > 0, GAP, lambda i: {
+        "missing_sessions": int(missing[i]),
+        "first_missing": str(calendars[int(bars.stock_ids[i])].sessions[first_missing[i]]),
+        "previous_bar": str(days[i - 1])})
+
+
+def check_spikes(bars: Bars, window: int = 60, min_observations: int = 20, z_threshold: float = 6.0) -> list[Issue]:
+    """
+    Flags new bars whose log return is a z-score outlier against the stock's trailing returns.
+
+    Expects one bar per (stock, date); the trailing mean and variance come
+    from running sums, so the check is O(bars) for any window.
+    """
+    count = len(bars.dates)
+    starts = _group_starts(bars.stock_ids)
+    returns = np.full(count, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = np.log(bars.close[1:] / bars.close[:-1])
+    returns[starts == np.arange(count)] = np.nan
+    valid = np.isfinite(returns)
+    filled = np.where(valid, returns, 0.0)
+    sums = np.concatenate(([0.0], np.cumsum(filled)))
+    squares = np.concatenate(([0.0], np.cumsum(filled * filled)))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    # Fenster [lo, i): die letzten `window` Zeilen derselben Aktie vor dem Bar.
+    index = np.arange(count)
+    lo = np.maximum(index - window, starts)
+    n = counts[index] - counts[lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (sums[index] - sums[lo]) / n
+        variance = (squares[index] - squares[lo] - n * mean * mean) / (n - 1)
+        deviation = np.abs(returns - mean)
+        z = deviation / np.sqrt(np.maximum(variance, 0.0))
+    z = np.where(deviation > 1e-12, z, 0.0)
+    spikes = valid & bars.new & (n >= min_observations) & (z > z_threshold)
+    return _issues(bars, spikes, SPIKE, lambda i: {
+        "return": round(float(returns[i]), 6), "z_score": round(float(z[i]), 2) if np.isfinite(z[i]) else None,
+        "observations": int(n[i])})
+
+
+def scan(bars: Bars, calendars: dict[int, TradingCalendar], window: int = 60, min_observations: int = 20,
+         z_threshold: float = 6.0) -> list[Issue]:
+    """
+    Runs all checks over new and context bars of any number of stocks.
+
+    Args:
+        bars: New bars and the context bars before them, in any order.
+        calendars: Trading calendar of every stock in `bars`.
+    """
+    bars = bars.take(np.lexsort((bars.bar_ids, bars.dates, bars.stock_ids)))
+    first, issues = check_duplicates(bars)
+    issues += check_ohlc(bars)
+    unique = bars.take(np.flatnonzero(first))
+    issues += check_gaps(unique, calendars)
+    issues += check_spikes(unique, window, min_observations, z_threshold)
+    return issues
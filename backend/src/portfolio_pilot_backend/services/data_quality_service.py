@@ -0,0 +1,153 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from data_quality import CHECKS, Bars, scan
+from trading_calendar_service import TradingCalendarService
+from portfolio_pilot_backend.repositories.data_quality_repository import DataQualityRepository, \
+    DataQualityRepositoryFactory
+
+
+class DataQualityService:
+    """
+    Scans the price history incrementally for duplicates, gaps, OHLC errors and spikes (see data_quality).
+
+    Every stock has a watermark, the highest historical_data id already
+    scanned; ids only grow, so back-filled and duplicated bars are found
+    too, not just bars with newer dates. A scan reads the bars above the
+    watermarks with one primary key range scan (stocks never scanned via
+    the stock/date index instead), adds the last `window` sessions before
+    them as context and checks `batch_size` stocks per query and commit.
+    """
+
+    def __init__(self, data_quality_repository_factory: DataQualityRepositoryFactory,
+                 calendar_service: TradingCalendarService, window: int = 60, z_threshold: float = 6.0,
+                 min_observations: int = 20, batch_size: int = 500):
+        """
+        Args:
+            data_quality_repository_factory: Factory for the data-quality repository.
+            calendar_service: Source of every stock's trading calendar for the gap check.
+            window: Trailing returns a new return is compared with in the spike check.
+            z_threshold: Z-score above which a return counts as a spike.
+            min_observations: Trailing returns needed before spikes are reported.
+            batch_size: Stocks checked per context query and commit.
+        """
+        self.data_quality_repository_factory = data_quality_repository_factory
+        self.calendar_service = calendar_service
+        self.window = window
+        self.z_threshold = z_threshold
+        self.min_observations = min_observations
+        self.batch_size = batch_size
+
+    def create_data_quality_repository(self, session: Session) -> DataQualityRepository:
+        return self.data_quality_repository_factory.create(session)
+
+    def scan(self, session: Session, stock_ids: list[int] | None = None,
+             full: bool = False) -> tuple[dict | None, str | None]:
+        """
+        Checks all bars added since the last scan, of all stocks or only the given ones.
+
+        Args:
+            full: Drops the stocks' issues and watermarks first and scans their whole history again.
+
+        Returns:
+            A report with the scanned stocks and bars and the new issues per check.
+        """
+        repository = self.create_data_quality_repository(session)
+        checked_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        report = {"stocks": 0, "bars": 0, "issues": dict.fromkeys(CHECKS, 0)}
+        try:
+            if full:
+                repository.reset(stock_ids)
+            high = repository.get_max_bar_id()
+            targets = repository.list_stock_ids() if stock_ids is None else list(dict.fromkeys(stock_ids))
+            watermarks = repository.get_watermarks(stock_ids)
+            new = self._load_new_bars(repository, targets, watermarks, high)
+            touched = np.unique(new.stock_ids)
+            for offset in range(0, len(touched), self.batch_size):
+                batch = touched[offset:offset + self.batch_size]
+                issues = self._scan_batch(session, repository, new.take(np.flatnonzero(np.isin(new.stock_ids, batch))),
+                                          batch.tolist(), watermarks, high, checked_at)
+                for issue in issues:
+                    report["issues"][issue.check] += 1
+                session.commit()
+            # Aktien ohne neue Bars sind bis `high` geprüft; so bleibt der Bereichsscan beim nächsten Mal klein.
+            touched_ids = set(touched.tolist())
+            idle = [stock_id for stock_id in targets if stock_id not in touched_ids]
+            repository.advance_watermarks([stock_id for stock_id in idle if stock_id in watermarks], high, checked_at)
+            repository.set_watermarks([{"stock_id": stock_id, "last_bar_id": high, "last_bar_date": None,
+                                        "checked_at": checked_at} for stock_id in idle if stock_id not in watermarks])
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            return None, f"Fehler bei der Datenqualitätsprüfung: {e}"
+        report["stocks"] = len(touched)
+        report["bars"] = len(new.dates)
+        return report, None
+
+    @staticmethod
+    def _load_new_bars(repository: DataQualityRepository, targets: list[int], watermarks: dict[int, Row],
+                       high: int) -> Bars:
+        unscanned = [stock_id for stock_id in targets if stock_id not in watermarks]
+        parts = [Bars.from_rows(repository.get_bars_for_stocks(unscanned, high), True)] if unscanned else []
+        scanned = np.array(sorted(set(targets) & watermarks.keys()), dtype=np.int64)
+        if len(scanned):
+            marks = np.array([watermarks[stock_id].last_bar_id for stock_id in scanned.tolist()], dtype=np.int64)
+            if marks.min() < high:
+                bars = Bars.from_rows(repository.get_bars_after(int(marks.min()), high), True)
+                position = np.minimum(np.searchsorted(scanned, bars.stock_ids), len(scanned) - 1)
+                keep = (scanned[position] == bars.stock_ids) & (bars.bar_ids > marks[position])
+                parts.append(bars.take(np.flatnonzero(keep)))
+        return Bars.concat(parts) if parts else Bars.from_rows([], True)
+
+    def _scan_batch(self, session: Session, repository: DataQualityRepository, new: Bars, stock_ids: list[int],
+                    watermarks: dict[int, Row], high: int, checked_at: datetime) -> list:
+        # Kontext: die Sitzungen vor dem ältesten neuen Bar, großzügig in Kalendertagen bemessen.
+        context_days = timedelta(days=self.window * 7 // 5 + 10)
+        order = np.argsort(new.stock_ids, kind="stable")
+        ids, starts = np.unique(new.stock_ids[order], return_index=True)
+        first_dates = np.minimum.reduceat(new.dates[order], starts) if len(order) else new.dates
+        first_new = {stock_id: date - context_days for stock_id, date in zip(ids.tolist(),
+                                                                             first_dates.astype(datetime).tolist())}
+        scanned = [stock_id for stock_id in stock_ids if stock_id in watermarks]
+        parts = [new]
+        if scanned:
+            context = Bars.from_rows(repository.get_bars_for_stocks(
+                scanned, high, min(first_new[stock_id] for stock_id in scanned)), False)
+            marks = np.array([watermarks[stock_id].last_bar_id for stock_id in context.stock_ids.tolist()],
+                             dtype=np.int64)
+            since = np.array([first_new[stock_id] for stock_id in context.stock_ids.tolist()], dtype="datetime64[s]")
+            parts.append(context.take(np.flatnonzero((context.bar_ids <= marks) & (context.dates >= since))))
+            # Liegt der letzte bekannte Bar vor dem Kontextfenster, dient er nur als Vorgänger für die Lückenprüfung.
+            earlier = [(stock_id, 0, watermarks[stock_id].last_bar_date, np.nan, np.nan, np.nan, np.nan)
+                       for stock_id in scanned if watermarks[stock_id].last_bar_date is not None
+                       and watermarks[stock_id].last_bar_date < first_new[stock_id]]
+            if earlier:
+                parts.append(Bars.from_rows(earlier, False))
+        issues = scan(Bars.concat(parts), self.calendar_service.by_stock(session, stock_ids), self.window,
+                      self.min_observations, self.z_threshold)
+        repository.add_issues([{"stock_id": issue.stock_id, "date": issue.date, "check": issue.check,
+                                "details": json.dumps(issue.details), "detected_at": checked_at}
+                               for issue in issues])
+        last_dates = {stock_id: watermarks[stock_id].last_bar_date for stock_id in scanned
+                      if watermarks[stock_id].last_bar_date is not None}
+        for stock_id, date in zip(new.stock_ids.tolist(), new.dates.astype(datetime).tolist()):
+            last_dates[stock_id] = max(date, last_dates.get(stock_id, date))
+        repository.set_watermarks([{"stock_id": stock_id, "last_bar_id": high, "last_bar_date": last_dates[stock_id],
+                                    "checked_at": checked_at} for stock_id in stock_ids])
+        return issues
+
+    def list_issues(self, session: Session, stock_id: int | None = None, check: str | None = None,
+                    start: datetime | None = None, end: datetime | None = None, limit: int = 100) -> list[Row]:
+        return self.create_data_quality_repository(session).list_issues(stock_id, check, start, end, limit)
+
+    def get_summary(self, session: Session, stock_id: int | None = None) -> dict:
+        """
+        Returns the number of issues and affected stocks per check.
+        """
+        counts = {row.check: row for row in self.create_data_quality_repository(session).count_issues(stock_id)}
+        return {check: {"issues": counts[check].issues if check in counts else 0,
+                        "stocks": counts[check].stocks if check in counts else 0} for check in CHECKS}
@@ -0,0 +1,277 @@
+"""
+Streaming CSV and Parquet export of price history and portfolio valuations.
+
+Exports are produced batch by batch from a yield_per query and encoded
+straight into output chunks, so the memory of an export does not grow
+with its size. A stream outlives the request that started it: every
+generator opens its own session from `session_factory` and closes it when
+it is exhausted or closed by the WSGI server.
+
+Parquet needs the optional pyarrow package; each batch becomes one row
+group that is written and handed out before the next one is read.
+
+Valuations can be converted into one currency: the FX factors of a
+whole fetched partition are looked up at once in the cached FxMatrix.
+They value today's quantities, so historical closes are scaled by the
+split and dividend factors of their day like adjusted history.
+"""
+import csv
+import io
+import math
+from datetime import datetime
+from typing import Iterable, Iterator
+
+import numpy as np
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from adjustment_factors import AdjustmentFactors
+from corporate_action_service import CorporateActionService
+from fx_service import FxService
+from shard_router import route_session
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepository, \
+    HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.holding_repository import HoldingRepositoryFactory
+
+CSV = "csv"
+PARQUET = "parquet"
+FORMATS = (CSV, PARQUET)
+MEDIA_TYPES = {CSV: "text/csv", PARQUET: "application/vnd.apache.parquet"}
+
+STRING = "string"
+DATE = "date"
+FLOAT = "float"
+INT = "int"
+
+VALUATION_COLUMNS = (("date", DATE), ("market_value", FLOAT), ("cost_basis", FLOAT), ("unrealized_pnl", FLOAT),
+                     ("positions", INT))
+
+
+def load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Parquet export requires the pyarrow package.") from e
+    return pyarrow, pyarrow.parquet
+
+
+def parquet_available() -> bool:
+    try:
+        load_pyarrow()
+    except RuntimeError:
+        return False
+    return True
+
+
+def history_columns(fields: tuple[str, ...]) -> tuple[tuple[str, str], ...]:
+    return (("symbol", STRING), ("date", DATE)) + tuple((field, INT if field == "volume" else FLOAT)
+                                                        for field in fields)
+
+
+def encode_csv(columns: tuple[tuple[str, str], ...], batches: Iterable[list[tuple]]) -> Iterator[bytes]:
+    """
+    Encodes row batches as CSV, one output chunk per batch; dates are written as ISO days.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow([name for name, _ in columns])
+    date_positions = {i for i, (_, kind) in enumerate(columns) if kind == DATE}
+    for batch in batches:
+        if date_positions:
+            batch = [[value.date().isoformat() if i in date_positions and value is not None else value
+                      for i, value in enumerate(row)] for row in batch]
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file object that collects what pyarrow writes until it is drained.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def encode_parquet(columns: tuple[tuple[str, str], ...], batches: Iterable[list[tuple]]) -> Iterator[bytes]:
+    """
+    Encodes row batches as one Parquet file, one row group per batch.
+    """
+    pyarrow, parquet = load_pyarrow()
+    types = {STRING: pyarrow.string(), DATE: pyarrow.timestamp("s"), FLOAT: pyarrow.float64(),
+             INT: pyarrow.int64()}
+    schema = pyarrow.schema([(name, types[kind]) for name, kind in columns])
+    sink = _ChunkSink()
+    writer = parquet.ParquetWriter(sink, schema)
+    try:
+        for batch in batches:
+            values = list(zip(*batch))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+class ExportService:
+    def __init__(self, session_factory, historical_data_repository_factory: HistoricalDataRepositoryFactory,
+                 holding_repository_factory: HoldingRepositoryFactory, batch_size: int = 5000,
+                 fx_service: FxService | None = None,
+                 corporate_action_service: CorporateActionService | None = None):
+        """
+        Args:
+            session_factory: Opens the session each export stream owns.
+            historical_data_repository_factory: Factory for the row-per-bar repository.
+            holding_repository_factory: Factory for the holdings repository.
+            batch_size: Rows per fetch, CSV chunk and Parquet row group.
+            fx_service: Converts valuations into another currency.
+            corporate_action_service: Supplies the split and dividend factors valuations adjust closes with.
+        """
+        self.session_factory = session_factory
+        self.historical_data_repository_factory = historical_data_repository_factory
+        self.holding_repository_factory = holding_repository_factory
+        self.batch_size = batch_size
+        self.fx_service = fx_service
+        self.corporate_action_service = corporate_action_service
+
+    @staticmethod
+    def adjustment_factors(partition: list[Row], factors: dict[int, AdjustmentFactors]) -> list[float] | None:
+        """
+        Price factor of every (date, stock_id, close) row; None if no stock of the partition has corporate actions.
+        """
+        adjusted = [stock_id for stock_id, stock_factors in factors.items() if len(stock_factors)]
+        if not adjusted:
+            return None
+        stock_ids = np.array([row[1] for row in partition])
+        dates = np.array([row[0] for row in partition], dtype="datetime64[s]")
+        price = np.ones(len(partition))
+        for stock_id in adjusted:
+            rows = stock_ids == stock_id
+            price[rows] = factors[stock_id].factors_for(dates[rows])[0]
+        return price.tolist()
+
+    @staticmethod
+    def encode(export_format: str, columns: tuple[tuple[str, str], ...],
+               batches: Iterable[list[tuple]]) -> Iterator[bytes]:
+        if export_format == CSV:
+            return encode_csv(columns, batches)
+        if export_format == PARQUET:
+            return encode_parquet(columns, batches)
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    def iter_history_batches(self, symbols: dict[int, str], fields: tuple[str, ...], start: datetime | None = None,
+                             end: datetime | None = None) -> Iterator[list[tuple]]:
+        """
+        Yields (symbol, date, *fields) rows of the given stocks, ordered by stock and date.
+        """
+        with self.session_factory() as session:
+            repository = self.historical_data_repository_factory.create(session)
+            for partition in repository.iter_range_partitions(list(symbols), fields, start, end, self.batch_size):
+                yield [(symbols[row[0]],) + tuple(row[1:]) for row in partition]
+
+    def validate_valuation(self, session: Session, user_id: int, currency: str | None = None) -> str | None:
+        """
+        Checks before streaming that the holdings can be valued and, with a currency, converted into it.
+        """
+        if currency is not None and self.fx_service is None:
+            return "Währungsumrechnung ist nicht verfügbar."
+        holdings = self.holding_repository_factory.create(session).list_rows_for_user(user_id)
+        stock_ids = [holding.stock_id for holding in holdings]
+        if len(stock_ids) > HistoricalDataRepository.MAX_IN_IDS:
+            return f"Die Bewertung unterstützt höchstens {HistoricalDataRepository.MAX_IN_IDS} Positionen."
+        if currency is None:
+            return None
+        return self.fx_service.get_stock_currencies(session, stock_ids, currency)[1]
+
+    def iter_valuation_batches(self, user_id: int, start: datetime | None = None, end: datetime | None = None,
+                               currency: str | None = None) -> Iterator[list[tuple]]:
+        """
+        Yields one (date, market_value, cost_basis, unrealized_pnl, positions) row per trading day.
+
+        Uses the current holdings for the whole range, so closes are adjusted
+        for later splits and dividends; a stock without a bar on a day is
+        valued at its last known close. With a currency, closes
+        are converted at the rate of their day and a position's cost basis at
+        the rate of its first valued day; bars before the first known rate
+        of their currency are skipped.
+        """
+        with self.session_factory() as session:
+            route_session(session, user_id)
+            holdings = {stock_id: (quantity, quantity * purchase_price) for stock_id, quantity, purchase_price
+                        in self.holding_repository_factory.create(session).list_rows_for_user(user_id)}
+            if not holdings:
+                return
+            if currency is not None:
+                currencies, error_msg = self.fx_service.get_stock_currencies(session, list(holdings), currency)
+                if error_msg:
+                    raise ValueError(error_msg)
+                fx_matrix = self.fx_service.get_matrix(session)
+            split_factors = self.corporate_action_service.get_factors_for_stocks(session, list(holdings)) \
+                if self.corporate_action_service is not None else {}
+            repository = self.historical_data_repository_factory.create(session)
+            last_close: dict[int, float] = {}
+            market_value = cost_basis = 0.0
+            current_date = None
+            batch = []
+            for partition in repository.iter_closes_by_date(list(holdings), start, end, self.batch_size):
+                factors = fx_matrix.factors([currencies[row[1]] for row in partition], currency,
+                                            [row[0] for row in partition]).tolist() if currency is not None else None
+                adjustments = self.adjustment_factors(partition, split_factors)
+                for i, (date, stock_id, close) in enumerate(partition):
+                    factor = 1.0 if factors is None else factors[i]
+                    if math.isnan(factor):
+                        continue
+                    if date != current_date:
+                        if current_date is not None:
+                            batch.append((current_date, market_value, cost_basis, market_value - cost_basis,
+                                          len(last_close)))
+                        current_date = date
+                    close *= factor if adjustments is None else factor * adjustments[i]
+                    quantity, cost = holdings[stock_id]
+                    previous = last_close.get(stock_id)
+                    if previous is None:
+                        cost_basis += cost * factor
+                        previous = 0.0
+                    market_value += quantity * (close - previous)
+                    last_close[stock_id] = close
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+            if current_date is not None:
+                batch.append((current_date, market_value, cost_basis, market_value - cost_basis, len(last_close)))
+            if batch:
+                yield batch
+
+    def stream_history(self, export_format: str, symbols: dict[int, str], fields: tuple[str, ...],
+                       start: datetime | None = None, end: datetime | None = None) -> Iterator[bytes]:
+        return self.encode(export_format, history_columns(fields),
+                           self.iter_history_batches(symbols, fields, start, end))
+
+    def stream_valuation(self, export_format: str, user_id: int, start: datetime | None = None,
+                         end: datetime | None = None, currency: str | None = None) -> Iterator[bytes]:
+        return self.encode(export_format, VALUATION_COLUMNS,
+                           self.iter_valuation_batches(user_id, start, end, currency))
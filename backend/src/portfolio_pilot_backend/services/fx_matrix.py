@@ -0,0 +1,135 @@
+"""
+Currency codes and the cached matrix of FX reference rates.
+
+Rates are stored against one pivot currency (EUR, like the ECB reference
+rates): `rate` is the number of units of a currency per 1 EUR, so any
+cross rate is a quotient of two stored rates and n currencies need n
+series instead of n^2. Minor units such as GBX (pence, used on the LSE)
+are a fixed fraction of their major currency and have no series of
+their own.
+
+FxMatrix holds all series on one shared date axis (currencies x dates),
+forward-filled so that a weekend or holiday uses the last published rate.
+Converting a whole aligned price matrix then costs one binary search per
+date, one fancy-index per currency and one multiply.
+"""
+import re
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from aligned_prices import forward_fill
+
+PIVOT_CURRENCY = "EUR"
+# Untereinheiten ohne eigene Kursreihe: Code -> (Hauptwährung, Wert einer Einheit in der Hauptwährung)
+MINOR_UNITS = {"GBX": ("GBP", 0.01), "ZAC": ("ZAR", 0.01), "ILA": ("ILS", 0.01)}
+
+_CODE = re.compile(r"^[A-Z]{3}$")
+
+
+def parse_currency(value: str | None) -> str | None:
+    """
+    Normalizes a currency code to upper case; returns None if it is not three letters.
+    """
+    if not isinstance(value, str):
+        return None
+    code = value.strip().upper()
+    return code if _CODE.match(code) else None
+
+
+def split_currency(code: str) -> tuple[str, float]:
+    """
+    Returns the currency with a rate series and the value of one unit of `code` in it.
+    """
+    return MINOR_UNITS.get(code, (code, 1.0))
+
+
+class FxMatrix:
+    """
+    Forward-filled rates of all currencies on the union of their dates; immutable once built.
+    """
+
+    def __init__(self, currencies: Sequence[str], dates: np.ndarray, rates: np.ndarray):
+        """
+        Args:
+            currencies: Row order of `rates`.
+            dates: Sorted datetime64[s] axis.
+            rates: (currencies x dates) units per pivot currency, NaN before a currency's first rate.
+        """
+        self.currencies = tuple(currencies)
+        self.dates = dates
+        self.rates = rates
+        self._rows = {currency: i for i, currency in enumerate(self.currencies)}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> "FxMatrix":
+        """
+        Builds the matrix from (currency, date, rate) rows.
+        """
+        rows = list(rows)
+        if not rows:
+            return cls((), np.empty(0, dtype="datetime64[s]"), np.empty((0, 0)))
+        currencies, dates, rates = zip(*rows)
+        codes, row_index = np.unique(np.array(currencies), return_inverse=True)
+        axis, date_index = np.unique(np.array(dates, dtype="datetime64[s]"), return_inverse=True)
+        matrix = np.full((len(codes), len(axis)), np.nan)
+        matrix[row_index, date_index] = rates
+        return cls(codes.tolist(), axis, forward_fill(matrix))
+
+    def has_rates(self, code: str) -> bool:
+        major = split_currency(code)[0]
+        return major == PIVOT_CURRENCY or major in self._rows
+
+    def first_date(self, code: str) -> np.datetime64 | None:
+        """
+        Returns the first date a rate of the currency is known (None for the pivot and unknown currencies).
+        """
+        row = self._rows.get(split_currency(code)[0])
+        if row is None:
+            return None
+        known = np.flatnonzero(~np.isnan(self.rates[row]))
+        return self.dates[known[0]] if len(known) else None
+
+    def positions(self, dates: np.ndarray) -> np.ndarray:
+        """
+        Index of the last rate date on or before each date, -1 before the first one.
+        """
+        return np.searchsorted(self.dates, np.asarray(dates, dtype="datetime64[s]"), side="right") - 1
+
+    def _pivot_rates(self, major: str, positions: np.ndarray) -> np.ndarray:
+        if major == PIVOT_CURRENCY:
+            return np.ones(len(positions))
+        row = self._rows.get(major)
+        if row is None:
+            return np.full(len(positions), np.nan)
+        return np.where(positions >= 0, self.rates[row][np.maximum(positions, 0)], np.nan)
+
+    def _factor(self, source: str, target: str, positions: np.ndarray) -> np.ndarray:
+        source_major, source_scale = split_currency(source)
+        target_major, target_scale = split_currency(target)
+        if source_major == target_major:
+            return np.full(len(positions), source_scale / target_scale)
+        return self._pivot_rates(target_major, positions) / self._pivot_rates(source_major, positions) \
+            * (source_scale / target_scale)
+
+    def grid(self, sources: Sequence[str], target: str, dates: np.ndarray) -> np.ndarray:
+        """
+        Conversion factors into `target` for every source currency (rows) and date (columns), NaN if unknown.
+        """
+        positions = self.positions(dates)
+        factors = {code: self._factor(code, target, positions) for code in set(sources)}
+        if not sources:
+            return np.empty((0, len(positions)))
+        return np.stack([factors[code] for code in sources])
+
+    def factors(self, sources: Sequence[str], target: str, dates: np.ndarray) -> np.ndarray:
+        """
+        Conversion factors into `target` for pairs of source currency and date, NaN if unknown.
+        """
+        sources = np.asarray(sources, dtype=object)
+        positions = self.positions(dates)
+        result = np.empty(len(positions))
+        for code in set(sources.tolist()):
+            selected = sources == code
+            result[selected] = self._factor(code, target, positions[selected])
+        return result
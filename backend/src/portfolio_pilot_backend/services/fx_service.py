@@ -0,0 +1,136 @@
+import math
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from aligned_prices import AlignedPrices
+from fx_matrix import PIVOT_CURRENCY, FxMatrix
+from portfolio_pilot_backend.repositories.fx_rate_repository import FxRateRepository, FxRateRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+
+
+class FxService:
+    """
+    Converts prices between currencies with a process-wide cached FxMatrix.
+
+    The matrix is loaded with one query on first use and rebuilt after
+    `cache_seconds` or when this process stores new rates; other processes
+    pick up new rates once their copy expires.
+    """
+
+    def __init__(self, fx_rate_repository_factory: FxRateRepositoryFactory,
+                 stock_repository_factory: StockRepositoryFactory, cache_seconds: float = 300.0,
+                 clock=time.monotonic):
+        """
+        Args:
+            fx_rate_repository_factory: Factory for the FX rate repository.
+            stock_repository_factory: Factory for the stock repository, used to look up stock currencies.
+            cache_seconds: Lifetime of the cached rate matrix.
+            clock: Monotonic time source, replaceable in tests.
+        """
+        self.fx_rate_repository_factory = fx_rate_repository_factory
+        self.stock_repository_factory = stock_repository_factory
+        self.cache_seconds = cache_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._matrix: FxMatrix | None = None
+        self._loaded_at = 0.0
+        self._generation = 0
+
+    def create_fx_rate_repository(self, session: Session) -> FxRateRepository:
+        return self.fx_rate_repository_factory.create(session)
+
+    def get_matrix(self, session: Session) -> FxMatrix:
+        with self._lock:
+            if self._matrix is not None and self.clock() - self._loaded_at < self.cache_seconds:
+                return self._matrix
+            generation = self._generation
+        matrix = FxMatrix.from_rows(self.create_fx_rate_repository(session).list_rows())
+        with self._lock:
+            # Nur speichern, wenn während des Ladens keine neuen Kurse geschrieben wurden.
+            if generation == self._generation:
+                self._matrix, self._loaded_at = matrix, self.clock()
+        return matrix
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._matrix = None
+            self._generation += 1
+
+    def list_rates(self, session: Session, currency: str, start=None, end=None) -> list[Row]:
+        return self.create_fx_rate_repository(session).get_range_rows(currency, start, end)
+
+    def validate_rates(self, currency: str | None, rates: list[dict]) -> str | None:
+        if currency is None:
+            return "Währung muss ein dreistelliger ISO-Code sein."
+        if currency == PIVOT_CURRENCY:
+            return f"Für die Bezugswährung {PIVOT_CURRENCY} werden keine Kurse gespeichert."
+        if not rates:
+            return "Keine Kurse angegeben."
+        for rate in rates:
+            if rate.get("date") is None:
+                return "Jeder Kurs braucht ein Datum."
+            value = rate.get("rate")
+            if not isinstance(value, (int, float)) or not math.isfinite(value) or value <= 0:
+                return "Kurse müssen positive Zahlen sein."
+        return None
+
+    def set_rates(self, session: Session, currency: str | None, rates: list[dict]) -> tuple[int, str | None]:
+        """
+        Stores daily rates (units of `currency` per 1 EUR) and drops the cached matrix.
+        """
+        validation_msg = self.validate_rates(currency, rates)
+        if validation_msg:
+            return 0, validation_msg
+        # Doppelte Tage im selben Aufruf: der letzte Kurs gewinnt.
+        rows = list({rate["date"]: {"date": rate["date"], "rate": float(rate["rate"])} for rate in rates}.values())
+        try:
+            count = self.create_fx_rate_repository(session).replace_rates(currency, rows)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            return 0, f"Fehler beim Speichern der Wechselkurse: {e}"
+        self.invalidate()
+        return count, None
+
+    def get_stock_currencies(self, session: Session, stock_ids: list[int],
+                             target: str) -> tuple[dict[int, str] | None, str | None]:
+        """
+        Returns the currency of every stock, or a message if one is unknown or has no rates.
+        """
+        currencies = self.stock_repository_factory.create(session).get_currencies(stock_ids)
+        unknown = [stock_id for stock_id in stock_ids if not currencies.get(stock_id)]
+        if unknown:
+            return None, f"Für Aktie(n) {', '.join(map(str, unknown))} ist keine Währung hinterlegt."
+        matrix = self.get_matrix(session)
+        missing = sorted({code for code in list(currencies.values()) + [target] if not matrix.has_rates(code)})
+        if missing:
+            return None, f"Keine Wechselkurse für {', '.join(missing)} vorhanden."
+        return currencies, None
+
+    def convert_aligned(self, session: Session, aligned: AlignedPrices,
+                        target: str) -> tuple[AlignedPrices | None, str | None]:
+        """
+        Converts all price columns into `target` with one multiply against the FX grid of the same dates.
+        """
+        currencies, error_msg = self.get_stock_currencies(session, aligned.stock_ids.tolist(), target)
+        if error_msg:
+            return None, error_msg
+        matrix = self.get_matrix(session)
+        sources = [currencies[stock_id] for stock_id in aligned.stock_ids.tolist()]
+        factors = matrix.grid(sources, target, aligned.dates)
+        priced = np.zeros(factors.shape, dtype=bool)
+        for values in aligned.columns.values():
+            priced |= ~np.isnan(values)
+        uncovered = np.isnan(factors) & priced
+        if uncovered.any():
+            codes = sorted(({sources[row] for row in np.flatnonzero(uncovered.any(axis=1))} | {target})
+                           - {PIVOT_CURRENCY})
+            first = max((date for date in (matrix.first_date(code) for code in codes) if date is not None),
+                        default=None)
+            day = np.datetime_as_string(first, unit="D") if first is not None else "-"
+            return None, f"Wechselkurse für {', '.join(codes)} liegen erst ab {day} vor."
+        return aligned.scaled(factors), None
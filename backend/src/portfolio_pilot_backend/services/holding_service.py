@@ -0,0 +1,52 @@
+from sqlalchemy.orm import Session
+
+from portfolio_pilot_backend.models import Holding
+from portfolio_pilot_backend.repositories.holding_repository import HoldingRepository, HoldingRepositoryFactory
+
+class HoldingService:
+    def __init__(self, holding_repository_factory: HoldingRepositoryFactory):
+        self.holding_repository_factory = holding_repository_factory
+
+    def create_holding_repository(self, session: Session) -> HoldingRepository:
+        return self.holding_repository_factory.create(session)
+
+    def list_holdings(self, session: Session, user_id: int) -> list[Holding]:
+        return self.create_holding_repository(session).list_for_user(user_id)
+
+    def validate_holding(self, quantity: float | None, purchase_price: float | None) -> str | None:
+        if quantity is None or not quantity > 0:
+            return "Stückzahl muss größer als 0 sein."
+        if purchase_price is None or purchase_price < 0:
+            return "Einstandskurs darf nicht negativ sein."
+        return None
+
+    def set_holding(self, session: Session, user_id: int, stock_id: int, quantity: float | None,
+                    purchase_price: float | None) -> tuple[Holding | None, str | None]:
+        """
+        Creates the position or replaces its quantity and purchase price.
+        """
+        validation_msg = self.validate_holding(quantity, purchase_price)
+        if validation_msg:
+            return None, validation_msg
+        repository = self.create_holding_repository(session)
+        try:
+            holding = repository.get(user_id, stock_id)
+            if holding is None:
+                holding = repository.add(Holding(user_id, stock_id, quantity, purchase_price))
+            else:
+                holding.quantity = quantity
+                holding.purchase_price = purchase_price
+            session.commit()
+            return holding, None
+        except Exception as e:
+            session.rollback()
+            return None, f"Fehler beim Speichern der Position: {e}"
+
+    def delete_holding(self, session: Session, user_id: int, stock_id: int) -> bool:
+        repository = self.create_holding_repository(session)
+        holding = repository.get(user_id, stock_id)
+        if holding is None:
+            return False
+        repository.delete(holding)
+        session.commit()
+        return True
@@ -0,0 +1,255 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from adjustment_factors import AdjustmentFactors
+from corporate_action_service import CorporateActionService
+from movers import METRICS, Mover, MoverRanking
+from quote_hub import Quote
+from revocation_list import to_datetime
+from portfolio_pilot_backend.models import Dividend, Split, Stock
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepository, \
+    HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepository, StockRepositoryFactory
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class MoverService:
+    """
+    Answers top gainer, loser and volume queries per exchange and industry from memory.
+
+    The ranking (see movers) is built once from the last two bars of every
+    stock and then updated in place: by `bars_changed` when bars are stored
+    through this process, by `on_ticks` for live quotes and by an
+    incremental reload of the series stamped since the previous one, at
+    most every `sync_interval` seconds, for bars written by other
+    processes. Queries never touch the database themselves. Stored bars
+    are unadjusted, so the last and prior close are scaled by the stock's
+    split and dividend factors; a new corporate action re-reads them.
+
+    With a `snapshot_path` the ranking is written to a JSON file at most
+    every `snapshot_interval` seconds and on shutdown; a restart restores
+    it and reloads only the series stamped since it was written.
+    """
+
+    def __init__(self, historical_data_repository_factory: HistoricalDataRepositoryFactory,
+                 stock_repository_factory: StockRepositoryFactory, session_factory=None,
+                 snapshot_path: str | None = None, snapshot_interval: float = 60.0, sync_interval: float = 30.0,
+                 clock=time.time, corporate_action_service: CorporateActionService | None = None):
+        """
+        Args:
+            historical_data_repository_factory: Factory for the price history repository.
+            stock_repository_factory: Factory for the stock repository, supplies exchange and industry.
+            session_factory: Opens sessions for loading and the periodic reload; without it only updates apply.
+            snapshot_path: JSON file the ranking is persisted to, None keeps it in memory only.
+            snapshot_interval: Minimum seconds between two snapshots.
+            sync_interval: Minimum seconds between two reloads of changed series.
+            corporate_action_service: Supplies the adjustment factors; without it the bars are ranked as stored.
+        """
+        self.historical_data_repository_factory = historical_data_repository_factory
+        self.stock_repository_factory = stock_repository_factory
+        self.session_factory = session_factory
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self.corporate_action_service = corporate_action_service
+        self.ranking = MoverRanking()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._last_sync: float | None = None
+        self._synced_until: datetime | None = None
+        self._last_snapshot: float | None = None
+        self._dirty = False
+
+    def create_historical_data_repository(self, session: Session) -> HistoricalDataRepository:
+        return self.historical_data_repository_factory.create(session)
+
+    def create_stock_repository(self, session: Session) -> StockRepository:
+        return self.stock_repository_factory.create(session)
+
+    def load(self, session: Session) -> int:
+        """
+        Builds the ranking from the snapshot, if there is one, or from the stored bars; returns the ranked stocks.
+        """
+        now = self.clock()
+        stocks = {row.id: row for row in self.create_stock_repository(session).list_reference_rows()}
+        snapshot = self._read_snapshot()
+        ranking = MoverRanking()
+        for stock in stocks.values():
+            ranking.set_groups(stock.id, stock.exchange, stock.industry)
+        history_repository = self.create_historical_data_repository(session)
+        if snapshot is not None:
+            ranking.restore(row for row in snapshot["stocks"] if row[0] in stocks)
+            since = datetime.fromisoformat(snapshot["synced_until"]) - timedelta(seconds=self.sync_interval)
+            stock_ids = history_repository.list_stamped_since(since)
+            rows = history_repository.list_latest_bars(stock_ids) if stock_ids else []
+        else:
+            rows = history_repository.list_latest_bars()
+        self._apply_bars(ranking, rows, self._load_factors(session, rows))
+        with self._lock:
+            self.ranking = ranking
+            self._dirty = True
+        self._synced_until, self._last_sync, self._last_snapshot = to_datetime(now), now, now
+        return len(ranking)
+
+    def _load_factors(self, session: Session, rows: list) -> dict[int, AdjustmentFactors] | None:
+        if self.corporate_action_service is None or not rows:
+            return None
+        return self.corporate_action_service.get_factors_for_stocks(session, sorted({row.stock_id for row in rows}))
+
+    @staticmethod
+    def _apply_bars(ranking: MoverRanking, rows: Iterable,
+                    factors: dict[int, AdjustmentFactors] | None = None) -> None:
+        # Zeilen sind nach Aktie und Datum sortiert: die letzte ist die jüngste Bar, die davor liefert den Vortag.
+        for stock_id, bars in groupby(rows, key=lambda row: row.stock_id):
+            bars = list(bars)
+            last, prior = bars[-1], bars[-2] if len(bars) > 1 else None
+            price, volume = (1.0, 1.0), (1.0, 1.0)
+            if factors is not None:
+                # Ohne Faktoren wäre am Ex-Tag eines Splits der Vortagesschluss ein Vielfaches des letzten Kurses.
+                price, volume = factors[stock_id].factors_for(
+                    np.array([last.date, (prior or last).date], dtype="datetime64[s]"))
+            ranking.set_bars(stock_id, last.date.date(), float(last.adj_close * price[0]),
+                             float(prior.adj_close * price[1]) if prior else None,
+                             int(round((last.volume or 0) * volume[0])))
+
+    def bars_changed(self, session: Session, stock_id: int) -> None:
+        """
+        Re-reads the last two bars of a stock once its new bars are committed.
+
+        Called after the commit, so a failed or rolled back write never reaches the ranking.
+        """
+        rows = self.create_historical_data_repository(session).list_latest_bars([stock_id])
+        factors = self._load_factors(session, rows)
+        with self._lock:
+            self._apply_bars(self.ranking, rows, factors)
+            self._dirty = True
+
+    def corporate_action_added(self, action: Split | Dividend) -> None:
+        """
+        CorporateActionService listener: re-reads the stock's last two bars with its new factors.
+        """
+        if self.session_factory is None:
+            return
+        with self.session_factory() as session:
+            self.bars_changed(session, action.stock_id)
+
+    def stock_changed(self, stock: Stock | None, stock_id: int) -> None:
+        """
+        StockService listener: moves a stock to its new exchange and industry, or drops a deleted one.
+        """
+        with self._lock:
+            if stock is None:
+                self.ranking.remove(stock_id)
+            else:
+                self.ranking.set_groups(stock_id, stock.exchange, stock.industry)
+            self._dirty = True
+
+    def on_ticks(self, quotes: Iterable[Quote]) -> int:
+        """
+        QuoteHub listener: applies live quotes to the ranking; returns how many moved a stock.
+        """
+        with self._lock:
+            applied = self.ranking.apply_ticks(quotes)
+            self._dirty = self._dirty or applied > 0
+        return applied
+
+    def get_movers(self, k: int = 10, exchange: str | None = None, industry: str | None = None,
+                   metrics: Iterable[str] = METRICS) -> dict[str, list[Mover]]:
+        """
+        The k top stocks per metric among all stocks or those of an exchange and/or industry.
+        """
+        self._maybe_sync()
+        with self._lock:
+            return {metric: self.ranking.top(metric, k, exchange, industry) for metric in metrics}
+
+    def sync(self, session: Session) -> None:
+        now = self.clock()
+        history_repository = self.create_historical_data_repository(session)
+        if self._synced_until is None:
+            rows = history_repository.list_latest_bars()
+        else:
+            # Überlappendes Fenster, damit spät committete Bars anderer Prozesse nicht verloren gehen.
+            stock_ids = history_repository.list_stamped_since(
+                self._synced_until - timedelta(seconds=self.sync_interval))
+            rows = history_repository.list_latest_bars(stock_ids) if stock_ids else []
+        factors = self._load_factors(session, rows)
+        with self._lock:
+            self._apply_bars(self.ranking, rows, factors)
+            self._dirty = self._dirty or bool(rows)
+        self._synced_until = to_datetime(now)
+        self._last_sync = now
+
+    def _maybe_sync(self) -> None:
+        now = self.clock()
+        sync_due = self.session_factory is not None and \
+            (self._last_sync is None or now - self._last_sync >= self.sync_interval)
+        snapshot_due = self.snapshot_path is not None and \
+            (self._last_snapshot is None or now - self._last_snapshot >= self.snapshot_interval)
+        if not (sync_due or snapshot_due) or not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            if sync_due:
+                with self.session_factory() as session:
+                    self.sync(session)
+            if snapshot_due:
+                self.save_snapshot()
+        except Exception:
+            # Ein Datenbank- oder Dateifehler darf die Abfrage nicht blockieren; der nächste Aufruf versucht es erneut.
+            logger.exception("Mover ranking sync failed")
+            self._last_sync = self._last_snapshot = self.clock()
+        finally:
+            self._sync_lock.release()
+
+    def _read_snapshot(self) -> dict | None:
+        if not self.snapshot_path:
+            return None
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable movers snapshot %s: %s", self.snapshot_path, e)
+            return None
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return None
+        return snapshot
+
+    def save_snapshot(self) -> bool:
+        """
+        Writes the ranking to the snapshot file if it changed since the last one; returns whether it was written.
+        """
+        self._last_snapshot = self.clock()
+        if not self.snapshot_path or self._synced_until is None:
+            return False
+        with self._lock:
+            if not self._dirty:
+                return False
+            # Nur bis synced_until geladene Bars sind sicher enthalten, ab dort lädt der Neustart nach.
+            snapshot = {"version": SNAPSHOT_VERSION, "synced_until": self._synced_until.isoformat(),
+                        "stocks": self.ranking.to_snapshot()}
+            self._dirty = False
+        temporary = f"{self.snapshot_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(snapshot, file, separators=(",", ":"))
+            os.replace(temporary, self.snapshot_path)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+            raise
+        return True
@@ -0,0 +1,215 @@
+"""
+In-memory rankings of the day's biggest gainers, losers and most traded stocks.
+
+Every stock belongs to up to four groups: all stocks, its exchange, its
+industry and the pair of both. Each group keeps its members in two sorted
+arrays, (change, stock_id) and (volume, stock_id). A new bar or tick moves
+one stock: its old entries are found by bisection and replaced, so an
+update costs O(log n) comparisons plus a memmove within each of its
+groups, and a top-k query is a slice of k entries, no matter how many
+stocks there are.
+
+The change of a stock is its latest price against the close before it.
+Stored daily bars give the close of the last session and the one before;
+live ticks of a later day move the price against the last close, and
+their volumes add up to the day's volume until that day's bar arrives.
+"""
+from bisect import bisect_left, insort
+from datetime import date, datetime, timezone
+from typing import Iterable, NamedTuple
+
+from quote_hub import Quote
+
+GAINERS = "gainers"
+LOSERS = "losers"
+MOST_TRADED = "most_traded"
+METRICS = (GAINERS, LOSERS, MOST_TRADED)
+
+ALL = (None, None)
+
+
+class StockMove(NamedTuple):
+    bar_date: date | None
+    bar_close: float | None
+    prior_close: float | None  # Schluss der Sitzung vor bar_date
+    bar_volume: int
+    tick_date: date | None = None
+    tick_price: float | None = None
+    tick_volume: int = 0  # Summe der Tick-Volumina seit Beginn von tick_date
+    tick_time: float | None = None
+
+
+class Mover(NamedTuple):
+    stock_id: int
+    price: float
+    previous_close: float | None
+    change: float | None  # relativ, 0.05 = +5 %
+    volume: int
+    as_of: datetime
+
+
+def to_mover(stock_id: int, move: StockMove) -> Mover | None:
+    if move.tick_date is not None and (move.bar_date is None or move.tick_date > move.bar_date):
+        price, reference, volume = move.tick_price, move.bar_close, move.tick_volume
+        as_of = datetime.fromtimestamp(move.tick_time, timezone.utc).replace(tzinfo=None)
+    elif move.bar_close is not None:
+        price, reference, volume = move.bar_close, move.prior_close, move.bar_volume
+        as_of = datetime.combine(move.bar_date, datetime.min.time())
+    else:
+        return None
+    change = price / reference - 1 if reference else None
+    return Mover(stock_id, price, reference, change, volume, as_of)
+
+
+def group_key(exchange: str | None, industry: str | None) -> tuple[str | None, str | None]:
+    return (exchange.strip().casefold() or None if exchange else None,
+            industry.strip().casefold() or None if industry else None)
+
+
+class _Ranks:
+    __slots__ = ("changes", "volumes")
+
+    def __init__(self):
+        self.changes: list[tuple[float, int]] = []
+        self.volumes: list[tuple[int, int]] = []
+
+    @staticmethod
+    def _remove(entries: list, entry: tuple) -> None:
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+    def replace(self, old: Mover | None, new: Mover | None) -> None:
+        if old is not None:
+            if old.change is not None:
+                self._remove(self.changes, (old.change, old.stock_id))
+            self._remove(self.volumes, (old.volume, old.stock_id))
+        if new is not None:
+            if new.change is not None:
+                insort(self.changes, (new.change, new.stock_id))
+            insort(self.volumes, (new.volume, new.stock_id))
+
+    def __len__(self) -> int:
+        return len(self.volumes)
+
+
+class MoverRanking:
+    """
+    Per-group sorted arrays of the current movers; not thread-safe, see MoverService.
+    """
+
+    def __init__(self):
+        self._moves: dict[int, StockMove] = {}
+        self._movers: dict[int, Mover] = {}
+        self._groups_of: dict[int, frozenset] = {}
+        self._ranks: dict[tuple, _Ranks] = {}
+
+    def __len__(self) -> int:
+        return len(self._movers)
+
+    def get(self, stock_id: int) -> Mover | None:
+        return self._movers.get(stock_id)
+
+    def _groups(self, stock_id: int) -> frozenset:
+        return self._groups_of.get(stock_id, frozenset((ALL,)))
+
+    def _place(self, stock_id: int, groups: Iterable[tuple], old: Mover | None, new: Mover | None) -> None:
+        for group in groups:
+            ranks = self._ranks.get(group)
+            if ranks is None:
+                ranks = self._ranks[group] = _Ranks()
+            ranks.replace(old, new)
+            if not ranks:
+                del self._ranks[group]
+
+    def set_groups(self, stock_id: int, exchange: str | None, industry: str | None) -> None:
+        exchange_key, industry_key = group_key(exchange, industry)
+        groups = frozenset({ALL, (exchange_key, None), (None, industry_key), (exchange_key, industry_key)})
+        old_groups = self._groups(stock_id)
+        if groups == old_groups:
+            return
+        self._groups_of[stock_id] = groups
+        mover = self._movers.get(stock_id)
+        if mover is not None:
+            self._place(stock_id, old_groups - groups, mover, None)
+            self._place(stock_id, groups - old_groups, None, mover)
+
+    def remove(self, stock_id: int) -> None:
+        mover = self._movers.pop(stock_id, None)
+        self._moves.pop(stock_id, None)
+        if mover is not None:
+            self._place(stock_id, self._groups(stock_id), mover, None)
+        self._groups_of.pop(stock_id, None)
+
+    def _set(self, stock_id: int, move: StockMove) -> None:
+        self._moves[stock_id] = move
+        old, new = self._movers.get(stock_id), to_mover(stock_id, move)
+        if old == new:
+            return
+        if new is None:
+            del self._movers[stock_id]
+        else:
+            self._movers[stock_id] = new
+        self._place(stock_id, self._groups(stock_id), old, new)
+
+    def set_bars(self, stock_id: int, bar_date: date, bar_close: float, prior_close: float | None,
+                 bar_volume: int) -> None:
+        """
+        Sets the stock's last stored session; ticks of a later day are kept.
+        """
+        move = StockMove(bar_date, bar_close, prior_close, bar_volume)
+        current = self._moves.get(stock_id)
+        if current is not None and current.tick_date is not None and current.tick_date > bar_date:
+            move = move._replace(tick_date=current.tick_date, tick_price=current.tick_price,
+                                 tick_volume=current.tick_volume, tick_time=current.tick_time)
+        self._set(stock_id, move)
+
+    def apply_ticks(self, quotes: Iterable[Quote]) -> int:
+        """
+        Moves the prices of ticked stocks; ticks on or before the last stored session are ignored.
+        """
+        applied = 0
+        for quote in quotes:
+            day = datetime.fromtimestamp(quote.timestamp, timezone.utc).date()
+            move = self._moves.get(quote.stock_id) or StockMove(None, None, None, 0)
+            if move.bar_date is not None and day <= move.bar_date:
+                continue
+            if move.tick_time is not None and quote.timestamp < move.tick_time:
+                continue
+            volume = quote.volume + (move.tick_volume if move.tick_date == day else 0)
+            self._set(quote.stock_id, move._replace(tick_date=day, tick_price=quote.price, tick_volume=volume,
+                                                    tick_time=quote.timestamp))
+            applied += 1
+        return applied
+
+    def top(self, metric: str, k: int, exchange: str | None = None, industry: str | None = None) -> list[Mover]:
+        """
+        The k biggest gainers, losers or most traded stocks of a group, best first.
+        """
+        ranks = self._ranks.get(group_key(exchange, industry))
+        if ranks is None or k <= 0:
+            return []
+        if metric == GAINERS:
+            entries = ranks.changes[:-k - 1:-1]
+        elif metric == LOSERS:
+            entries = ranks.changes[:k]
+        elif metric == MOST_TRADED:
+            entries = ranks.volumes[:-k - 1:-1]
+        else:
+            raise ValueError(f"Unknown metric: {metric}")
+        return [self._movers[stock_id] for _, stock_id in entries]
+
+    def to_snapshot(self) -> list[list]:
+        """
+        The state of every stock as JSON-ready rows; group memberships are reference data and not included.
+        """
+        return [[stock_id, move.bar_date.isoformat() if move.bar_date else None, move.bar_close, move.prior_close,
+                 move.bar_volume, move.tick_date.isoformat() if move.tick_date else None, move.tick_price,
+                 move.tick_volume, move.tick_time] for stock_id, move in self._moves.items()]
+
+    def restore(self, rows: Iterable[list]) -> None:
+        for stock_id, bar_date, bar_close, prior_close, bar_volume, tick_date, tick_price, tick_volume, tick_time \
+                in rows:
+            self._set(stock_id, StockMove(date.fromisoformat(bar_date) if bar_date else None, bar_close, prior_close,
+                                          bar_volume, date.fromisoformat(tick_date) if tick_date else None,
+                                          tick_price, tick_volume, tick_time))
@@ -0,0 +1,130 @@
+"""
+Password key derivation running in a bounded thread pool.
+
+Hashes are stored self-describing, so parameters can be raised later and
+old hashes still verify (and get flagged by `needs_rehash`):
+
+    scrypt$<log2 n>$<r>$<p>$<salt b64>$<key b64>
+    $argon2id$...                    (argon2-cffi format, optional dependency)
+
+hashlib.scrypt and argon2-cffi release the GIL, so the pool threads run in
+parallel with request workers. The pool only admits `max_workers +
+max_pending` jobs at a time; beyond that callers get HasherBusyError
+immediately instead of piling up behind a login burst.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SCRYPT = "scrypt"
+ARGON2 = "argon2"
+
+
+class HasherBusyError(RuntimeError):
+    pass
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+class PasswordHasher:
+    def __init__(self, algorithm: str = SCRYPT, scrypt_log2_n: int = 14, scrypt_r: int = 8, scrypt_p: int = 1,
+                 max_workers: int = 2, max_pending: int = 16, wait_timeout: float = 0.05):
+        """
+        Args:
+            algorithm: "scrypt" (stdlib) or "argon2" (requires argon2-cffi) for new hashes.
+            scrypt_log2_n: scrypt CPU/memory cost as a power of two.
+            scrypt_r: scrypt block size.
+            scrypt_p: scrypt parallelism.
+            max_workers: Threads deriving keys concurrently.
+            max_pending: Jobs allowed to wait for a free thread.
+            wait_timeout: Seconds to wait for an admission slot before raising HasherBusyError.
+        """
+        if algorithm not in (SCRYPT, ARGON2):
+            raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.scrypt_log2_n = scrypt_log2_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+        self.wait_timeout = wait_timeout
+        self._argon2 = self._load_argon2() if algorithm == ARGON2 else None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-kdf")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    @staticmethod
+    def _load_argon2():
+        try:
+            import argon2
+        except ImportError as e:
+            raise RuntimeError("Password hash algorithm 'argon2' requires the argon2-cffi package.") from e
+        return argon2.PasswordHasher()
+
+    def hash(self, password: str) -> str:
+        return self._run(self._hash, password)
+
+    def verify(self, stored_hash: str, password: str) -> bool:
+        return self._run(self._verify, stored_hash, password)
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        """
+        True for legacy plain values and for hashes made with another algorithm or other parameters.
+        """
+        if self.algorithm == ARGON2:
+            return not stored_hash.startswith("$argon2") or self._argon2.check_needs_rehash(stored_hash)
+        return not stored_hash.startswith(self._scrypt_prefix())
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise HasherBusyError("Too many concurrent password operations.")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def _scrypt_prefix(self) -> str:
+        return f"{SCRYPT}${self.scrypt_log2_n}${self.scrypt_r}${self.scrypt_p}$"
+
+    @staticmethod
+    def _scrypt(password: str, salt: bytes, log2_n: int, r: int, p: int) -> bytes:
+        n = 1 << log2_n
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, dklen=32,
+                              maxmem=256 * n * r + 1024 * 1024)
+
+    def _hash(self, password: str) -> str:
+        if self.algorithm == ARGON2:
+            return self._argon2.hash(password)
+        salt = os.urandom(16)
+        key = self._scrypt(password, salt, self.scrypt_log2_n, self.scrypt_r, self.scrypt_p)
+        return self._scrypt_prefix() + _b64encode(salt) + "$" + _b64encode(key)
+
+    def _verify(self, stored_hash: str, password: str) -> bool:
+        if stored_hash.startswith(SCRYPT + "$"):
+            try:
+                _, log2_n, r, p, salt, key = stored_hash.split("$")
+                expected = _b64decode(key)
+                derived = self._scrypt(password, _b64decode(salt), int(log2_n), int(r), int(p))
+            except ValueError:
+                return False
+            return hmac.compare_digest(derived, expected)
+        if stored_hash.startswith("$argon2"):
+            argon2 = self._argon2 or self._load_argon2()
+            try:
+                return argon2.verify(stored_hash, password)
+            except Exception:
+                return False
+        # Altbestand ohne KDF: Klartextvergleich in konstanter Zeit, wird beim Login neu gehasht.
+        return hmac.compare_digest(stored_hash.encode("utf-8"), password.encode("utf-8"))
@@ -0,0 +1,165 @@
+"""
+Binary encoding of one symbol-year of daily bars.
+
+Layout (MAGIC followed by these sections):
+
+    count            varint
+    base timestamp   zigzag varint, seconds since epoch
+    unit             varint, seconds; gcd of all timestamp deltas (86400 for daily bars)
+    deltas           count-1 zigzag varints: the first delta, then delta-of-deltas (in units)
+    5 price columns  XOR stream per column (open, high, low, close, adj_close)
+    volume           count varints
+
+Price columns use a byte-aligned variant of Gorilla XOR compression: every
+value is XORed with its predecessor and stored as one header byte (leading
+and trailing zero bytes) plus the meaningful bytes. adj_close is XORed with
+the same bar's close first, so unadjusted history costs one byte per bar.
+Byte alignment gives up a little density against bit-level Gorilla but lets
+both directions run as NumPy array operations; decoding ends in a single
+`np.bitwise_xor.accumulate` per column.
+"""
+import numpy as np
+
+from price_series import PRICE_FIELDS, PriceSeries
+
+MAGIC = b"PC1"
+
+_VARINT_GROUPS = 10
+_BYTE_COLUMNS = np.arange(8)
+
+
+class ChunkDecodeError(ValueError):
+    pass
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64)
+    return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
+
+
+def _encode_varints(values: np.ndarray) -> bytes:
+    values = np.asarray(values, dtype=np.uint64)
+    shifts = (np.arange(_VARINT_GROUPS, dtype=np.uint64) * np.uint64(7))
+    groups = (values[:, None] >> shifts) & np.uint64(0x7F)
+    lengths = 1 + ((values[:, None] >> shifts[1:]) != 0).sum(axis=1)
+    used = np.arange(_VARINT_GROUPS) < lengths[:, None]
+    more = np.arange(_VARINT_GROUPS) < (lengths - 1)[:, None]
+    groups = (groups | (more.astype(np.uint64) << np.uint64(7))).astype(np.uint8)
+    return groups[used].tobytes()
+
+
+def _decode_varints(buffer: np.ndarray, pos: int, count: int) -> tuple[np.ndarray, int]:
+    if count == 0:
+        return np.empty(0, dtype=np.uint64), pos
+    window = buffer[pos:pos + count * _VARINT_GROUPS]
+    ends = np.flatnonzero(window < 0x80)[:count]
+    if len(ends) < count:
+        raise ChunkDecodeError("Truncated varint section.")
+    consumed = int(ends[-1]) + 1
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    offsets = np.arange(consumed) - np.repeat(starts, ends - starts + 1)
+    groups = (window[:consumed].astype(np.uint64) & np.uint64(0x7F)) << (offsets.astype(np.uint64) * np.uint64(7))
+    return np.add.reduceat(groups, starts), pos + consumed
+
+
+def _encode_xor_column(words: np.ndarray) -> bytes:
+    xor = words.copy()
+    xor[1:] ^= words[:-1]
+    octets = xor.astype(">u8").view(np.uint8).reshape(-1, 8)
+    nonzero = octets != 0
+    present = nonzero.any(axis=1)
+    lead = np.where(present, nonzero.argmax(axis=1), 8)
+    trail = np.where(present, nonzero[:, ::-1].argmax(axis=1), 0)
+    header = ((lead << 4) | trail).astype(np.uint8)
+    mask = (_BYTE_COLUMNS >= lead[:, None]) & (_BYTE_COLUMNS < (8 - trail)[:, None])
+    payload = octets[mask]
+    return header.tobytes() + _encode_varints(np.array([len(payload)])) + payload.tobytes()
+
+
+def _decode_xor_column(buffer: np.ndarray, pos: int, count: int) -> tuple[np.ndarray, int]:
+    header = buffer[pos:pos + count]
+    if len(header) < count:
+        raise ChunkDecodeError("Truncated price column.")
+    (length,), pos = _decode_varints(buffer, pos + count, 1)
+    lead = (header >> 4).astype(np.int64)
+    trail = (header & 0x0F).astype(np.int64)
+    mask = (_BYTE_COLUMNS >= lead[:, None]) & (_BYTE_COLUMNS < (8 - trail)[:, None])
+    payload = buffer[pos:pos + int(length)]
+    if len(payload) != int(length) or int(mask.sum()) != int(length):
+        raise ChunkDecodeError("Corrupt price column.")
+    octets = np.zeros((count, 8), dtype=np.uint8)
+    octets[mask] = payload
+    xor = octets.view(">u8").reshape(count).astype(np.uint64)
+    return np.bitwise_xor.accumulate(xor), pos + int(length)
+
+
+def _float_words(values: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64).view(np.uint64)
+
+
+def encode_series(series: PriceSeries) -> bytes:
+    """
+    Encodes a non-empty, date-sorted series into a compressed chunk.
+    """
+    count = len(series)
+    if count == 0:
+        raise ValueError("Cannot encode an empty series.")
+    if (series.volume < 0).any():
+        raise ValueError("Volumes must not be negative.")
+    seconds = series.dates.astype("datetime64[s]").astype(np.int64)
+    deltas = np.diff(seconds)
+    unit = int(np.gcd.reduce(deltas)) if len(deltas) else 1
+    unit = unit or 1
+    units = deltas // unit
+    delta_stream = np.concatenate((units[:1], np.diff(units))) if len(units) else units
+
+    parts = [
+        MAGIC,
+        _encode_varints(np.array([count])),
+        _encode_varints(_zigzag(seconds[:1])),
+        _encode_varints(np.array([unit])),
+        _encode_varints(_zigzag(delta_stream)),
+    ]
+    close_words = _float_words(series.close)
+    for field in PRICE_FIELDS:
+        words = _float_words(getattr(series, field))
+        if field == "adj_close":
+            words = words ^ close_words
+        parts.append(_encode_xor_column(words))
+    parts.append(_encode_varints(series.volume))
+    return b"".join(parts)
+
+
+def decode_series(data: bytes) -> PriceSeries:
+    """
+    Decodes a chunk straight into the NumPy columns of a PriceSeries.
+    """
+    if not data.startswith(MAGIC):
+        raise ChunkDecodeError("Unknown price chunk format.")
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    (count,), pos = _decode_varints(buffer, len(MAGIC), 1)
+    count = int(count)
+    (base,), pos = _decode_varints(buffer, pos, 1)
+    (unit,), pos = _decode_varints(buffer, pos, 1)
+    delta_stream, pos = _decode_varints(buffer, pos, count - 1)
+
+    seconds = np.empty(count, dtype=np.int64)
+    seconds[0] = _unzigzag(np.array([base]))[0]
+    seconds[1:] = np.cumsum(np.cumsum(_unzigzag(delta_stream))) * np.int64(unit)
+    seconds[1:] += seconds[0]
+
+    columns = {}
+    for field in PRICE_FIELDS:
+        columns[field], pos = _decode_xor_column(buffer, pos, count)
+    columns["adj_close"] ^= columns["close"]
+    volumes, pos = _decode_varints(buffer, pos, count)
+    if pos != len(buffer):
+        raise ChunkDecodeError("Trailing bytes after price chunk.")
+    return PriceSeries(seconds.astype("datetime64[s]"),
+                       *(columns[field].view(np.float64) for field in PRICE_FIELDS),
+                       volumes.astype(np.int64))
@@ -0,0 +1,180 @@
+import math
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import attrgetter
+
+import numpy as np
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from aligned_prices import AlignedPrices
+from price_chunk_codec import decode_series, encode_series
+from price_series import PRICE_FIELDS, PriceSeries
+from trading_calendar import TradingCalendar
+from portfolio_pilot_backend.models import PriceChunk
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepository, \
+    HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepository, \
+    PriceChunkRepositoryFactory
+
+BAR_FIELDS = ("date", "open", "high", "low", "close", "adj_close", "volume")
+NUMERIC_BAR_FIELDS = BAR_FIELDS[1:]
+
+class PriceHistoryService:
+    def __init__(self, historical_data_repository_factory: HistoricalDataRepositoryFactory,
+                 price_chunk_repository_factory: PriceChunkRepositoryFactory, read_from_chunks: bool = False):
+        """
+        Args:
+            historical_data_repository_factory: Factory for the row-per-bar repository.
+            price_chunk_repository_factory: Factory for the compressed chunk repository.
+            read_from_chunks: Serve reads from price_chunks for converted symbols.
+        """
+        self.historical_data_repository_factory = historical_data_repository_factory
+        self.price_chunk_repository_factory = price_chunk_repository_factory
+        self.read_from_chunks = read_from_chunks
+
+    def create_historical_data_repository(self, session: Session) -> HistoricalDataRepository:
+        return self.historical_data_repository_factory.create(session)
+
+    def create_price_chunk_repository(self, session: Session) -> PriceChunkRepository:
+        return self.price_chunk_repository_factory.create(session)
+
+    def get_series(self, session: Session, stock_id: int, start: datetime | None = None,
+                   end: datetime | None = None) -> PriceSeries:
+        if self.read_from_chunks:
+            chunks = self.create_price_chunk_repository(session).get_chunks(
+                stock_id, start.year if start else None, end.year if end else None)
+            if chunks:
+                return PriceSeries.concat(decode_series(chunk.data) for chunk in chunks).between(start, end)
+        rows = self.create_historical_data_repository(session).get_range_rows(stock_id, start, end)
+        return PriceSeries.from_rows(rows)
+
+    def get_aligned(self, session: Session, stock_ids: list[int], fields: tuple[str, ...],
+                    start: datetime | None = None, end: datetime | None = None,
+                    calendar: TradingCalendar | None = None) -> AlignedPrices:
+        """
+        Loads several stocks with set-based queries and aligns them on the union of their dates.
+
+        Converted stocks come from one chunk query, all others from one
+        `stock_id IN (...)` range scan over the requested columns only. With
+        a calendar the date axis is its sessions between start and end
+        instead; gaps stay NaN until `AlignedPrices.filled()`.
+        """
+        parts = []
+        remaining = list(stock_ids)
+        if self.read_from_chunks and stock_ids:
+            chunk_repository = self.create_price_chunk_repository(session)
+            converted = chunk_repository.list_converted_stock_ids(stock_ids)
+            chunks = chunk_repository.get_chunks_for_stocks(
+                sorted(converted), start.year if start else None, end.year if end else None) if converted else []
+            for stock_id, group in groupby(chunks, key=attrgetter("stock_id")):
+                series = PriceSeries.concat(decode_series(chunk.data) for chunk in group).between(start, end)
+                parts.append((np.full(len(series), stock_id, dtype=np.int64), series.dates,
+                              [getattr(series, field) for field in fields]))
+            remaining = [stock_id for stock_id in stock_ids if stock_id not in converted]
+        if remaining:
+            rows = self.create_historical_data_repository(session).get_range_rows_for_stocks(
+                remaining, fields, start, end)
+            if rows:
+                columns = list(zip(*rows))
+                parts.append((np.array(columns[0], dtype=np.int64), np.array(columns[1], dtype="datetime64[s]"),
+                              [np.array(column, dtype=np.float64 if field in PRICE_FIELDS else np.int64)
+                               for field, column in zip(fields, columns[2:])]))
+
+        if parts:
+            bar_stock_ids = np.concatenate([part[0] for part in parts])
+            bar_dates = np.concatenate([part[1] for part in parts])
+            bar_columns = {field: np.concatenate([part[2][i] for part in parts]) for i, field in enumerate(fields)}
+        else:
+            bar_stock_ids, bar_dates = np.empty(0, dtype=np.int64), np.empty(0, dtype="datetime64[s]")
+            bar_columns = {field: np.empty(0) for field in fields}
+        if calendar is not None:
+            return AlignedPrices.on_calendar(stock_ids, bar_stock_ids, bar_dates, bar_columns, calendar, start, end)
+        return AlignedPrices.from_flat(stock_ids, bar_stock_ids, bar_dates, bar_columns)
+
+    def validate_bars(self, bars: list[dict]) -> str | None:
+        if not bars:
+            return "Es müssen Kursdaten angegeben werden."
+        for bar in bars:
+            missing = [field for field in ("date", "open", "high", "adj_close", "volume") if bar.get(field) is None]
+            if missing:
+                return f"Pflichtfelder fehlen: {', '.join(missing)}."
+            # Strings, bool, NaN oder inf würden gespeichert und erst beim Lesen scheitern.
+            invalid = [field for field in NUMERIC_BAR_FIELDS
+                       if bar.get(field) is not None and not self._is_finite_number(bar[field])]
+            if invalid:
+                return f"Kurswerte müssen endliche Zahlen sein: {', '.join(invalid)}."
+            if not float(bar["volume"]).is_integer():
+                return "Das Volumen muss eine ganze Zahl sein."
+        return None
+
+    @staticmethod
+    def _is_finite_number(value) -> bool:
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+    def add_bars(self, session: Session, stock_id: int, bars: list[dict]) -> tuple[int, str | None]:
+        validation_msg = self.validate_bars(bars)
+        if validation_msg:
+            return 0, validation_msg
+        rows = [{field: bar.get(field) for field in BAR_FIELDS} for bar in bars]
+        self.create_historical_data_repository(session).add_bars(stock_id, rows)
+        # Bereits konvertierte Symbole halten ihre Chunks synchron, egal ob von dort gelesen wird.
+        if self.create_price_chunk_repository(session).has_chunks(stock_id):
+            self.rebuild_chunks(session, stock_id, {row["date"].year for row in rows})
+        self.touch_series(session, stock_id)
+        return len(rows), None
+
+    def get_stamp(self, session: Session, stock_id: int) -> Row | None:
+        """
+        Returns (version, last_bar_date, modified_at) of the stock's series, or None if it was never stamped.
+        """
+        return self.create_historical_data_repository(session).get_stamp_row(stock_id)
+
+    def touch_series(self, session: Session, stock_id: int) -> None:
+        """
+        Bumps the series stamp; every change to what the history endpoints return must call this.
+        """
+        history_repository = self.create_historical_data_repository(session)
+        history_repository.touch_stamp(stock_id, history_repository.get_last_bar_date(stock_id),
+                                       datetime.now(timezone.utc).replace(tzinfo=None))
+
+    def rebuild_chunks(self, session: Session, stock_id: int, years: set[int] | None = None) -> tuple[int, int, int]:
+        """
+        Re-encodes the given years (default: all years) of a stock from the row table.
+
+        Returns:
+            A tuple of chunks written, bars encoded and compressed bytes.
+        """
+        history_repository = self.create_historical_data_repository(session)
+        chunk_repository = self.create_price_chunk_repository(session)
+        if years is None:
+            years = set(history_repository.get_years(stock_id))
+        chunks = bars = size = 0
+        for year in sorted(years):
+            series = PriceSeries.from_rows(history_repository.get_range_rows(
+                stock_id, datetime(year, 1, 1), datetime(year, 12, 31, 23, 59, 59, 999999)))
+            if not len(series):
+                continue
+            data = encode_series(series)
+            chunk_repository.save(PriceChunk(stock_id, year, len(series),
+                                             series.dates[0].astype(datetime), series.dates[-1].astype(datetime), data))
+            chunks, bars, size = chunks + 1, bars + len(series), size + len(data)
+        return chunks, bars, size
+
+    def convert_all(self, session: Session, stock_ids: list[int] | None = None) -> dict:
+        """
+        Converts the row table into price chunks, committing after each stock.
+        """
+        if stock_ids is None:
+            stock_ids = self.create_historical_data_repository(session).list_stock_ids()
+        report = {"stocks": 0, "chunks": 0, "bars": 0, "bytes": 0}
+        for stock_id in stock_ids:
+            chunks, bars, size = self.rebuild_chunks(session, stock_id)
+            session.commit()
+            report["stocks"] += 1
+            report["chunks"] += chunks
+            report["bars"] += bars
+            report["bytes"] += size
+        report["bytes_per_bar"] = round(report["bytes"] / report["bars"], 2) if report["bars"] else 0.0
+        return report
+
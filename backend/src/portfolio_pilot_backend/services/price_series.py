@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Sequence
+
+import numpy as np
+
+PRICE_FIELDS = ("open", "high", "low", "close", "adj_close")
+SERIES_FIELDS = PRICE_FIELDS + ("volume",)
+
+
+@dataclass(frozen=True)
+class PriceSeries:
+    """
+    Column-oriented daily bars of one stock, sorted by date.
+
+    `dates` is datetime64[s]; price columns are float64 with NaN for missing
+    values; `volume` is int64.
+    """
+    dates: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    adj_close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def empty(cls) -> "PriceSeries":
+        prices = np.empty(0, dtype=np.float64)
+        return cls(np.empty(0, dtype="datetime64[s]"), prices, prices, prices, prices, prices,
+                   np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence) -> "PriceSeries":
+        """
+        Builds a series from (date, open, high, low, close, adj_close, volume) rows.
+        """
+        if not rows:
+            return cls.empty()
+        columns = list(zip(*rows))
+        return cls(
+            np.array(columns[0], dtype="datetime64[s]"),
+            *(np.array(column, dtype=np.float64) for column in columns[1:6]),
+            np.array(columns[6], dtype=np.int64),
+        )
+
+    @classmethod
+    def concat(cls, parts: Iterable["PriceSeries"]) -> "PriceSeries":
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        return cls(*(np.concatenate([getattr(part, field) for part in parts])
+                     for field in ("dates",) + SERIES_FIELDS))
+
+    def between(self, start: datetime | None = None, end: datetime | None = None) -> "PriceSeries":
+        """
+        Returns the bars with start <= date <= end using binary search on the dates.
+        """
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start, "s"), side="left")
+        hi = len(self) if end is None else np.searchsorted(self.dates, np.datetime64(end, "s"), side="right")
+        if lo == 0 and hi == len(self):
+            return self
+        return PriceSeries(*(getattr(self, field)[lo:hi] for field in ("dates",) + SERIES_FIELDS))
+
+    def to_columns(self, fields: Sequence[str] = SERIES_FIELDS) -> dict:
+        """
+        Converts the series into a JSON-ready columnar dict; NaN becomes None.
+        """
+        columns = {"dates": np.datetime_as_string(self.dates, unit="D").tolist()}
+        for field in fields:
+            values = getattr(self, field)
+            if values.dtype.kind == "f":
+                columns[field] = np.where(np.isnan(values), None, values).tolist()
+            else:
+                columns[field] = values.tolist()
+        return columns
@@ -0,0 +1,194 @@
+"""
+Query-plan capture for the statements the repositories issue.
+
+A QueryPlanRecorder listens to the cursor executions of an engine. The
+first time a distinct statement runs from code in the repositories package
+it is explained on the same connection, with the same parameters
+(EXPLAIN QUERY PLAN on SQLite, EXPLAIN on PostgreSQL and MySQL), and the
+plan is kept together with the repository method that issued it. Later
+executions of that statement cost one dictionary lookup. Statements differ
+only in the length of their IN lists are one statement.
+
+A plan reading a table without an index ("SCAN users" on SQLite, "Seq Scan
+on users" on PostgreSQL, type ALL on MySQL) is a full scan; on one of the
+large tables it is flagged and logged. Baselines store the accepted plans
+as JSON: `regressions` lists statements with flagged full scans the
+baseline does not have, so a test fails when a change introduces a
+sequential scan on a hot path.
+"""
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import Engine, event
+
+import portfolio_pilot_backend.repositories
+
+logger = logging.getLogger(__name__)
+
+REPOSITORIES_DIRECTORY = os.path.dirname(os.path.abspath(portfolio_pilot_backend.repositories.__file__))
+
+# Tabellen, die mit Benutzern, Aktien und Kurshistorie wachsen; auf kleinen Tabellen ist ein Scan billig.
+LARGE_TABLES = frozenset({"users", "stocks", "historical_data", "price_chunks", "watchlists", "holdings",
+                          "price_alerts", "audit_events", "revoked_tokens", "fx_rates", "adjustment_factors",
+                          "data_quality_issues", "data_quality_watermarks"})
+
+_EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN ", "mysql": "EXPLAIN ",
+                   "mariadb": "EXPLAIN "}
+_EXPLAINED = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|INSERT\b.*\bSELECT)\b", re.IGNORECASE | re.DOTALL)
+_IN_LIST = re.compile(r"\((?:\?|%s|%\(\w+\)s|:\w+)(?:,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\)")
+_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+\"?(\w+)\"?\s+AS\s+\"?(\w+)\"?", re.IGNORECASE)
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+class QueryPlan(NamedTuple):
+    statement: str  # normalisiert, siehe normalize_statement
+    origin: str | None  # Repository-Methode, z. B. "user_repository.UserRepository.get_by_username"
+    plan: list[str]
+    full_scans: list[str]  # ohne Index gelesene Tabellen
+    flagged: list[str]  # davon große Tabellen
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Collapses whitespace and IN lists of any length to one placeholder, so equal queries share a key.
+    """
+    statement = " ".join(statement.split())
+    return _IN_LIST.sub("(?)", statement)
+
+
+def parse_plan(dialect: str, statement: str, columns: list[str], rows: list) -> tuple[list[str], list[str]]:
+    """
+    Turns EXPLAIN output into readable lines and the tables it reads without an index.
+    """
+    if dialect == "sqlite":
+        lines = [str(row[-1]) for row in rows]
+        aliases = {alias: table for table, alias in _ALIAS.findall(statement)}
+        scans = [match.group(1) for match in map(_SQLITE_SCAN.match, lines) if match]
+        tables = [aliases.get(name, name) for name in scans if name != "CONSTANT"]
+    elif dialect == "postgresql":
+        lines = [str(row[0]) for row in rows]
+        tables = [table for line in lines for table in _POSTGRES_SCAN.findall(line)]
+    else:
+        records = [dict(zip(columns, row)) for row in rows]
+        lines = [f"{record.get('table')}: type={record.get('type')} key={record.get('key')}" for record in records]
+        aliases = {alias: table for table, alias in _ALIAS.findall(statement)}
+        tables = [aliases.get(record.get("table"), record.get("table")) for record in records
+                  if record.get("type") == "ALL"]
+    return lines, list(dict.fromkeys(tables))
+
+
+def repository_origin(frame=None) -> str | None:
+    """
+    The innermost repository method on the call stack, None if no repository is involved.
+    """
+    frame = frame or sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(REPOSITORIES_DIRECTORY):
+            module = os.path.splitext(os.path.basename(filename))[0]
+            return f"{module}.{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return None
+
+
+class QueryPlanRecorder:
+    def __init__(self, large_tables: Iterable[str] = LARGE_TABLES, repositories_only: bool = True):
+        """
+        Args:
+            large_tables: Tables whose full scans are flagged.
+            repositories_only: Ignores statements that do not come from a repository, e.g. of migrations.
+        """
+        self.large_tables = frozenset(large_tables)
+        self.repositories_only = repositories_only
+        self._plans: dict[str, QueryPlan] = {}
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+        self._engines: list[Engine] = []
+
+    def attach(self, engine: Engine) -> "QueryPlanRecorder":
+        if engine.dialect.name not in _EXPLAIN_PREFIX:
+            logger.warning("Query plans are not supported for %s.", engine.dialect.name)
+            return self
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engines.append(engine)
+        return self
+
+    def detach(self) -> None:
+        for engine in self._engines:
+            event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engines.clear()
+
+    def _after_cursor_execute(self, connection, cursor, statement, parameters, context, executemany) -> None:
+        if statement in self._seen:
+            return
+        with self._lock:
+            if statement in self._seen:
+                return
+            self._seen.add(statement)
+        if not _EXPLAINED.match(statement):
+            return
+        key = normalize_statement(statement)
+        if key in self._plans:
+            return
+        origin = repository_origin()
+        if origin is None and self.repositories_only:
+            return
+        dialect = connection.dialect.name
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        # Eigener DBAPI-Cursor: läuft in derselben Transaktion, löst aber keine Events aus.
+        explain_cursor = connection.connection.cursor()
+        try:
+            explain_cursor.execute(_EXPLAIN_PREFIX[dialect] + statement, parameters)
+            columns = [column[0] for column in explain_cursor.description or ()]
+            lines, full_scans = parse_plan(dialect, statement, columns, explain_cursor.fetchall())
+        except Exception as e:
+            logger.debug("Could not explain %s: %s", key, e)
+            return
+        finally:
+            explain_cursor.close()
+        flagged = [table for table in full_scans if table in self.large_tables]
+        if flagged:
+            logger.warning("Full scan of %s in %s: %s", ", ".join(flagged), origin, key)
+        with self._lock:
+            self._plans.setdefault(key, QueryPlan(key, origin, lines, full_scans, flagged))
+
+    def plans(self) -> list[QueryPlan]:
+        with self._lock:
+            return sorted(self._plans.values(), key=lambda plan: (plan.origin or "", plan.statement))
+
+    def flagged(self) -> list[QueryPlan]:
+        return [plan for plan in self.plans() if plan.flagged]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self._seen.clear()
+
+    def save_baseline(self, path: str) -> None:
+        """
+        Stores the captured plans as the accepted ones, keyed by statement.
+        """
+        baseline = {plan.statement: {"origin": plan.origin, "plan": plan.plan, "full_scans": plan.full_scans}
+                    for plan in self.plans()}
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+
+    @staticmethod
+    def load_baseline(path: str) -> dict[str, dict]:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+
+    def regressions(self, baseline: dict[str, dict]) -> list[QueryPlan]:
+        """
+        Captured plans with flagged full scans that their baseline entry does not have; new statements count too.
+        """
+        return [plan for plan in self.flagged()
+                if not set(plan.flagged) <= set(baseline.get(plan.statement, {}).get("full_scans", ()))]
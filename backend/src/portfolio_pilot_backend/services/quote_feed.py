@@ -0,0 +1,91 @@
+import asyncio
+import csv
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+import numpy as np
+
+from quote_hub import Quote
+
+
+class IQuoteFeed(ABC):
+    @abstractmethod
+    def ticks(self) -> AsyncIterator[list[Quote]]:
+        """
+        Should yield batches of quotes as they arrive.
+        """
+        pass
+
+
+class ReplayQuoteFeed(IQuoteFeed):
+    def __init__(self, path: str, speed: float = 1.0, loop_forever: bool = False):
+        """
+        Replays a CSV file with `timestamp,stock_id,price[,volume]` rows (epoch seconds, sorted).
+
+        Args:
+            path: The replay file.
+            speed: Time compression; 10 replays ten times faster, 0 without any pauses.
+            loop_forever: Start over at the end of the file.
+        """
+        self.path = path
+        self.speed = speed
+        self.loop_forever = loop_forever
+
+    def _read(self) -> list[Quote]:
+        with open(self.path, newline="") as replay_file:
+            return [Quote(int(row[1]), float(row[2]), int(row[3]) if len(row) > 3 and row[3] else 0, float(row[0]))
+                    for row in csv.reader(replay_file) if row and not row[0].startswith("#")]
+
+    async def ticks(self) -> AsyncIterator[list[Quote]]:
+        quotes = await asyncio.get_running_loop().run_in_executor(None, self._read)
+        while quotes:
+            batch, batch_time = [], quotes[0].timestamp
+            for quote in quotes:
+                # Ticks mit gleichem Zeitstempel gehen als ein Batch raus.
+                if quote.timestamp != batch_time:
+                    yield batch
+                    if self.speed > 0:
+                        await asyncio.sleep((quote.timestamp - batch_time) / self.speed)
+                    batch, batch_time = [], quote.timestamp
+                batch.append(quote)
+            yield batch
+            if not self.loop_forever:
+                return
+
+
+class SyntheticQuoteFeed(IQuoteFeed):
+    def __init__(self, stock_ids: list[int], interval: float = 0.1, ticks_per_batch: int | None = None,
+                 volatility: float = 0.001, seed: int | None = None, batches: int | None = None):
+        """
+        Random-walk quotes for tests and load generation.
+
+        Args:
+            stock_ids: Stocks to quote.
+            interval: Seconds between batches.
+            ticks_per_batch: Stocks moving per batch (default: all).
+            volatility: Standard deviation of the log return per tick.
+            seed: Seed of the random generator.
+            batches: Stop after this many batches (default: run until cancelled).
+        """
+        self.stock_ids = np.asarray(stock_ids, dtype=np.int64)
+        self.interval = interval
+        self.ticks_per_batch = ticks_per_batch or len(stock_ids)
+        self.volatility = volatility
+        self.batches = batches
+        self._rng = np.random.default_rng(seed)
+        self._prices = np.full(len(stock_ids), 100.0)
+
+    async def ticks(self) -> AsyncIterator[list[Quote]]:
+        produced = 0
+        while self.batches is None or produced < self.batches:
+            chosen = self._rng.choice(len(self.stock_ids), size=min(self.ticks_per_batch, len(self.stock_ids)),
+                                      replace=False)
+            self._prices[chosen] *= np.exp(self._rng.normal(0.0, self.volatility, len(chosen)))
+            volumes = self._rng.integers(1, 1000, len(chosen))
+            now = time.time()
+            yield [Quote(int(stock_id), round(float(price), 4), int(volume), now)
+                   for stock_id, price, volume in zip(self.stock_ids[chosen], self._prices[chosen], volumes)]
+            produced += 1
+            if self.interval > 0:
+                await asyncio.sleep(self.interval)
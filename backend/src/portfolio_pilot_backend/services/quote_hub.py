@@ -0,0 +1,163 @@
+"""
+In-memory fan-out of live quotes to many subscribers on one asyncio loop.
+
+Every client owns a ConflatingQueue that holds at most one pending quote
+per subscribed stock: a newer tick overwrites the older one. A slow client
+therefore never grows a backlog; it simply skips intermediate prices and
+receives the newest one once it reads again. Each quote is serialized once
+per tick and the same bytes are shared by all subscribers.
+
+All QuoteHub methods except `get_latest`/`snapshot` must be called on the
+hub's event loop.
+"""
+import asyncio
+import json
+from typing import Iterable, NamedTuple
+
+
+class Quote(NamedTuple):
+    stock_id: int
+    price: float
+    volume: int
+    timestamp: float
+
+
+def encode_quote(quote: Quote) -> bytes:
+    """
+    Encodes a quote as one Server-Sent Events message.
+    """
+    data = json.dumps({"stock_id": quote.stock_id, "price": quote.price, "volume": quote.volume,
+                       "ts": quote.timestamp}, separators=(",", ":"))
+    return f"event: quote\ndata: {data}\n\n".encode("utf-8")
+
+
+class ConflatingQueue:
+    def __init__(self, stock_ids: Iterable[int]):
+        self.stock_ids = frozenset(stock_ids)
+        self._pending: dict[int, bytes] = {}
+        self._ready = asyncio.Event()
+        self.delivered = 0
+        self.conflated = 0
+        self.closed = False
+
+    def put(self, stock_id: int, message: bytes) -> None:
+        if stock_id in self._pending:
+            self.conflated += 1
+        self._pending[stock_id] = message
+        self._ready.set()
+
+    async def get_batch(self, timeout: float | None = None) -> list[bytes]:
+        """
+        Waits for pending quotes and takes all of them; returns an empty list on timeout or close.
+        """
+        if not self._pending and not self.closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._ready.clear()
+        batch = list(self._pending.values())
+        self._pending = {}
+        self.delivered += len(batch)
+        return batch
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+
+class QuoteHub:
+    def __init__(self, max_clients: int = 10_000):
+        self.max_clients = max_clients
+        self._latest: dict[int, Quote] = {}
+        self._encoded: dict[int, bytes] = {}
+        self._subscribers: dict[int, set[ConflatingQueue]] = {}
+        self._clients: set[ConflatingQueue] = set()
+        self._listeners: list = []
+        self.ticks = 0
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def get_latest(self, stock_id: int) -> Quote | None:
+        return self._latest.get(stock_id)
+
+    def snapshot(self, stock_ids: Iterable[int]) -> list[Quote]:
+        return [quote for quote in map(self._latest.get, stock_ids) if quote is not None]
+
+    def add_listener(self, listener) -> None:
+        """
+        Registers a callable that receives every published batch (accepted quotes only), e.g. the AlertEngine.
+        """
+        self._listeners.append(listener)
+
+    def publish(self, quotes: Iterable[Quote]) -> None:
+        accepted = []
+        for quote in quotes:
+            previous = self._latest.get(quote.stock_id)
+            if previous is not None and previous.timestamp > quote.timestamp:
+                continue  # Verspätete Ticks überschreiben keinen neueren Kurs
+            self._latest[quote.stock_id] = quote
+            message = self._encoded[quote.stock_id] = encode_quote(quote)
+            accepted.append(quote)
+            for queue in self._subscribers.get(quote.stock_id, ()):
+                queue.put(quote.stock_id, message)
+        self.ticks += len(accepted)
+        for listener in self._listeners:
+            listener(accepted)
+
+    def subscribe(self, stock_ids: Iterable[int]) -> ConflatingQueue:
+        """
+        Registers a client; its queue starts with the latest known quote of every subscribed stock.
+        """
+        if len(self._clients) >= self.max_clients:
+            raise OverflowError("Quote hub is at its client limit.")
+        queue = ConflatingQueue(stock_ids)
+        self._attach(queue)
+        self._clients.add(queue)
+        return queue
+
+    def update_subscription(self, queue: ConflatingQueue, stock_ids: Iterable[int]) -> None:
+        stock_ids = frozenset(stock_ids)
+        if stock_ids == queue.stock_ids:
+            return
+        self._detach(queue)
+        added = stock_ids - queue.stock_ids
+        queue.stock_ids = stock_ids
+        self._attach(queue, added)
+
+    def unsubscribe(self, queue: ConflatingQueue) -> None:
+        self._detach(queue)
+        self._clients.discard(queue)
+        queue.close()
+
+    def close_all(self) -> None:
+        """
+        Ends every client stream, e.g. on shutdown.
+        """
+        for queue in list(self._clients):
+            self.unsubscribe(queue)
+
+    async def run(self, feed) -> None:
+        """
+        Publishes every tick batch of the feed until it is exhausted or the task is cancelled.
+        """
+        async for quotes in feed.ticks():
+            self.publish(quotes)
+
+    def _attach(self, queue: ConflatingQueue, initial: Iterable[int] | None = None) -> None:
+        for stock_id in queue.stock_ids:
+            self._subscribers.setdefault(stock_id, set()).add(queue)
+        for stock_id in (queue.stock_ids if initial is None else initial):
+            message = self._encoded.get(stock_id)
+            if message is not None:
+                queue.put(stock_id, message)
+
+    def _detach(self, queue: ConflatingQueue) -> None:
+        for stock_id in queue.stock_ids:
+            subscribers = self._subscribers.get(stock_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[stock_id]
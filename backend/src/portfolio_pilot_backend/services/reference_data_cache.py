@@ -0,0 +1,195 @@
+import sys
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+from portfolio_pilot_backend.repositories.user_repository import UserRepositoryFactory
+
+
+class StockRecord(NamedTuple):
+    id: int
+    symbol: str
+    name: str
+    isin: str | None
+    wkn: str | None
+    exchange: str | None
+    industry: str | None
+    currency: str | None
+
+
+class UserRecord(NamedTuple):
+    id: int
+    username: str
+    email: str
+    version: int
+
+
+STOCK = "stock"
+USER = "user"
+
+
+def record_size(record: tuple) -> int:
+    """
+    Returns the bytes held by a record: the tuple itself plus its field objects.
+    """
+    return sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record if value is not None)
+
+
+class ReferenceDataCache:
+    """
+    Process-wide cache of immutable Stock and User profile records.
+
+    Records are NamedTuples (tuple storage, no per-instance __dict__) built
+    from column-only selects, so no ORM identity map or instance state is kept
+    alive. Every key carries a version counter that writers bump through
+    `invalidate_*`; a loader only stores its result if the version did not
+    move while it was reading, so a slow read can never resurrect stale data.
+
+    Writes of other processes never reach `invalidate_*`, so with a `ttl` the
+    whole cache is dropped every `ttl` seconds and refilled on demand. User
+    records also carry their row version; `validate_user` drops a record
+    that an ETag validator found to be older than the database row.
+    """
+
+    def __init__(self, stock_repository_factory: StockRepositoryFactory,
+                 user_repository_factory: UserRepositoryFactory, ttl: float | None = None,
+                 clock: Callable[[], float] = time.time):
+        self.stock_repository_factory = stock_repository_factory
+        self.user_repository_factory = user_repository_factory
+        self.ttl = ttl
+        self.clock = clock
+        self._expires_at = clock() + ttl if ttl is not None else None
+        self._lock = threading.Lock()
+        self._stocks: dict[int, StockRecord] = {}
+        self._stock_ids_by_symbol: dict[str, int] = {}
+        self._users: dict[int, UserRecord] = {}
+        self._versions: dict[tuple[str, int], int] = {}
+        self._stock_generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, kind: str, entity_id: int) -> int:
+        return self._versions.get((kind, entity_id), 0)
+
+    def preload(self, session: Session, user_rows: list[Row] | None = None) -> None:
+        """
+        Loads all stocks and users; `user_rows` replaces the user query (e.g. gathered from all shards).
+        """
+        stock_rows = self.stock_repository_factory.create(session).list_reference_rows()
+        if user_rows is None:
+            user_rows = self.user_repository_factory.create(session).list_profile_rows()
+        stocks = {row.id: StockRecord(*row) for row in stock_rows}
+        users = {row.id: UserRecord(*row) for row in user_rows}
+        with self._lock:
+            self._stocks = stocks
+            self._stock_ids_by_symbol = {record.symbol: record.id for record in stocks.values()}
+            self._users = users
+            if self.ttl is not None:
+                self._expires_at = self.clock() + self.ttl
+
+    def _expire(self) -> None:
+        if self._expires_at is None or self.clock() < self._expires_at:
+            return
+        with self._lock:
+            now = self.clock()
+            if now < self._expires_at:
+                return
+            # Änderungen anderer Prozesse sind so höchstens eine TTL alt.
+            self._stocks, self._stock_ids_by_symbol, self._users = {}, {}, {}
+            self._stock_generation += 1
+            self._expires_at = now + self.ttl
+
+    def get_stock(self, session: Session, stock_id: int) -> StockRecord | None:
+        self._expire()
+        record = self._stocks.get(stock_id)
+        if record is not None:
+            self.hits += 1
+            return record
+        self.misses += 1
+        version = self.version(STOCK, stock_id)
+        row = self.stock_repository_factory.create(session).get_reference_row(stock_id)
+        return self._store_stock(StockRecord(*row), version) if row else None
+
+    def get_stock_by_symbol(self, session: Session, symbol: str) -> StockRecord | None:
+        self._expire()
+        stock_id = self._stock_ids_by_symbol.get(symbol)
+        if stock_id is not None:
+            record = self._stocks.get(stock_id)
+            if record is not None and record.symbol == symbol:
+                self.hits += 1
+                return record
+        self.misses += 1
+        # Die ID ist vor dem Lesen unbekannt, daher schützt hier der Zähler über alle Aktien.
+        generation = self._stock_generation
+        row = self.stock_repository_factory.create(session).get_reference_row_by_symbol(symbol)
+        if row is None:
+            return None
+        record = StockRecord(*row)
+        with self._lock:
+            if self._stock_generation == generation:
+                self._stocks[record.id] = record
+                self._stock_ids_by_symbol[record.symbol] = record.id
+        return record
+
+    def get_user(self, session: Session, user_id: int) -> UserRecord | None:
+        self._expire()
+        record = self._users.get(user_id)
+        if record is not None:
+            self.hits += 1
+            return record
+        self.misses += 1
+        version = self.version(USER, user_id)
+        row = self.user_repository_factory.create(session).get_profile_row(user_id)
+        if row is None:
+            return None
+        record = UserRecord(*row)
+        with self._lock:
+            if self.version(USER, user_id) == version:
+                self._users[user_id] = record
+        return record
+
+    def invalidate_stock(self, stock_id: int) -> None:
+        with self._lock:
+            self._versions[(STOCK, stock_id)] = self.version(STOCK, stock_id) + 1
+            self._stock_generation += 1
+            record = self._stocks.pop(stock_id, None)
+            if record is not None and self._stock_ids_by_symbol.get(record.symbol) == stock_id:
+                del self._stock_ids_by_symbol[record.symbol]
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._versions[(USER, user_id)] = self.version(USER, user_id) + 1
+            self._users.pop(user_id, None)
+
+    def validate_user(self, user_id: int, version: int) -> None:
+        """
+        Drops the cached record of a user if its row version differs from `version`, read from the database.
+        """
+        record = self._users.get(user_id)
+        if record is not None and record.version != version:
+            self.invalidate_user(user_id)
+
+    def memory_report(self) -> dict:
+        """
+        Measures the cached records and returns totals and bytes per record.
+        """
+        report = {}
+        for kind, records in ((STOCK, list(self._stocks.values())), (USER, list(self._users.values()))):
+            total = sum(record_size(record) for record in records)
+            report[kind] = {
+                "records": len(records),
+                "bytes": total,
+                "bytes_per_record": round(total / len(records), 1) if records else 0.0,
+            }
+        return report
+
+    def _store_stock(self, record: StockRecord, version: int) -> StockRecord:
+        with self._lock:
+            if self.version(STOCK, record.id) == version:
+                self._stocks[record.id] = record
+                self._stock_ids_by_symbol[record.symbol] = record.id
+        return record
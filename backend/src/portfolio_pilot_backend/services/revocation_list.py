@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from portfolio_pilot_backend.models import RevokedToken
+from portfolio_pilot_backend.repositories.revoked_token_repository import RevokedTokenRepositoryFactory
+
+logger = logging.getLogger(__name__)
+
+
+def to_datetime(timestamp: float) -> datetime:
+    # Die Tabellen speichern naive UTC-Zeitstempel.
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+class RevocationList:
+    """
+    In-memory set of revoked token ids, backed by the revoked_tokens table.
+
+    An entry is only kept until its token would have expired anyway, so the
+    set stays small. Revocations made by other processes are picked up by an
+    incremental reload at most every `sync_interval` seconds; checks never
+    touch the database themselves.
+    """
+
+    def __init__(self, revoked_token_repository_factory: RevokedTokenRepositoryFactory, session_factory=None,
+                 sync_interval: float = 30.0, clock=time.time):
+        self.revoked_token_repository_factory = revoked_token_repository_factory
+        self.session_factory = session_factory
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self._revoked: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._last_sync: float | None = None
+        self._synced_until: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, jti: str) -> bool:
+        self._maybe_sync()
+        return jti in self._revoked
+
+    def revoke(self, session: Session, jti: str, user_id: int, expires_at: float) -> bool:
+        """
+        Persists the revocation in the caller's transaction and applies it locally right away.
+
+        Rows of tokens that have expired in the meantime are purged in the same transaction.
+        Returns False if the token was already revoked, possibly by another process not yet synced.
+        """
+        now = to_datetime(self.clock())
+        repository = self.revoked_token_repository_factory.create(session)
+        repository.purge_expired(now)
+        inserted = repository.add(RevokedToken(jti, user_id, to_datetime(expires_at), now))
+        with self._lock:
+            self._revoked[jti] = expires_at
+        return inserted
+
+    def sync(self, session: Session) -> None:
+        now = self.clock()
+        # Überlappendes Fenster, damit spät committete Sperren anderer Prozesse nicht verloren gehen.
+        since = self._synced_until - timedelta(seconds=self.sync_interval) if self._synced_until else None
+        rows = self.revoked_token_repository_factory.create(session).list_active_rows(to_datetime(now), since)
+        with self._lock:
+            for jti, expires_at, _ in rows:
+                self._revoked[jti] = expires_at.replace(tzinfo=timezone.utc).timestamp()
+            self._revoked = {jti: expiry for jti, expiry in self._revoked.items() if expiry > now}
+        self._synced_until = to_datetime(now)
+        self._last_sync = now
+
+    def _maybe_sync(self) -> None:
+        if self.session_factory is None:
+            return
+        if self._last_sync is not None and self.clock() - self._last_sync < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            with self.session_factory() as session:
+                self.sync(session)
+        except Exception:
+            # Ein Datenbankfehler darf die Prüfung nicht blockieren; der nächste Aufruf versucht es erneut.
+            logger.exception("Revocation list sync failed")
+            self._last_sync = self.clock()
+        finally:
+            self._sync_lock.release()
@@ -0,0 +1,161 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from aligned_prices import AlignedPrices, forward_fill
+from corporate_action_service import CorporateActionService
+from fx_service import FxService
+from price_history_service import PriceHistoryService
+from risk_simulation import BOOTSTRAP, METHODS, fit_model, simulate_pnl, value_at_risk
+from trading_calendar import TradingCalendar
+from trading_calendar_service import TradingCalendarService
+from portfolio_pilot_backend.repositories.holding_repository import HoldingRepository, HoldingRepositoryFactory
+
+MAX_PATHS = 1_000_000
+MAX_HORIZON_DAYS = 250
+MIN_OBSERVATIONS = 20
+
+
+class RiskEstimate(NamedTuple):
+    method: str
+    confidence: float
+    horizon_days: int
+    paths: int
+    observations: int
+    portfolio_value: float
+    value_at_risk: float
+    expected_shortfall: float
+    mean_pnl: float
+    currency: str | None = None
+
+
+class RiskService:
+    """
+    Estimates Value-at-Risk and expected shortfall of a user's holdings by Monte Carlo simulation.
+
+    Daily log returns of split- and dividend-adjusted closes over the
+    lookback window drive the simulation (see risk_simulation). With `workers` > 1 the path chunks
+    run in a lazily started process pool.
+    """
+
+    def __init__(self, holding_repository_factory: HoldingRepositoryFactory,
+                 price_history_service: PriceHistoryService, workers: int = 0, chunk_size: int = 50_000,
+                 fx_service: FxService | None = None, calendar_service: TradingCalendarService | None = None,
+                 corporate_action_service: CorporateActionService | None = None):
+        """
+        Args:
+            holding_repository_factory: Factory for the holdings repository.
+            price_history_service: Source of the aligned price history.
+            workers: Processes simulating path chunks; 0 or 1 simulates in the calling thread.
+            chunk_size: Paths per chunk, bounds memory to chunk_size x assets floats per worker.
+            fx_service: Converts prices into a common currency; without it positions are summed as quoted.
+            calendar_service: Aligns prices on the sessions of the holdings' exchanges instead of their bar dates.
+            corporate_action_service: Adjusts the stored bars for splits and dividends; without it they are used as
+                stored.
+        """
+        self.holding_repository_factory = holding_repository_factory
+        self.price_history_service = price_history_service
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.fx_service = fx_service
+        self.calendar_service = calendar_service
+        self.corporate_action_service = corporate_action_service
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+
+    def create_holding_repository(self, session: Session) -> HoldingRepository:
+        return self.holding_repository_factory.create(session)
+
+    def validate_parameters(self, method: str, confidence: float, horizon_days: int, paths: int,
+                            lookback_days: int) -> str | None:
+        if method not in METHODS:
+            return f"Methode muss eine von {', '.join(METHODS)} sein."
+        if not 0.5 <= confidence < 1:
+            return "Konfidenzniveau muss zwischen 0.5 und 1 liegen."
+        if not 1 <= horizon_days <= MAX_HORIZON_DAYS:
+            return f"Haltedauer muss zwischen 1 und {MAX_HORIZON_DAYS} Tagen liegen."
+        if not 1000 <= paths <= MAX_PATHS:
+            return f"Pfadanzahl muss zwischen 1000 und {MAX_PATHS} liegen."
+        if lookback_days < MIN_OBSERVATIONS:
+            return f"Beobachtungszeitraum muss mindestens {MIN_OBSERVATIONS} Tage umfassen."
+        return None
+
+    def estimate_risk(self, session: Session, user_id: int, method: str = BOOTSTRAP, confidence: float = 0.99,
+                      horizon_days: int = 1, paths: int = 100_000, lookback_days: int = 750, seed: int | None = None,
+                      as_of: datetime | None = None,
+                      currency: str | None = None) -> tuple[RiskEstimate | None, str | None]:
+        """
+        Simulates the P&L distribution of the user's holdings over `horizon_days` trading days.
+
+        Args:
+            lookback_days: Number of daily returns up to `as_of` the simulation is based on.
+            seed: Makes the estimate reproducible.
+            as_of: Last day of the lookback window (default: now).
+            currency: Currency of the result; prices are converted day by day, so FX moves are part of the risk.
+        """
+        validation_msg = self.validate_parameters(method, confidence, horizon_days, paths, lookback_days)
+        if not validation_msg and currency is not None and self.fx_service is None:
+            validation_msg = "Währungsumrechnung ist nicht verfügbar."
+        if validation_msg:
+            return None, validation_msg
+        holdings = self.create_holding_repository(session).list_rows_for_user(user_id)
+        if not holdings:
+            return None, "Keine Positionen vorhanden."
+
+        stock_ids = [holding.stock_id for holding in holdings]
+        end = as_of or datetime.now()
+        if self.calendar_service is not None:
+            # Der Kalender kennt die Handelstage, das Fenster beginnt genau lookback_days Sitzungen vor dem Ende.
+            calendar = self.calendar_service.for_stocks(session, stock_ids)
+            hi = calendar.bounds(None, end)[1]
+            start = calendar.sessions[max(0, hi - lookback_days - 1)].astype("datetime64[s]").astype(datetime) \
+                if hi else end
+            aligned = self._load_closes(session, stock_ids, start, end, calendar).filled()
+        else:
+            # Kalendertage großzügig bemessen, damit trotz Wochenenden und Feiertagen genug Handelstage anfallen.
+            aligned = self._load_closes(session, stock_ids, end - timedelta(days=lookback_days * 7 // 5 + 10), end)
+        if currency is not None:
+            aligned, error_msg = self.fx_service.convert_aligned(session, aligned, currency)
+            if aligned is None:
+                return None, error_msg
+        closes = forward_fill(aligned.columns["adj_close"])
+        complete = ~np.isnan(closes).any(axis=0)
+        if not complete.any():
+            return None, "Nicht für alle Positionen liegen Kursdaten vor."
+        closes = closes[:, complete.argmax():]
+        returns = np.diff(np.log(closes), axis=1).T[-lookback_days:]
+        if len(returns) < MIN_OBSERVATIONS:
+            return None, f"Zu wenige gemeinsame Kurstage ({len(returns)}) für eine Schätzung."
+
+        values = np.array([holding.quantity for holding in holdings]) * closes[:, -1]
+        pnl = simulate_pnl(fit_model(method, returns), values, horizon_days, paths, seed, self.chunk_size,
+                           self._get_executor())
+        var, expected_shortfall = value_at_risk(pnl, confidence)
+        return RiskEstimate(method, confidence, horizon_days, paths, len(returns), float(values.sum()), var,
+                            expected_shortfall, float(pnl.mean()), currency), None
+
+    def _load_closes(self, session: Session, stock_ids: list[int], start: datetime, end: datetime,
+                     calendar: TradingCalendar | None = None) -> AlignedPrices:
+        # Die Bars sind unbereinigt gespeichert; ein Split wäre sonst ein Renditeausreißer im Verlustrand.
+        if self.corporate_action_service is not None:
+            return self.corporate_action_service.get_adjusted_aligned(session, stock_ids, ("adj_close",), start, end,
+                                                                      calendar)
+        return self.price_history_service.get_aligned(session, stock_ids, ("adj_close",), start, end, calendar)
+
+    def _get_executor(self) -> ProcessPoolExecutor | None:
+        if self.workers <= 1:
+            return None
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers)
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
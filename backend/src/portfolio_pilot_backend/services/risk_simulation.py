@@ -0,0 +1,98 @@
+"""
+Vectorized Monte Carlo simulation of portfolio profit and loss.
+
+Both methods work on a matrix of daily log returns (observations x assets)
+and produce one P&L value per path for a holding period of `horizon`
+days:
+
+    bootstrap  draws whole historical days (all assets at once, so the
+               empirical correlation and fat tails are kept) and sums
+               `horizon` of them per path.
+    normal     draws from a multivariate normal with the sample mean and
+               covariance, via a Cholesky factor, scaled to the horizon.
+
+Paths are simulated in chunks of at most `chunk_size` rows, so memory is
+bounded by chunk_size x assets floats no matter how many paths are
+requested. Every chunk gets its own child of one SeedSequence: the result
+depends only on the seed and chunk size, not on how many processes ran
+the chunks.
+"""
+from concurrent.futures import Executor
+from typing import NamedTuple
+
+import numpy as np
+
+BOOTSTRAP = "bootstrap"
+NORMAL = "normal"
+METHODS = (BOOTSTRAP, NORMAL)
+
+
+class ReturnModel(NamedTuple):
+    method: str
+    returns: np.ndarray | None = None
+    mean: np.ndarray | None = None
+    cholesky: np.ndarray | None = None
+
+
+def fit_model(method: str, returns: np.ndarray) -> ReturnModel:
+    if method == BOOTSTRAP:
+        return ReturnModel(method, returns=np.ascontiguousarray(returns))
+    if method != NORMAL:
+        raise ValueError(f"Unknown simulation method: {method}")
+    covariance = np.atleast_2d(np.cov(returns, rowvar=False))
+    try:
+        cholesky = np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        # Mehr Assets als Beobachtungen o. Ä.: negative Eigenwerte abschneiden.
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        cholesky = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+    return ReturnModel(method, mean=returns.mean(axis=0), cholesky=cholesky)
+
+
+def simulate_chunk(model: ReturnModel, values: np.ndarray, horizon: int, paths: int,
+                   seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Simulates `paths` horizon P&Ls of positions worth `values` today.
+    """
+    rng = np.random.default_rng(seed)
+    if model.method == BOOTSTRAP:
+        total = np.zeros((paths, len(values)))
+        for _ in range(horizon):
+            total += model.returns[rng.integers(0, len(model.returns), paths)]
+    else:
+        total = rng.standard_normal((paths, len(values))) @ model.cholesky.T
+        total *= np.sqrt(horizon)
+        total += model.mean * horizon
+    np.expm1(total, out=total)
+    return total @ values
+
+
+def chunk_sizes(paths: int, chunk_size: int) -> list[int]:
+    full, rest = divmod(paths, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def simulate_pnl(model: ReturnModel, values: np.ndarray, horizon: int, paths: int, seed: int | None = None,
+                 chunk_size: int = 50_000, executor: Executor | None = None) -> np.ndarray:
+    """
+    Simulates `paths` P&L values, chunk by chunk, in the executor's processes if one is given.
+    """
+    sizes = chunk_sizes(paths, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    pnl = np.empty(paths)
+    mapper = map if executor is None else executor.map
+    offset = 0
+    for chunk in mapper(simulate_chunk, [model] * len(sizes), [values] * len(sizes), [horizon] * len(sizes),
+                        sizes, seeds):
+        pnl[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+    return pnl
+
+
+def value_at_risk(pnl: np.ndarray, confidence: float) -> tuple[float, float]:
+    """
+    Returns (VaR, expected shortfall) as positive loss amounts at the given confidence level.
+    """
+    losses = -pnl
+    var = float(np.quantile(losses, confidence))
+    return var, float(losses[losses >= var].mean())
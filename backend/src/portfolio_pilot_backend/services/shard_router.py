@@ -0,0 +1,231 @@
+"""
+User-sharded deployment: user-owned tables spread over several databases.
+
+The rows of users, watchlists, holdings and price alerts live on one of N
+shard databases, chosen by a jump consistent hash of the user id; all other
+tables (stocks, historical_data and the rest of the reference data, revoked
+tokens, audit events and the user id allocator) stay on one reference
+database. A router session binds the reference tables to the reference
+engine and the user-owned tables to no engine at all until `route_session`
+picks the shard of a user, so a statement that reaches user data without
+knowing whose it is fails instead of reading the wrong shard. One session
+may touch both databases; its commit commits both, one after the other and
+not atomically.
+
+Jump hashing keeps rebalancing small: going from N to N + 1 shards moves
+about 1 / (N + 1) of the users, all of them to the new shard. `rebalance`
+moves every user that sits on another shard than the hash picks. A user is
+copied to the target in one transaction and only then deleted from the
+source, so an interrupted run is finished by running it again. Holdings and
+price alerts get new ids on the target shard; user ids never change.
+
+Foreign keys from the shards to the reference tables cannot be enforced
+across databases, the shards are created without them.
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, TypeVar
+
+from sqlalchemy import Engine, MetaData, Table, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from portfolio_pilot_backend.models import Base, Holding, PriceAlert, User, UserIdAllocation, Watchlist
+
+# Eltern vor Kindern: in dieser Reihenfolge wird kopiert, umgekehrt gelöscht.
+SHARDED_TABLES: tuple[Table, ...] = (User.__table__, Watchlist.__table__, Holding.__table__, PriceAlert.__table__)
+SHARDED_TABLE_NAMES = frozenset(table.name for table in SHARDED_TABLES)
+ROUTER_KEY = "shard_router"
+SHARD_KEY = "shard"
+
+T = TypeVar("T")
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping and Veach): the bucket of `key` among `buckets`.
+    """
+    key &= 0xFFFFFFFFFFFFFFFF
+    bucket, candidate = -1, 0
+    while candidate < buckets:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return bucket
+
+
+def shard_metadata() -> MetaData:
+    """
+    The sharded tables, without their foreign keys to reference tables.
+    """
+    metadata = MetaData()
+    for table in SHARDED_TABLES:
+        copy = table.to_metadata(metadata)
+        for constraint in list(copy.foreign_key_constraints):
+            if constraint.elements[0].target_fullname.split(".")[0] in SHARDED_TABLE_NAMES:
+                continue
+            copy.constraints.discard(constraint)
+            for foreign_key in constraint.elements:
+                foreign_key.parent.foreign_keys.discard(foreign_key)
+                copy.foreign_keys.discard(foreign_key)
+    return metadata
+
+
+def route_session(session: Session, user_id: int) -> None:
+    """
+    Binds the user-owned tables of a router session to the shard of `user_id`; no-op for other sessions.
+    """
+    router = session.info.get(ROUTER_KEY)
+    if router is not None:
+        router.route(session, user_id)
+
+
+def scatter_session(session: Session, function: Callable[[Session], T]) -> list[T]:
+    """
+    Calls `function` with a session of every shard for router sessions, else once with `session` itself.
+    """
+    router = session.info.get(ROUTER_KEY)
+    if router is None:
+        return [function(session)]
+    return router.scatter(function)
+
+
+def _owner_column(table: Table):
+    return table.c.id if table is User.__table__ else table.c.user_id
+
+
+class ShardRouter:
+    def __init__(self, reference_engine: Engine, shard_engines: list[Engine], workers: int | None = None):
+        """
+        Args:
+            reference_engine: Database of all tables that are not user-owned.
+            shard_engines: One engine per shard; their order defines the shard numbers.
+            workers: Threads of scatter-gather queries; defaults to one per shard.
+        """
+        if not shard_engines:
+            raise ValueError("At least one shard is required.")
+        self.reference_engine = reference_engine
+        self.shard_engines = list(shard_engines)
+        self._binds = {table: reference_engine for table in Base.metadata.sorted_tables
+                       if table.name not in SHARDED_TABLE_NAMES}
+        self._executor = ThreadPoolExecutor(workers or len(self.shard_engines), thread_name_prefix="shard")
+
+    @property
+    def shard_count(self) -> int:
+        return len(self.shard_engines)
+
+    def shard_for(self, user_id: int) -> int:
+        return jump_hash(user_id, len(self.shard_engines))
+
+    def __call__(self) -> Session:
+        # Als session_factory nutzbar: eine Session ohne Shard, die erst route_session festlegt.
+        return self.session()
+
+    def session(self, user_id: int | None = None, shard: int | None = None) -> Session:
+        """
+        Opens a session on the reference database, routed to the shard of `user_id` or to `shard` if given.
+        """
+        session = Session(binds=self._binds, autoflush=False, info={ROUTER_KEY: self})
+        if user_id is not None:
+            self.route(session, user_id)
+        elif shard is not None:
+            self._bind_shard(session, shard)
+        return session
+
+    def route(self, session: Session, user_id: int) -> None:
+        self._bind_shard(session, self.shard_for(user_id))
+
+    def _bind_shard(self, session: Session, shard: int) -> None:
+        current = session.info.get(SHARD_KEY)
+        if current == shard:
+            return
+        if current is not None:
+            # Eine Session bleibt bei einem Shard, sonst landeten Teile einer Transaktion auf einem anderen.
+            raise ValueError(f"The session is already routed to shard {current}, not {shard}.")
+        session.info[SHARD_KEY] = shard
+        for table in SHARDED_TABLES:
+            session.bind_table(table, self.shard_engines[shard])
+
+    def scatter(self, function: Callable[[Session], T]) -> list[T]:
+        """
+        Calls `function` with a read session of every shard in parallel; returns the results in shard order.
+        """
+        def run(shard: int) -> T:
+            with self.session(shard=shard) as session:
+                return function(session)
+        return list(self._executor.map(run, range(len(self.shard_engines))))
+
+    def create_all(self) -> None:
+        Base.metadata.create_all(bind=self.reference_engine, tables=list(self._binds))
+        metadata = shard_metadata()
+        for engine in self.shard_engines:
+            metadata.create_all(bind=engine)
+
+    def rebalance(self, batch_size: int = 500, drain: list[Engine] = ()) -> dict[str, int]:
+        """
+        Moves every user, with all user-owned rows, to the shard `shard_for` picks, e.g. after shards were added.
+
+        Run it while the application is stopped: requests of a user being
+        moved would already be routed to the new shard. Afterwards the id
+        allocator is moved past the highest user id on any shard.
+
+        Args:
+            batch_size: Users moved per transaction.
+            drain: Further databases whose users all move to the shards, e.g. a former single database.
+
+        Returns:
+            Moved users per "source->target" pair; drained databases are named "drain<i>".
+        """
+        moved: dict[str, int] = defaultdict(int)
+        highest = 0
+        sources = [(str(shard), shard, engine) for shard, engine in enumerate(self.shard_engines)]
+        sources += [(f"drain{i}", None, engine) for i, engine in enumerate(drain)]
+        for name, source, engine in sources:
+            with engine.connect() as connection:
+                user_ids = list(connection.scalars(select(User.__table__.c.id).order_by(User.__table__.c.id)))
+            highest = max([highest, *user_ids[-1:]])
+            targets: dict[int, list[int]] = defaultdict(list)
+            for user_id in user_ids:
+                target = self.shard_for(user_id)
+                if target != source:
+                    targets[target].append(user_id)
+            for target, misplaced in targets.items():
+                for offset in range(0, len(misplaced), batch_size):
+                    self._move(engine, target, misplaced[offset:offset + batch_size])
+                moved[f"{name}->{target}"] += len(misplaced)
+        self.advance_id_allocation(highest)
+        return dict(moved)
+
+    def _move(self, source: Engine, target: int, user_ids: list[int]) -> None:
+        with source.connect() as connection:
+            rows = {table: [dict(row._mapping) for row in connection.execute(
+                select(table).where(_owner_column(table).in_(user_ids)))] for table in SHARDED_TABLES}
+        with self.shard_engines[target].begin() as connection:
+            # Schon vorhanden: Kopie eines abgebrochenen Laufs, es fehlt nur noch das Löschen an der Quelle.
+            copied = set(connection.scalars(select(User.__table__.c.id).where(User.__table__.c.id.in_(user_ids))))
+            for table in SHARDED_TABLES:
+                owner = _owner_column(table).name
+                # Ersatzschlüssel kollidieren zwischen Shards und werden im Ziel neu vergeben.
+                drop_id = table is not User.__table__ and "id" in table.c
+                payload = [{key: value for key, value in row.items() if not (drop_id and key == "id")}
+                           for row in rows[table] if row[owner] not in copied]
+                if payload:
+                    connection.execute(insert(table), payload)
+        with source.begin() as connection:
+            for table in reversed(SHARDED_TABLES):
+                connection.execute(delete(table).where(_owner_column(table).in_(user_ids)))
+
+    def advance_id_allocation(self, user_id: int) -> None:
+        """
+        Makes sure the allocator hands out ids above `user_id`, e.g. for users of a former single database.
+        """
+        table = UserIdAllocation.__table__
+        with self.reference_engine.begin() as connection:
+            if (connection.scalar(select(func.max(table.c.id))) or 0) < user_id:
+                connection.execute(insert(table).values(id=user_id,
+                                                        allocated_at=datetime.now(timezone.utc).replace(tzinfo=None)))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for engine in self.shard_engines:
+            engine.dispose()
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from auth_service import IAuthService
+from reference_data_cache import ReferenceDataCache, UserRecord
+from shard_router import ShardRouter, route_session
+from user_service import UserService
+from portfolio_pilot_backend.repositories.user_repository import UserRepository, UserRepositoryFactory
+from portfolio_pilot_backend.models import User
+
+
+class ShardedUserService(UserService):
+    """
+    UserService of the sharded mode (see shard_router).
+
+    Requests that name a user are routed to its shard by the request
+    handler. Everything else asks all shards at once: the admin listing,
+    username and email lookups (login, uniqueness checks) and new users,
+    whose id is drawn from the allocator on the reference database and then
+    decides their shard.
+    """
+
+    def __init__(self, user_repository_factory: UserRepositoryFactory, auth_service: IAuthService,
+                 shard_router: ShardRouter, reference_cache: ReferenceDataCache | None = None):
+        super().__init__(user_repository_factory, auth_service, reference_cache)
+        self.shard_router = shard_router
+
+    def _find_user_id(self, lookup: Callable[[UserRepository], User | None]) -> int | None:
+        def find(session: Session) -> int | None:
+            user = lookup(self.create_user_repository(session))
+            return user.id if user is not None else None
+        return next((user_id for user_id in self.shard_router.scatter(find) if user_id is not None), None)
+
+    def get_user_profile(self, session: Session, user_id: int) -> UserRecord | None:
+        # Auch für Aufrufer ohne Benutzer in der Route, z. B. den Token-Refresh.
+        route_session(session, user_id)
+        return super().get_user_profile(session, user_id)
+
+    def get_user_by_username(self, session: Session, username: str) -> User | None:
+        user_id = self._find_user_id(lambda repository: repository.get_by_username(username))
+        if user_id is None:
+            return None
+        route_session(session, user_id)
+        return super().get_user_by_username(session, username)
+
+    def get_user_by_email(self, session: Session, email: str) -> User | None:
+        user_id = self._find_user_id(lambda repository: repository.get_by_email(email))
+        if user_id is None:
+            return None
+        route_session(session, user_id)
+        return super().get_user_by_email(session, email)
+
+    def get_all_users(self, session: Session) -> list[Row]:
+        """
+        Gathers the (id, username, email, version) rows of all shards, ordered by id.
+        """
+        shards = self.shard_router.scatter(lambda shard: self.create_user_repository(shard).list_profile_rows())
+        return sorted((row for rows in shards for row in rows), key=lambda row: row.id)
+
+    def _username_taken(self, session: Session, username: str) -> bool:
+        return self._find_user_id(lambda repository: repository.get_by_username(username)) is not None
+
+    def _email_taken(self, session: Session, email: str) -> bool:
+        return self._find_user_id(lambda repository: repository.get_by_email(email)) is not None
+
+    def _prepare_new_user(self, session: Session, user: User) -> None:
+        user.id = self.create_user_repository(session).allocate_id(datetime.now(timezone.utc).replace(tzinfo=None))
+        route_session(session, user.id)
+
+    def authenticate_user(self, session: Session, username: str, password_hash_from_frontend: str) -> User | None:
+        user_id = self._find_user_id(lambda repository: repository.get_by_username(username))
+        if user_id is None:
+            return None
+        route_session(session, user_id)
+        return super().authenticate_user(session, username, password_hash_from_frontend)
@@ -0,0 +1,336 @@
+import re
+import sys
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Callable, Iterable, NamedTuple
+
+from sqlalchemy import Engine, text
+
+from portfolio_pilot_backend.models import Stock
+
+
+class StockSearchHit(NamedTuple):
+    stock_id: int
+    symbol: str
+    name: str
+    isin: str | None
+    wkn: str | None
+    exchange: str | None
+    score: float
+    matched_field: str
+
+
+class IStockSearchIndex(ABC):
+    @abstractmethod
+    def search(self, query: str, limit: int = 10) -> list[StockSearchHit]:
+        pass
+
+    @abstractmethod
+    def upsert(self, stock: Stock) -> None:
+        pass
+
+    @abstractmethod
+    def remove(self, stock_id: int) -> None:
+        pass
+
+    @abstractmethod
+    def rebuild(self, stocks: Iterable[Stock]) -> None:
+        pass
+
+
+# Feld-Codes im Schlüssel; kleinere Codes ranken bei gleichem Treffer höher.
+_FIELD_SYMBOL = "0"
+_FIELD_ISIN = "1"
+_FIELD_WKN = "2"
+_FIELD_NAME = "3"
+_FIELD_NAME_WORD = "4"
+
+_FIELD_NAMES = {
+    _FIELD_SYMBOL: "symbol",
+    _FIELD_ISIN: "isin",
+    _FIELD_WKN: "wkn",
+    _FIELD_NAME: "name",
+    _FIELD_NAME_WORD: "name",
+}
+_FIELD_WEIGHTS = {
+    _FIELD_SYMBOL: 1.0,
+    _FIELD_ISIN: 0.9,
+    _FIELD_WKN: 0.9,
+    _FIELD_NAME: 0.8,
+    _FIELD_NAME_WORD: 0.7,
+}
+
+_SEPARATOR = "\x00"
+_WORD_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(value: str | None) -> str:
+    """
+    Case-folds the value and strips accents and surrounding whitespace.
+    """
+    if not value:
+        return ""
+    if value.isascii():
+        return value.lower().strip()
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).strip()
+
+
+def _compact(value: str | None) -> str:
+    return re.sub(r"\s+", "", normalize(value))
+
+
+def _trigrams(value: str) -> set[str]:
+    padded = f"  {value} "
+    return {sys.intern(padded[i:i + 3]) for i in range(len(padded) - 2)}
+
+
+class InMemoryStockSearchIndex(IStockSearchIndex):
+    """
+    Process-local type-ahead index over symbol, name, ISIN and WKN.
+
+    Prefix lookups run against a single sorted list of encoded keys
+    ("<key>\\x00<field><stock_id>") using binary search, so a lookup costs
+    O(log n) plus the size of the result window. Fuzzy matching falls back to
+    a trigram posting index over symbol and name when the prefix pass does not
+    fill the requested limit. All updates are incremental; trigram postings are
+    append-only and compacted once stale entries dominate.
+    """
+
+    def __init__(self, max_prefix_scan: int = 256, max_fuzzy_postings: int = 20000):
+        """
+        Args:
+            max_prefix_scan: Upper bound for keys inspected per prefix lookup.
+            max_fuzzy_postings: Budget of posting entries counted per fuzzy
+                lookup; the rarest trigrams are counted first.
+        """
+        self.max_prefix_scan = max_prefix_scan
+        self.max_fuzzy_postings = max_fuzzy_postings
+        self._lock = threading.Lock()
+        self._docs: dict[int, tuple] = {}
+        self._keys: list[str] = []
+        self._doc_keys: dict[int, tuple[str, ...]] = {}
+        self._grams: dict[str, array] = {}
+        self._doc_grams: dict[int, tuple[str, ...]] = {}
+        self._postings = 0
+        self._stale_postings = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def rebuild(self, stocks: Iterable[Stock]) -> None:
+        docs, doc_keys, doc_grams, keys = {}, {}, {}, []
+        grams: dict[str, array] = {}
+        for stock in stocks:
+            stock_id = stock.id
+            doc, stock_keys, stock_grams = self._analyze(stock)
+            docs[stock_id] = doc
+            doc_keys[stock_id] = stock_keys
+            doc_grams[stock_id] = stock_grams
+            keys.extend(stock_keys)
+            for gram in stock_grams:
+                grams.setdefault(gram, array("l")).append(stock_id)
+        keys.sort()
+        with self._lock:
+            self._docs, self._doc_keys, self._doc_grams = docs, doc_keys, doc_grams
+            self._keys, self._grams = keys, grams
+            self._postings = sum(len(grams) for grams in doc_grams.values())
+            self._stale_postings = 0
+
+    def upsert(self, stock: Stock) -> None:
+        doc, stock_keys, stock_grams = self._analyze(stock)
+        with self._lock:
+            self._remove_locked(stock.id)
+            self._docs[stock.id] = doc
+            self._doc_keys[stock.id] = stock_keys
+            self._doc_grams[stock.id] = stock_grams
+            for key in stock_keys:
+                insort(self._keys, key)
+            stock_id = stock.id
+            for gram in stock_grams:
+                self._grams.setdefault(gram, array("l")).append(stock_id)
+            self._postings += len(stock_grams)
+
+    def remove(self, stock_id: int) -> None:
+        with self._lock:
+            self._remove_locked(stock_id)
+
+    def search(self, query: str, limit: int = 10) -> list[StockSearchHit]:
+        needle = normalize(query)
+        if not needle or limit <= 0:
+            return []
+        with self._lock:
+            best: dict[int, tuple[float, str]] = {}
+            self._prefix_matches(needle.replace(" ", ""), best)
+            if " " in needle:
+                self._prefix_matches(needle, best)
+            if len(best) < limit and len(needle) >= 3:
+                self._fuzzy_matches(needle, best, limit)
+            ranked = sorted(best.items(), key=lambda item: (-item[1][0], self._docs[item[0]][0]))[:limit]
+            return [StockSearchHit(stock_id, *self._docs[stock_id], score=round(score, 4), matched_field=field)
+                    for stock_id, (score, field) in ranked]
+
+    def _analyze(self, stock: Stock) -> tuple[tuple, tuple[str, ...], tuple[str, ...]]:
+        doc = (stock.symbol, stock.name, stock.isin, stock.wkn, stock.exchange)
+        symbol, name = _compact(stock.symbol), normalize(stock.name)
+        entries = {
+            (symbol, _FIELD_SYMBOL),
+            (_compact(stock.isin), _FIELD_ISIN),
+            (_compact(stock.wkn), _FIELD_WKN),
+            (name, _FIELD_NAME),
+        }
+        entries.update((word, _FIELD_NAME_WORD) for word in _WORD_SPLIT.split(name))
+        keys = tuple(f"{key}{_SEPARATOR}{field}{stock.id}" for key, field in entries if key)
+        grams = _trigrams(symbol) | _trigrams(name)
+        return doc, keys, tuple(grams)
+
+    def _remove_locked(self, stock_id: int) -> None:
+        if stock_id not in self._docs:
+            return
+        del self._docs[stock_id]
+        for key in self._doc_keys.pop(stock_id):
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+        # Posting-Listen werden nicht sofort bereinigt; Suchen prüfen Kandidaten gegen _doc_grams.
+        self._stale_postings += len(self._doc_grams.pop(stock_id))
+        if self._stale_postings * 4 > self._postings:
+            self._compact_grams_locked()
+
+    def _compact_grams_locked(self) -> None:
+        grams: dict[str, array] = {}
+        for stock_id, stock_grams in self._doc_grams.items():
+            for gram in stock_grams:
+                grams.setdefault(gram, array("l")).append(stock_id)
+        self._grams = grams
+        self._postings -= self._stale_postings
+        self._stale_postings = 0
+
+    def _prefix_matches(self, needle: str, best: dict[int, tuple[float, str]]) -> None:
+        keys = self._keys
+        position = bisect_left(keys, needle)
+        end = min(len(keys), position + self.max_prefix_scan)
+        while position < end and keys[position].startswith(needle):
+            key, _, tail = keys[position].partition(_SEPARATOR)
+            field, stock_id = tail[0], int(tail[1:])
+            # Exakte Treffer schlagen Präfixtreffer, kürzere Schlüssel schlagen längere.
+            exact = 1.0 if key == needle else len(needle) / len(key)
+            score = _FIELD_WEIGHTS[field] * (1.0 + exact)
+            if score > best.get(stock_id, (0.0, ""))[0]:
+                best[stock_id] = (score, _FIELD_NAMES[field])
+            position += 1
+
+    def _fuzzy_matches(self, needle: str, best: dict[int, tuple[float, str]], limit: int) -> None:
+        query_grams = _trigrams(needle)
+        postings = sorted((self._grams[gram] for gram in query_grams if gram in self._grams), key=len)
+        counts = Counter()
+        budget = self.max_fuzzy_postings
+        for posting in postings:
+            if len(posting) > budget and counts:
+                break
+            counts.update(posting)
+            budget -= len(posting)
+        for stock_id, _ in counts.most_common(limit * 8):
+            doc_grams = self._doc_grams.get(stock_id)
+            if doc_grams is None:
+                continue
+            common = len(query_grams.intersection(doc_grams))
+            similarity = 2.0 * common / (len(query_grams) + len(doc_grams))
+            if similarity < 0.3:
+                continue
+            # Fuzzy-Treffer bleiben immer unter dem schwächsten Präfixtreffer.
+            score = 0.7 * similarity
+            if score > best.get(stock_id, (0.0, ""))[0]:
+                best[stock_id] = (score, "fuzzy")
+
+
+class DatabaseStockSearch(IStockSearchIndex):
+    """
+    Delegates search to the database: SQLite FTS5 or PostgreSQL pg_trgm.
+
+    The database keeps its own index current through triggers (SQLite) or
+    a GIN index (PostgreSQL), so upsert/remove/rebuild are no-ops here.
+    """
+
+    def __init__(self, engine: Engine, session_factory: Callable):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.dialect = engine.dialect.name
+        if self.dialect not in ("sqlite", "postgresql"):
+            raise ValueError(f"Unsupported dialect for database search: {self.dialect}")
+
+    def ensure_schema(self) -> None:
+        with self.engine.begin() as connection:
+            statements = _SQLITE_FTS_DDL if self.dialect == "sqlite" else _POSTGRES_TRGM_DDL
+            for statement in statements:
+                connection.execute(text(statement))
+
+    def search(self, query: str, limit: int = 10) -> list[StockSearchHit]:
+        needle = normalize(query)
+        if not needle or limit <= 0:
+            return []
+        with self.session_factory() as session:
+            if self.dialect == "sqlite":
+                terms = " ".join('"{}"*'.format(term.replace('"', '""')) for term in needle.split())
+                rows = session.execute(text(_SQLITE_FTS_QUERY), {"q": terms, "limit": limit}).all()
+            else:
+                rows = session.execute(text(_POSTGRES_TRGM_QUERY),
+                                       {"q": needle, "prefix": f"{needle}%", "limit": limit}).all()
+        return [StockSearchHit(row.id, row.symbol, row.name, row.isin, row.wkn, row.exchange,
+                               score=round(float(row.score), 4), matched_field="database")
+                for row in rows]
+
+    def upsert(self, stock: Stock) -> None:
+        pass
+
+    def remove(self, stock_id: int) -> None:
+        pass
+
+    def rebuild(self, stocks: Iterable[Stock]) -> None:
+        if self.dialect == "sqlite":
+            with self.engine.begin() as connection:
+                connection.execute(text("INSERT INTO stocks_fts(stocks_fts) VALUES('rebuild')"))
+
+
+_SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS stocks_fts USING fts5("
+    "symbol, name, isin, wkn, content='stocks', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS stocks_fts_ai AFTER INSERT ON stocks BEGIN "
+    "INSERT INTO stocks_fts(rowid, symbol, name, isin, wkn) "
+    "VALUES (new.id, new.symbol, new.name, new.isin, new.wkn); END",
+    "CREATE TRIGGER IF NOT EXISTS stocks_fts_ad AFTER DELETE ON stocks BEGIN "
+    "INSERT INTO stocks_fts(stocks_fts, rowid, symbol, name, isin, wkn) "
+    "VALUES ('delete', old.id, old.symbol, old.name, old.isin, old.wkn); END",
+    "CREATE TRIGGER IF NOT EXISTS stocks_fts_au AFTER UPDATE ON stocks BEGIN "
+    "INSERT INTO stocks_fts(stocks_fts, rowid, symbol, name, isin, wkn) "
+    "VALUES ('delete', old.id, old.symbol, old.name, old.isin, old.wkn); "
+    "INSERT INTO stocks_fts(rowid, symbol, name, isin, wkn) "
+    "VALUES (new.id, new.symbol, new.name, new.isin, new.wkn); END",
+)
+
+_SQLITE_FTS_QUERY = (
+    "SELECT s.id, s.symbol, s.name, s.isin, s.wkn, s.exchange, -stocks_fts.rank AS score "
+    "FROM stocks_fts JOIN stocks s ON s.id = stocks_fts.rowid "
+    "WHERE stocks_fts MATCH :q ORDER BY stocks_fts.rank LIMIT :limit"
+)
+
+_POSTGRES_TRGM_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_stocks_symbol_trgm ON stocks USING gin (lower(symbol) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_stocks_name_trgm ON stocks USING gin (lower(name) gin_trgm_ops)",
+)
+
+_POSTGRES_TRGM_QUERY = (
+    "SELECT id, symbol, name, isin, wkn, exchange, "
+    "GREATEST(similarity(lower(symbol), :q), similarity(lower(name), :q), "
+    "CASE WHEN lower(symbol) LIKE :prefix OR lower(isin) LIKE :prefix OR lower(wkn) LIKE :prefix "
+    "THEN 1.0 ELSE 0.0 END) AS score "
+    "FROM stocks "
+    "WHERE lower(symbol) LIKE :prefix OR lower(isin) LIKE :prefix OR lower(wkn) LIKE :prefix "
+    "OR lower(symbol) % :q OR lower(name) % :q "
+    "ORDER BY score DESC, symbol LIMIT :limit"
+)
@@ -0,0 +1,188 @@
+from sqlalchemy.orm import Session
+
+from fx_matrix import parse_currency
+from reference_data_cache import ReferenceDataCache, StockRecord
+from shard_router import SHARDED_TABLE_NAMES, scatter_session
+from stock_search_index import IStockSearchIndex, StockSearchHit
+from portfolio_pilot_backend.repositories.stock_repository import STOCK_REFERENCES, StockRepository, \
+    StockRepositoryFactory
+from portfolio_pilot_backend.models import Stock
+
+# Was eine Aktie noch am Löschen hindert, je verweisender Tabelle.
+REFERENCE_LABELS = {
+    "historical_data": "Kursdaten", "price_chunks": "Kursdaten", "price_series_stamps": "Kursdaten",
+    "splits": "Kapitalmaßnahmen", "dividends": "Kapitalmaßnahmen", "adjustment_factors": "Kapitalmaßnahmen",
+    "data_quality_issues": "Datenqualität", "data_quality_watermarks": "Datenqualität",
+    "watchlists": "Watchlists", "holdings": "Depotpositionen", "price_alerts": "Kursalarme",
+}
+REFERENCE_TABLES = tuple(table for table in STOCK_REFERENCES if table.name not in SHARDED_TABLE_NAMES)
+USER_OWNED_TABLES = tuple(table for table in STOCK_REFERENCES if table.name in SHARDED_TABLE_NAMES)
+
+class StockService:
+    def __init__(self, stock_repository_factory: StockRepositoryFactory, search_index: IStockSearchIndex,
+                 reference_cache: ReferenceDataCache | None = None):
+        self.stock_repository_factory = stock_repository_factory
+        self.search_index = search_index
+        self.reference_cache = reference_cache
+        self._listeners: list = []
+
+    def add_listener(self, listener) -> None:
+        """
+        Registers a callable(stock, stock_id) notified after every committed change; stock is None on deletion.
+        """
+        self._listeners.append(listener)
+
+    def create_stock_repository(self, session: Session) -> StockRepository:
+        return self.stock_repository_factory.create(session)
+
+    def get_stock_by_id(self, session: Session, stock_id: int) -> Stock | None:
+        stock_repository = self.create_stock_repository(session)
+        return stock_repository.get_by_id(stock_id)
+
+    def get_stock_by_symbol(self, session: Session, symbol: str) -> Stock | None:
+        stock_repository = self.create_stock_repository(session)
+        return stock_repository.get_by_symbol(symbol)
+
+    def get_stock_reference(self, session: Session, stock_id: int) -> StockRecord | None:
+        if self.reference_cache is not None:
+            return self.reference_cache.get_stock(session, stock_id)
+        row = self.create_stock_repository(session).get_reference_row(stock_id)
+        return StockRecord(*row) if row else None
+
+    def get_stock_reference_by_symbol(self, session: Session, symbol: str) -> StockRecord | None:
+        if self.reference_cache is not None:
+            return self.reference_cache.get_stock_by_symbol(session, symbol)
+        row = self.create_stock_repository(session).get_reference_row_by_symbol(symbol)
+        return StockRecord(*row) if row else None
+
+    def get_stock_references_by_symbols(self, session: Session, symbols: list[str]) -> dict[str, StockRecord]:
+        """
+        Resolves several symbols at once; unknown symbols are missing from the result.
+        """
+        if self.reference_cache is not None:
+            records = {symbol: self.reference_cache.get_stock_by_symbol(session, symbol) for symbol in symbols}
+            return {symbol: record for symbol, record in records.items() if record is not None}
+        rows = self.create_stock_repository(session).list_reference_rows_by_symbols(symbols)
+        return {row.symbol: StockRecord(*row) for row in rows}
+
+    def _stock_changed(self, stock: Stock | None, stock_id: int) -> None:
+        # Index und Cache werden erst nach dem Commit angepasst, damit sie nie ungespeicherte Daten enthalten.
+        if stock is None:
+            self.search_index.remove(stock_id)
+        else:
+            self.search_index.upsert(stock)
+        if self.reference_cache is not None:
+            self.reference_cache.invalidate_stock(stock_id)
+        for listener in self._listeners:
+            listener(stock, stock_id)
+
+    def get_all_stocks(self, session: Session) -> list[Stock]:
+        stock_repository = self.create_stock_repository(session)
+        return stock_repository.list_all()
+
+    def search_stocks(self, query: str, limit: int = 10) -> list[StockSearchHit]:
+        return self.search_index.search(query, limit)
+
+    def rebuild_search_index(self, session: Session) -> None:
+        self.search_index.rebuild(self.get_all_stocks(session))
+
+    def validate_stock_data(self, symbol: str, name: str) -> str | None:
+        if not symbol:
+            return "Symbol muss angegeben werden."
+        if not name:
+            return "Name muss angegeben werden."
+        return None
+
+    @staticmethod
+    def validate_currency(currency: str | None) -> str | None:
+        if currency and parse_currency(currency) is None:
+            return "Währung muss ein dreistelliger ISO-Code sein."
+        return None
+
+    def _find_conflict(self, stock_repository: StockRepository, stock_id: int | None, symbol: str | None,
+                       isin: str | None, wkn: str | None) -> str | None:
+        checks = (
+            (symbol, stock_repository.get_by_symbol, "Symbol bereits vergeben."),
+            (isin, stock_repository.get_by_isin, "ISIN bereits registriert."),
+            (wkn, stock_repository.get_by_wkn, "WKN bereits registriert."),
+        )
+        for value, lookup, message in checks:
+            if value:
+                existing = lookup(value)
+                if existing and existing.id != stock_id:
+                    return message
+        return None
+
+    def create_new_stock(self, session: Session, symbol: str, name: str, isin: str | None = None,
+                         wkn: str | None = None, exchange: str | None = None, industry: str | None = None,
+                         currency: str | None = None) -> tuple[Stock | None, str | None]:
+        validation_msg = self.validate_stock_data(symbol, name) or self.validate_currency(currency)
+        if validation_msg:
+            return None, validation_msg
+
+        stock_repository = self.create_stock_repository(session)
+        conflict_msg = self._find_conflict(stock_repository, None, symbol, isin, wkn)
+        if conflict_msg:
+            return None, conflict_msg
+
+        new_stock = Stock(symbol=symbol, name=name, isin=isin, wkn=wkn, exchange=exchange, industry=industry,
+                          currency=parse_currency(currency))
+        try:
+            created_stock = stock_repository.create(new_stock)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            return None, f"Fehler beim Erstellen der Aktie: {e}"
+        self._stock_changed(created_stock, created_stock.id)
+        return created_stock, None
+
+    def update_stock(self, session: Session, stock_id: int, symbol: str | None = None, name: str | None = None,
+                     isin: str | None = None, wkn: str | None = None, exchange: str | None = None,
+                     industry: str | None = None, currency: str | None = None) -> tuple[Stock | None, str | None]:
+        validation_msg = self.validate_currency(currency)
+        if validation_msg:
+            return None, validation_msg
+        stock_repository = self.create_stock_repository(session)
+        stock = stock_repository.get_by_id(stock_id)
+        if not stock:
+            return None, "Aktie nicht gefunden."
+
+        conflict_msg = self._find_conflict(stock_repository, stock.id, symbol, isin, wkn)
+        if conflict_msg:
+            return None, conflict_msg
+
+        changes = {"symbol": symbol, "name": name, "isin": isin, "wkn": wkn, "exchange": exchange,
+                   "industry": industry, "currency": parse_currency(currency)}
+        for field, value in changes.items():
+            if value:
+                setattr(stock, field, value)
+
+        try:
+            updated_stock = stock_repository.update(stock)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            return None, f"Fehler beim Aktualisieren der Aktie: {e}"
+        self._stock_changed(updated_stock, stock_id)
+        return updated_stock, None
+
+    def delete_stock(self, session: Session, stock_id: int) -> tuple[bool, str | None]:
+        """
+        Deletes a stock nothing refers to any more; (False, None) if it does not exist.
+        """
+        stock_repository = self.create_stock_repository(session)
+        stock = stock_repository.get_by_id(stock_id)
+        if not stock:
+            return False, None
+        references = stock_repository.list_referencing_tables(stock_id, REFERENCE_TABLES)
+        # Watchlists, Positionen und Alarme liegen bei Sharding verteilt und ohne Fremdschlüssel auf den Shards.
+        for shard_references in scatter_session(session, lambda shard: self.create_stock_repository(shard)
+                                                .list_referencing_tables(stock_id, USER_OWNED_TABLES)):
+            references.extend(shard_references)
+        if references:
+            labels = dict.fromkeys(REFERENCE_LABELS.get(name, name) for name in references)
+            return False, f"Die Aktie wird noch verwendet ({', '.join(labels)}) und kann nicht gelöscht werden."
+        stock_repository.delete(stock)
+        session.commit()
+        self._stock_changed(None, stock_id)
+        return True, None
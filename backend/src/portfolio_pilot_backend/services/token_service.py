@@ -0,0 +1,99 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from revocation_list import RevocationList
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+class TokenClaims(NamedTuple):
+    user_id: int
+    token_type: str
+    jti: str
+    issued_at: int
+    expires_at: int
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+class TokenService:
+    """
+    Issues and verifies HMAC-SHA256 signed access and refresh tokens.
+
+    A token is `<payload>.<signature>`, both base64url; the payload is
+    compact JSON with sub, typ, iat, exp and jti. Verification is a
+    signature check, a JSON parse and a dict lookup in the revocation list,
+    so identifying the caller costs no database round trip.
+    """
+
+    def __init__(self, secret: bytes, revocation_list: RevocationList, access_ttl: int = 900,
+                 refresh_ttl: int = 14 * 24 * 3600, clock=time.time):
+        """
+        Args:
+            secret: HMAC key; all processes of a deployment must share it.
+            revocation_list: Cache of revoked token ids.
+            access_ttl: Lifetime of access tokens in seconds.
+            refresh_ttl: Lifetime of refresh tokens in seconds.
+            clock: Time source returning epoch seconds.
+        """
+        if len(secret) < 32:
+            raise ValueError("The token secret must be at least 32 bytes long.")
+        self.secret = secret
+        self.revocation_list = revocation_list
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.clock = clock
+
+    def issue(self, user_id: int, token_type: str) -> tuple[str, TokenClaims]:
+        now = int(self.clock())
+        ttl = self.access_ttl if token_type == ACCESS else self.refresh_ttl
+        claims = TokenClaims(user_id, token_type, secrets.token_urlsafe(12), now, now + ttl)
+        payload = _b64encode(json.dumps({"sub": claims.user_id, "typ": claims.token_type, "jti": claims.jti,
+                                         "iat": claims.issued_at, "exp": claims.expires_at},
+                                        separators=(",", ":")).encode("utf-8"))
+        return (payload + b"." + _b64encode(self._sign(payload))).decode("ascii"), claims
+
+    def issue_pair(self, user_id: int) -> dict:
+        access_token, access_claims = self.issue(user_id, ACCESS)
+        refresh_token, _ = self.issue(user_id, REFRESH)
+        return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "Bearer",
+                "expires_in": access_claims.expires_at - access_claims.issued_at}
+
+    def verify(self, token: str | None, token_type: str = ACCESS) -> tuple[TokenClaims | None, str | None]:
+        if not token:
+            return None, "Token fehlt."
+        try:
+            payload, signature = token.encode("ascii").split(b".")
+            if not hmac.compare_digest(self._sign(payload), _b64decode(signature)):
+                return None, "Ungültige Signatur."
+            data = json.loads(_b64decode(payload))
+            claims = TokenClaims(int(data["sub"]), data["typ"], data["jti"], int(data["iat"]), int(data["exp"]))
+        except (ValueError, KeyError, TypeError, UnicodeError):
+            return None, "Ungültiges Token."
+        if claims.token_type != token_type:
+            return None, "Falscher Tokentyp."
+        if claims.expires_at <= self.clock():
+            return None, "Token abgelaufen."
+        if self.revocation_list.is_revoked(claims.jti):
+            return None, "Token wurde widerrufen."
+        return claims, None
+
+    def revoke(self, session: Session, claims: TokenClaims) -> bool:
+        return self.revocation_list.revoke(session, claims.jti, claims.user_id, claims.expires_at)
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()
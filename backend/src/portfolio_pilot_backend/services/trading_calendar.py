@@ -0,0 +1,297 @@
+"""
+Exchange trading calendars with O(1) date to session-index lookup.
+
+A calendar is the sorted array of session days of one exchange, computed
+once from the holiday rules below (fixed dates with weekend observance,
+Easter offsets, n-th weekdays, one-off closures). Next to it lives a dense
+lookup table with one entry per calendar day between the first and last
+session, holding the index of the last session on or before that day. A
+date maps to its session index with one subtraction and one array read,
+for single dates and whole arrays alike, so series of any exchange can be
+scattered into dense (stocks x sessions) arrays without joining on dates,
+and resampled to weekly or monthly closes by position (see period_ends).
+
+Observance of holidays that fall on a weekend:
+
+    none        the holiday is lost (XETRA)
+    us          Saturday -> Friday before, Sunday -> Monday after (NYSE)
+    us_sunday   only Sunday -> Monday (NYSE New Year's Day)
+    uk          the next weekday that is not a holiday already (LSE)
+"""
+from datetime import date, timedelta
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+DAILY = "D"
+WEEKLY = "W"
+MONTHLY = "M"
+FREQUENCIES = (DAILY, WEEKLY, MONTHLY)
+
+NONE = "none"
+US = "us"
+US_SUNDAY = "us_sunday"
+UK = "uk"
+
+
+class HolidayRule(NamedTuple):
+    name: str
+    month: int | None = None
+    day: int | None = None
+    easter_offset: int | None = None
+    weekday: int | None = None  # 0 = Montag
+    nth: int | None = None  # 1 = erster, -1 = letzter Wochentag im Monat
+    observance: str = NONE
+    first_year: int | None = None
+    last_year: int | None = None
+
+
+def fixed(name: str, month: int, day: int, observance: str = NONE, first_year: int | None = None) -> HolidayRule:
+    return HolidayRule(name, month=month, day=day, observance=observance, first_year=first_year)
+
+
+def easter(name: str, offset: int) -> HolidayRule:
+    return HolidayRule(name, easter_offset=offset)
+
+
+def nth_weekday(name: str, month: int, weekday: int, nth: int, first_year: int | None = None) -> HolidayRule:
+    return HolidayRule(name, month=month, weekday=weekday, nth=nth, first_year=first_year)
+
+
+MON, TUE, WED, THU, FRI = range(5)
+
+HOLIDAY_RULES: dict[str, tuple[HolidayRule, ...]] = {
+    "XETRA": (
+        fixed("Neujahr", 1, 1),
+        easter("Karfreitag", -2),
+        easter("Ostermontag", 1),
+        fixed("Tag der Arbeit", 5, 1),
+        fixed("Heiligabend", 12, 24),
+        fixed("1. Weihnachtstag", 12, 25),
+        fixed("2. Weihnachtstag", 12, 26),
+        fixed("Silvester", 12, 31),
+    ),
+    "NYSE": (
+        fixed("New Year's Day", 1, 1, US_SUNDAY),
+        nth_weekday("Martin Luther King Jr. Day", 1, MON, 3, first_year=1998),
+        nth_weekday("Washington's Birthday", 2, MON, 3),
+        easter("Good Friday", -2),
+        nth_weekday("Memorial Day", 5, MON, -1),
+        fixed("Juneteenth", 6, 19, US, first_year=2022),
+        fixed("Independence Day", 7, 4, US),
+        nth_weekday("Labor Day", 9, MON, 1),
+        nth_weekday("Thanksgiving Day", 11, THU, 4),
+        fixed("Christmas Day", 12, 25, US),
+    ),
+    "LSE": (
+        fixed("New Year's Day", 1, 1, UK),
+        easter("Good Friday", -2),
+        easter("Easter Monday", 1),
+        nth_weekday("Early May Bank Holiday", 5, MON, 1),
+        nth_weekday("Spring Bank Holiday", 5, MON, -1),
+        nth_weekday("Summer Bank Holiday", 8, MON, -1),
+        fixed("Christmas Day", 12, 25, UK),
+        fixed("Boxing Day", 12, 26, UK),
+    ),
+}
+
+# Einmalige Schließungen und verschobene Feiertage, die keiner Regel folgen.
+SPECIAL_CLOSURES: dict[str, tuple[str, ...]] = {
+    "NYSE": ("2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14", "2004-06-11", "2007-01-02", "2012-10-29",
+             "2012-10-30", "2018-12-05", "2025-01-09"),
+    "LSE": ("2011-04-29", "2012-06-04", "2012-06-05", "2022-06-02", "2022-06-03", "2022-09-19", "2023-05-08"),
+}
+# Die Regel-Feiertage, die in diesen Jahren verlegt wurden (z. B. Jubiläen), entfallen.
+MOVED_HOLIDAYS: dict[str, tuple[str, ...]] = {
+    "LSE": ("1995-05-01", "2012-05-28", "2020-05-04", "2022-05-30"),
+}
+
+# Abweichende Schreibweisen des Börsenfelds der Aktien.
+EXCHANGE_ALIASES = {
+    "XETR": "XETRA", "GER": "XETRA", "FRA": "XETRA", "FWB": "XETRA",
+    "NASDAQ": "NYSE", "NMS": "NYSE", "NYQ": "NYSE", "XNYS": "NYSE", "XNAS": "NYSE", "AMEX": "NYSE",
+    "LON": "LSE", "XLON": "LSE",
+}
+WEEKDAYS = "WEEKDAYS"
+
+
+def canonical_exchange(exchange: str | None) -> str:
+    """
+    Maps an exchange name to its calendar; unknown or missing exchanges trade on every weekday.
+    """
+    if not exchange:
+        return WEEKDAYS
+    name = exchange.strip().upper()
+    name = EXCHANGE_ALIASES.get(name, name)
+    return name if name in HOLIDAY_RULES else WEEKDAYS
+
+
+def easter_sunday(year: int) -> date:
+    # Gaußsche Osterformel in der anonymen gregorianischen Fassung.
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _rule_date(rule: HolidayRule, year: int) -> date:
+    if rule.easter_offset is not None:
+        return easter_sunday(year) + timedelta(days=rule.easter_offset)
+    if rule.nth is None:
+        return date(year, rule.month, rule.day)
+    if rule.nth > 0:
+        first = date(year, rule.month, 1)
+        return first + timedelta(days=(rule.weekday - first.weekday()) % 7 + 7 * (rule.nth - 1))
+    last = (date(year + rule.month // 12, rule.month % 12 + 1, 1) - timedelta(days=1))
+    return last - timedelta(days=(last.weekday() - rule.weekday) % 7)
+
+
+def holidays(exchange: str, first_year: int, last_year: int) -> set[date]:
+    """
+    Returns the weekdays on which the exchange is closed.
+    """
+    closed: set[date] = set()
+    substitutes: list[date] = []
+    for year in range(first_year, last_year + 1):
+        for rule in HOLIDAY_RULES.get(exchange, ()):
+            if (rule.first_year and year < rule.first_year) or (rule.last_year and year > rule.last_year):
+                continue
+            day = _rule_date(rule, year)
+            weekday = day.weekday()
+            if weekday < 5:
+                closed.add(day)
+            elif rule.observance == US:
+                closed.add(day - timedelta(days=1) if weekday == 5 else day + timedelta(days=1))
+            elif rule.observance == US_SUNDAY and weekday == 6:
+                closed.add(day + timedelta(days=1))
+            elif rule.observance == UK:
+                substitutes.append(day)
+    # Ersatztage erst nach allen regulären Feiertagen vergeben, damit Weihnachten und Boxing Day nicht kollidieren.
+    for day in sorted(substitutes):
+        while day.weekday() >= 5 or day in closed:
+            day += timedelta(days=1)
+        closed.add(day)
+    closed -= {date.fromisoformat(day) for day in MOVED_HOLIDAYS.get(exchange, ())}
+    closed |= {date.fromisoformat(day) for day in SPECIAL_CLOSURES.get(exchange, ())
+               if first_year <= int(day[:4]) <= last_year}
+    return closed
+
+
+def period_ends(dates: np.ndarray, frequency: str) -> np.ndarray:
+    """
+    Positions of the last date of every week or month in sorted dates; all positions for daily.
+    """
+    days = np.asarray(dates).astype("datetime64[D]")
+    if frequency == DAILY or not len(days):
+        return np.arange(len(days))
+    if frequency == WEEKLY:
+        # Tage seit einem Montag, ganzzahlig durch 7: gleiche Kalenderwoche.
+        periods = (days - np.datetime64("1970-01-05")).astype(np.int64) // 7
+    elif frequency == MONTHLY:
+        periods = days.astype("datetime64[M]").astype(np.int64)
+    else:
+        raise ValueError(f"Unknown frequency: {frequency}")
+    return np.flatnonzero(np.append(periods[1:] != periods[:-1], True))
+
+
+class TradingCalendar:
+    """
+    Session days of one exchange (or a union of several) with a dense day -> session lookup table.
+    """
+
+    def __init__(self, name: str, sessions: np.ndarray):
+        """
+        Args:
+            name: Calendar name, e.g. the exchange.
+            sessions: Sorted, unique session days as datetime64[D]; must not be empty.
+        """
+        self.name = name
+        self.sessions = sessions.astype("datetime64[D]")
+        self.origin = self.sessions[0]
+        offsets = (self.sessions - self.origin).astype(np.int64)
+        # previous[t]: Index der letzten Sitzung am oder vor Tag origin + t.
+        is_session = np.zeros(int(offsets[-1]) + 1, dtype=bool)
+        is_session[offsets] = True
+        self._previous = (np.cumsum(is_session) - 1).astype(np.int32)
+        self._is_session = is_session
+
+    @classmethod
+    def build(cls, exchange: str, first_year: int, last_year: int) -> "TradingCalendar":
+        days = np.arange(np.datetime64(f"{first_year}-01-01"), np.datetime64(f"{last_year + 1}-01-01"),
+                         dtype="datetime64[D]")
+        closed = holidays(exchange, first_year, last_year)
+        holiday_array = np.array(sorted(closed), dtype="datetime64[D]") if closed else np.empty(0, "datetime64[D]")
+        return cls(exchange, days[np.is_busday(days, holidays=holiday_array)])
+
+    @classmethod
+    def union(cls, calendars: Sequence["TradingCalendar"]) -> "TradingCalendar":
+        """
+        Days on which at least one of the exchanges trades, e.g. for a portfolio spanning several.
+        """
+        if len(calendars) == 1:
+            return calendars[0]
+        return cls("+".join(sorted(calendar.name for calendar in calendars)),
+                   np.unique(np.concatenate([calendar.sessions for calendar in calendars])))
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def _offsets(self, dates) -> np.ndarray:
+        offsets = (np.asarray(dates).astype("datetime64[D]") - self.origin).astype(np.int64)
+        if offsets.size and offsets.max() >= len(self._previous):
+            raise ValueError(f"Date after the end of the {self.name} calendar ({self.sessions[-1]}).")
+        return offsets
+
+    def session_index(self, day) -> int | None:
+        """
+        Index of the session on `day`, None if the exchange is closed then.
+        """
+        offset = int(self._offsets(np.datetime64(day, "D")))
+        if offset < 0 or not self._is_session[offset]:
+            return None
+        return int(self._previous[offset])
+
+    def locate(self, dates) -> np.ndarray:
+        """
+        Index of the last session on or before every date, -1 before the first session.
+        """
+        offsets = self._offsets(dates)
+        return np.where(offsets >= 0, self._previous[np.maximum(offsets, 0)], -1)
+
+    def bounds(self, start=None, end=None) -> tuple[int, int]:
+        """
+        Session slice [lo, hi) of the sessions between start and end (both inclusive, None = open).
+        """
+        if start is None:
+            lo = 0
+        elif np.datetime64(start, "D") > self.sessions[-1]:
+            lo = len(self.sessions)
+        else:
+            lo = int(self.locate(np.datetime64(start, "D") - np.timedelta64(1, "D"))) + 1
+        if end is None or np.datetime64(end, "D") > self.sessions[-1]:
+            hi = len(self.sessions)
+        else:
+            hi = int(self.locate(np.datetime64(end, "D"))) + 1
+        return lo, max(lo, hi)
+
+    def scatter(self, rows: np.ndarray, dates: np.ndarray, values: np.ndarray, row_count: int, lo: int,
+                hi: int) -> np.ndarray:
+        """
+        Places values into a dense (row_count x sessions[lo:hi]) matrix, NaN where nothing was given.
+
+        Values dated on days the calendar has no session for are dropped.
+        """
+        offsets = (np.asarray(dates).astype("datetime64[D]") - self.origin).astype(np.int64)
+        inside = (offsets >= 0) & (offsets < len(self._previous))
+        inside[inside] = self._is_session[offsets[inside]]
+        columns = self._previous[offsets[inside]] - lo
+        in_slice = (columns >= 0) & (columns < hi - lo)
+        dense = np.full((row_count, hi - lo), np.nan)
+        dense[rows[inside][in_slice], columns[in_slice]] = values[inside][in_slice]
+        return dense
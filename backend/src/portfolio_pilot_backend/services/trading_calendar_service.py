@@ -0,0 +1,76 @@
+import threading
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from trading_calendar import HOLIDAY_RULES, WEEKDAYS, TradingCalendar, canonical_exchange
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+
+
+class TradingCalendarService:
+    """
+    Builds the trading calendars of all exchanges once per process and hands them out.
+
+    Calendars are computed lazily from the holiday rules in trading_calendar
+    and cover `first_year` to `last_year` (default: two years ahead).
+    """
+
+    def __init__(self, stock_repository_factory: StockRepositoryFactory, first_year: int = 1970,
+                 last_year: int | None = None):
+        """
+        Args:
+            stock_repository_factory: Factory for the stock repository, used to look up exchanges.
+            first_year: First year with sessions.
+            last_year: Last year with sessions.
+        """
+        self.stock_repository_factory = stock_repository_factory
+        self.first_year = first_year
+        self.last_year = last_year or date.today().year + 2
+        self._lock = threading.Lock()
+        self._calendars: dict[str, TradingCalendar] = {}
+
+    @staticmethod
+    def list_calendars() -> list[str]:
+        return sorted(HOLIDAY_RULES) + [WEEKDAYS]
+
+    def get(self, exchange: str | None) -> TradingCalendar:
+        name = canonical_exchange(exchange)
+        with self._lock:
+            calendar = self._calendars.get(name)
+            if calendar is None:
+                calendar = TradingCalendar.build(name, self.first_year, self.last_year)
+                self._calendars[name] = calendar
+            return calendar
+
+    def find(self, name: str) -> TradingCalendar | None:
+        """
+        Returns the calendar of a known exchange or alias, None for unknown names.
+        """
+        exchange = canonical_exchange(name)
+        if exchange == WEEKDAYS and name.strip().upper() != WEEKDAYS:
+            return None
+        return self.get(exchange)
+
+    def by_stock(self, session: Session, stock_ids: list[int]) -> dict[int, TradingCalendar]:
+        """
+        Returns the calendar of every stock's own exchange.
+        """
+        exchanges = self.stock_repository_factory.create(session).get_exchanges(stock_ids)
+        return {stock_id: self.get(exchanges.get(stock_id)) for stock_id in stock_ids}
+
+    def for_stocks(self, session: Session, stock_ids: list[int]) -> TradingCalendar:
+        """
+        Returns the calendar of the stocks' exchanges, the union of them if they trade on several.
+        """
+        exchanges = set(self.stock_repository_factory.create(session).get_exchanges(stock_ids).values())
+        names = sorted({canonical_exchange(exchange) for exchange in exchanges}) or [WEEKDAYS]
+        calendars = [self.get(name) for name in names]
+        if len(calendars) == 1:
+            return calendars[0]
+        key = "+".join(names)
+        with self._lock:
+            calendar = self._calendars.get(key)
+            if calendar is None:
+                calendar = TradingCalendar.union(calendars)
+                self._calendars[key] = calendar
+            return calendar
@@ -1,13 +1,17 @@
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 
 from auth_service import IAuthService
+from reference_data_cache import ReferenceDataCache, UserRecord
 from portfolio_pilot_backend.repositories.user_repository import UserRepository, UserRepositoryFactory
 from portfolio_pilot_backend.models import User
 
 class UserService:
-    def __init__(self, user_repository_factory: UserRepositoryFactory, auth_service: IAuthService):
+    def __init__(self, user_repository_factory: UserRepositoryFactory, auth_service: IAuthService,
+                 reference_cache: ReferenceDataCache | None = None):
         self.user_repository_factory = user_repository_factory
         self.auth_service = auth_service
+        self.reference_cache = reference_cache
 
     def create_user_repository(self, session:Session) -> UserRepository:
         return self.user_repository_factory.create(session)
@@ -16,6 +20,27 @@ class UserService:
         user_repository = self.create_user_repository(session)
         return user_repository.get_by_id(user_id)
 
+    def get_user_profile(self, session: Session, user_id: int) -> UserRecord | None:
+        if self.reference_cache is not None:
+            return self.reference_cache.get_user(session, user_id)
+        row = self.create_user_repository(session).get_profile_row(user_id)
+        return UserRecord(*row) if row else None
+
+    def get_user_version(self, session: Session, user_id: int) -> Row | None:
+        """
+        Returns (version, updated_at) of a user with a primary key lookup, without loading the row.
+
+        A cached profile of another version is dropped, so the body served under this version's ETag is current.
+        """
+        row = self.create_user_repository(session).get_version_row(user_id)
+        if row is not None and self.reference_cache is not None:
+            self.reference_cache.validate_user(user_id, row.version)
+        return row
+
+    def _invalidate_cached_user(self, user_id: int) -> None:
+        if self.reference_cache is not None:
+            self.reference_cache.invalidate_user(user_id)
+
     def get_user_by_username(self, session: Session, username: str) -> User | None:
         user_repository = self.create_user_repository(session)
         return user_repository.get_by_username(username)
@@ -24,9 +49,22 @@ class UserService:
         user_repository = self.create_user_repository(session)
         return user_repository.get_by_email(email)
 
-    def get_all_users(self, session: Session) -> list[User]:
-        user_repository = self.create_user_repository(session)
-        return user_repository.list_all()
+    def get_all_users(self, session: Session) -> list[Row]:
+        """
+        Returns (id, username, email, version) rows of all users, without loading the entities.
+        """
+        return self.create_user_repository(session).list_profile_rows()
+
+    def _username_taken(self, session: Session, username: str) -> bool:
+        return self.create_user_repository(session).get_by_username(username) is not None
+
+    def _email_taken(self, session: Session, email: str) -> bool:
+        return self.create_user_repository(session).get_by_email(email) is not None
+
+    def _prepare_new_user(self, session: Session, user: User) -> None:
+        """
+        Hook before a new user is inserted; the id comes from the database autoincrement here.
+        """
 
     def validate_user_data(self, username: str, email: str, password_hash: str) -> str | None:
         if username is None:
@@ -46,14 +84,15 @@ class UserService:
 
 
         # Validierungen (Eindeutigkeit etc.)
-        if user_repository.get_by_username(username):
+        if self._username_taken(session, username):
             return None, "Benutzername bereits vergeben."
-        if user_repository.get_by_email(email):
+        if self._email_taken(session, email):
             return None, "E-Mail bereits registriert."
 
 
-        new_user = User(username=username, email=email, password_hash=password_hash)
+        new_user = User(username=username, email=email, password_hash=self.auth_service.hash_password(password_hash))
         try:
+            self._prepare_new_user(session, new_user)
             created_user = user_repository.create(new_user)
             session.commit()
             return created_user, None
@@ -67,22 +106,23 @@ class UserService:
         if not user:
             return None, "Benutzer nicht gefunden."
 
-        if username and username != user.username and user_repository.get_by_username(username):
+        if username and username != user.username and self._username_taken(session, username):
             return None, "Benutzername bereits vergeben."
-        if email and email != user.email and user_repository.get_by_email(email):
+        if email and email != user.email and self._email_taken(session, email):
             return None, "E-Mail bereits registriert."
 
         if username:
             user.username = username
         if email:
             user.email = email
-        # Das gehashte Passwort wird direkt gesetzt
+        # Gespeichert wird nur die Ableitung der KDF, nie der übermittelte Wert selbst
         if password_hash:
-            user.password_hash = password_hash
+            user.password_hash = self.auth_service.hash_password(password_hash)
 
         try:
             updated_user = user_repository.update(user)
             session.commit()
+            self._invalidate_cached_user(user_id)
             return updated_user, None
         except Exception as e:
             session.rollback()
@@ -94,12 +134,18 @@ class UserService:
         if user:
             user_repository.delete(user)
             session.commit()
+            self._invalidate_cached_user(user_id)
             return True
         return False
 
     def authenticate_user(self, session: Session, username: str, password_hash_from_frontend: str) -> User | None:
         user_repository = self.create_user_repository(session)
         user = user_repository.get_by_username(username)
-        if user and self.auth_service.authenticate(user, password_hash_from_frontend):
-            return user
-        return None
\ No newline at end of file
+        if not user or not self.auth_service.authenticate(user, password_hash_from_frontend):
+            return None
+        if self.auth_service.needs_rehash(user):
+            # Altbestand bzw. veraltete Parameter werden beim erfolgreichen Login nachgezogen.
+            user.password_hash = self.auth_service.hash_password(password_hash_from_frontend)
+            user_repository.update(user)
+            session.commit()
+        return user
\ No newline at end of file
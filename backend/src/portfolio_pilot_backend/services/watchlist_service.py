@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from write_behind import SYNC, WriteBehindQueue, WriteType
+from portfolio_pilot_backend.repositories.watchlist_repository import WatchlistRepository, \
+    WatchlistRepositoryFactory
+
+WATCHLIST_EDIT = "watchlist_edit"
+
+
+class WatchlistEdit(NamedTuple):
+    user_id: int
+    stock_id: int
+    add: bool
+
+
+class WatchlistService:
+    def __init__(self, watchlist_repository_factory: WatchlistRepositoryFactory,
+                 write_queue: WriteBehindQueue | None = None, durability: str = SYNC):
+        """
+        Args:
+            watchlist_repository_factory: Factory for the watchlist repository.
+            write_queue: Groups edits of many users into shared commits; without it every edit commits itself.
+            durability: Durability of queued edits; sync returns only after the edit is committed.
+        """
+        self.watchlist_repository_factory = watchlist_repository_factory
+        self.write_queue = write_queue
+        if write_queue is not None:
+            # Pro Benutzer und Aktie zählt nur die letzte Änderung, Hinzufügen und Entfernen heben sich auf.
+            write_queue.register(WriteType(WATCHLIST_EDIT, self.apply_edits, durability,
+                                           lambda edit: (edit.user_id, edit.stock_id), lambda edit: edit.user_id))
+
+    def create_watchlist_repository(self, session: Session) -> WatchlistRepository:
+        return self.watchlist_repository_factory.create(session)
+
+    def get_stock_ids(self, session: Session, user_id: int) -> list[int]:
+        return self.create_watchlist_repository(session).list_stock_ids(user_id)
+
+    def add_stock(self, session: Session, user_id: int, stock_id: int) -> None:
+        self._edit(session, WatchlistEdit(user_id, stock_id, True))
+
+    def remove_stock(self, session: Session, user_id: int, stock_id: int) -> None:
+        self._edit(session, WatchlistEdit(user_id, stock_id, False))
+
+    def apply_edits(self, session: Session, edits: list[WatchlistEdit]) -> None:
+        """
+        Writes a batch of edits (at most one per user and stock) without committing.
+        """
+        repository = self.create_watchlist_repository(session)
+        repository.remove_pairs([(edit.user_id, edit.stock_id) for edit in edits if not edit.add])
+        repository.add_pairs([(edit.user_id, edit.stock_id) for edit in edits if edit.add],
+                             datetime.now(timezone.utc).replace(tzinfo=None))
+
+    def _edit(self, session: Session, edit: WatchlistEdit) -> None:
+        if self.write_queue is not None:
+            self.write_queue.submit(WATCHLIST_EDIT, edit)
+            return
+        try:
+            self.apply_edits(session, [edit])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
@@ -0,0 +1,283 @@
+"""
+Write-behind queue that turns many small writes into few group commits.
+
+Callers submit payloads of registered write types; a background thread
+collects them and writes everything pending in one session and one
+commit, at the latest every `flush_interval` seconds or as soon as
+`max_batch` payloads are waiting. Each write type chooses its durability:
+
+    sync   submit() returns once the group commit holding the write has
+           succeeded and raises if it failed. The writer starts at once,
+           so writes that arrive while a commit runs share the next one.
+    async  submit() returns immediately; the write lands within
+           flush_interval and is lost if the process dies before that.
+
+A type with a `coalesce_key` keeps only the newest pending payload per
+key (e.g. one last-seen timestamp per user), so bursts collapse into a
+single row write. `close()` flushes everything still pending; the app
+calls it on shutdown.
+
+If a group commit fails, each write type is retried alone and a failing
+type in halves, until only the payloads that fail themselves are lost.
+
+In the sharded mode (`shard_for` given) a type with a `route` writes each
+payload on the shard of the user it returns: a group commit becomes one
+commit per shard.
+"""
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, NamedTuple
+
+from sqlalchemy.orm import Session
+
+from shard_router import route_session
+
+logger = logging.getLogger(__name__)
+
+SYNC = "sync"
+ASYNC = "async"
+DURABILITIES = (SYNC, ASYNC)
+
+
+class WriteQueueFullError(RuntimeError):
+    pass
+
+
+class WriteType(NamedTuple):
+    name: str
+    apply: Callable[[Session, list], None]
+    durability: str = ASYNC
+    coalesce_key: Callable[[Any], Hashable] | None = None
+    route: Callable[[Any], int | None] | None = None  # Benutzer-ID der Nutzlast, wählt im Shard-Betrieb den Shard
+
+
+class WriteBehindQueue:
+    def __init__(self, session_factory, flush_interval: float = 0.05, max_batch: int = 500,
+                 max_pending: int = 10_000, submit_timeout: float = 5.0,
+                 shard_for: Callable[[int], int] | None = None):
+        """
+        Args:
+            session_factory: Opens the session of each group commit.
+            flush_interval: Longest time an async write waits for its commit, in seconds.
+            max_batch: Pending payloads that trigger a commit before the interval is over.
+            max_pending: Payloads allowed to wait; further submits block, then raise WriteQueueFullError.
+            submit_timeout: Seconds a submit may block on a full queue or wait for its sync commit.
+            shard_for: Shard of a user id; splits group commits of routed write types by shard.
+        """
+        self.session_factory = session_factory
+        self.shard_for = shard_for
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.submit_timeout = submit_timeout
+        self.committed = 0
+        self.commits = 0
+        self.failed = 0
+        self._types: dict[str, WriteType] = {}
+        self._pending: dict[str, dict] = {}
+        self._waiters: dict[str, dict[Hashable, list[Future]]] = {}
+        self._count = 0
+        self._first_pending_at: float | None = None
+        self._flush_waiters: list[Future] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def register(self, write_type: WriteType) -> None:
+        if write_type.durability not in DURABILITIES:
+            raise ValueError(f"Unknown durability: {write_type.durability}")
+        with self._condition:
+            self._types[write_type.name] = write_type
+
+    def set_durability(self, name: str, durability: str) -> None:
+        if durability not in DURABILITIES:
+            raise ValueError(f"Unknown durability: {durability}")
+        with self._condition:
+            if name not in self._types:
+                raise ValueError(f"Unknown write type: {name}")
+            self._types[name] = self._types[name]._replace(durability=durability)
+
+    @property
+    def pending(self) -> int:
+        return self._count
+
+    def submit(self, name: str, payload: Any) -> None:
+        """
+        Queues a payload; blocks until it is committed if the write type is sync.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The write-behind queue is closed.")
+            write_type = self._types[name]
+            if self._count >= self.max_pending and not self._condition.wait_for(
+                    lambda: self._count < self.max_pending or self._closed, self.submit_timeout):
+                raise WriteQueueFullError("Too many pending writes.")
+            pending = self._pending.setdefault(name, {})
+            key = write_type.coalesce_key(payload) if write_type.coalesce_key else next(self._sequence)
+            if key not in pending:
+                self._count += 1
+            pending[key] = payload
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            future = None
+            if write_type.durability == SYNC:
+                future = Future()
+                self._waiters.setdefault(name, {}).setdefault(key, []).append(future)
+            if future is not None or self._count >= self.max_batch:
+                self._condition.notify_all()
+            self._ensure_thread()
+        if future is not None:
+            future.result(self.submit_timeout)
+
+    def flush(self, timeout: float | None = None) -> None:
+        """
+        Commits everything pending now and waits for it.
+        """
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                return
+            future = Future()
+            self._flush_waiters.append(future)
+            self._condition.notify_all()
+        future.result(timeout)
+
+    def close(self, timeout: float | None = None) -> None:
+        """
+        Stops accepting writes, commits what is pending and stops the writer thread.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def _due(self) -> bool:
+        return self._closed or bool(self._flush_waiters) or bool(self._waiters) or self._count >= self.max_batch \
+            or (self._first_pending_at is not None
+                and time.monotonic() - self._first_pending_at >= self.flush_interval)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._due():
+                    timeout = None if self._first_pending_at is None \
+                        else self.flush_interval - (time.monotonic() - self._first_pending_at)
+                    self._condition.wait(timeout)
+                batches = {name: pending for name, pending in self._pending.items() if pending}
+                waiters, flush_waiters = self._waiters, self._flush_waiters
+                self._pending, self._waiters, self._flush_waiters = {}, {}, []
+                self._count, self._first_pending_at = 0, None
+                types = dict(self._types)
+                closed = self._closed
+                self._condition.notify_all()
+            if batches:
+                self._write(types, batches, waiters)
+            for future in flush_waiters:
+                future.set_result(None)
+            if closed:
+                return
+
+    def _write(self, types: dict[str, WriteType], batches: dict[str, dict],
+               waiters: dict[str, dict[Hashable, list[Future]]]) -> None:
+        failed = set()
+        for user_id, group in self._shard_groups(types, batches):
+            failed |= self._write_group(types, group, user_id)
+        for name, futures_by_key in waiters.items():
+            for key, futures in futures_by_key.items():
+                if (name, key) in failed:
+                    error = RuntimeError(f"Write-behind commit of a {name} write failed.")
+                    for future in futures:
+                        future.set_exception(error)
+                else:
+                    self._resolve(futures)
+
+    def _shard_groups(self, types: dict[str, WriteType],
+                      batches: dict[str, dict]) -> list[tuple[int | None, dict[str, dict]]]:
+        """
+        Splits the batches by shard; each group comes with a user id its session is routed by.
+        """
+        if self.shard_for is None:
+            return [(None, batches)]
+        groups: dict[int | None, tuple[int | None, dict[str, dict]]] = {}
+        for name, payloads in batches.items():
+            route = types[name].route
+            for key, payload in payloads.items():
+                user_id = route(payload) if route is not None else None
+                shard = self.shard_for(user_id) if user_id is not None else None
+                groups.setdefault(shard, (user_id, {}))[1].setdefault(name, {})[key] = payload
+        return list(groups.values())
+
+    def _write_group(self, types: dict[str, WriteType], batches: dict[str, dict],
+                     user_id: int | None) -> set[tuple[str, Hashable]]:
+        """
+        Commits a group; returns (write type, key) of the payloads that could not be committed.
+        """
+        error = self._try_commit(types, batches, user_id)
+        if error is None:
+            return set()
+        # Einzeln wiederholen, damit ein fehlerhafter Schreibtyp die anderen nicht mitreißt.
+        failed = set()
+        for name, payloads in batches.items():
+            if len(batches) > 1:
+                error = self._try_commit(types, {name: payloads}, user_id)
+                if error is None:
+                    continue
+            failed |= self._isolate(types, name, payloads, user_id, error)
+        return failed
+
+    def _isolate(self, types: dict[str, WriteType], name: str, payloads: dict, user_id: int | None,
+                 error: Exception) -> set[tuple[str, Hashable]]:
+        """
+        Retries the payloads of a failed commit in halves until each failing payload stands alone.
+        """
+        if len(payloads) == 1:
+            self._log_failure(name, error)
+            return {(name, key) for key in payloads}
+        items = list(payloads.items())
+        failed = set()
+        for half in (dict(items[:len(items) // 2]), dict(items[len(items) // 2:])):
+            error = self._try_commit(types, {name: half}, user_id)
+            if error is not None:
+                failed |= self._isolate(types, name, half, user_id, error)
+        return failed
+
+    def _try_commit(self, types: dict[str, WriteType], batches: dict[str, dict],
+                    user_id: int | None) -> Exception | None:
+        try:
+            self._commit(types, batches, user_id)
+        except Exception as e:
+            return e
+        return None
+
+    def _commit(self, types: dict[str, WriteType], batches: dict[str, dict], user_id: int | None = None) -> None:
+        with self.session_factory() as session:
+            try:
+                if user_id is not None:
+                    route_session(session, user_id)
+                for name, payloads in batches.items():
+                    types[name].apply(session, list(payloads.values()))
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+        self.commits += 1
+        self.committed += sum(len(payloads) for payloads in batches.values())
+
+    def _log_failure(self, name: str, error: Exception) -> None:
+        logger.error("Write-behind commit of a %s write failed", name, exc_info=error)
+        self.failed += 1
+
+    @staticmethod
+    def _resolve(futures) -> None:
+        for future in futures:
+            future.set_result(None)
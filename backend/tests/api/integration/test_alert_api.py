@@ -0,0 +1,68 @@
+import os
+import unittest
+import tempfile
+
+from app import AppFactory
+
+class AlertAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!"
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        for username in ("anna", "bert"):
+            self.test_client.post("/users", json={"username": username, "email": f"{username}@example.com",
+                                                  "password_hash": "passwort"})
+        self.stock_id = self.test_client.post("/stocks", json={"symbol": "AAPL", "name": "Apple Inc."}) \
+            .get_json()["id"]
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def auth(self, username):
+        response = self.test_client.post("/auth/login", json={"username": username, "password_hash": "passwort"})
+        return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+    def test_create_list_and_delete_alert(self):
+        headers = self.auth("anna")
+        response = self.test_client.post("/alerts", headers=headers,
+                                         json={"stock_id": self.stock_id, "direction": "above", "threshold": 150})
+        self.assertEqual(response.status_code, 201)
+        alert = response.get_json()
+        self.assertEqual((alert["direction"], alert["threshold"], alert["triggered_at"]), ("above", 150.0, None))
+
+        response = self.test_client.get("/alerts", headers=headers)
+        self.assertEqual([item["id"] for item in response.get_json()], [alert["id"]])
+        self.assertEqual(self.test_client.get("/alerts", headers=self.auth("bert")).get_json(), [])
+
+        response = self.test_client.delete(f"/alerts/{alert['id']}", headers=self.auth("bert"))
+        self.assertEqual(response.status_code, 404)
+        response = self.test_client.delete(f"/alerts/{alert['id']}", headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_alert_rejects_invalid_input(self):
+        headers = self.auth("anna")
+        response = self.test_client.post("/alerts", headers=headers, json={"stock_id": self.stock_id})
+        self.assertEqual(response.status_code, 400)
+        response = self.test_client.post("/alerts", headers=headers,
+                                         json={"stock_id": self.stock_id, "direction": "up", "threshold": 1})
+        self.assertEqual(response.status_code, 400)
+        response = self.test_client.post("/alerts", headers=headers,
+                                         json={"stock_id": 999, "direction": "above", "threshold": 1})
+        self.assertEqual(response.status_code, 404)
+
+    def test_alerts_require_token(self):
+        self.assertEqual(self.test_client.get("/alerts").status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
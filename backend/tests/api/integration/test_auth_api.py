@@ -0,0 +1,104 @@
+import os
+import unittest
+import tempfile
+
+from app import AppFactory
+from portfolio_pilot_backend.models import User
+
+class AuthAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        self.test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!"
+        }
+        self.app_factory = AppFactory(config=self.test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        self.test_client.post("/users", json={"username": "anna", "email": "anna@example.com",
+                                              "password_hash": "passwort"})
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def login(self):
+        response = self.test_client.post("/auth/login", json={"username": "anna", "password_hash": "passwort"})
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_login_issues_tokens_usable_for_me(self):
+        data = self.login()
+        self.assertEqual(data["token_type"], "Bearer")
+        self.assertEqual(data["expires_in"], 900)
+
+        response = self.test_client.get("/auth/me", headers={"Authorization": f"Bearer {data['access_token']}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["username"], "anna")
+
+    def test_me_requires_valid_token(self):
+        response = self.test_client.get("/auth/me")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.headers["WWW-Authenticate"], "Bearer")
+        refresh_token = self.login()["refresh_token"]
+        response = self.test_client.get("/auth/me", headers={"Authorization": f"Bearer {refresh_token}"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_rotates_tokens(self):
+        tokens = self.login()
+        response = self.test_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        self.assertEqual(response.status_code, 200)
+        renewed = response.get_json()
+        self.assertNotEqual(renewed["refresh_token"], tokens["refresh_token"])
+
+        response = self.test_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_token_is_used_once_across_workers(self):
+        tokens = self.login()
+        other_worker = AppFactory(config=self.test_config)
+        try:
+            other_client = other_worker.create_app().test_client()
+            # Der zweite Worker gleicht seine Sperrliste jetzt ab und dann erst wieder nach 30 s.
+            headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+            self.assertEqual(other_client.get("/auth/me", headers=headers).status_code, 200)
+            response = self.test_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+            self.assertEqual(response.status_code, 200)
+            response = other_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+            self.assertEqual(response.status_code, 401)
+        finally:
+            other_worker.shutdown()
+            other_worker.engine.dispose()
+
+    def test_login_and_logout_survive_a_closed_write_queue(self):
+        tokens = self.login()
+        self.app_factory.write_queue.close()
+        with self.assertLogs("user_api", "WARNING"):
+            self.assertEqual(self.test_client.post("/auth/login", json={"username": "anna",
+                                                                        "password_hash": "passwort"}).status_code, 200)
+            response = self.test_client.post("/auth/logout",
+                                             headers={"Authorization": f"Bearer {tokens['access_token']}"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout_revokes_tokens(self):
+        tokens = self.login()
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        response = self.test_client.post("/auth/logout", headers=headers,
+                                         json={"refresh_token": tokens["refresh_token"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.test_client.get("/auth/me", headers=headers).status_code, 401)
+        response = self.test_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+        self.assertEqual(response.status_code, 401)
+
+    def test_password_is_stored_as_kdf_hash(self):
+        with self.app_factory.session_factory() as db:
+            user = db.query(User).filter(User.username == "anna").one()
+        self.assertTrue(user.password_hash.startswith("scrypt$"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import unittest
+import tempfile
+
+from app import AppFactory
+
+class CalendarAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!"
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        response = self.test_client.post("/stocks", json={"symbol": "AAPL", "name": "Apple Inc.",
+                                                          "exchange": "NASDAQ"})
+        stock_id = response.get_json()["id"]
+        # Kein Bar am 3. Juli; der 4. Juli ist an der NYSE ein Feiertag.
+        self.test_client.post(f"/stocks/{stock_id}/history", json=[
+            {"date": day, "open": close, "high": close, "low": close, "close": close, "adj_close": close,
+             "volume": 10} for day, close in (("2024-06-28", 1.0), ("2024-07-01", 2.0), ("2024-07-02", 3.0),
+                                             ("2024-07-05", 4.0), ("2024-07-08", 5.0))])
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def test_sessions(self):
+        self.assertIn("XETRA", self.test_client.get("/calendars").get_json()["calendars"])
+        response = self.test_client.get("/calendars/nyse/sessions?start=2024-07-01&end=2024-07-07")
+        self.assertEqual(response.get_json(), {"calendar": "NYSE",
+                                               "sessions": ["2024-07-01", "2024-07-02", "2024-07-03", "2024-07-05"]})
+        self.assertEqual(self.test_client.get("/calendars/XYZ/sessions").status_code, 400)
+
+    def test_batch_history_on_calendar(self):
+        body = {"symbols": ["AAPL"], "fields": ["close", "volume"], "start": "2024-07-01", "end": "2024-07-08",
+                "calendar": "auto"}
+        payload = self.test_client.post("/stocks/history/batch", json=body).get_json()
+        self.assertEqual(payload["calendar"], "NYSE")
+        self.assertEqual(payload["dates"], ["2024-07-01", "2024-07-02", "2024-07-03", "2024-07-05", "2024-07-08"])
+        self.assertEqual(payload["fields"], {"close": [[2.0, 3.0, 3.0, 4.0, 5.0]], "volume": [[10, 10, 0, 10, 10]]})
+
+        payload = self.test_client.post("/stocks/history/batch", json=dict(body, fill=False)).get_json()
+        self.assertEqual(payload["fields"]["close"], [[2.0, 3.0, None, 4.0, 5.0]])
+
+        payload = self.test_client.post("/stocks/history/batch", json=dict(
+            body, calendar="XETRA", start="2024-06-24", frequency="W")).get_json()
+        self.assertEqual(payload["dates"], ["2024-06-28", "2024-07-05", "2024-07-08"])
+        self.assertEqual(payload["fields"]["close"], [[1.0, 4.0, 5.0]])
+
+    def test_batch_history_rejects_unknown_calendar(self):
+        for options in ({"calendar": "XYZ"}, {"frequency": "Q"}):
+            response = self.test_client.post("/stocks/history/batch", json=dict(symbols=["AAPL"], **options))
+            self.assertEqual(response.status_code, 400)
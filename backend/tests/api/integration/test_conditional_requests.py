@@ -0,0 +1,102 @@
+import os
+import unittest
+import tempfile
+
+from sqlalchemy import event
+
+from app import AppFactory
+
+class ConditionalRequestTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        response = self.test_client.post("/users", json={"username": "ben", "email": "ben@example.com",
+                                                         "password_hash": "passwort"})
+        self.user_id = response.get_json()["id"]
+        response = self.test_client.post("/stocks", json={"symbol": "BAS", "name": "BASF SE"})
+        self.stock_id = response.get_json()["id"]
+        self.add_bar("2024-03-01", 50.0)
+        self.statements = []
+        event.listen(self.app_factory.engine, "before_cursor_execute", self.record_statement)
+
+    def tearDown(self):
+        event.remove(self.app_factory.engine, "before_cursor_execute", self.record_statement)
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def add_bar(self, date, close):
+        bar = {"date": date, "open": close, "high": close, "low": close, "close": close, "adj_close": close,
+               "volume": 1}
+        response = self.test_client.post(f"/stocks/{self.stock_id}/history", json=[bar])
+        self.assertEqual(response.status_code, 201)
+
+    def test_user_etag_and_not_modified(self):
+        response = self.test_client.get(f"/users/{self.user_id}")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertIn("Last-Modified", response.headers)
+
+        response = self.test_client.get(f"/users/{self.user_id}", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+
+        self.test_client.put(f"/users/{self.user_id}", json={"email": "ben@example.org"})
+        response = self.test_client.get(f"/users/{self.user_id}", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.get_json()["email"], "ben@example.org")
+
+    def test_history_not_modified_skips_price_tables(self):
+        url = f"/stocks/{self.stock_id}/history?fields=close"
+        etag = self.test_client.get(url).headers["ETag"]
+
+        self.statements.clear()
+        response = self.test_client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([statement for statement in self.statements if "historical_data" in statement])
+
+        self.assertNotEqual(self.test_client.get(f"/stocks/{self.stock_id}/history").headers["ETag"], etag)
+
+    def test_history_etag_changes_with_new_bars_and_corporate_actions(self):
+        url = f"/stocks/{self.stock_id}/history"
+        first = self.test_client.get(url).headers["ETag"]
+        self.add_bar("2024-03-04", 52.0)
+        second = self.test_client.get(url, headers={"If-None-Match": first})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.get_json()["close"], [50.0, 52.0])
+
+        self.test_client.post(f"/stocks/{self.stock_id}/splits", json={"ex_date": "2024-03-04", "ratio": 2})
+        third = self.test_client.get(url, headers={"If-None-Match": second.headers["ETag"]})
+        self.assertEqual(third.status_code, 200)
+
+    def test_if_modified_since(self):
+        response = self.test_client.get(f"/stocks/{self.stock_id}/history")
+        last_modified = response.headers["Last-Modified"]
+        response = self.test_client.get(f"/stocks/{self.stock_id}/history",
+                                        headers={"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+        response = self.test_client.get(f"/stocks/{self.stock_id}/history",
+                                        headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_resources_have_no_etag(self):
+        response = self.test_client.get("/users/999")
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("ETag", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
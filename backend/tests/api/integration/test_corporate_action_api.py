@@ -0,0 +1,72 @@
+import os
+import unittest
+import tempfile
+
+from app import AppFactory
+
+class CorporateActionAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        response = self.test_client.post("/stocks", json={"symbol": "NVDA", "name": "NVIDIA Corp."})
+        self.stock_id = response.get_json()["id"]
+        bars = [{"date": date, "open": close, "high": close, "low": close, "close": close, "adj_close": close,
+                 "volume": 10} for date, close in (("2024-06-06", 1200.0), ("2024-06-07", 1210.0),
+                                                   ("2024-06-10", 121.0))]
+        self.test_client.post(f"/stocks/{self.stock_id}/history", json=bars)
+
+    def tearDown(self):
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def test_split_changes_adjusted_history(self):
+        response = self.test_client.post(f"/stocks/{self.stock_id}/splits", json={"ex_date": "2024-06-10", "ratio": 10})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()["ex_date"], "2024-06-10")
+
+        data = self.test_client.get(f"/stocks/{self.stock_id}/history?adjusted=true&fields=close,volume").get_json()
+        self.assertTrue(data["adjusted"])
+        self.assertEqual(data["close"], [120.0, 121.0, 121.0])
+        self.assertEqual(data["volume"], [100, 100, 10])
+        raw = self.test_client.get(f"/stocks/{self.stock_id}/history?fields=close").get_json()
+        self.assertEqual(raw["close"], [1200.0, 1210.0, 121.0])
+
+    def test_batch_history_is_adjusted(self):
+        self.test_client.post(f"/stocks/{self.stock_id}/splits", json={"ex_date": "2024-06-10", "ratio": 10})
+        response = self.test_client.post("/stocks/history/batch", json={
+            "symbols": ["NVDA"], "fields": ["adj_close", "volume"], "adjusted": True})
+        data = response.get_json()
+        self.assertTrue(data["adjusted"])
+        self.assertEqual(data["fields"], {"adj_close": [[120.0, 121.0, 121.0]], "volume": [[100, 100, 10]]})
+
+    def test_list_corporate_actions(self):
+        self.test_client.post(f"/stocks/{self.stock_id}/splits", json={"ex_date": "2024-06-10", "ratio": 10})
+        self.test_client.post(f"/stocks/{self.stock_id}/dividends", json={"ex_date": "2024-06-07", "amount": 12})
+
+        response = self.test_client.get(f"/stocks/{self.stock_id}/corporate-actions")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([split["ratio"] for split in data["splits"]], [10.0])
+        self.assertEqual([dividend["amount"] for dividend in data["dividends"]], [12.0])
+        self.assertEqual([factor["ex_date"] for factor in data["factors"]], ["2024-06-07", "2024-06-10"])
+        self.assertAlmostEqual(data["factors"][0]["price_factor"], 0.099)
+
+    def test_invalid_corporate_actions(self):
+        response = self.test_client.post(f"/stocks/{self.stock_id}/splits", json={"ex_date": "2024-06-10"})
+        self.assertEqual(response.status_code, 400)
+        response = self.test_client.post(f"/stocks/{self.stock_id}/dividends", json={"ex_date": "x", "amount": 1})
+        self.assertEqual(response.status_code, 400)
+        response = self.test_client.post("/stocks/999/splits", json={"ex_date": "2024-06-10", "ratio": 2})
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import unittest
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from app import AppFactory
+
+class CorrelationAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        self.temp_dir = tempfile.mkdtemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!",
+            'CORRELATION_DIRECTORY': self.temp_dir,
+            'CORRELATION_WORKERS': 2
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        self.test_client.post("/users", json={"username": "anna", "email": "anna@example.com",
+                                              "password_hash": "passwort"})
+        response = self.test_client.post("/auth/login", json={"username": "anna", "password_hash": "passwort"})
+        self.headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+        rng = np.random.default_rng(5)
+        factor = rng.normal(0, 0.01, 80)
+        days = np.busday_offset("2024-01-02", np.arange(80), roll="forward").astype(datetime)
+        self.stock_ids = {}
+        for symbol, returns in (("SAP", factor + rng.normal(0, 0.002, 80)), ("SIE", factor + rng.normal(0, 0.002, 80)),
+                                ("GLD", rng.normal(0, 0.01, 80))):
+            stock_id = self.test_client.post("/stocks", json={"symbol": symbol, "name": symbol}).get_json()["id"]
+            closes = 100 * np.exp(np.cumsum(returns))
+            self.test_client.post(f"/stocks/{stock_id}/history", json=[
+                {"date": day.isoformat(), "open": close, "high": close, "low": close, "close": close,
+                 "adj_close": close, "volume": 1} for day, close in zip(days, closes.tolist())])
+            self.stock_ids[symbol] = stock_id
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+        shutil.rmtree(self.temp_dir)
+
+    def test_build_and_most_correlated(self):
+        self.assertEqual(self.test_client.get("/correlations").status_code, 404)
+        self.assertEqual(self.test_client.get(f"/stocks/{self.stock_ids['SAP']}/correlated").status_code, 404)
+
+        response = self.test_client.post("/correlations/build", json={"lookback_days": 60, "end": "2024-04-19"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.get_json()["stocks"], response.get_json()["sessions"]), (3, 60))
+        self.assertEqual(self.test_client.get("/correlations").get_json()["kind"], "correlation")
+
+        response = self.test_client.get(f"/stocks/{self.stock_ids['SAP']}/correlated?k=1")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["stocks"][0]["symbol"], "SIE")
+        self.assertGreater(data["stocks"][0]["correlation"], 0.9)
+
+        self.assertEqual(self.test_client.get(f"/stocks/{self.stock_ids['SAP']}/correlated?k=0").status_code, 400)
+        self.assertEqual(self.test_client.get("/stocks/999/correlated").status_code, 404)
+        response = self.test_client.post("/correlations/build", json={"symbols": ["SAP", "XXX"]})
+        self.assertEqual(response.status_code, 404)
+        response = self.test_client.post("/correlations/build", json={"kind": "beta"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_watchlist_clusters(self):
+        self.assertEqual(self.test_client.get("/watchlist/clusters").status_code, 401)
+        for symbol in ("SAP", "SIE", "GLD"):
+            self.test_client.put(f"/watchlist/{self.stock_ids[symbol]}", headers=self.headers)
+        self.test_client.post("/correlations/build", json={"lookback_days": 60, "end": "2024-04-19"})
+
+        response = self.test_client.get("/watchlist/clusters?lookback=60&as_of=2024-04-19", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["observations"], 60)
+        self.assertEqual([[stock["symbol"] for stock in cluster["stocks"]] for cluster in data["clusters"]],
+                         [["SAP", "SIE"], ["GLD"]])
+        self.assertEqual(data["suggestions"], [])
+
+        response = self.test_client.get("/watchlist/clusters?min_correlation=2", headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import unittest
+import tempfile
+from unittest import mock
+
+from app import AppFactory
+from data_quality_service import DataQualityService
+
+class DataQualityAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!",
+            'DATA_QUALITY_ON_INGEST': True
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        response = self.test_client.post("/stocks", json={"symbol": "SAP", "name": "SAP SE", "exchange": "XETRA"})
+        self.stock_id = response.get_json()["id"]
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def post_bars(self, *bars):
+        return self.test_client.post(f"/stocks/{self.stock_id}/history", json=[
+            {"date": day, "open": close, "high": high, "low": close, "close": close, "adj_close": close,
+             "volume": 1} for day, close, high in bars])
+
+    def test_ingest_scans_new_bars(self):
+        response = self.post_bars(("2024-07-01", 10.0, 10.0), ("2024-07-02", 10.0, 10.0))
+        self.assertEqual(response.get_json()["issues"], {"duplicate": 0, "gap": 0, "ohlc": 0, "spike": 0})
+        response = self.post_bars(("2024-07-02", 10.0, 10.0), ("2024-07-04", 11.0, 10.5))
+        self.assertEqual(response.get_json()["issues"], {"duplicate": 1, "gap": 1, "ohlc": 1, "spike": 0})
+
+        report = self.test_client.get("/data-quality/report?symbol=SAP").get_json()
+        self.assertEqual(report["summary"]["gap"], {"issues": 1, "stocks": 1})
+        self.assertEqual([(issue["date"], issue["check"]) for issue in report["issues"]],
+                         [("2024-07-04", "gap"), ("2024-07-04", "ohlc"), ("2024-07-02", "duplicate")])
+        self.assertEqual(report["issues"][0]["details"]["first_missing"], "2024-07-03")
+        report = self.test_client.get("/data-quality/report?check=ohlc&limit=5").get_json()
+        self.assertEqual(len(report["issues"]), 1)
+
+    def test_failed_ingest_scan_keeps_bars(self):
+        with mock.patch.object(DataQualityService, "_scan_batch", side_effect=RuntimeError("boom")):
+            response = self.post_bars(("2024-07-01", 10.0, 10.0), ("2024-07-02", 10.0, 10.0))
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("issues", response.get_json())
+        self.assertIn("boom", response.get_json()["scan_error"])
+        history = self.test_client.get(f"/stocks/{self.stock_id}/history").get_json()
+        self.assertEqual(history["dates"], ["2024-07-01", "2024-07-02"])
+        # Die nicht geprüften Bars holt der nächste Scan nach.
+        self.assertEqual(self.test_client.post("/data-quality/scan", json={}).get_json()["bars"], 2)
+
+    def test_scan_and_validation(self):
+        self.post_bars(("2024-07-01", 10.0, 10.0))
+        response = self.test_client.post("/data-quality/scan", json={"symbols": ["SAP"], "full": True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["bars"], 1)
+        self.assertEqual(self.test_client.post("/data-quality/scan", json={}).get_json()["bars"], 0)
+        self.assertEqual(self.test_client.post("/data-quality/scan", json={"symbols": ["XXX"]}).status_code, 404)
+        self.assertEqual(self.test_client.get("/data-quality/report?check=typo").status_code, 400)
+        self.assertEqual(self.test_client.get("/data-quality/report?symbol=XXX").status_code, 404)
@@ -0,0 +1,76 @@
+import os
+import unittest
+import tempfile
+from unittest.mock import patch
+
+from app import AppFactory
+from export_service import parquet_available
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepository
+
+class ExportAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!",
+            'EXPORT_BATCH_ROWS': 2
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        self.stock_id = self.test_client.post("/stocks", json={"symbol": "AAPL", "name": "Apple Inc."}) \
+            .get_json()["id"]
+        self.test_client.post(f"/stocks/{self.stock_id}/history", json=[
+            {"date": f"2024-01-0{day}", "open": 100.0 + day, "high": 101.0 + day, "low": 99.0 + day,
+             "close": 100.0 + day, "adj_close": 100.0 + day, "volume": 10 * day} for day in range(1, 6)])
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def test_history_csv_is_streamed(self):
+        response = self.test_client.get(f"/stocks/{self.stock_id}/history/export?fields=close,volume"
+                                        "&start=2024-01-02&end=2024-01-04")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, "text/csv")
+        self.assertIn('filename="AAPL_history.csv"', response.headers["Content-Disposition"])
+        self.assertEqual(response.get_data(as_text=True).splitlines(),
+                         ["symbol,date,close,volume", "AAPL,2024-01-02,102.0,20", "AAPL,2024-01-03,103.0,30",
+                          "AAPL,2024-01-04,104.0,40"])
+
+    def test_history_export_errors(self):
+        self.assertEqual(self.test_client.get("/stocks/999/history/export").status_code, 404)
+        response = self.test_client.get(f"/stocks/{self.stock_id}/history/export?format=xlsx")
+        self.assertEqual(response.status_code, 400)
+        response = self.test_client.get(f"/stocks/{self.stock_id}/history/export?format=parquet")
+        self.assertEqual(response.status_code, 200 if parquet_available() else 501)
+
+    def test_portfolio_valuation_export(self):
+        self.test_client.post("/users", json={"username": "anna", "email": "anna@example.com",
+                                              "password_hash": "passwort"})
+        response = self.test_client.post("/auth/login", json={"username": "anna", "password_hash": "passwort"})
+        headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+        self.test_client.put(f"/portfolio/holdings/{self.stock_id}", headers=headers,
+                             json={"quantity": 2, "purchase_price": 100.0})
+
+        response = self.test_client.get("/portfolio/export?end=2024-01-02", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(as_text=True).splitlines(),
+                         ["date,market_value,cost_basis,unrealized_pnl,positions", "2024-01-01,202.0,200.0,2.0,1",
+                          "2024-01-02,204.0,200.0,4.0,1"])
+        self.assertEqual(self.test_client.get("/portfolio/export").status_code, 401)
+
+        # Zu viele Positionen werden vor dem Streamen abgewiesen statt mitten in der Antwort abzubrechen.
+        with patch.object(HistoricalDataRepository, "MAX_IN_IDS", 0):
+            response = self.test_client.get("/portfolio/export", headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {"error": "Die Bewertung unterstützt höchstens 0 Positionen."})
+
+
+if __name__ == "__main__":
+    unittest.main()
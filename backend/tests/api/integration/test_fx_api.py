@@ -0,0 +1,89 @@
+import os
+import unittest
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from app import AppFactory
+
+class FxAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!"
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        self.test_client.post("/users", json={"username": "anna", "email": "anna@example.com",
+                                              "password_hash": "passwort"})
+        response = self.test_client.post("/auth/login", json={"username": "anna", "password_hash": "passwort"})
+        self.headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+        response = self.test_client.post("/stocks", json={"symbol": "AAPL", "name": "Apple Inc.", "currency": "usd"})
+        self.assertEqual(response.get_json()["currency"], "USD")
+        self.stock_id = response.get_json()["id"]
+        self.days = np.busday_offset("2024-01-02", np.arange(40), roll="forward").astype(datetime)
+        closes = 100 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.01, 40)))
+        self.test_client.post(f"/stocks/{self.stock_id}/history", json=[
+            {"date": day.isoformat(), "open": close, "high": close, "low": close, "close": close,
+             "adj_close": close, "volume": 1} for day, close in zip(self.days, closes.tolist())])
+        self.test_client.put(f"/portfolio/holdings/{self.stock_id}", headers=self.headers,
+                             json={"quantity": 10, "purchase_price": 90.0})
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def post_usd_rate(self, rate=2.0):
+        # Ein Kurs am ersten Tag gilt durch Vorwärtsauffüllen für die ganze Reihe.
+        response = self.test_client.post("/fx/rates/usd", json=[{"date": "2024-01-01", "rate": rate}])
+        self.assertEqual(response.status_code, 201)
+
+    def test_store_and_list_rates(self):
+        self.post_usd_rate()
+        response = self.test_client.get("/fx/rates/USD")
+        self.assertEqual(response.get_json(), {"currency": "USD", "dates": ["2024-01-01"], "rates": [2.0]})
+        response = self.test_client.post("/fx/rates/USD", json=[{"date": "2024-01-01", "rate": 0}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.test_client.get("/fx/rates/US").status_code, 400)
+
+    def test_batch_history_in_base_currency(self):
+        body = {"symbols": ["AAPL"], "fields": ["close", "volume"], "end": "2024-01-03"}
+        native = self.test_client.post("/stocks/history/batch", json=body).get_json()
+        response = self.test_client.post("/stocks/history/batch", json=dict(body, currency="EUR"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("USD", response.get_json()["error"])
+
+        self.post_usd_rate()
+        converted = self.test_client.post("/stocks/history/batch", json=dict(body, currency="EUR")).get_json()
+        self.assertEqual(converted["currency"], "EUR")
+        np.testing.assert_allclose(converted["fields"]["close"], np.array(native["fields"]["close"]) / 2)
+        self.assertEqual(converted["fields"]["volume"], native["fields"]["volume"])
+
+    def test_risk_and_valuation_in_base_currency(self):
+        self.post_usd_rate()
+        query = "/portfolio/risk?paths=5000&lookback=30&seed=1&as_of=2024-02-26"
+        native = self.test_client.get(query, headers=self.headers).get_json()
+        converted = self.test_client.get(query + "&currency=eur", headers=self.headers).get_json()
+        self.assertEqual((native["currency"], converted["currency"]), (None, "EUR"))
+        self.assertAlmostEqual(converted["portfolio_value"], native["portfolio_value"] / 2)
+        self.assertAlmostEqual(converted["value_at_risk"], native["value_at_risk"] / 2)
+
+        native = self.test_client.get("/portfolio/export", headers=self.headers).get_data(as_text=True)
+        converted = self.test_client.get("/portfolio/export?currency=EUR", headers=self.headers) \
+            .get_data(as_text=True)
+        native_last = [float(value) for value in native.splitlines()[-1].split(",")[1:4]]
+        converted_last = [float(value) for value in converted.splitlines()[-1].split(",")[1:4]]
+        np.testing.assert_allclose(converted_last, np.array(native_last) / 2)
+        response = self.test_client.get("/portfolio/export?currency=JPY", headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
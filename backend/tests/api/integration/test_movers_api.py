@@ -0,0 +1,101 @@
+import os
+import shutil
+import unittest
+import tempfile
+from unittest import mock
+
+from sqlalchemy import func, select
+
+from app import AppFactory
+from mover_service import MoverService
+from portfolio_pilot_backend.models import HistoricalData
+
+class MoversAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!",
+            'MOVERS_SNAPSHOT_PATH': os.path.join(self.temp_dir, "movers.json")
+        }
+        self.app_factory = AppFactory(config=self.test_config)
+        self.test_client = self.app_factory.create_app().test_client()
+        self.stock_ids = {}
+        for symbol, exchange, industry, closes in (("SAP", "XETRA", "Software", [100, 104]),
+                                                   ("BMW", "XETRA", "Automobiles", [50, 45]),
+                                                   ("MSFT", "NASDAQ", "Software", [400, 402])):
+            stock_id = self.test_client.post("/stocks", json={"symbol": symbol, "name": symbol, "exchange": exchange,
+                                                              "industry": industry}).get_json()["id"]
+            self.test_client.post(f"/stocks/{stock_id}/history", json=[
+                {"date": day, "open": close, "high": close, "low": close, "close": close, "adj_close": close,
+                 "volume": len(symbol) * 100} for day, close in zip(("2024-05-31", "2024-06-03"), closes)])
+            self.stock_ids[symbol] = stock_id
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+        shutil.rmtree(self.temp_dir)
+
+    def test_movers(self):
+        response = self.test_client.get("/stocks/movers?k=2")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([mover["symbol"] for mover in data["gainers"]], ["SAP", "MSFT"])
+        self.assertEqual([mover["symbol"] for mover in data["losers"]], ["BMW", "MSFT"])
+        self.assertEqual([mover["symbol"] for mover in data["most_traded"]], ["MSFT", "BMW"])
+        self.assertEqual(data["gainers"][0], {"stock_id": self.stock_ids["SAP"], "symbol": "SAP", "price": 104,
+                                              "previous_close": 100, "change": 0.04, "volume": 300,
+                                              "as_of": "2024-06-03T00:00:00"})
+
+        data = self.test_client.get("/stocks/movers?exchange=XETRA&metric=gainers").get_json()
+        self.assertEqual(list(data), ["exchange", "gainers", "industry"])
+        self.assertEqual([mover["symbol"] for mover in data["gainers"]], ["SAP", "BMW"])
+        data = self.test_client.get("/stocks/movers?industry=software&exchange=nasdaq").get_json()
+        self.assertEqual([mover["symbol"] for mover in data["gainers"]], ["MSFT"])
+
+        # Wechsel der Branche und neue Bars wirken sofort.
+        self.test_client.put(f"/stocks/{self.stock_ids['BMW']}", json={"industry": "Software"})
+        self.test_client.post(f"/stocks/{self.stock_ids['BMW']}/history", json=[
+            {"date": "2024-06-04", "open": 45, "high": 60, "low": 45, "close": 54, "adj_close": 54, "volume": 1}])
+        data = self.test_client.get("/stocks/movers?industry=Software&metric=gainers&k=1").get_json()
+        self.assertEqual((data["gainers"][0]["symbol"], data["gainers"][0]["change"]), ("BMW", 0.2))
+
+        self.assertEqual(self.test_client.get("/stocks/movers?k=0").status_code, 400)
+        self.assertEqual(self.test_client.get("/stocks/movers?metric=volume").status_code, 400)
+
+    def test_ranking_sees_only_committed_bars(self):
+        committed = []
+        bars_changed = MoverService.bars_changed
+
+        def check_committed(service, session, stock_id):
+            with self.app_factory.session_factory() as other:
+                committed.append(other.scalar(select(func.count()).select_from(HistoricalData)
+                                              .where(HistoricalData.stock_id == stock_id)))
+            bars_changed(service, session, stock_id)
+
+        with mock.patch.object(MoverService, "bars_changed", autospec=True, side_effect=check_committed):
+            response = self.test_client.post(f"/stocks/{self.stock_ids['SAP']}/history", json=[
+                {"date": "2024-06-04", "open": 1, "high": 1, "low": 1, "close": 1, "adj_close": 1, "volume": 1}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(committed, [3])
+
+        # Scheitert der Commit, bleibt die Rangliste unverändert.
+        with mock.patch("sqlalchemy.orm.Session.commit", side_effect=RuntimeError("disk full")):
+            response = self.test_client.post(f"/stocks/{self.stock_ids['BMW']}/history", json=[
+                {"date": "2024-06-04", "open": 1, "high": 1, "low": 1, "close": 90, "adj_close": 90, "volume": 1}])
+        self.assertEqual(response.status_code, 500)
+        data = self.test_client.get("/stocks/movers?metric=gainers&k=1").get_json()
+        self.assertNotEqual(data["gainers"][0]["symbol"], "BMW")
+
+    def test_snapshot_survives_restart(self):
+        self.app_factory.shutdown()
+        self.assertTrue(os.path.exists(self.test_config['MOVERS_SNAPSHOT_PATH']))
+        self.app_factory.engine.dispose()
+        self.app_factory = AppFactory(config=self.test_config)
+        data = self.app_factory.create_app().test_client().get("/stocks/movers?metric=gainers").get_json()
+        self.assertEqual([mover["symbol"] for mover in data["gainers"]], ["SAP", "MSFT", "BMW"])
@@ -0,0 +1,69 @@
+import os
+import unittest
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from app import AppFactory
+
+class PortfolioAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!"
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        self.test_client.post("/users", json={"username": "anna", "email": "anna@example.com",
+                                              "password_hash": "passwort"})
+        response = self.test_client.post("/auth/login", json={"username": "anna", "password_hash": "passwort"})
+        self.headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+        self.stock_id = self.test_client.post("/stocks", json={"symbol": "AAPL", "name": "Apple Inc."}) \
+            .get_json()["id"]
+        closes = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, 60)))
+        days = np.busday_offset("2024-01-02", np.arange(60), roll="forward").astype(datetime)
+        self.test_client.post(f"/stocks/{self.stock_id}/history", json=[
+            {"date": day.isoformat(), "open": close, "high": close, "low": close, "close": close,
+             "adj_close": close, "volume": 1} for day, close in zip(days, closes.tolist())])
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def test_holdings_crud(self):
+        response = self.test_client.put(f"/portfolio/holdings/{self.stock_id}", headers=self.headers,
+                                        json={"quantity": 10, "purchase_price": 95.5})
+        self.assertEqual(response.status_code, 200)
+        response = self.test_client.get("/portfolio/holdings", headers=self.headers)
+        self.assertEqual(response.get_json(), [{"stock_id": self.stock_id, "quantity": 10.0, "purchase_price": 95.5}])
+
+        response = self.test_client.put("/portfolio/holdings/999", headers=self.headers,
+                                        json={"quantity": 1, "purchase_price": 1})
+        self.assertEqual(response.status_code, 404)
+        response = self.test_client.delete(f"/portfolio/holdings/{self.stock_id}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.test_client.get("/portfolio/holdings").status_code, 401)
+
+    def test_risk_estimate(self):
+        self.test_client.put(f"/portfolio/holdings/{self.stock_id}", headers=self.headers,
+                             json={"quantity": 10, "purchase_price": 95.5})
+        response = self.test_client.get("/portfolio/risk?method=normal&confidence=0.95&horizon=5&paths=20000"
+                                        "&lookback=50&seed=3&as_of=2024-03-29", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual((data["method"], data["paths"], data["observations"]), ("normal", 20000, 50))
+        self.assertGreater(data["expected_shortfall"], data["value_at_risk"])
+
+        response = self.test_client.get("/portfolio/risk?paths=abc", headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
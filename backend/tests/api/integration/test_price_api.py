@@ -0,0 +1,101 @@
+import os
+import unittest
+import tempfile
+
+from sqlalchemy import event
+
+from app import AppFactory
+from price_history_service import PriceHistoryService
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+
+class PriceAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'PRICE_STORAGE': "chunks"
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        response = self.test_client.post("/stocks", json={"symbol": "SAP", "name": "SAP SE"})
+        self.stock_id = response.get_json()["id"]
+        self.bars = [
+            {"date": "2024-12-30", "open": 10.0, "high": 11.0, "low": 9.5, "close": 10.5, "adj_close": 10.5,
+             "volume": 100},
+            {"date": "2024-12-31", "open": 10.5, "high": 11.5, "low": 10.0, "close": 11.0, "adj_close": 11.0,
+             "volume": 200},
+            {"date": "2025-01-02", "open": 11.0, "high": 12.0, "low": 10.5, "close": 11.5, "adj_close": 11.5,
+             "volume": 300},
+        ]
+
+    def tearDown(self):
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def test_add_and_get_history(self):
+        response = self.test_client.post(f"/stocks/{self.stock_id}/history", json=self.bars)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()["count"], 3)
+
+        response = self.test_client.get(f"/stocks/{self.stock_id}/history?start=2024-12-31&fields=close,volume")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["symbol"], "SAP")
+        self.assertEqual(data["dates"], ["2024-12-31", "2025-01-02"])
+        self.assertEqual(data["close"], [11.0, 11.5])
+        self.assertEqual(data["volume"], [200, 300])
+        self.assertNotIn("open", data)
+
+    def test_history_served_from_chunks_after_conversion(self):
+        self.test_client.post(f"/stocks/{self.stock_id}/history", json=self.bars)
+        price_history_service = PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory())
+        with self.app_factory.session_factory() as db:
+            report = price_history_service.convert_all(db)
+        self.assertEqual(report["chunks"], 2)
+
+        data = self.test_client.get(f"/stocks/{self.stock_id}/history").get_json()
+        self.assertEqual(data["dates"], ["2024-12-30", "2024-12-31", "2025-01-02"])
+        self.assertEqual(data["low"], [9.5, 10.0, 10.5])
+
+    def test_batch_history_aligns_symbols(self):
+        self.test_client.post(f"/stocks/{self.stock_id}/history", json=self.bars)
+        other_id = self.test_client.post("/stocks", json={"symbol": "BMW", "name": "BMW AG"}).get_json()["id"]
+        self.test_client.post(f"/stocks/{other_id}/history", json=[dict(self.bars[1], close=80.0)])
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(self.app_factory.engine, "before_cursor_execute", listener)
+        response = self.test_client.post("/stocks/history/batch", json={
+            "symbols": ["BMW", "SAP", "XXX", "SAP"], "start": "2024-12-30", "fields": ["close"]})
+        event.remove(self.app_factory.engine, "before_cursor_execute", listener)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["symbols"], ["BMW", "SAP"])
+        self.assertEqual(data["missing"], ["XXX"])
+        self.assertEqual(data["dates"], ["2024-12-30", "2024-12-31", "2025-01-02"])
+        self.assertEqual(data["fields"], {"close": [[None, 80.0, None], [10.5, 11.0, 11.5]]})
+        self.assertEqual(len([statement for statement in statements if "FROM historical_data" in statement]), 1)
+
+    def test_batch_history_validation(self):
+        self.assertEqual(self.test_client.post("/stocks/history/batch", json={"symbols": []}).status_code, 400)
+        response = self.test_client.post("/stocks/history/batch", json={"symbols": ["SAP"], "fields": ["foo"]})
+        self.assertEqual(response.status_code, 400)
+        response = self.test_client.post("/stocks/history/batch",
+                                         json={"symbols": [f"S{i}" for i in range(201)]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.test_client.get("/stocks/999/history").status_code, 404)
+        self.assertEqual(self.test_client.get(f"/stocks/{self.stock_id}/history?start=gestern").status_code, 400)
+        self.assertEqual(self.test_client.get(f"/stocks/{self.stock_id}/history?fields=foo").status_code, 400)
+        self.assertEqual(self.test_client.post(f"/stocks/{self.stock_id}/history", json={"a": 1}).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import unittest
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from app import AppFactory
+from query_plans import QueryPlanRecorder
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "query_plan_baseline.json")
+
+
+class QueryPlanRegressionTestCase(unittest.TestCase):
+    """
+    Runs the hot request paths with query-plan capture and compares the plans with the stored baseline.
+
+    After an intended change run the test with UPDATE_QUERY_PLAN_BASELINE=1
+    to store the new plans, and review the diff of the baseline file.
+    """
+
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!",
+            'QUERY_PLAN_CAPTURE': True
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def run_hot_paths(self):
+        client = self.test_client
+        client.post("/users", json={"username": "anna", "email": "anna@example.com", "password_hash": "passwort"})
+        response = client.post("/auth/login", json={"username": "anna", "password_hash": "passwort"})
+        headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+        client.get("/auth/me", headers=headers)
+        client.get("/users/1", headers=headers)
+
+        stock_ids = [client.post("/stocks", json={"symbol": symbol, "name": symbol, "exchange": "XETRA"})
+                     .get_json()["id"] for symbol in ("SAP", "SIE")]
+        days = np.busday_offset("2024-01-02", np.arange(30), roll="forward").astype(datetime)
+        for stock_id in stock_ids:
+            client.post(f"/stocks/{stock_id}/history", json=[
+                {"date": day.isoformat(), "open": 100.0, "high": 101.0, "low": 99.0, "close": 100.0,
+                 "adj_close": 100.0, "volume": 1} for day in days])
+            client.get(f"/stocks/{stock_id}")
+            client.get(f"/stocks/{stock_id}/history?start=2024-01-10&end=2024-02-01")
+            client.put(f"/watchlist/{stock_id}", headers=headers)
+            client.put(f"/portfolio/holdings/{stock_id}", headers=headers, json={"quantity": 1, "purchase_price": 90})
+            client.post("/alerts", headers=headers, json={"stock_id": stock_id, "direction": "above",
+                                                          "threshold": 150.0})
+        client.post("/stocks/history/batch", json={"symbols": ["SAP", "SIE"], "start": "2024-01-10"})
+        client.get("/stocks/search?q=SA")
+        client.get("/watchlist", headers=headers)
+        client.get("/portfolio/holdings", headers=headers)
+        client.get("/alerts", headers=headers)
+        client.delete(f"/watchlist/{stock_ids[0]}", headers=headers)
+
+    def test_no_new_full_scans(self):
+        self.run_hot_paths()
+        recorder = self.app_factory.query_plan_recorder
+        self.assertTrue(recorder.plans())
+        if os.environ.get("UPDATE_QUERY_PLAN_BASELINE"):
+            recorder.save_baseline(BASELINE_PATH)
+        regressions = recorder.regressions(QueryPlanRecorder.load_baseline(BASELINE_PATH))
+        self.assertEqual([], [f"{plan.origin}: full scan of {', '.join(plan.flagged)} in {plan.statement}"
+                              for plan in regressions])
+
+    def test_login_uses_username_index(self):
+        self.run_hot_paths()
+        plans = [plan for plan in self.app_factory.query_plan_recorder.plans()
+                 if plan.origin == "user_repository.UserRepository.get_by_username"]
+        self.assertEqual(len(plans), 1)
+        self.assertEqual(plans[0].flagged, [])
+
+    def test_query_plan_endpoint(self):
+        self.run_hot_paths()
+        response = self.test_client.get("/diagnostics/query-plans")
+        self.assertEqual(response.status_code, 200)
+        plans = response.get_json()["plans"]
+        self.assertTrue(all({"statement", "origin", "plan", "full_scans", "flagged"} <= plan.keys() for plan in plans))
+        flagged = self.test_client.get("/diagnostics/query-plans?flagged=true").get_json()["plans"]
+        self.assertTrue(all(plan["flagged"] for plan in flagged))
+
+
+if __name__ == "__main__":
+    unittest.main()
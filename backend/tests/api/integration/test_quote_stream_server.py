@@ -0,0 +1,73 @@
+import asyncio
+import json
+import unittest
+
+from quote_hub import Quote, QuoteHub
+from quote_stream_server import QuoteStreamServer
+from revocation_list import RevocationList
+from token_service import ACCESS, TokenService
+from portfolio_pilot_backend.repositories.revoked_token_repository import RevokedTokenRepositoryFactory
+
+
+class QuoteStreamServerTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hub = QuoteHub()
+        self.token_service = TokenService(b"q" * 32, RevocationList(RevokedTokenRepositoryFactory()))
+        self.watchlists = {1: [10, 11]}
+        self.server = QuoteStreamServer(self.hub, self.token_service, lambda user_id: self.watchlists[user_id],
+                                        heartbeat=0.05)
+        self.listener = await self.server.start("127.0.0.1", 0)
+        self.port = self.listener.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.hub.close_all()
+        self.listener.close()
+        await self.listener.wait_closed()
+
+    async def request(self, target, headers=""):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode("latin-1"))
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        return reader, writer, head.decode("latin-1")
+
+    async def read_event(self, reader):
+        while True:
+            block = (await asyncio.wait_for(reader.readuntil(b"\n\n"), 2)).decode("utf-8")
+            if block.startswith("event: quote"):
+                return json.loads(block.split("data: ")[1])
+
+    async def test_stream_delivers_watchlist_quotes(self):
+        token, _ = self.token_service.issue(1, ACCESS)
+        reader, writer, head = await self.request("/quotes/stream", f"Authorization: Bearer {token}\r\n")
+        self.assertIn("200 OK", head)
+        self.assertIn("text/event-stream", head)
+
+        self.hub.publish([Quote(99, 1.0, 1, 1.0), Quote(11, 42.5, 7, 1.0)])
+        self.assertEqual(await self.read_event(reader), {"stock_id": 11, "price": 42.5, "volume": 7, "ts": 1.0})
+        self.assertEqual(self.hub.client_count, 1)
+        writer.close()
+
+    async def test_stream_accepts_query_token_and_sends_snapshot(self):
+        self.hub.publish([Quote(10, 5.0, 1, 1.0)])
+        token, _ = self.token_service.issue(1, ACCESS)
+        reader, writer, _ = await self.request(f"/quotes/stream?access_token={token}")
+        self.assertEqual((await self.read_event(reader))["stock_id"], 10)
+        writer.close()
+
+    async def test_stream_requires_token(self):
+        reader, writer, head = await self.request("/quotes/stream")
+        self.assertIn("401", head)
+        writer.close()
+
+    async def test_latest_snapshot(self):
+        self.hub.publish([Quote(10, 5.0, 1, 1.0)])
+        reader, writer, head = await self.request("/quotes/latest?stock_ids=10,12")
+        self.assertIn("200 OK", head)
+        body = json.loads(await reader.read())
+        self.assertEqual(body, [{"stock_id": 10, "price": 5.0, "volume": 1, "timestamp": 1.0}])
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
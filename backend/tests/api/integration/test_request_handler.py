@@ -0,0 +1,157 @@
+import threading
+import time
+import unittest
+
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, event, select, update
+from sqlalchemy.orm import sessionmaker
+
+from handle_request import RequestHandler
+from rate_limiter import InMemoryTokenBucketLimiter
+from portfolio_pilot_backend.models import Base, Stock
+
+
+class FakeSession:
+    def __init__(self):
+        self.info = {}
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class RequestHandlerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config["TESTING"] = True
+        self.clock_now = 0.0
+        limiter = InMemoryTokenBucketLimiter(rate_per_second=1, capacity=2, clock=lambda: self.clock_now)
+        self.request_handler = RequestHandler(FakeSession, limiter)
+        self.release = threading.Event()
+        self.executions = 0
+
+        def history(db, symbol):
+            self.executions += 1
+            self.release.wait(timeout=5)
+            return jsonify({"symbol": symbol, "bars": [1, 2, 3]}), 200
+
+        def profile(db, user_id):
+            return jsonify({"id": user_id}), 200
+
+        self.app.add_url_rule("/history/<symbol>", view_func=self.request_handler.handle(
+            history, coalesce=True, rate_limited=False))
+        self.app.add_url_rule("/users/<int:user_id>", view_func=self.request_handler.handle(profile))
+        self.test_client = self.app.test_client()
+
+    def test_identical_gets_are_coalesced(self):
+        responses = []
+
+        def fetch():
+            responses.append(self.app.test_client().get("/history/SAP"))
+
+        threads = [threading.Thread(target=fetch) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while self.request_handler.single_flight.shared < 4 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(self.executions, 1)
+        self.assertEqual([response.status_code for response in responses], [200] * 5)
+        self.assertTrue(all(response.get_json()["symbol"] == "SAP" for response in responses))
+        self.assertEqual(responses[0].headers["Content-Type"], "application/json")
+
+    def test_different_queries_are_not_coalesced(self):
+        self.release.set()
+        self.test_client.get("/history/SAP?start=2024-01-01")
+        self.test_client.get("/history/SAP?start=2025-01-01")
+        self.assertEqual(self.executions, 2)
+
+    def test_rate_limit_per_client_address(self):
+        self.assertEqual(self.test_client.get("/users/1").status_code, 200)
+        self.assertEqual(self.test_client.get("/users/1").status_code, 200)
+        response = self.test_client.get("/users/1")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        # Die user_id der URL öffnet keinen neuen Bucket, eine andere Adresse schon.
+        self.assertEqual(self.test_client.get("/users/2").status_code, 429)
+        self.assertEqual(self.test_client.get("/users/2", environ_base={"REMOTE_ADDR": "10.0.0.2"}).status_code, 200)
+
+        self.clock_now += 1
+        self.assertEqual(self.test_client.get("/users/1").status_code, 200)
+
+
+class SessionHandlingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(self.engine)
+        self.opened = []
+        self.commits = 0
+        event.listen(self.engine, "commit", self._count_commit)
+        session_factory = sessionmaker(bind=self.engine)
+
+        def counting_factory():
+            self.opened.append(session_factory())
+            return self.opened[-1]
+
+        self.app = Flask(__name__)
+        self.request_handler = RequestHandler(counting_factory)
+
+        def validate(db):
+            return jsonify({"error": "Name is required."}), 400
+
+        def create(db):
+            db.add(Stock(symbol="SAP", name="SAP SE"))
+            return jsonify({"message": "created"}), 201
+
+        def rename(db):
+            db.execute(update(Stock).values(name="Renamed"))
+            return jsonify({"message": "renamed"}), 200
+
+        def names(db):
+            return jsonify(list(db.scalars(select(Stock.name)))), 200
+
+        for path, view, methods in (("/validate", validate, ["POST"]), ("/stocks", create, ["POST", "GET"]),
+                                    ("/rename", rename, ["GET"]), ("/names", names, ["GET"])):
+            self.app.add_url_rule(path, methods=methods, view_func=self.request_handler.handle(view),
+                                  endpoint=path)
+        self.test_client = self.app.test_client()
+
+    def tearDown(self):
+        event.remove(self.engine, "commit", self._count_commit)
+        self.engine.dispose()
+
+    def _count_commit(self, connection):
+        self.commits += 1
+
+    def test_session_is_created_on_first_use(self):
+        self.assertEqual(self.test_client.post("/validate").status_code, 400)
+        self.assertEqual(self.opened, [])
+
+        self.assertEqual(self.test_client.post("/stocks").status_code, 201)
+        self.assertEqual((len(self.opened), self.commits), (1, 1))
+        self.assertFalse(self.opened[0].expire_on_commit)
+
+    def test_get_sessions_are_read_only(self):
+        self.test_client.post("/stocks")
+        commits = self.commits
+        self.assertEqual(self.test_client.get("/names").get_json(), ["SAP SE"])
+        self.assertEqual(self.commits, commits)
+
+        for path in ("/stocks", "/rename"):
+            response = self.test_client.get(path)
+            self.assertEqual(response.status_code, 500)
+            self.assertIn("read-only", response.get_json()["error"])
+        self.assertEqual(self.test_client.get("/names").get_json(), ["SAP SE"])
+
+
+if __name__ == "__main__":
+    unittest.main()
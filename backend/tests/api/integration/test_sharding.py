@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, select
+
+from app import AppFactory
+from portfolio_pilot_backend.models import User, Watchlist
+
+class ShardingTestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test: a reference database and two shards."""
+        self.temp_files = [tempfile.mkstemp() for _ in range(3)]
+        uris = [f"sqlite:///{path}" for _, path in self.temp_files]
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': uris[0],
+            'SHARD_DATABASE_URIS': uris[1:],
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!"
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        self.user_ids = [self.test_client.post("/users", json={
+            "username": username, "email": f"{username}@example.com", "password_hash": "passwort"}).get_json()["id"]
+            for username in ("anna", "bert", "carl", "dora", "emil")]
+        self.stock_id = self.test_client.post("/stocks", json={"symbol": "SAP", "name": "SAP SE"}).get_json()["id"]
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        for handle, path in self.temp_files:
+            os.close(handle)
+            os.remove(path)
+
+    def shard_user_ids(self, shard: int) -> set[int]:
+        engine = create_engine(f"sqlite:///{self.temp_files[shard + 1][1]}")
+        with engine.connect() as connection:
+            user_ids = set(connection.scalars(select(User.__table__.c.id)))
+        engine.dispose()
+        return user_ids
+
+    def auth(self, username):
+        response = self.test_client.post("/auth/login", json={"username": username, "password_hash": "passwort"})
+        self.assertEqual(response.status_code, 200)
+        return {"Authorization": f"Bearer {response.get_json()['access_token']}"}, response.get_json()
+
+    def test_users_are_spread_by_id_hash(self):
+        self.assertEqual(self.user_ids, [1, 2, 3, 4, 5])
+        router = self.app_factory.shard_router
+        for shard in (0, 1):
+            self.assertEqual(self.shard_user_ids(shard),
+                             {user_id for user_id in self.user_ids if router.shard_for(user_id) == shard})
+        self.assertTrue(self.shard_user_ids(0) and self.shard_user_ids(1))
+
+    def test_uniqueness_spans_all_shards(self):
+        response = self.test_client.post("/users", json={"username": "anna2", "email": "emil@example.com",
+                                                         "password_hash": "passwort"})
+        self.assertEqual(response.status_code, 400)
+        response = self.test_client.put(f"/users/{self.user_ids[0]}", json={"username": "bert"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.test_client.get(f"/users/{self.user_ids[0]}").get_json()["username"], "anna")
+
+    def test_admin_listing_gathers_all_shards(self):
+        response = self.test_client.get("/users?fields=id,username")
+        self.assertEqual(response.get_json(), [{"id": user_id, "username": username} for user_id, username
+                                               in zip(self.user_ids, ("anna", "bert", "carl", "dora", "emil"))])
+
+    def test_user_routes_use_the_users_shard(self):
+        for username, user_id in (("bert", 2), ("emil", 5)):
+            headers, login = self.auth(username)
+            self.assertEqual(login["user_id"], user_id)
+            self.assertEqual(self.test_client.get("/auth/me", headers=headers).get_json()["username"], username)
+            self.assertEqual(self.test_client.put(f"/watchlist/{self.stock_id}", headers=headers).status_code, 200)
+            self.assertEqual(self.test_client.get("/watchlist", headers=headers).get_json(),
+                             {"stock_ids": [self.stock_id]})
+            response = self.test_client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+            self.assertEqual(response.status_code, 200)
+            shard = self.app_factory.shard_router.shard_for(user_id)
+            with self.app_factory.shard_router.session(shard=shard) as session:
+                self.assertEqual(session.scalars(select(Watchlist.user_id)).all().count(user_id), 1)
+        self.assertEqual(self.test_client.delete(f"/users/{self.user_ids[2]}").status_code, 200)
+        self.assertEqual(self.test_client.get(f"/users/{self.user_ids[2]}").status_code, 404)
+
+    def test_stock_on_a_shard_watchlist_is_not_deleted(self):
+        headers, _ = self.auth("emil")
+        self.test_client.put(f"/watchlist/{self.stock_id}", headers=headers)
+        response = self.test_client.delete(f"/stocks/{self.stock_id}")
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("Watchlists", response.get_json()["error"])
+        self.test_client.delete(f"/watchlist/{self.stock_id}", headers=headers)
+        self.assertEqual(self.test_client.delete(f"/stocks/{self.stock_id}").status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
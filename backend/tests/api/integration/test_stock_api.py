@@ -0,0 +1,87 @@
+import os
+import unittest
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from portfolio_pilot_backend.models import Base, Stock
+
+from app import AppFactory
+
+class StockAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        }
+        # Eine Aktie existiert schon vor dem App-Start und muss beim Start indiziert werden
+        engine = create_engine(test_config['SQLALCHEMY_DATABASE_URI'])
+        Base.metadata.create_all(engine)
+        with sessionmaker(bind=engine)() as db:
+            db.add(Stock(symbol="AAPL", name="Apple Inc.", isin="US0378331005", wkn="865985"))
+            db.commit()
+        engine.dispose()
+
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+
+    def tearDown(self):
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def test_search_finds_preloaded_stock(self):
+        response = self.test_client.get("/stocks/search?q=appl")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data[0]["symbol"], "AAPL")
+
+    def test_search_requires_query(self):
+        response = self.test_client.get("/stocks/search")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.get_json())
+
+    def test_created_and_updated_stocks_are_searchable(self):
+        response = self.test_client.post("/stocks", json={"symbol": "SAP", "name": "SAP SE", "exchange": "XETRA"})
+        self.assertEqual(response.status_code, 201)
+        stock_id = response.get_json()["id"]
+
+        data = self.test_client.get("/stocks/search?q=sap").get_json()
+        self.assertEqual(data[0]["id"], stock_id)
+
+        response = self.test_client.put(f"/stocks/{stock_id}", json={"wkn": "716460"})
+        self.assertEqual(response.status_code, 200)
+        data = self.test_client.get("/stocks/search?q=7164").get_json()
+        self.assertEqual(data[0]["id"], stock_id)
+
+        response = self.test_client.delete(f"/stocks/{stock_id}")
+        self.assertEqual(response.status_code, 200)
+        data = self.test_client.get("/stocks/search?q=sap").get_json()
+        self.assertEqual(data, [])
+
+    def test_delete_stock_with_history_conflicts(self):
+        stock_id = self.test_client.get("/stocks/search?q=appl").get_json()[0]["id"]
+        response = self.test_client.post(f"/stocks/{stock_id}/history", json=[
+            {"date": "2024-01-02", "open": 100.0, "high": 101.0, "low": 99.0, "close": 100.5, "adj_close": 100.5,
+             "volume": 1000}])
+        self.assertEqual(response.status_code, 201)
+        response = self.test_client.delete(f"/stocks/{stock_id}")
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("Kursdaten", response.get_json()["error"])
+        self.assertEqual(self.test_client.delete("/stocks/9999").status_code, 404)
+
+    def test_create_duplicate_symbol_fails(self):
+        response = self.test_client.post("/stocks", json={"symbol": "AAPL", "name": "Apple Again"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.get_json())
+
+    def test_get_unknown_stock(self):
+        response = self.test_client.get("/stocks/9999")
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -47,6 +47,7 @@ class UserAPITestCase(unittest.TestCase):
         self.login_data = {"username": "testuser", "password_hash": "testpassword"}
 
     def tearDown(self):
+        self.app_factory.shutdown()
         self.app_factory.engine.dispose()
         os.close(self.temp_db_file)
         os.remove(self.temp_db_path)
@@ -94,6 +95,14 @@ class UserAPITestCase(unittest.TestCase):
         self.assertIn("testuser", usernames)
         self.assertIn("anotheruser", usernames)
 
+    def test_sparse_fieldsets(self):
+        response = self.test_client.get(f"/users/{self.test_user_id}?fields=username,id")
+        self.assertEqual(response.get_json(), {"id": self.test_user_id, "username": "testuser"})
+        response = self.test_client.get("/users?fields=email")
+        self.assertEqual(response.get_json(), [{"email": "test@example.com"}])
+        response = self.test_client.get("/users?fields=password_hash")
+        self.assertEqual(response.status_code, 400)
+
     def test_update_user(self):
         updated_data = {"username": "updateduser", "email": "updated@example.com"}
         response = self.test_client.put(f"/users/{self.test_user_id}", json=updated_data)
@@ -114,6 +123,14 @@ class UserAPITestCase(unittest.TestCase):
         data = response.get_json()
         self.assertIn("error", data)
 
+    def test_get_user_after_update_returns_fresh_data(self):
+        response = self.test_client.get(f"/users/{self.test_user_id}")
+        self.assertEqual(response.get_json()["username"], "testuser")
+
+        self.test_client.put(f"/users/{self.test_user_id}", json={"username": "renamed"})
+        response = self.test_client.get(f"/users/{self.test_user_id}")
+        self.assertEqual(response.get_json()["username"], "renamed")
+
     def test_delete_user(self):
         response = self.test_client.delete(f"/users/{self.test_user_id}")
         self.assertEqual(response.status_code, 200)
@@ -0,0 +1,83 @@
+import os
+import unittest
+import tempfile
+from unittest.mock import patch
+
+from sqlalchemy import select
+
+from app import AppFactory
+from watchlist_service import WatchlistService
+from portfolio_pilot_backend.models import AuditEvent, User
+
+class WatchlistAPITestCase(unittest.TestCase):
+    def setUp(self):
+        """Set up for each test."""
+        self.temp_db_file, self.temp_db_path = tempfile.mkstemp()
+        test_config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.temp_db_path}",
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+            'AUTH_SECRET_KEY': "test-secret-test-secret-test-secret!"
+        }
+        self.app_factory = AppFactory(config=test_config)
+        self.app = self.app_factory.create_app()
+        self.test_client = self.app.test_client()
+        for username in ("anna", "bert"):
+            self.test_client.post("/users", json={"username": username, "email": f"{username}@example.com",
+                                                  "password_hash": "passwort"})
+        self.stock_ids = [self.test_client.post("/stocks", json={"symbol": symbol, "name": symbol}).get_json()["id"]
+                          for symbol in ("AAPL", "MSFT")]
+
+    def tearDown(self):
+        self.app_factory.shutdown()
+        self.app_factory.engine.dispose()
+        os.close(self.temp_db_file)
+        os.remove(self.temp_db_path)
+
+    def auth(self, username):
+        response = self.test_client.post("/auth/login", json={"username": username, "password_hash": "passwort"})
+        return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+    def test_add_list_and_remove(self):
+        headers = self.auth("anna")
+        aapl, msft = self.stock_ids
+        for stock_id in (msft, aapl, aapl):
+            response = self.test_client.put(f"/watchlist/{stock_id}", headers=headers)
+            self.assertEqual(response.status_code, 200)
+        # Synchrone Haltbarkeit: die Änderung ist beim Antworten bereits committet.
+        response = self.test_client.get("/watchlist", headers=headers)
+        self.assertEqual(response.get_json(), {"stock_ids": [aapl, msft]})
+        self.assertEqual(self.test_client.get("/watchlist", headers=self.auth("bert")).get_json(),
+                         {"stock_ids": []})
+
+        response = self.test_client.delete(f"/watchlist/{aapl}", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.test_client.get("/watchlist", headers=headers).get_json(), {"stock_ids": [msft]})
+
+    def test_unknown_stock_and_missing_token(self):
+        response = self.test_client.put("/watchlist/999", headers=self.auth("anna"))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.test_client.get("/watchlist").status_code, 401)
+
+    def test_failed_write_is_service_unavailable(self):
+        headers = self.auth("anna")
+        failed_commit = RuntimeError("Write-behind commit of a watchlist write failed.")
+        for method, name, error in (("put", "add_stock", failed_commit), ("delete", "remove_stock", TimeoutError())):
+            with patch.object(WatchlistService, name, side_effect=error), self.assertLogs("watchlist_api", "WARNING"):
+                response = getattr(self.test_client, method)(f"/watchlist/{self.stock_ids[0]}", headers=headers)
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["Retry-After"], "1")
+            self.assertEqual(response.get_json(),
+                             {"error": "Die Watchlist konnte nicht gespeichert werden, bitte erneut versuchen."})
+
+    def test_activity_is_recorded(self):
+        headers = self.auth("anna")
+        self.test_client.post("/auth/login", json={"username": "anna", "password_hash": "falsch"})
+        self.test_client.get("/watchlist", headers=headers)
+        self.test_client.post("/auth/logout", headers=headers)
+        self.app_factory.write_queue.flush()
+        with self.app_factory.session_factory() as db:
+            user = db.scalars(select(User).where(User.username == "anna")).one()
+            self.assertIsNotNone(user.last_seen_at)
+            actions = db.execute(select(AuditEvent.user_id, AuditEvent.action).order_by(AuditEvent.id)).all()
+        self.assertEqual([tuple(row) for row in actions],
+                         [(user.id, "login"), (None, "login_failed"), (user.id, "logout")])
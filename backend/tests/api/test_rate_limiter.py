@@ -0,0 +1,97 @@
+import math
+
+import pytest
+
+from rate_limiter import InMemoryTokenBucketLimiter, RedisTokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """
+    Minimal in-process stand-in for Redis that evaluates the token-bucket script.
+
+    Lua cannot run here, so `eval` mirrors the script's semantics and reply
+    types (integer plus bulk strings) on a dict of hashes with expiry.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.hashes: dict[str, dict[str, bytes]] = {}
+        self.expiry: dict[str, float] = {}
+        self.scripts = []
+
+    def eval(self, script, numkeys, *keys_and_args):
+        self.scripts.append(script)
+        key = keys_and_args[0]
+        rate, capacity, now, cost = (float(value) for value in keys_and_args[numkeys:])
+        if key in self.expiry and self.expiry[key] <= self.clock():
+            self.hashes.pop(key, None)
+        bucket = self.hashes.get(key, {})
+        tokens = float(bucket.get("tokens", capacity))
+        ts = float(bucket.get("ts", now))
+        tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+        allowed, retry_after = 0, 0.0
+        if tokens >= cost:
+            tokens -= cost
+            allowed = 1
+        else:
+            retry_after = (cost - tokens) / rate
+        self.hashes[key] = {"tokens": repr(tokens).encode(), "ts": repr(now).encode()}
+        self.expiry[key] = self.clock() + math.ceil(capacity / rate * 1000) / 1000
+        return [allowed, repr(tokens).encode(), repr(retry_after).encode()]
+
+
+@pytest.fixture(params=["memory", "redis"])
+def limiter_and_clock(request):
+    clock = FakeClock()
+    if request.param == "memory":
+        return InMemoryTokenBucketLimiter(rate_per_second=2, capacity=3, clock=clock), clock
+    return RedisTokenBucketLimiter(FakeRedis(clock), rate_per_second=2, capacity=3, clock=clock), clock
+
+def test_burst_then_reject(limiter_and_clock):
+    limiter, _ = limiter_and_clock
+    decisions = [limiter.consume("user:1") for _ in range(4)]
+    assert [decision.allowed for decision in decisions] == [True, True, True, False]
+    assert decisions[-1].retry_after == pytest.approx(0.5)
+
+def test_refill_over_time(limiter_and_clock):
+    limiter, clock = limiter_and_clock
+    for _ in range(3):
+        limiter.consume("user:1")
+    clock.now += 1.0
+    assert limiter.consume("user:1").remaining == pytest.approx(1.0)
+    clock.now += 60
+    assert limiter.consume("user:1").remaining == pytest.approx(2.0)
+
+def test_buckets_are_per_key(limiter_and_clock):
+    limiter, _ = limiter_and_clock
+    for _ in range(3):
+        limiter.consume("user:1")
+    assert not limiter.consume("user:1").allowed
+    assert limiter.consume("user:2").allowed
+
+def test_redis_limiter_uses_prefixed_keys():
+    clock = FakeClock()
+    client = FakeRedis(clock)
+    RedisTokenBucketLimiter(client, 1, 1, prefix="rl:", clock=clock).consume("addr:127.0.0.1")
+    assert list(client.hashes) == ["rl:addr:127.0.0.1"]
+
+def test_in_memory_limiter_prunes_idle_buckets():
+    clock = FakeClock()
+    limiter = InMemoryTokenBucketLimiter(rate_per_second=1, capacity=1, clock=clock, max_keys=2)
+    limiter.consume("a")
+    limiter.consume("b")
+    clock.now += 5
+    limiter.consume("c")
+    assert set(limiter._buckets) == {"c"}
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        InMemoryTokenBucketLimiter(rate_per_second=0, capacity=1)
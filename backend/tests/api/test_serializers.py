@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+import serializers
+from serializers import USER_SCHEMA, Field, Schema, dumps, isoformat
+from portfolio_pilot_backend.models import Base, User
+
+
+class Record(NamedTuple):
+    id: int
+    name: str
+    created_at: datetime | None
+
+
+SCHEMA = Schema(("id", Field("title", "name"), Field("created_at", convert=isoformat)))
+
+
+def test_encodes_rows_records_and_entities():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(User("anna", "anna@example.com", "hash"))
+        session.commit()
+        row = session.execute(select(User.id, User.username, User.email)).first()
+        entity = session.scalars(select(User)).first()
+        assert USER_SCHEMA.dump(row) == USER_SCHEMA.dump(entity) == {"id": 1, "username": "anna",
+                                                                     "email": "anna@example.com"}
+    engine.dispose()
+    assert SCHEMA.dump_many([Record(1, "a", datetime(2024, 1, 2, 3, 4)), Record(2, "b", None)]) == [
+        {"id": 1, "title": "a", "created_at": "2024-01-02T03:04:00"}, {"id": 2, "title": "b", "created_at": None}]
+
+
+def test_sparse_fieldsets_keep_schema_order_and_are_compiled_once():
+    fields = SCHEMA.parse_fields("created_at, id")
+    assert fields == ("id", "created_at")
+    assert SCHEMA.dump(Record(1, "a", None), fields) == {"id": 1, "created_at": None}
+    assert SCHEMA.encoder(fields) is SCHEMA.encoder(SCHEMA.parse_fields("id,created_at"))
+    assert SCHEMA.parse_fields("") is None
+    with pytest.raises(ValueError, match="No fields requested"):
+        SCHEMA.parse_fields(" , ")
+    with pytest.raises(ValueError, match="password"):
+        SCHEMA.parse_fields("id,password")
+    with pytest.raises(ValueError):
+        Schema(("id", "name) or (1"))
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_with_and_without_orjson(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serializers, "orjson", None)
+    elif serializers.orjson is None:
+        pytest.skip("orjson is not installed")
+    payload = {"name": "Müller", "at": datetime(2024, 1, 2), "values": np.array([1.5, 2.0])}
+    assert dumps(payload) == '{"name":"Müller","at":"2024-01-02T00:00:00","values":[1.5,2.0]}'.encode("utf-8")
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "value"
+
+    def worker():
+        results.append(single_flight.do("key", compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while single_flight.shared < 7 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert all(value == "value" for value, _ in results)
+    assert single_flight.in_flight() == 0
+
+def test_sequential_calls_execute_again():
+    single_flight = SingleFlight()
+    assert single_flight.do("key", lambda: 1) == (1, False)
+    assert single_flight.do("key", lambda: 2) == (2, False)
+    assert single_flight.executions == 2
+
+def test_error_is_propagated_and_key_released():
+    single_flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        single_flight.do("key", fail)
+    assert single_flight.do("key", lambda: "ok") == ("ok", False)
@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from alert_engine import AlertEngine
+from alert_service import AlertService
+from quote_hub import Quote, QuoteHub
+from portfolio_pilot_backend.models import Base, PriceAlert, Stock, User
+from portfolio_pilot_backend.repositories.price_alert_repository import PriceAlertRepositoryFactory
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def ids(session):
+    user = User("anna", "anna@example.com", "hash")
+    stock = Stock(symbol="AAPL", name="Apple Inc.")
+    session.add_all([user, stock])
+    session.commit()
+    return user.id, stock.id
+
+@pytest.fixture(scope="function")
+def alert_service():
+    return AlertService(PriceAlertRepositoryFactory())
+
+def make_engine(**kwargs):
+    return AlertEngine(PriceAlertRepositoryFactory(), SessionLocal, **kwargs)
+
+def test_create_alert_validates(session, ids, alert_service):
+    user_id, stock_id = ids
+    alert, error_msg = alert_service.create_alert(session, user_id, stock_id, "sideways", 100.0)
+    assert alert is None and "Richtung" in error_msg
+    alert, error_msg = alert_service.create_alert(session, user_id, stock_id, "above", 0)
+    assert alert is None and "Schwelle" in error_msg
+    alert, error_msg = alert_service.create_alert(session, user_id, stock_id, "above", 150.0)
+    assert error_msg is None and alert.id is not None
+    assert alert_service.delete_alert(session, user_id + 1, alert.id) is False
+    assert alert_service.delete_alert(session, user_id, alert.id) is True
+
+def test_first_tick_only_sets_reference_price(session, ids, alert_service):
+    user_id, stock_id = ids
+    alert_service.create_alert(session, user_id, stock_id, "above", 150.0)
+    alert_engine = make_engine()
+    assert alert_engine.load() == 1
+    assert alert_engine.on_ticks([Quote(stock_id, 160.0, 1, 1.0)]) == []
+    assert alert_engine.on_ticks([Quote(stock_id, 140.0, 1, 2.0), Quote(stock_id, 151.0, 1, 3.0)])[0].price == 151.0
+
+def test_fired_alerts_are_persisted_in_one_flush(session, ids, alert_service):
+    user_id, stock_id = ids
+    for threshold in (101.0, 102.0, 103.0):
+        alert_service.create_alert(session, user_id, stock_id, "above", threshold)
+    alert_service.create_alert(session, user_id, stock_id, "below", 90.0)
+    alert_engine = make_engine()
+    alert_engine.load()
+    alert_engine.on_ticks([Quote(stock_id, 100.0, 1, 1_700_000_000.0)])
+    assert len(alert_engine.on_ticks([Quote(stock_id, 102.5, 1, 1_700_000_001.0)])) == 2
+
+    assert alert_engine.flush() == 2
+    session.expire_all()
+    triggered = [alert for alert in alert_service.list_alerts(session, user_id) if alert.triggered_at]
+    assert [(alert.threshold, alert.triggered_price) for alert in triggered] == [(101.0, 102.5), (102.0, 102.5)]
+    assert triggered[0].triggered_at == datetime(2023, 11, 14, 22, 13, 21)
+    assert alert_engine.flush() == 0
+
+def test_sync_adds_new_alerts_but_not_fired_ones(session, ids, alert_service):
+    user_id, stock_id = ids
+    alert_service.create_alert(session, user_id, stock_id, "above", 101.0)
+    alert_engine = make_engine()
+    alert_engine.load()
+    alert_engine.on_ticks([Quote(stock_id, 100.0, 1, 1.0), Quote(stock_id, 101.0, 1, 2.0)])
+    alert_service.create_alert(session, user_id, stock_id, "below", 99.0)
+
+    assert alert_engine.sync() == 1
+    assert len(alert_engine.index) == 1
+    assert alert_engine.flush() == 1
+
+def test_deleted_alert_fires_without_update(session, ids, alert_service):
+    user_id, stock_id = ids
+    alert, _ = alert_service.create_alert(session, user_id, stock_id, "below", 99.0)
+    alert_engine = make_engine()
+    alert_engine.load()
+    alert_service.delete_alert(session, user_id, alert.id)
+    alert_engine.on_ticks([Quote(stock_id, 100.0, 1, 1.0), Quote(stock_id, 98.0, 1, 2.0)])
+    assert alert_engine.flush() == 0
+    assert session.query(PriceAlert).count() == 0
+
+def test_engine_listens_to_hub_and_flushes_on_shutdown(session, ids, alert_service):
+    user_id, stock_id = ids
+    alert_service.create_alert(session, user_id, stock_id, "above", 101.0)
+    alert_engine = make_engine(flush_interval=60)
+
+    async def scenario():
+        hub = QuoteHub()
+        alert_engine.load()
+        hub.add_listener(alert_engine.on_ticks)
+        task = asyncio.create_task(alert_engine.run())
+        hub.publish([Quote(stock_id, 100.0, 1, 1.0)])
+        hub.publish([Quote(stock_id, 99.0, 1, 0.5)])
+        hub.publish([Quote(stock_id, 101.5, 1, 2.0)])
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(scenario())
+    assert alert_engine.persisted == 1
+    session.expire_all()
+    assert alert_service.list_alerts(session, user_id)[0].triggered_price == 101.5
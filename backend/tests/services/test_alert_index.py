@@ -0,0 +1,62 @@
+import numpy as np
+
+from alert_index import ABOVE, BELOW, AlertIndex
+
+def build_index():
+    return AlertIndex.from_rows([
+        (1, 10, 7, ABOVE, 105.0),
+        (2, 11, 7, ABOVE, 110.0),
+        (3, 10, 7, ABOVE, 101.0),
+        (4, 12, 7, BELOW, 95.0),
+        (5, 10, 7, BELOW, 90.0),
+        (6, 10, 8, ABOVE, 105.0),
+    ])
+
+def test_rise_fires_crossed_upper_thresholds_once():
+    index = build_index()
+    fired = index.evaluate(7, 100.0, 105.0, 1.0)
+    assert [(alert.alert_id, alert.user_id, alert.threshold) for alert in fired] == [(3, 10, 101.0), (1, 10, 105.0)]
+    assert all(alert.price == 105.0 and alert.direction == ABOVE for alert in fired)
+    assert index.evaluate(7, 100.0, 105.0, 2.0) == []
+    assert len(index) == 4
+
+def test_fall_fires_crossed_lower_thresholds_only():
+    index = build_index()
+    assert index.evaluate(7, 100.0, 96.0, 1.0) == []
+    assert [alert.alert_id for alert in index.evaluate(7, 96.0, 90.0, 2.0)] == [5, 4]
+    assert index.evaluate(7, 90.0, 90.0, 3.0) == []
+    assert index.evaluate(9, 90.0, 200.0, 3.0) == []
+
+def test_threshold_equal_to_previous_price_is_not_crossed_again():
+    index = AlertIndex.from_rows([(1, 1, 1, ABOVE, 100.0), (2, 1, 1, BELOW, 100.0)])
+    assert index.evaluate(1, 100.0, 101.0, 1.0) == []
+    assert [alert.alert_id for alert in index.evaluate(1, 101.0, 100.0, 2.0)] == [2]
+
+def test_add_and_remove():
+    index = build_index()
+    assert index.add(7, 10, 7, ABOVE, 103.0)
+    assert not index.add(7, 10, 7, ABOVE, 103.0)
+    assert index.remove(1, 7, ABOVE)
+    assert not index.remove(1, 7, ABOVE)
+    assert index.contains(7, 7, ABOVE)
+    assert [alert.alert_id for alert in index.evaluate(7, 100.0, 106.0, 1.0)] == [3, 7]
+
+def test_matches_naive_scan_on_random_path():
+    rng = np.random.default_rng(5)
+    rows = [(i, i % 13, int(rng.integers(0, 5)), ABOVE if i % 2 else BELOW, float(rng.uniform(80, 120)))
+            for i in range(2000)]
+    index = AlertIndex.from_rows(rows)
+    active = {row[0]: row for row in rows}
+    prices = {stock_id: 100.0 for stock_id in range(5)}
+    for step in range(500):
+        stock_id = int(rng.integers(0, 5))
+        previous, current = prices[stock_id], float(prices[stock_id] + rng.normal(0, 2))
+        prices[stock_id] = current
+        expected = {alert_id for alert_id, (_, _, alert_stock, direction, threshold) in active.items()
+                    if alert_stock == stock_id and ((direction == ABOVE and previous < threshold <= current)
+                                                    or (direction == BELOW and current <= threshold < previous))}
+        fired = {alert.alert_id for alert in index.evaluate(stock_id, previous, current, float(step))}
+        assert fired == expected
+        for alert_id in fired:
+            del active[alert_id]
+    assert len(index) == len(active)
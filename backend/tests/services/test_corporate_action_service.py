@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from adjustment_factors import AdjustmentFactors
+from corporate_action_service import CorporateActionService
+from price_history_service import PriceHistoryService
+from portfolio_pilot_backend.models import AdjustmentFactor, Base, Stock
+from portfolio_pilot_backend.repositories.corporate_action_repository import CorporateActionRepositoryFactory
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def stock_id(session):
+    stock = Stock(symbol="AAPL", name="Apple Inc.")
+    session.add(stock)
+    session.commit()
+    return stock.id
+
+@pytest.fixture(scope="function")
+def service():
+    price_history_service = PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory())
+    return CorporateActionService(CorporateActionRepositoryFactory(), price_history_service)
+
+def add_history(service, session, stock_id, closes):
+    bars = [{"date": datetime(2024, 1, 1) + timedelta(days=i), "open": close, "high": close, "low": close,
+             "close": close, "adj_close": close, "volume": 100} for i, close in enumerate(closes)]
+    service.price_history_service.add_bars(session, stock_id, bars)
+    session.commit()
+
+def test_factors_accumulate_from_newest_event():
+    factors = AdjustmentFactors.from_events(np.array(["2024-01-03", "2024-01-05"], dtype="datetime64[s]"),
+                                            np.array([0.5, 0.9]), np.array([2.0, 1.0]))
+    assert factors.price.tolist() == [0.45, 0.9]
+    dates = np.array(["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"], dtype="datetime64[s]")
+    price, volume = factors.factors_for(dates)
+    assert price.tolist() == [0.45, 0.9, 0.9, 1.0]
+    assert volume.tolist() == [2.0, 1.0, 1.0, 1.0]
+
+def test_split_adjusts_earlier_bars_only(session, stock_id, service):
+    add_history(service, session, stock_id, [400.0, 404.0, 101.0, 102.0])
+    split, msg = service.add_split(session, stock_id, datetime(2024, 1, 3), 4.0)
+    assert msg is None
+    assert split.id is not None
+
+    series = service.get_adjusted_series(session, stock_id)
+    assert series.close.tolist() == [100.0, 101.0, 101.0, 102.0]
+    assert series.adj_close.tolist() == series.close.tolist()
+    assert series.volume.tolist() == [400, 400, 100, 100]
+    raw = service.price_history_service.get_series(session, stock_id)
+    assert raw.close.tolist() == [400.0, 404.0, 101.0, 102.0]
+
+def test_dividend_uses_close_before_ex_date(session, stock_id, service):
+    add_history(service, session, stock_id, [50.0, 50.0, 48.0])
+    _, msg = service.add_dividend(session, stock_id, datetime(2024, 1, 3), 2.0)
+    assert msg is None
+    assert session.query(AdjustmentFactor).one().price_factor == pytest.approx(0.96)
+    series = service.get_adjusted_series(session, stock_id, start=datetime(2024, 1, 2))
+    assert series.close.tolist() == pytest.approx([48.0, 48.0])
+
+def test_dividend_without_history_is_applied_once_bars_arrive(session, stock_id, service):
+    service.add_dividend(session, stock_id, datetime(2024, 1, 2), 1.0)
+    assert len(service.get_factors(session, stock_id)) == 0
+
+    add_history(service, session, stock_id, [10.0, 9.0])
+    service.bars_changed(session, stock_id)
+    assert service.get_factors(session, stock_id).price.tolist() == pytest.approx([0.9])
+
+def test_factors_are_cached_and_invalidated_on_new_action(session, stock_id, service):
+    add_history(service, session, stock_id, [100.0, 50.0])
+    service.add_split(session, stock_id, datetime(2024, 1, 2), 2.0)
+    factors = service.get_factors(session, stock_id)
+    assert service.get_factors(session, stock_id) is factors
+
+    service.add_split(session, stock_id, datetime(2024, 1, 10), 5.0)
+    factors = service.get_factors(session, stock_id)
+    assert factors.price.tolist() == pytest.approx([0.1, 0.2])
+    assert factors.volume.tolist() == [10.0, 5.0]
+
+def test_invalid_and_duplicate_actions(session, stock_id, service):
+    assert service.add_split(session, stock_id, datetime(2024, 1, 2), 0)[1] is not None
+    assert service.add_split(session, stock_id, None, 2.0)[1] is not None
+    assert service.add_dividend(session, stock_id, datetime(2024, 1, 2), -1.0)[1] is not None
+    assert service.add_split(session, stock_id, datetime(2024, 1, 2), 2.0)[1] is None
+    split, msg = service.add_split(session, stock_id, datetime(2024, 1, 2), 3.0)
+    assert split is None
+    assert msg == "Für dieses Datum ist bereits ein Split erfasst."
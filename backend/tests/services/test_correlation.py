@@ -0,0 +1,182 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from correlation import COVARIANCE, CorrelationMatrix, block_statistic, compute_blockwise, hierarchical_clusters
+from correlation_service import CorrelationService
+from corporate_action_service import CorporateActionService
+from price_history_service import PriceHistoryService
+from trading_calendar_service import TradingCalendarService
+from watchlist_service import WatchlistService
+from portfolio_pilot_backend.models import Base, Stock, User
+from portfolio_pilot_backend.repositories.corporate_action_repository import CorporateActionRepositoryFactory
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+from portfolio_pilot_backend.repositories.watchlist_repository import WatchlistRepositoryFactory
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+AS_OF = datetime(2024, 6, 28)
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def price_history_service():
+    return PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory())
+
+@pytest.fixture(scope="function")
+def correlation_service(price_history_service, tmp_path):
+    return CorrelationService(price_history_service, StockRepositoryFactory(), WatchlistRepositoryFactory(),
+                              TradingCalendarService(StockRepositoryFactory(), 2020), str(tmp_path / "matrix"),
+                              block_size=2, workers=2)
+
+def factor_returns(seed=0, days=250):
+    # Zwei Gruppen: A* folgen einem Faktor, B* einem anderen, C ist unabhängig.
+    rng = np.random.default_rng(seed)
+    first, second = rng.normal(0, 0.01, days), rng.normal(0, 0.01, days)
+    return {"A1": first + rng.normal(0, 0.003, days), "A2": first + rng.normal(0, 0.003, days),
+            "B1": second + rng.normal(0, 0.003, days), "B2": second + rng.normal(0, 0.003, days),
+            "B3": second + rng.normal(0, 0.003, days), "C": rng.normal(0, 0.01, days)}
+
+def trading_day(index):
+    return np.busday_offset("2023-07-03", index, roll="forward").astype(datetime)
+
+def add_stock(session, price_history_service, symbol, returns, skip=(), split_at=None):
+    stock = Stock(symbol=symbol, name=symbol, exchange="XETRA")
+    session.add(stock)
+    session.commit()
+    closes = 100 * np.exp(np.cumsum(returns))
+    if split_at is not None:
+        # Unbereinigt gespeichert: vor einem 10:1-Split kostete die Aktie das Zehnfache.
+        closes[:split_at] *= 10
+    days = trading_day(np.arange(len(closes)))
+    price_history_service.add_bars(session, stock.id, [
+        {"date": day, "open": close, "high": close, "low": close, "close": close, "adj_close": close, "volume": 1}
+        for i, (day, close) in enumerate(zip(days, closes.tolist())) if i not in skip])
+    session.commit()
+    return stock.id
+
+def test_blockwise_matches_corrcoef():
+    returns = np.random.default_rng(3).normal(size=(11, 80)).astype(np.float32)
+    out = np.empty((11, 11), dtype=np.float32)
+    with ThreadPoolExecutor(3) as executor:
+        compute_blockwise(returns, out, block_size=4, executor=executor)
+    np.testing.assert_allclose(out, np.corrcoef(returns), atol=1e-5)
+
+    compute_blockwise(returns, out, kind=COVARIANCE, block_size=3)
+    np.testing.assert_allclose(out, np.cov(returns), rtol=1e-4, atol=1e-6)
+
+def test_pairwise_complete_observations():
+    rng = np.random.default_rng(4)
+    returns = rng.normal(size=(3, 60))
+    returns[0, :10] = np.nan
+    returns[2, 30:] = np.nan
+    result = block_statistic(returns, returns, min_observations=25)
+
+    common = ~np.isnan(returns[0]) & ~np.isnan(returns[1])
+    assert result[0, 1] == pytest.approx(np.corrcoef(returns[0, common], returns[1, common])[0, 1])
+    # Zeilen 0 und 2 haben nur 20 gemeinsame Renditen.
+    assert np.isnan(result[0, 2]) and np.isnan(result[2, 0])
+    assert result[2, 2] == pytest.approx(1.0)
+
+def test_matrix_top_k_and_least_correlated(tmp_path):
+    returns = np.array(list(factor_returns().values()), dtype=np.float32)
+    meta = CorrelationMatrix.create(str(tmp_path), [10, 20, 30, 40, 50, 60], returns, {"lookback_days": 250},
+                                    block_size=4)
+    assert (meta["kind"], meta["stocks"]) == ("correlation", 6)
+    matrix = CorrelationMatrix.open(str(tmp_path))
+    assert isinstance(matrix.values, np.memmap)
+
+    top = matrix.top_k(30, 2)
+    assert [stock_id for stock_id, _ in top] in ([40, 50], [50, 40])
+    assert top[0][1] >= top[1][1] > 0.8
+    assert len(matrix.top_k(30, 10)) == 5
+    assert [stock_id for stock_id, _ in matrix.top_k(30, 5, absolute=True)][:2] in ([40, 50], [50, 40])
+    assert matrix.top_k(99) is None
+    assert {stock_id for stock_id, _ in matrix.least_correlated([10, 20], 5)} == {30, 40, 50, 60}
+
+def test_hierarchical_clusters():
+    correlation = np.corrcoef(np.array(list(factor_returns().values())))
+    clusters = hierarchical_clusters(correlation, min_correlation=0.5)
+    assert [cluster.members for cluster in clusters] == [[2, 3, 4], [0, 1], [5]]
+    assert clusters[0].mean_correlation > 0.8 and clusters[2].mean_correlation is None
+
+    # Ohne Mindestkorrelation landet alles in einem Cluster, unbekannte Paare zählen als unkorreliert.
+    correlation[0, 5] = correlation[5, 0] = np.nan
+    assert [cluster.members for cluster in hierarchical_clusters(correlation, -1)] == [[0, 1, 2, 3, 4, 5]]
+
+def test_build_and_query(session, price_history_service, correlation_service):
+    ids = {symbol: add_stock(session, price_history_service, symbol, returns, skip={5} if symbol == "C" else ())
+           for symbol, returns in factor_returns().items()}
+
+    meta, error_msg = correlation_service.build(session, lookback_days=200, end=AS_OF)
+    assert error_msg is None
+    assert (meta["stocks"], meta["sessions"], meta["end"]) == (6, 200, "2024-06-28")
+    result, error_msg = correlation_service.get_most_correlated(ids["A1"], 1)
+    assert result.kind == "correlation" and result.stocks[0][0] == ids["A2"]
+
+    meta, _ = correlation_service.build(session, [ids["A1"], ids["C"]], 200, AS_OF, COVARIANCE)
+    assert meta["stocks"] == 2
+    result, _ = correlation_service.get_most_correlated(ids["A1"], 5)
+    assert result.kind == "covariance" and [stock_id for stock_id, _ in result.stocks] == [ids["C"]]
+    assert correlation_service.get_most_correlated(ids["B1"])[1] is not None
+    assert correlation_service.build(session, [ids["A1"]])[1] is not None
+    assert correlation_service.build(session, lookback_days=5)[1] is not None
+
+def test_watchlist_clusters(session, price_history_service, correlation_service):
+    ids = {symbol: add_stock(session, price_history_service, symbol, returns)
+           for symbol, returns in factor_returns().items()}
+    user = User("anna", "anna@example.com", "hash")
+    session.add(user)
+    session.commit()
+    assert correlation_service.get_watchlist_clusters(session, user.id)[1] == "Die Watchlist ist leer."
+    watchlist_service = WatchlistService(WatchlistRepositoryFactory())
+    for symbol in ("A1", "A2", "B1", "B2"):
+        watchlist_service.add_stock(session, user.id, ids[symbol])
+
+    result, error_msg = correlation_service.get_watchlist_clusters(session, user.id, end=AS_OF)
+    assert error_msg is None
+    assert sorted(cluster.members for cluster in result.clusters) == [[ids["A1"], ids["A2"]], [ids["B1"], ids["B2"]]]
+    assert result.suggestions == []
+
+    correlation_service.build(session, lookback_days=200, end=AS_OF)
+    result, _ = correlation_service.get_watchlist_clusters(session, user.id, suggestions=1, end=AS_OF)
+    assert [stock_id for stock_id, _ in result.suggestions] == [ids["C"]]
+
+def test_adjusted_returns_and_stale_matrix(session, price_history_service, tmp_path):
+    corporate_action_service = CorporateActionService(CorporateActionRepositoryFactory(), price_history_service)
+    correlation_service = CorrelationService(price_history_service, StockRepositoryFactory(),
+                                             WatchlistRepositoryFactory(),
+                                             TradingCalendarService(StockRepositoryFactory(), 2020),
+                                             str(tmp_path / "matrix"),
+                                             corporate_action_service=corporate_action_service)
+    corporate_action_service.add_listener(correlation_service.corporate_action_added)
+    returns = factor_returns()
+    ids = {symbol: add_stock(session, price_history_service, symbol, returns[symbol],
+                             split_at=150 if symbol == "A1" else None) for symbol in ("A1", "A2", "C")}
+    corporate_action_service.add_split(session, ids["A1"], trading_day(150), 10.0)
+
+    correlation_service.build(session, lookback_days=200, end=AS_OF)
+    result, error_msg = correlation_service.get_most_correlated(ids["A1"], 1)
+    assert result.stocks[0][0] == ids["A2"] and result.stocks[0][1] > 0.8
+
+    # Eine Dividende nach dem Fenster lässt die Renditen darin unverändert, eine darin nicht.
+    corporate_action_service.add_dividend(session, ids["C"], datetime(2024, 7, 8), 1.0)
+    assert correlation_service.get_most_correlated(ids["A1"], 1)[1] is None
+    corporate_action_service.add_dividend(session, ids["C"], trading_day(200), 1.0)
+    assert "veraltet" in correlation_service.get_most_correlated(ids["A1"], 1)[1]
+    assert correlation_service.get_matrix().meta["stale"]
+
+    correlation_service.build(session, lookback_days=200, end=AS_OF)
+    assert correlation_service.get_most_correlated(ids["A1"], 1)[1] is None
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import numpy as np
+
+from data_quality import DUPLICATE, GAP, OHLC, SPIKE, Bars, scan
+from trading_calendar import TradingCalendar
+
+CALENDAR = TradingCalendar.build("XETRA", 2024, 2024)
+
+
+def make_bars(stock_id, dates, closes, new=True, first_id=1):
+    rows = [(stock_id, first_id + i, datetime.fromisoformat(date), close, close, close, close)
+            for i, (date, close) in enumerate(zip(dates, closes))]
+    return Bars.from_rows(rows, new)
+
+
+def sessions(start, count):
+    lo = CALENDAR.bounds(start, None)[0]
+    return np.datetime_as_string(CALENDAR.sessions[lo:lo + count]).tolist()
+
+
+def test_clean_series_has_no_issues():
+    closes = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, 80)))
+    assert scan(make_bars(1, sessions("2024-01-02", 80), closes), {1: CALENDAR}) == []
+
+
+def test_duplicates_and_ohlc():
+    bars = Bars.concat([make_bars(1, ["2024-01-02", "2024-01-03"], [10.0, 11.0], new=False),
+                        Bars.from_rows([(1, 7, datetime(2024, 1, 3), 11.0, 10.0, 10.5, 11.0),
+                                        (1, 8, datetime(2024, 1, 4), 11.0, 12.0, 10.0, None)], True)])
+    issues = scan(bars, {1: CALENDAR})
+    assert [(issue.check, issue.date.day) for issue in issues] == [(DUPLICATE, 3), (OHLC, 3)]
+    assert issues[0].details == {"bar_id": 7, "first_bar_id": 2}
+    # Fehlende Schlusskurse von Altdaten sind kein OHLC-Fehler.
+    assert issues[1].details["high"] == 10.0
+
+
+def test_gaps_follow_the_calendar():
+    # Karfreitag und Ostermontag sind keine Sitzungen, der 3. April fehlt.
+    bars = Bars.concat([make_bars(1, ["2024-03-27", "2024-03-28"], [10.0, 10.0], new=False),
+                        make_bars(1, ["2024-04-02", "2024-04-04"], [10.0, 10.0], first_id=3)])
+    issues = scan(bars, {1: CALENDAR})
+    assert [(issue.check, issue.date.day, issue.details["missing_sessions"]) for issue in issues] == [(GAP, 4, 1)]
+    assert issues[0].details["first_missing"] == "2024-04-03"
+
+
+def test_spikes_use_the_trailing_window_of_each_stock():
+    closes = list(100 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.01, 70))))
+    closes[65] *= 1.3
+    dates = sessions("2024-01-02", 70)
+    bars = Bars.concat([make_bars(1, dates[:60], closes[:60], new=False),
+                        make_bars(1, dates[60:], closes[60:], first_id=61),
+                        make_bars(2, dates[60:], closes[60:], first_id=100)])
+    issues = scan(bars, {1: CALENDAR, 2: CALENDAR})
+    # Aktie 2 hat zu wenige Renditen für eine Schätzung.
+    assert [(issue.stock_id, issue.check, issue.date) for issue in issues] == [
+        (1, SPIKE, datetime.fromisoformat(dates[65])), (1, SPIKE, datetime.fromisoformat(dates[66]))]
+    assert issues[0].details["observations"] == 60
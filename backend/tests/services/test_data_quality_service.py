@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from data_quality_service import DataQualityService
+from price_history_service import PriceHistoryService
+from trading_calendar_service import TradingCalendarService
+from portfolio_pilot_backend.models import Base, DataQualityWatermark, Stock
+from portfolio_pilot_backend.repositories.data_quality_repository import DataQualityRepositoryFactory
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def price_history_service():
+    return PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory())
+
+@pytest.fixture(scope="function")
+def service():
+    return DataQualityService(DataQualityRepositoryFactory(),
+                              TradingCalendarService(StockRepositoryFactory(), 2023, 2025), batch_size=1)
+
+def add_stock(session, symbol):
+    stock = Stock(symbol=symbol, name=symbol, exchange="XETRA")
+    session.add(stock)
+    session.commit()
+    return stock.id
+
+def make_bars(sessions, closes):
+    return [{"date": day, "open": close, "high": close, "low": close, "close": close, "adj_close": close,
+             "volume": 1} for day, close in zip(sessions, closes)]
+
+def xetra_sessions(service, start, count):
+    calendar = service.calendar_service.get("XETRA")
+    lo = calendar.bounds(start, None)[0]
+    return calendar.sessions[lo:lo + count].astype("datetime64[s]").astype(datetime).tolist()
+
+def test_scan_is_incremental(session, price_history_service, service):
+    first, second = add_stock(session, "SAP"), add_stock(session, "BMW")
+    days = xetra_sessions(service, "2024-01-02", 90)
+    closes = (100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, 90)))).tolist()
+    price_history_service.add_bars(session, first, make_bars(days[:70], closes[:70]))
+    report, error_msg = service.scan(session)
+    assert error_msg is None
+    assert report == {"stocks": 1, "bars": 70, "issues": {"duplicate": 0, "gap": 0, "ohlc": 0, "spike": 0}}
+    # Auch Aktien ohne Bars bekommen eine Wassermarke, damit der nächste Scan nur neue IDs liest.
+    assert session.get(DataQualityWatermark, second).last_bar_id == 70
+
+    new_bars = make_bars(days[70:75] + days[76:], closes[70:75] + closes[76:])
+    new_bars[-1]["close"] = new_bars[-1]["high"] * 1.01
+    price_history_service.add_bars(session, first, new_bars)
+    # Nachgelieferter Bar mit altem Datum: ein Duplikat, obwohl er älter als die Wassermarke ist.
+    price_history_service.add_bars(session, first, make_bars(days[10:11], closes[10:11]))
+    price_history_service.add_bars(session, second, make_bars(days[:5], closes[:5]))
+    report, _ = service.scan(session)
+    assert report == {"stocks": 2, "bars": 25, "issues": {"duplicate": 1, "gap": 1, "ohlc": 1, "spike": 0}}
+
+    assert service.scan(session)[0]["bars"] == 0
+    issues = service.list_issues(session, stock_id=first)
+    assert [(row.check, row.date) for row in issues] == [("ohlc", days[-1]), ("gap", days[76]),
+                                                        ("duplicate", days[10])]
+    assert service.get_summary(session)["gap"] == {"issues": 1, "stocks": 1}
+
+    report, _ = service.scan(session, [first], full=True)
+    assert report["bars"] == 90
+    assert len(service.list_issues(session)) == 3
+
+def test_gap_before_context_window(session, price_history_service, service):
+    stock_id = add_stock(session, "SAP")
+    days = xetra_sessions(service, "2024-01-02", 200)
+    price_history_service.add_bars(session, stock_id, make_bars(days[:10], [10.0] * 10))
+    service.scan(session)
+    # Nach einem halben Jahr ohne Kurse liegt der letzte Bar weit vor dem Kontextfenster.
+    price_history_service.add_bars(session, stock_id, make_bars(days[190:], [10.0] * 10))
+    report, _ = service.scan(session)
+    assert report["issues"]["gap"] == 1
+    assert service.list_issues(session, check="gap")[0].details.startswith('{"missing_sessions": 180')
@@ -0,0 +1,131 @@
+import io
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from corporate_action_service import CorporateActionService
+from export_service import CSV, PARQUET, VALUATION_COLUMNS, ExportService, history_columns
+from price_history_service import PriceHistoryService
+from portfolio_pilot_backend.models import Base, HistoricalData, Holding, Stock, User
+from portfolio_pilot_backend.repositories.corporate_action_repository import CorporateActionRepositoryFactory
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepository, \
+    HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.holding_repository import HoldingRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+
+class TrackingSessionFactory:
+    def __init__(self):
+        self.sessions = []
+
+    def __call__(self):
+        session = SessionLocal()
+        self.sessions.append(session)
+        return session
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def stock_ids(session):
+    stocks = [Stock(symbol="AAA", name="A"), Stock(symbol="BBB", name="B")]
+    session.add_all(stocks)
+    session.flush()
+    closes = {stocks[0].id: [10.0, 11.0, 12.0, 13.0], stocks[1].id: [20.0, None, 22.0, 21.0]}
+    session.execute(insert(HistoricalData), [
+        {"stock_id": stock_id, "date": datetime(2024, 1, 1 + day), "open": close or 0, "high": close or 0,
+         "low": close, "close": close, "adj_close": (close or 21.5) * 0.5, "volume": 100 * (day + 1)}
+        for stock_id, values in closes.items() for day, close in enumerate(values)])
+    session.commit()
+    return [stock.id for stock in stocks]
+
+def make_service(session_factory, batch_size=2):
+    return ExportService(session_factory, HistoricalDataRepositoryFactory(), HoldingRepositoryFactory(), batch_size)
+
+def test_history_csv_streams_one_chunk_per_batch(session, stock_ids):
+    session_factory = TrackingSessionFactory()
+    chunks = list(make_service(session_factory).stream_history(
+        CSV, {stock_ids[0]: "AAA"}, ("close", "volume"), start=datetime(2024, 1, 2)))
+    assert len(chunks) == 2
+    assert b"".join(chunks).decode() == ("symbol,date,close,volume\n"
+                                         "AAA,2024-01-02,11.0,200\nAAA,2024-01-03,12.0,300\n"
+                                         "AAA,2024-01-04,13.0,400\n")
+    assert session_factory.sessions[0].get_transaction() is None
+
+def test_stream_owns_its_session_until_closed(session, stock_ids):
+    session_factory = TrackingSessionFactory()
+    chunks = make_service(session_factory, batch_size=1).stream_history(
+        CSV, {stock_ids[0]: "AAA", stock_ids[1]: "BBB"}, ("close",))
+    assert session_factory.sessions == []
+    next(chunks)
+    assert session_factory.sessions[0].get_transaction() is not None
+    chunks.close()
+    assert session_factory.sessions[0].get_transaction() is None
+
+def test_valuation_values_holdings_at_last_close(session, stock_ids):
+    user = User("anna", "anna@example.com", "hash")
+    session.add(user)
+    session.flush()
+    session.add_all([Holding(user.id, stock_ids[0], 2, 9.0), Holding(user.id, stock_ids[1], 1, 25.0)])
+    session.commit()
+
+    batches = list(make_service(SessionLocal).iter_valuation_batches(user.id, end=datetime(2024, 1, 3)))
+    assert [row for batch in batches for row in batch] == [
+        (datetime(2024, 1, 1), 40.0, 43.0, -3.0, 2),
+        (datetime(2024, 1, 2), 32.75, 43.0, -10.25, 2),  # BBB ohne close: Fallback auf adj_close 10.75
+        (datetime(2024, 1, 3), 46.0, 43.0, 3.0, 2),
+    ]
+    assert b"".join(make_service(SessionLocal).stream_valuation(CSV, user.id + 1)).decode() == \
+        ",".join(name for name, _ in VALUATION_COLUMNS) + "\n"
+
+def test_valuation_adjusts_closes_before_a_split(session, stock_ids):
+    user = User("anna", "anna@example.com", "hash")
+    session.add(user)
+    session.flush()
+    session.add_all([Holding(user.id, stock_ids[0], 2, 9.0), Holding(user.id, stock_ids[1], 1, 25.0)])
+    session.commit()
+    corporate_action_service = CorporateActionService(
+        CorporateActionRepositoryFactory(),
+        PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory()))
+    assert corporate_action_service.add_split(session, stock_ids[0], datetime(2024, 1, 3), 2.0)[1] is None
+
+    service = ExportService(SessionLocal, HistoricalDataRepositoryFactory(), HoldingRepositoryFactory(), 2,
+                            corporate_action_service=corporate_action_service)
+    batches = list(service.iter_valuation_batches(user.id, end=datetime(2024, 1, 3)))
+    # Die heutigen 2 AAA-Stücke waren vor dem Split 1 Stück: Schlusskurse davor zählen nur halb.
+    assert [row for batch in batches for row in batch] == [
+        (datetime(2024, 1, 1), 30.0, 43.0, -13.0, 2),
+        (datetime(2024, 1, 2), 21.75, 43.0, -21.25, 2),
+        (datetime(2024, 1, 3), 46.0, 43.0, 3.0, 2),
+    ]
+
+def test_validate_valuation_rejects_more_holdings_than_one_in_list(session, stock_ids, monkeypatch):
+    user = User("anna", "anna@example.com", "hash")
+    session.add(user)
+    session.flush()
+    session.add_all([Holding(user.id, stock_ids[0], 2, 9.0), Holding(user.id, stock_ids[1], 1, 25.0)])
+    session.commit()
+    service = make_service(SessionLocal)
+    assert service.validate_valuation(session, user.id) is None
+    assert service.validate_valuation(session, user.id, "EUR") == "Währungsumrechnung ist nicht verfügbar."
+
+    monkeypatch.setattr(HistoricalDataRepository, "MAX_IN_IDS", 1)
+    assert service.validate_valuation(session, user.id) == "Die Bewertung unterstützt höchstens 1 Positionen."
+
+def test_history_parquet_has_one_row_group_per_batch(session, stock_ids):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    data = b"".join(make_service(SessionLocal, batch_size=3).stream_history(
+        PARQUET, {stock_ids[0]: "AAA", stock_ids[1]: "BBB"}, ("close",)))
+    parquet_file = parquet.ParquetFile(io.BytesIO(data))
+    assert parquet_file.metadata.num_row_groups == 3
+    assert parquet_file.schema_arrow.names == [name for name, _ in history_columns(("close",))]
+    assert parquet_file.read().num_rows == 8
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from aligned_prices import AlignedPrices
+from fx_matrix import FxMatrix, parse_currency, split_currency
+from fx_service import FxService
+from portfolio_pilot_backend.models import Base, Stock
+from portfolio_pilot_backend.repositories.fx_rate_repository import FxRateRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def day(n):
+    return datetime(2024, 1, n)
+
+def dates(*days):
+    return np.array([day(n) for n in days], dtype="datetime64[s]")
+
+# USD: 1.10 am 2., 1.20 am 4.; GBP: 0.85 ab dem 1.
+RATES = [("USD", day(2), 1.10), ("USD", day(4), 1.20), ("GBP", day(1), 0.85)]
+
+def test_parse_and_split_currency():
+    assert parse_currency(" usd ") == "USD"
+    assert parse_currency("US") is None
+    assert parse_currency(None) is None
+    assert split_currency("GBX") == ("GBP", 0.01)
+    assert split_currency("USD") == ("USD", 1.0)
+
+def test_grid_forward_fills_and_crosses_via_pivot():
+    matrix = FxMatrix.from_rows(RATES)
+    factors = matrix.grid(["USD", "EUR", "GBX"], "EUR", dates(1, 2, 3, 4, 5))
+    np.testing.assert_allclose(factors[0], [np.nan, 1 / 1.10, 1 / 1.10, 1 / 1.20, 1 / 1.20])
+    np.testing.assert_allclose(factors[1], 1.0)
+    np.testing.assert_allclose(factors[2], 0.01 / 0.85)
+    # USD -> GBP über den EUR: 0.85 / 1.10
+    np.testing.assert_allclose(matrix.grid(["USD"], "GBP", dates(3))[0], [0.85 / 1.10])
+    assert np.isnan(matrix.grid(["JPY"], "EUR", dates(3))).all()
+
+def test_factors_per_pair_match_grid():
+    matrix = FxMatrix.from_rows(RATES)
+    grid = matrix.grid(["USD", "GBP"], "EUR", dates(2, 4))
+    pairs = matrix.factors(["USD", "GBP", "USD", "GBP"], "EUR", dates(2, 2, 4, 4))
+    np.testing.assert_allclose(pairs, grid.T.ravel())
+
+def test_convert_aligned_multiplies_prices_only(session):
+    service = FxService(FxRateRepositoryFactory(), StockRepositoryFactory())
+    stocks = [Stock("AAPL", "Apple", currency="USD"), Stock("SAP", "SAP", currency="EUR")]
+    session.add_all(stocks)
+    session.commit()
+    count, error_msg = service.set_rates(session, "USD", [{"date": day(2), "rate": 1.25},
+                                                         {"date": day(3), "rate": 2.0}])
+    assert (count, error_msg) == (2, None)
+    aligned = AlignedPrices(np.array([stocks[0].id, stocks[1].id]), dates(2, 3),
+                            {"close": np.array([[125.0, 200.0], [50.0, np.nan]]),
+                             "volume": np.array([[10.0, 20.0], [30.0, 40.0]])})
+    converted, error_msg = service.convert_aligned(session, aligned, "EUR")
+    assert error_msg is None
+    np.testing.assert_allclose(converted.columns["close"], [[100.0, 100.0], [50.0, np.nan]])
+    np.testing.assert_array_equal(converted.columns["volume"], aligned.columns["volume"])
+
+def test_convert_aligned_reports_missing_rates(session):
+    service = FxService(FxRateRepositoryFactory(), StockRepositoryFactory())
+    stocks = [Stock("AAPL", "Apple", currency="USD"), Stock("XYZ", "Unknown")]
+    session.add_all(stocks)
+    session.commit()
+    aligned = AlignedPrices(np.array([stocks[0].id]), dates(1), {"close": np.array([[1.0]])})
+    assert service.convert_aligned(session, aligned, "EUR") == (None, "Keine Wechselkurse für USD vorhanden.")
+    service.set_rates(session, "USD", [{"date": day(2), "rate": 1.1}])
+    converted, error_msg = service.convert_aligned(session, aligned, "EUR")
+    assert converted is None and "ab 2024-01-02" in error_msg
+    aligned = AlignedPrices(np.array([stocks[1].id]), dates(1), {"close": np.array([[1.0]])})
+    assert "keine Währung" in service.convert_aligned(session, aligned, "EUR")[1]
+
+def test_matrix_is_cached_until_rates_change_or_expire(session):
+    clock = FakeClock()
+    service = FxService(FxRateRepositoryFactory(), StockRepositoryFactory(), cache_seconds=60, clock=clock)
+    first = service.get_matrix(session)
+    assert service.get_matrix(session) is first
+    service.set_rates(session, "USD", [{"date": day(1), "rate": 1.1}])
+    second = service.get_matrix(session)
+    assert second is not first and second.has_rates("USD")
+    clock.now = 61
+    assert service.get_matrix(session) is not second
+
+def test_set_rates_validates_and_overwrites(session):
+    service = FxService(FxRateRepositoryFactory(), StockRepositoryFactory())
+    assert service.set_rates(session, None, [{"date": day(1), "rate": 1.0}])[1] is not None
+    assert service.set_rates(session, "EUR", [{"date": day(1), "rate": 1.0}])[1] is not None
+    assert service.set_rates(session, "USD", [{"date": day(1), "rate": -1}])[1] is not None
+    service.set_rates(session, "USD", [{"date": day(1), "rate": 1.1}, {"date": day(2), "rate": 1.2}])
+    service.set_rates(session, "USD", [{"date": day(2), "rate": 1.3}])
+    assert [(row.date, row.rate) for row in service.list_rates(session, "USD")] == [(day(1), 1.1), (day(2), 1.3)]
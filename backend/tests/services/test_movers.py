@@ -0,0 +1,144 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from corporate_action_service import CorporateActionService
+from mover_service import MoverService
+from movers import GAINERS, LOSERS, MOST_TRADED, MoverRanking
+from price_history_service import PriceHistoryService
+from quote_hub import Quote
+from portfolio_pilot_backend.models import Base, Stock
+from portfolio_pilot_backend.repositories.corporate_action_repository import CorporateActionRepositoryFactory
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+DAYS = [datetime(2024, 5, 30), datetime(2024, 5, 31), datetime(2024, 6, 3)]
+NEXT_DAY = datetime(2024, 6, 4, 9, 30, tzinfo=timezone.utc).timestamp()
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def price_history_service():
+    return PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory())
+
+def create_service(snapshot_path=None, clock=lambda: NEXT_DAY, corporate_action_service=None):
+    return MoverService(HistoricalDataRepositoryFactory(), StockRepositoryFactory(), SessionLocal,
+                        snapshot_path, snapshot_interval=60, sync_interval=30, clock=clock,
+                        corporate_action_service=corporate_action_service)
+
+def add_stock(session, price_history_service, symbol, exchange, industry, closes, volume=100):
+    stock = Stock(symbol=symbol, name=symbol, exchange=exchange, industry=industry)
+    session.add(stock)
+    session.commit()
+    price_history_service.add_bars(session, stock.id, [
+        {"date": day, "open": close, "high": close, "low": close, "close": close, "adj_close": close,
+         "volume": volume} for day, close in zip(DAYS[-len(closes):], closes)])
+    session.commit()
+    return stock.id
+
+def test_ranking_groups_and_updates():
+    ranking = MoverRanking()
+    for stock_id, exchange, industry, change in ((1, "XETRA", "Tech", 5), (2, "XETRA", "Auto", -3),
+                                                 (3, "NYSE", "Tech", 2), (4, "NYSE", "Auto", -8)):
+        ranking.set_groups(stock_id, exchange, industry)
+        ranking.set_bars(stock_id, date(2024, 6, 3), 100 + change, 100, stock_id * 10)
+
+    assert [mover.stock_id for mover in ranking.top(GAINERS, 2)] == [1, 3]
+    assert [mover.stock_id for mover in ranking.top(LOSERS, 2)] == [4, 2]
+    assert [mover.stock_id for mover in ranking.top(MOST_TRADED, 1)] == [4]
+    assert [mover.stock_id for mover in ranking.top(GAINERS, 5, exchange="xetra")] == [1, 2]
+    assert [mover.stock_id for mover in ranking.top(LOSERS, 5, industry="TECH")] == [3, 1]
+    assert [mover.stock_id for mover in ranking.top(GAINERS, 5, "NYSE", "Auto")] == [4]
+    assert ranking.top(GAINERS, 5, "LSE") == []
+    assert ranking.top(GAINERS, 2)[0].change == pytest.approx(0.05)
+
+    # Ein späterer Tick bewegt den Kurs gegen den letzten Schluss, frühere Ticks werden ignoriert.
+    assert ranking.apply_ticks([Quote(4, 120.0, 7, NEXT_DAY), Quote(1, 1.0, 7, NEXT_DAY - 86400)]) == 1
+    assert ranking.get(4).change == pytest.approx(120 / 92 - 1) and ranking.get(4).volume == 7
+    ranking.apply_ticks([Quote(4, 121.0, 5, NEXT_DAY + 1)])
+    assert ranking.top(GAINERS, 1)[0] == ranking.get(4) and ranking.get(4).volume == 12
+
+    ranking.set_groups(4, "XETRA", "Auto")
+    ranking.remove(1)
+    assert [mover.stock_id for mover in ranking.top(GAINERS, 5, exchange="XETRA")] == [4, 2]
+    assert [mover.stock_id for mover in ranking.top(GAINERS, 5, exchange="NYSE")] == [3]
+    assert len(ranking) == 3
+
+    restored = MoverRanking()
+    restored.restore(ranking.to_snapshot())
+    assert [restored.get(stock_id) for stock_id in (2, 3, 4)] == [ranking.get(stock_id) for stock_id in (2, 3, 4)]
+
+def test_load_and_updates(session, price_history_service):
+    sap = add_stock(session, price_history_service, "SAP", "XETRA", "Software", [100, 104])
+    bmw = add_stock(session, price_history_service, "BMW", "XETRA", "Automobiles", [50, 45, 48], volume=500)
+    new = add_stock(session, price_history_service, "NEW", "NYSE", "Software", [10])
+    service = create_service()
+    assert service.load(session) == 3
+
+    movers = service.get_movers(5)
+    assert [mover.stock_id for mover in movers[GAINERS]] == [bmw, sap]
+    assert movers[GAINERS][0].previous_close == 45 and movers[GAINERS][0].as_of == datetime(2024, 6, 3)
+    assert [mover.stock_id for mover in movers[MOST_TRADED]] == [bmw, new, sap]
+    assert service.get_movers(5, industry="software")[GAINERS][0].stock_id == sap
+
+    price_history_service.add_bars(session, sap, [{"date": datetime(2024, 6, 4), "open": 90, "high": 90,
+                                                   "adj_close": 93.6, "volume": 1}])
+    session.commit()
+    service.bars_changed(session, sap)
+    assert service.get_movers(1)[LOSERS][0].stock_id == sap
+    assert service.get_movers(1)[LOSERS][0].change == pytest.approx(-0.1)
+
+    service.stock_changed(None, bmw)
+    assert [mover.stock_id for mover in service.get_movers(5, exchange="XETRA")[GAINERS]] == [sap]
+
+def test_sync_and_snapshot(session, price_history_service, tmp_path):
+    now = [NEXT_DAY]
+    sap = add_stock(session, price_history_service, "SAP", "XETRA", "Software", [100, 104])
+    service = create_service(str(tmp_path / "movers.json"), lambda: now[0])
+    service.load(session)
+
+    # Bars eines anderen Prozesses erscheinen mit dem nächsten Abgleich.
+    bmw = add_stock(session, price_history_service, "BMW", "XETRA", "Automobiles", [50, 60])
+    service.stock_changed(session.get(Stock, bmw), bmw)
+    assert [mover.stock_id for mover in service.get_movers(5)[GAINERS]] == [sap]
+    now[0] += 60
+    assert [mover.stock_id for mover in service.get_movers(5)[GAINERS]] == [bmw, sap]
+    assert (tmp_path / "movers.json").exists()
+
+    service.on_ticks([Quote(sap, 130.0, 9, now[0])])
+    assert service.save_snapshot() and not service.save_snapshot()
+    restarted = create_service(str(tmp_path / "movers.json"), lambda: now[0])
+    assert restarted.load(session) == 2
+    assert restarted.get_movers(5) == service.get_movers(5)
+    assert restarted.get_movers(1)[GAINERS][0].price == 130.0
+
+def test_split_on_the_last_bar_is_adjusted(session, price_history_service):
+    corporate_action_service = CorporateActionService(CorporateActionRepositoryFactory(), price_history_service)
+    # 2:1-Split zum letzten Handelstag: unbereinigt fällt der Kurs von 100 auf 51.
+    sap = add_stock(session, price_history_service, "SAP", "XETRA", "Software", [100, 51])
+    bmw = add_stock(session, price_history_service, "BMW", "XETRA", "Automobiles", [50, 49])
+    service = create_service(corporate_action_service=corporate_action_service)
+    corporate_action_service.add_listener(service.corporate_action_added)
+    service.load(session)
+    assert service.get_movers(1)[LOSERS][0].stock_id == sap
+
+    assert corporate_action_service.add_split(session, sap, DAYS[-1], 2.0)[1] is None
+    movers = service.get_movers(2)
+    assert [mover.stock_id for mover in movers[LOSERS]] == [bmw, sap]
+    assert movers[GAINERS][0].stock_id == sap and movers[GAINERS][0].change == pytest.approx(0.02)
+    assert movers[GAINERS][0].previous_close == pytest.approx(50)
+
+    restarted = create_service(corporate_action_service=corporate_action_service)
+    restarted.load(session)
+    assert restarted.get_movers(2) == movers
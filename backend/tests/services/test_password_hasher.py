@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from password_hasher import HasherBusyError, PasswordHasher
+
+@pytest.fixture(scope="module")
+def hasher():
+    hasher = PasswordHasher(scrypt_log2_n=10)
+    yield hasher
+    hasher.shutdown()
+
+def test_hash_and_verify(hasher):
+    stored = hasher.hash("geheim")
+    assert stored.startswith("scrypt$10$8$1$")
+    assert stored != hasher.hash("geheim")
+    assert hasher.verify(stored, "geheim")
+    assert not hasher.verify(stored, "Geheim")
+    assert not hasher.needs_rehash(stored)
+
+def test_legacy_plain_values_verify_and_need_rehash(hasher):
+    assert hasher.verify("geheim", "geheim")
+    assert not hasher.verify("geheim", "falsch")
+    assert hasher.needs_rehash("geheim")
+    assert not hasher.verify("scrypt$kaputt", "geheim")
+
+def test_changed_parameters_need_rehash(hasher):
+    stronger = PasswordHasher(scrypt_log2_n=11)
+    stored = hasher.hash("geheim")
+    assert stronger.needs_rehash(stored)
+    assert stronger.verify(stored, "geheim")
+    stronger.shutdown()
+
+def test_saturated_pool_fails_fast():
+    hasher = PasswordHasher(scrypt_log2_n=10, max_workers=1, max_pending=0, wait_timeout=0.01)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking(_):
+        started.set()
+        release.wait(timeout=5)
+        return "x"
+
+    hasher._hash = blocking
+    worker = threading.Thread(target=hasher.hash, args=("a",))
+    worker.start()
+    assert started.wait(timeout=5)
+    with pytest.raises(HasherBusyError):
+        hasher.hash("b")
+    release.set()
+    worker.join(timeout=5)
+    assert hasher.verify("geheim", "geheim")
+    hasher.shutdown()
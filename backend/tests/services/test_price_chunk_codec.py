@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from price_chunk_codec import ChunkDecodeError, decode_series, encode_series
+from price_series import PriceSeries
+
+
+def make_series(count=252, seed=1):
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset("2024-01-01", np.arange(count), roll="forward").astype("datetime64[s]")
+    close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, count))), 2)
+    return PriceSeries(dates, np.round(close * 0.99, 2), np.round(close * 1.01, 2), np.round(close * 0.98, 2),
+                       close, close.copy(), rng.integers(100_000, 10_000_000, count))
+
+def assert_series_equal(left, right):
+    assert np.array_equal(left.dates, right.dates)
+    for field in ("open", "high", "low", "close", "adj_close"):
+        assert np.array_equal(getattr(left, field), getattr(right, field), equal_nan=True), field
+    assert np.array_equal(left.volume, right.volume)
+
+def test_round_trip_is_lossless_and_smaller():
+    series = make_series()
+    data = encode_series(series)
+    assert len(data) < len(series) * 7 * 8
+    assert_series_equal(decode_series(data), series)
+
+def test_decoded_columns_are_numpy_arrays():
+    decoded = decode_series(encode_series(make_series(10)))
+    assert decoded.dates.dtype == np.dtype("datetime64[s]")
+    assert decoded.close.dtype == np.float64
+    assert decoded.volume.dtype == np.int64
+
+def test_round_trip_with_nan_irregular_timestamps_and_single_bar():
+    dates = np.array(["1960-01-01T10:00:00", "1960-01-03T10:00:07", "2030-01-01"], dtype="datetime64[s]")
+    prices = np.array([1.0, np.nan, -np.inf])
+    series = PriceSeries(dates, prices, prices, prices, prices, prices * 2, np.array([0, 2 ** 40, 5]))
+    assert_series_equal(decode_series(encode_series(series)), series)
+
+    single = make_series(1)
+    assert_series_equal(decode_series(encode_series(single)), single)
+
+def test_adjusted_close_differing_from_close():
+    series = make_series()
+    adjusted = PriceSeries(series.dates, series.open, series.high, series.low, series.close,
+                           series.close * 0.97, series.volume)
+    assert_series_equal(decode_series(encode_series(adjusted)), adjusted)
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        encode_series(PriceSeries.empty())
+    with pytest.raises(ChunkDecodeError):
+        decode_series(b"XX" + b"\x00" * 10)
+    data = encode_series(make_series(20))
+    with pytest.raises(ChunkDecodeError):
+        decode_series(data[:-5])
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from price_history_service import PriceHistoryService
+from trading_calendar import TradingCalendar
+from portfolio_pilot_backend.models import Base, PriceChunk, Stock
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def stock_id(session):
+    stock = Stock(symbol="SAP", name="SAP SE")
+    session.add(stock)
+    session.commit()
+    return stock.id
+
+def make_service(read_from_chunks):
+    return PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory(), read_from_chunks)
+
+def make_bars(start, count):
+    return [{"date": start + timedelta(days=i), "open": 100.0 + i, "high": 101.0 + i, "low": 99.0 + i,
+             "close": 100.5 + i, "adj_close": 100.5 + i, "volume": 1000 + i} for i in range(count)]
+
+def test_add_bars_and_read_range_from_rows(session, stock_id):
+    service = make_service(read_from_chunks=False)
+    count, msg = service.add_bars(session, stock_id, make_bars(datetime(2024, 12, 30), 5))
+    assert (count, msg) == (5, None)
+
+    series = service.get_series(session, stock_id, datetime(2024, 12, 31), datetime(2025, 1, 2))
+    assert len(series) == 3
+    assert series.close.tolist() == [101.5, 102.5, 103.5]
+
+def test_add_bars_validation(session, stock_id):
+    count, msg = make_service(False).add_bars(session, stock_id, [{"date": datetime(2024, 1, 1)}])
+    assert count == 0
+    assert "open" in msg
+
+    for bad in ({"close": "101.5"}, {"adj_close": float("nan")}, {"high": float("inf")}, {"low": True}):
+        assert make_service(False).add_bars(session, stock_id, [dict(make_bars(datetime(2024, 1, 1), 1)[0], **bad)]) \
+            == (0, f"Kurswerte müssen endliche Zahlen sein: {next(iter(bad))}.")
+    assert make_service(False).add_bars(session, stock_id, [dict(make_bars(datetime(2024, 1, 1), 1)[0], volume=1.5)]) \
+        == (0, "Das Volumen muss eine ganze Zahl sein.")
+    assert len(make_service(False).get_series(session, stock_id)) == 0
+
+def test_convert_splits_by_year_and_reads_match_rows(session, stock_id):
+    row_service = make_service(read_from_chunks=False)
+    chunk_service = make_service(read_from_chunks=True)
+    row_service.add_bars(session, stock_id, make_bars(datetime(2023, 12, 1), 100))
+
+    report = row_service.convert_all(session)
+    assert report["stocks"] == 1
+    assert report["chunks"] == 2
+    assert report["bars"] == 100
+    assert session.query(PriceChunk).count() == 2
+
+    start, end = datetime(2023, 12, 20), datetime(2024, 1, 10)
+    from_rows = row_service.get_series(session, stock_id, start, end)
+    from_chunks = chunk_service.get_series(session, stock_id, start, end)
+    assert len(from_chunks) == 22
+    assert np.array_equal(from_rows.dates, from_chunks.dates)
+    assert np.array_equal(from_rows.adj_close, from_chunks.adj_close)
+
+def test_new_bars_update_existing_chunks(session, stock_id):
+    service = make_service(read_from_chunks=True)
+    service.add_bars(session, stock_id, make_bars(datetime(2024, 1, 1), 10))
+    service.convert_all(session)
+
+    service.add_bars(session, stock_id, make_bars(datetime(2024, 2, 1), 3))
+    series = service.get_series(session, stock_id)
+    assert len(series) == 13
+    assert session.query(PriceChunk).one().bar_count == 13
+
+def test_unconverted_stock_falls_back_to_rows(session, stock_id):
+    service = make_service(read_from_chunks=True)
+    service.add_bars(session, stock_id, make_bars(datetime(2024, 1, 1), 4))
+    assert len(service.get_series(session, stock_id)) == 4
+
+def test_get_aligned_uses_union_of_dates(session, stock_id):
+    other = Stock(symbol="BMW", name="BMW AG")
+    session.add(other)
+    session.commit()
+    service = make_service(read_from_chunks=True)
+    service.add_bars(session, stock_id, make_bars(datetime(2024, 1, 1), 3))
+    service.add_bars(session, other.id, make_bars(datetime(2024, 1, 2), 3))
+    service.convert_all(session, [other.id])
+
+    aligned = service.get_aligned(session, [other.id, stock_id], ("close", "volume"), end=datetime(2024, 1, 3))
+    assert np.datetime_as_string(aligned.dates, unit="D").tolist() == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert aligned.stock_ids.tolist() == [other.id, stock_id]
+    assert np.array_equal(aligned.columns["close"], [[np.nan, 100.5, 101.5], [100.5, 101.5, 102.5]], equal_nan=True)
+
+    payload = aligned.to_payload(["BMW", "SAP"])
+    assert payload["fields"]["volume"] == [[None, 1000, 1001], [1000, 1001, 1002]]
+
+def test_get_aligned_without_bars(session, stock_id):
+    aligned = make_service(False).get_aligned(session, [stock_id], ("close",))
+    assert aligned.to_payload(["SAP"]) == {"dates": [], "symbols": ["SAP"], "fields": {"close": [[]]}}
+
+def test_get_aligned_on_calendar(session, stock_id):
+    other = Stock(symbol="BMW", name="BMW AG")
+    session.add(other)
+    session.commit()
+    service = make_service(read_from_chunks=False)
+    # SAP fehlt am 2. Januar, BMW hat einen Bar am Wochenende, der auf keine Sitzung fällt.
+    service.add_bars(session, stock_id, [bar for bar in make_bars(datetime(2024, 1, 1), 3) if bar["date"].day != 2])
+    service.add_bars(session, other.id, make_bars(datetime(2024, 1, 5), 4))
+    calendar = TradingCalendar.build("XETRA", 2024, 2024)
+
+    aligned = service.get_aligned(session, [stock_id, other.id], ("close", "volume"), datetime(2024, 1, 1),
+                                  datetime(2024, 1, 9), calendar)
+    assert np.datetime_as_string(aligned.dates, unit="D").tolist() == [
+        "2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05", "2024-01-08", "2024-01-09"]
+    assert np.array_equal(aligned.columns["close"], [[np.nan, 102.5, np.nan, np.nan, np.nan, np.nan],
+                                                     [np.nan, np.nan, np.nan, 100.5, 103.5, np.nan]], equal_nan=True)
+
+    filled = aligned.filled()
+    assert np.array_equal(filled.columns["close"], [[np.nan, 102.5, 102.5, 102.5, 102.5, 102.5],
+                                                    [np.nan, np.nan, np.nan, 100.5, 103.5, 103.5]], equal_nan=True)
+    assert filled.columns["volume"][0].tolist() == [0, 1002, 0, 0, 0, 0]
@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from query_plans import QueryPlanRecorder, normalize_statement, parse_plan
+from portfolio_pilot_backend.models import Base, User
+from portfolio_pilot_backend.repositories.stock_repository import StockRepository
+from portfolio_pilot_backend.repositories.user_repository import UserRepository
+
+
+@pytest.fixture(scope="function")
+def engine():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture(scope="function")
+def recorder(engine):
+    recorder = QueryPlanRecorder().attach(engine)
+    yield recorder
+    recorder.detach()
+
+def test_normalize_statement():
+    assert normalize_statement("SELECT a\n  FROM t WHERE id IN (?, ?, ?)") == "SELECT a FROM t WHERE id IN (?)"
+    assert normalize_statement("SELECT a FROM t WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == \
+        "SELECT a FROM t WHERE id IN (?)"
+    assert normalize_statement("SELECT a FROM t WHERE (a = ?)") == "SELECT a FROM t WHERE (a = ?)"
+
+def test_parse_plan_dialects():
+    statement = "SELECT u.id FROM users AS u JOIN stocks AS s ON s.id = u.id"
+    lines, scans = parse_plan("sqlite", statement, [], [(2, 0, 0, "SCAN u"), (4, 0, 0, "SEARCH s USING INTEGER "
+                                                        "PRIMARY KEY (rowid=?)"), (6, 0, 0, "SCAN CONSTANT ROW")])
+    assert scans == ["users"] and lines[1].startswith("SEARCH s")
+    assert parse_plan("sqlite", "SELECT count(*) FROM users", [],
+                      [(1, 0, 0, "SCAN users USING COVERING INDEX ix_users_username")])[1] == []
+    assert parse_plan("postgresql", "", [], [("Hash Join  (cost=1.0..2.0)",), ("  ->  Seq Scan on users u",),
+                                             ("  ->  Index Scan using stocks_pkey on stocks",)])[1] == ["users"]
+    columns = ["id", "select_type", "table", "type", "key"]
+    assert parse_plan("mysql", statement, columns, [(1, "SIMPLE", "u", "ALL", None),
+                                                    (1, "SIMPLE", "s", "eq_ref", "PRIMARY")])[1] == ["users"]
+
+def test_recorder_flags_full_scans_of_repository_statements(engine, recorder):
+    session = sessionmaker(bind=engine)()
+    session.add(User("anna", "anna@example.com", "hash"))
+    session.commit()
+    users = UserRepository(session)
+    assert users.get_by_username("anna").email == "anna@example.com"
+    users.list_all()
+    StockRepository(session).get_by_ids([1, 2, 3])
+    StockRepository(session).get_by_ids([4])
+    session.execute(text("SELECT * FROM stocks WHERE name = 'x'"))
+    session.close()
+
+    plans = {plan.origin: plan for plan in recorder.plans()}
+    assert plans["user_repository.UserRepository.get_by_username"].plan == \
+        ["SEARCH users USING INDEX ix_users_username (username=?)"]
+    assert plans["user_repository.UserRepository.get_by_username"].flagged == []
+    assert plans["user_repository.UserRepository.list_all"].flagged == ["users"]
+    # Verschieden lange IN-Listen sind eine Abfrage, Abfragen außerhalb der Repositories zählen nicht.
+    assert len([plan for plan in recorder.plans() if plan.origin == "stock_repository.StockRepository.get_by_ids"]) == 1
+    assert all(plan.origin is not None for plan in recorder.plans())
+    assert [plan.origin for plan in recorder.flagged()] == ["user_repository.UserRepository.list_all"]
+
+def test_baseline_regressions(engine, recorder, tmp_path):
+    session = sessionmaker(bind=engine)()
+    UserRepository(session).list_all()
+    path = str(tmp_path / "baseline.json")
+    recorder.save_baseline(path)
+    baseline = QueryPlanRecorder.load_baseline(path)
+    assert recorder.regressions(baseline) == []
+
+    StockRepository(session).list_reference_rows()
+    session.close()
+    assert [plan.origin for plan in recorder.regressions(baseline)] == \
+        ["stock_repository.StockRepository.list_reference_rows"]
+    recorder.reset()
+    assert recorder.plans() == []
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from quote_feed import ReplayQuoteFeed, SyntheticQuoteFeed
+from quote_hub import Quote, QuoteHub
+
+def decode(messages):
+    return [json.loads(message.decode("utf-8").split("data: ")[1]) for message in messages]
+
+def test_publish_fans_out_to_subscribers_only():
+    async def scenario():
+        hub = QuoteHub()
+        first = hub.subscribe([1, 2])
+        second = hub.subscribe([2])
+        hub.publish([Quote(1, 10.0, 5, 1.0), Quote(3, 30.0, 5, 1.0)])
+        assert decode(await first.get_batch(0.1)) == [{"stock_id": 1, "price": 10.0, "volume": 5, "ts": 1.0}]
+        assert await second.get_batch(0.01) == []
+        assert hub.get_latest(3).price == 30.0
+    asyncio.run(scenario())
+
+def test_slow_consumer_gets_only_latest_tick():
+    async def scenario():
+        hub = QuoteHub()
+        queue = hub.subscribe([1])
+        for i in range(100):
+            hub.publish([Quote(1, 100.0 + i, 1, float(i))])
+        batch = decode(await queue.get_batch(0.1))
+        assert [quote["price"] for quote in batch] == [199.0]
+        assert queue.conflated == 99
+    asyncio.run(scenario())
+
+def test_subscribe_starts_with_snapshot_and_follows_updates():
+    async def scenario():
+        hub = QuoteHub()
+        hub.publish([Quote(1, 10.0, 1, 1.0), Quote(2, 20.0, 1, 1.0)])
+        queue = hub.subscribe([1])
+        assert [quote["stock_id"] for quote in decode(await queue.get_batch(0.1))] == [1]
+
+        hub.update_subscription(queue, [2])
+        assert [quote["stock_id"] for quote in decode(await queue.get_batch(0.1))] == [2]
+        hub.publish([Quote(1, 11.0, 1, 2.0)])
+        assert await queue.get_batch(0.01) == []
+    asyncio.run(scenario())
+
+def test_late_ticks_and_client_limit():
+    async def scenario():
+        hub = QuoteHub(max_clients=1)
+        hub.publish([Quote(1, 10.0, 1, 5.0), Quote(1, 9.0, 1, 4.0)])
+        assert hub.get_latest(1).price == 10.0
+        queue = hub.subscribe([1])
+        with pytest.raises(OverflowError):
+            hub.subscribe([1])
+        hub.unsubscribe(queue)
+        assert queue.closed
+        assert hub.client_count == 0
+    asyncio.run(scenario())
+
+def test_replay_feed_batches_by_timestamp(tmp_path):
+    replay_file = tmp_path / "ticks.csv"
+    replay_file.write_text("# timestamp,stock_id,price,volume\n1.0,1,10.5,3\n1.0,2,20.0,\n2.0,1,10.6,1\n")
+
+    async def collect():
+        return [batch async for batch in ReplayQuoteFeed(str(replay_file), speed=0).ticks()]
+    batches = asyncio.run(collect())
+    assert batches == [[Quote(1, 10.5, 3, 1.0), Quote(2, 20.0, 0, 1.0)], [Quote(1, 10.6, 1, 2.0)]]
+
+def test_hub_runs_synthetic_feed():
+    async def scenario():
+        hub = QuoteHub()
+        await hub.run(SyntheticQuoteFeed([1, 2, 3], interval=0, ticks_per_batch=2, seed=1, batches=5))
+        return hub
+    hub = asyncio.run(scenario())
+    assert hub.ticks == 10
+    assert len(hub.snapshot([1, 2, 3])) >= 2
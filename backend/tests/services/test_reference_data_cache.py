@@ -0,0 +1,123 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from reference_data_cache import ReferenceDataCache, StockRecord, UserRecord
+from user_service import UserService
+from auth_service import AuthService
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+from portfolio_pilot_backend.repositories.user_repository import UserRepositoryFactory
+from portfolio_pilot_backend.models import Base, Stock, User
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def cache():
+    return ReferenceDataCache(StockRepositoryFactory(), UserRepositoryFactory())
+
+def test_preload_creates_immutable_records(cache, session):
+    session.add_all([Stock(symbol="SAP", name="SAP SE", exchange="XETRA"),
+                     User(username="alice", email="alice@example.com", password_hash="pw")])
+    session.commit()
+    cache.preload(session)
+
+    stock = cache.get_stock_by_symbol(session, "SAP")
+    assert isinstance(stock, StockRecord)
+    assert stock.exchange == "XETRA"
+    with pytest.raises(AttributeError):
+        stock.name = "changed"
+    assert cache.get_user(session, 1) == UserRecord(1, "alice", "alice@example.com", 1)
+    assert cache.misses == 0
+
+def test_miss_loads_and_caches(cache, session):
+    session.add(Stock(symbol="SIE", name="Siemens AG"))
+    session.commit()
+    assert cache.get_stock(session, 1).symbol == "SIE"
+    assert cache.get_stock(session, 1).symbol == "SIE"
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.get_stock(session, 99) is None
+
+def test_invalidation_bumps_version_and_drops_entry(cache, session):
+    session.add(Stock(symbol="BAS", name="BASF SE"))
+    session.commit()
+    cache.preload(session)
+    assert cache.version("stock", 1) == 0
+
+    cache.invalidate_stock(1)
+    assert cache.version("stock", 1) == 1
+    assert cache.get_stock_by_symbol(session, "BAS") is not None
+    assert cache.misses == 1
+
+def test_stale_load_is_not_stored(cache, session):
+    session.add(User(username="bob", email="bob@example.com", password_hash="pw"))
+    session.commit()
+    repository_factory = cache.user_repository_factory
+
+    class InvalidatingFactory:
+        def create(self, session):
+            # Simuliert einen Schreiber, der während des Ladens invalidiert
+            cache.invalidate_user(1)
+            return repository_factory.create(session)
+
+    cache.user_repository_factory = InvalidatingFactory()
+    assert cache.get_user(session, 1).username == "bob"
+    cache.user_repository_factory = repository_factory
+    assert cache.get_user(session, 1).username == "bob"
+    assert cache.misses == 2
+
+def test_user_service_writes_invalidate_cache(cache, session):
+    user_service = UserService(UserRepositoryFactory(), AuthService(), cache)
+    user, _ = user_service.create_new_user(session, "carol", "carol@example.com", "pw")
+    assert user_service.get_user_profile(session, user.id).username == "carol"
+
+    user_service.update_user(session, user.id, username="carol2")
+    assert user_service.get_user_profile(session, user.id).username == "carol2"
+
+    user_service.delete_user(session, user.id)
+    assert user_service.get_user_profile(session, user.id) is None
+
+def test_ttl_drops_records_written_elsewhere(session):
+    now = [1000.0]
+    cache = ReferenceDataCache(StockRepositoryFactory(), UserRepositoryFactory(), ttl=60, clock=lambda: now[0])
+    session.add(Stock(symbol="SAP", name="SAP SE"))
+    session.commit()
+    cache.preload(session)
+
+    # Schreiber eines anderen Prozesses invalidieren diesen Cache nicht.
+    session.get(Stock, 1).name = "SAP AG"
+    session.commit()
+    assert cache.get_stock(session, 1).name == "SAP SE"
+    now[0] += 60
+    assert cache.get_stock(session, 1).name == "SAP AG"
+    assert cache.get_stock_by_symbol(session, "SAP").name == "SAP AG"
+    assert cache.misses == 1
+
+def test_version_check_reloads_outdated_user(cache, session):
+    user_service = UserService(UserRepositoryFactory(), AuthService(), cache)
+    session.add(User(username="dave", email="dave@example.com", password_hash="pw"))
+    session.commit()
+    assert user_service.get_user_profile(session, 1).version == 1
+
+    session.get(User, 1).email = "dave@example.org"
+    session.commit()
+    assert user_service.get_user_profile(session, 1).email == "dave@example.com"
+    assert user_service.get_user_version(session, 1).version == 2
+    assert user_service.get_user_profile(session, 1) == UserRecord(1, "dave", "dave@example.org", 2)
+
+def test_memory_report(cache, session):
+    session.add_all([Stock(symbol=f"S{i}", name=f"Stock {i}") for i in range(10)])
+    session.commit()
+    cache.preload(session)
+    report = cache.memory_report()
+    assert report["stock"]["records"] == 10
+    assert report["stock"]["bytes_per_record"] > 0
+    assert report["user"] == {"records": 0, "bytes": 0, "bytes_per_record": 0.0}
@@ -0,0 +1,149 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from corporate_action_service import CorporateActionService
+from holding_service import HoldingService
+from price_history_service import PriceHistoryService
+from risk_service import RiskService, forward_fill
+from portfolio_pilot_backend.models import Base, Stock, User
+from portfolio_pilot_backend.repositories.corporate_action_repository import CorporateActionRepositoryFactory
+from portfolio_pilot_backend.repositories.historical_data_repository import HistoricalDataRepositoryFactory
+from portfolio_pilot_backend.repositories.holding_repository import HoldingRepositoryFactory
+from portfolio_pilot_backend.repositories.price_chunk_repository import PriceChunkRepositoryFactory
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+from trading_calendar_service import TradingCalendarService
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+AS_OF = datetime(2024, 6, 17)
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def user_id(session):
+    user = User("anna", "anna@example.com", "hash")
+    session.add(user)
+    session.commit()
+    return user.id
+
+@pytest.fixture(scope="function")
+def price_history_service():
+    return PriceHistoryService(HistoricalDataRepositoryFactory(), PriceChunkRepositoryFactory())
+
+@pytest.fixture(scope="function")
+def holding_service():
+    return HoldingService(HoldingRepositoryFactory())
+
+@pytest.fixture(scope="function")
+def risk_service(price_history_service):
+    return RiskService(HoldingRepositoryFactory(), price_history_service, chunk_size=20_000)
+
+def add_stock(session, price_history_service, symbol, closes, skip=()):
+    stock = Stock(symbol=symbol, name=symbol)
+    session.add(stock)
+    session.commit()
+    days = np.busday_offset("2024-01-02", np.arange(len(closes)), roll="forward").astype(datetime)
+    price_history_service.add_bars(session, stock.id, [
+        {"date": day, "open": close, "high": close, "low": close, "close": close, "adj_close": close, "volume": 1}
+        for i, (day, close) in enumerate(zip(days, closes)) if i not in skip])
+    session.commit()
+    return stock.id
+
+def random_walk(seed, days=120):
+    return (100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, days)))).tolist()
+
+def test_forward_fill():
+    matrix = np.array([[np.nan, 1.0, np.nan, 3.0], [2.0, np.nan, np.nan, 4.0]])
+    np.testing.assert_array_equal(forward_fill(matrix), [[np.nan, 1.0, 1.0, 3.0], [2.0, 2.0, 2.0, 4.0]])
+
+def test_estimate_risk_of_holdings(session, user_id, price_history_service, holding_service, risk_service):
+    first = add_stock(session, price_history_service, "AAA", random_walk(1))
+    second = add_stock(session, price_history_service, "BBB", random_walk(2), skip={40, 41})
+    holding_service.set_holding(session, user_id, first, 10, 90.0)
+    holding_service.set_holding(session, user_id, second, 5, 95.0)
+
+    estimate, error_msg = risk_service.estimate_risk(session, user_id, "normal", 0.99, 10, 50_000, 100, seed=7,
+                                                     as_of=AS_OF)
+    assert error_msg is None
+    assert estimate.observations == 100
+    closes = price_history_service.get_aligned(session, [first, second], ("adj_close",)).columns["adj_close"]
+    assert estimate.portfolio_value == pytest.approx(10 * closes[0, -1] + 5 * closes[1, -1])
+    assert 0 < estimate.value_at_risk < estimate.expected_shortfall < estimate.portfolio_value
+
+    again, _ = risk_service.estimate_risk(session, user_id, "normal", 0.99, 10, 50_000, 100, seed=7, as_of=AS_OF)
+    assert again == estimate
+    bootstrap, _ = risk_service.estimate_risk(session, user_id, "bootstrap", 0.99, 10, 50_000, 100, seed=7,
+                                              as_of=AS_OF)
+    assert bootstrap.value_at_risk == pytest.approx(estimate.value_at_risk, rel=0.3)
+
+def test_estimate_risk_on_trading_calendar(session, user_id, price_history_service, holding_service):
+    risk_service = RiskService(HoldingRepositoryFactory(), price_history_service, chunk_size=20_000,
+                               calendar_service=TradingCalendarService(StockRepositoryFactory(), 2023, 2025))
+    first = add_stock(session, price_history_service, "AAA", random_walk(1))
+    second = add_stock(session, price_history_service, "BBB", random_walk(2), skip={40, 41})
+    holding_service.set_holding(session, user_id, first, 10, 90.0)
+    holding_service.set_holding(session, user_id, second, 5, 95.0)
+
+    estimate, error_msg = risk_service.estimate_risk(session, user_id, "normal", 0.99, 10, 50_000, 100, seed=7,
+                                                     as_of=AS_OF)
+    assert error_msg is None
+    # Genau lookback_days Renditen, auch über den Montag ohne Bars vor AS_OF hinweg.
+    assert estimate.observations == 100
+    closes = price_history_service.get_aligned(session, [first, second], ("adj_close",)).columns["adj_close"]
+    assert estimate.portfolio_value == pytest.approx(10 * closes[0, -1] + 5 * closes[1, -1])
+
+def test_recorded_split_does_not_change_the_estimate(session, user_id, price_history_service, holding_service):
+    corporate_action_service = CorporateActionService(CorporateActionRepositoryFactory(), price_history_service)
+    risk_service = RiskService(HoldingRepositoryFactory(), price_history_service, chunk_size=20_000,
+                               corporate_action_service=corporate_action_service)
+    closes = random_walk(1)
+    plain = add_stock(session, price_history_service, "AAA", closes)
+    # Vor dem 10:1-Split sind die gespeicherten Kurse zehnmal so hoch.
+    split = add_stock(session, price_history_service, "BBB", [close * 10 for close in closes[:60]] + closes[60:])
+    ex_date = np.busday_offset("2024-01-02", 60, roll="forward").astype(datetime)
+    assert corporate_action_service.add_split(session, split, ex_date, 10.0)[1] is None
+
+    estimates = []
+    for stock_id in (plain, split):
+        holding_service.set_holding(session, user_id, stock_id, 10, 90.0)
+        estimate, error_msg = risk_service.estimate_risk(session, user_id, "bootstrap", 0.99, 1, 10_000, 100,
+                                                         seed=7, as_of=AS_OF)
+        assert error_msg is None
+        estimates.append(estimate)
+        holding_service.delete_holding(session, user_id, stock_id)
+    assert estimates[1].value_at_risk == pytest.approx(estimates[0].value_at_risk)
+    assert estimates[1].portfolio_value == pytest.approx(estimates[0].portfolio_value)
+
+def test_estimate_risk_errors(session, user_id, price_history_service, holding_service, risk_service):
+    assert risk_service.estimate_risk(session, user_id, as_of=AS_OF) == (None, "Keine Positionen vorhanden.")
+    assert "Methode" in risk_service.estimate_risk(session, user_id, method="garch")[1]
+    assert "Pfadanzahl" in risk_service.estimate_risk(session, user_id, paths=10)[1]
+
+    stock_id = add_stock(session, price_history_service, "AAA", random_walk(3, days=10))
+    holding_service.set_holding(session, user_id, stock_id, 1, 1.0)
+    assert "Zu wenige" in risk_service.estimate_risk(session, user_id, as_of=AS_OF)[1]
+    empty = Stock(symbol="EMPTY", name="No bars")
+    session.add(empty)
+    session.commit()
+    holding_service.set_holding(session, user_id, empty.id, 1, 1.0)
+    assert "Kursdaten" in risk_service.estimate_risk(session, user_id, as_of=AS_OF)[1]
+
+def test_set_holding_upserts(session, user_id, price_history_service, holding_service):
+    stock_id = add_stock(session, price_history_service, "AAA", [1.0])
+    holding_service.set_holding(session, user_id, stock_id, 1, 10.0)
+    holding, error_msg = holding_service.set_holding(session, user_id, stock_id, 3, 12.0)
+    assert error_msg is None
+    assert [(h.quantity, h.purchase_price) for h in holding_service.list_holdings(session, user_id)] == [(3, 12.0)]
+    assert holding_service.set_holding(session, user_id, stock_id, 0, 12.0)[1] == "Stückzahl muss größer als 0 sein."
+    assert holding_service.delete_holding(session, user_id, stock_id)
+    assert not holding_service.delete_holding(session, user_id, stock_id)
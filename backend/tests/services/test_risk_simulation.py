@@ -0,0 +1,44 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from risk_simulation import BOOTSTRAP, NORMAL, chunk_sizes, fit_model, simulate_pnl, value_at_risk
+
+def test_chunk_sizes():
+    assert chunk_sizes(10, 4) == [4, 4, 2]
+    assert chunk_sizes(8, 4) == [4, 4]
+
+def test_normal_var_matches_closed_form():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.01, (5000, 1))
+    model = fit_model(NORMAL, returns)
+    pnl = simulate_pnl(model, np.array([1000.0]), horizon=4, paths=200_000, seed=1, chunk_size=30_000)
+    var, expected_shortfall = value_at_risk(pnl, 0.99)
+    sigma = returns.std() * 2
+    assert var == pytest.approx(1000 * 2.326 * sigma, rel=0.03)
+    assert expected_shortfall == pytest.approx(1000 * 2.665 * sigma, rel=0.03)
+
+def test_correlated_assets_keep_correlation():
+    rng = np.random.default_rng(2)
+    common = rng.normal(0, 0.01, 3000)
+    returns = np.column_stack([common, common + rng.normal(0, 0.001, 3000)])
+    hedged = simulate_pnl(fit_model(NORMAL, returns), np.array([100.0, -100.0]), 1, 50_000, seed=3)
+    single = simulate_pnl(fit_model(NORMAL, returns), np.array([100.0, 0.0]), 1, 50_000, seed=3)
+    assert value_at_risk(hedged, 0.99)[0] < value_at_risk(single, 0.99)[0] / 5
+
+def test_bootstrap_one_day_reproduces_history():
+    returns = np.log1p(np.linspace(-0.05, 0.05, 101))[:, None]
+    pnl = simulate_pnl(fit_model(BOOTSTRAP, returns), np.array([100.0]), 1, 100_000, seed=4)
+    assert set(np.round(pnl, 6)) <= set(np.round(100 * np.linspace(-0.05, 0.05, 101), 6))
+    assert value_at_risk(pnl, 0.95)[0] == pytest.approx(4.5, abs=0.11)
+
+def test_result_is_independent_of_executor():
+    returns = np.random.default_rng(5).normal(0, 0.02, (250, 3))
+    values = np.array([10.0, 20.0, 30.0])
+    for method in (BOOTSTRAP, NORMAL):
+        model = fit_model(method, returns)
+        local = simulate_pnl(model, values, 5, 10_000, seed=9, chunk_size=3000)
+        with ProcessPoolExecutor(2) as executor:
+            pooled = simulate_pnl(model, values, 5, 10_000, seed=9, chunk_size=3000, executor=executor)
+        np.testing.assert_array_equal(local, pooled)
@@ -0,0 +1,137 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import UnboundExecutionError
+
+from shard_router import ShardRouter, jump_hash, route_session
+from write_behind import WriteBehindQueue, WriteType
+from portfolio_pilot_backend.models import Base, Holding, PriceAlert, Stock, User, Watchlist
+from portfolio_pilot_backend.repositories.user_repository import UserRepository
+
+NOW = datetime(2024, 1, 2)
+
+
+@pytest.fixture(scope="function")
+def make_router(tmp_path):
+    engines = {}
+    routers = []
+
+    def engine(name):
+        if name not in engines:
+            engines[name] = create_engine(f"sqlite:///{tmp_path / name}.db")
+        return engines[name]
+
+    def make(*shards):
+        router = ShardRouter(engine("reference"), [engine(name) for name in shards])
+        router.create_all()
+        routers.append(router)
+        return router
+
+    make.engine = engine
+    yield make
+    for router in routers:
+        router.close()
+    for engine in engines.values():
+        engine.dispose()
+
+
+def add_user(session, user_id):
+    user = User(f"user{user_id}", f"user{user_id}@example.com", "hash")
+    user.id = user_id
+    session.add(user)
+    session.flush()
+    session.add_all([Watchlist(user_id, 1), Holding(user_id, 1, 2.0, 10.0),
+                     PriceAlert(user_id, 1, "above", 100.0 + user_id, NOW)])
+
+
+def user_ids(engine):
+    with engine.connect() as connection:
+        return set(connection.scalars(select(User.__table__.c.id)))
+
+
+def test_jump_hash_moves_only_to_the_new_bucket():
+    before = [jump_hash(key, 3) for key in range(10_000)]
+    after = [jump_hash(key, 4) for key in range(10_000)]
+    assert set(before) == {0, 1, 2}
+    moved = [(old, new) for old, new in zip(before, after) if old != new]
+    assert all(new == 3 for _, new in moved)
+    assert 2000 < len(moved) < 3000
+
+
+def test_sessions_reach_user_tables_only_when_routed(make_router):
+    router = make_router("shard0", "shard1")
+    with router.session() as session:
+        session.add(Stock("SAP", "SAP SE"))
+        session.commit()
+        with pytest.raises(UnboundExecutionError):
+            session.execute(select(User.id)).all()
+    user_id = next(i for i in range(1, 100) if router.shard_for(i) == 1)
+    with router.session() as session:
+        route_session(session, user_id)
+        add_user(session, user_id)
+        # Referenz- und Benutzertabellen in einer Session, jeweils auf ihrer Datenbank.
+        assert session.scalar(select(Stock.symbol)) == "SAP"
+        session.commit()
+        with pytest.raises(ValueError):
+            route_session(session, next(i for i in range(1, 100) if router.shard_for(i) == 0))
+    assert user_ids(router.shard_engines[1]) == {user_id}
+    assert user_ids(router.shard_engines[0]) == set()
+    assert router.scatter(lambda session: session.scalar(select(func.count(User.id)))) == [0, 1]
+
+
+def test_rebalance_after_adding_a_shard(make_router):
+    router = make_router("shard0", "shard1")
+    for user_id in range(1, 41):
+        with router.session(user_id) as session:
+            add_user(session, user_id)
+            session.commit()
+
+    grown = make_router("shard0", "shard1", "shard2")
+    report = grown.rebalance(batch_size=4)
+    assert set(report) <= {"0->2", "1->2"}
+    assert sum(report.values()) == len(user_ids(grown.shard_engines[2])) > 0
+    for shard, engine in enumerate(grown.shard_engines):
+        assert all(grown.shard_for(user_id) == shard for user_id in user_ids(engine))
+    counts = grown.scatter(lambda session: (session.scalar(select(func.count()).select_from(Watchlist)),
+                                            session.scalar(select(func.count()).select_from(Holding)),
+                                            session.scalar(select(func.count()).select_from(PriceAlert))))
+    assert [sum(column) for column in zip(*counts)] == [40, 40, 40]
+    with grown.session(user_id=7) as session:
+        assert session.scalar(select(PriceAlert.threshold).where(PriceAlert.user_id == 7)) == 107.0
+        assert UserRepository(session).allocate_id(NOW) == 41
+    assert grown.rebalance() == {}
+
+
+def test_rebalance_drains_a_single_database(make_router):
+    legacy = make_router.engine("legacy")
+    Base.metadata.create_all(legacy)
+    with legacy.begin() as connection:
+        connection.execute(User.__table__.insert(), [
+            {"id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com",
+             "password_hash": "hash", "version": 1} for user_id in range(1, 11)])
+        connection.execute(Watchlist.__table__.insert(), [{"user_id": user_id, "stock_id": 1}
+                                                          for user_id in range(1, 11)])
+    router = make_router("shard0", "shard1")
+    report = router.rebalance(drain=[legacy])
+    assert sum(report.values()) == 10 and set(report) == {"drain0->0", "drain0->1"}
+    assert user_ids(legacy) == set()
+    assert user_ids(router.shard_engines[0]) | user_ids(router.shard_engines[1]) == set(range(1, 11))
+
+
+def test_write_behind_commits_routed_writes_per_shard(make_router):
+    router = make_router("shard0", "shard1")
+    users = [next(i for i in range(1, 100) if router.shard_for(i) == shard) for shard in (0, 1)]
+    for user_id in users:
+        with router.session(user_id) as session:
+            add_user(session, user_id)
+            session.commit()
+    queue = WriteBehindQueue(router, flush_interval=10, shard_for=router.shard_for)
+    queue.register(WriteType("last_seen", lambda session, rows: UserRepository(session).set_last_seen(rows),
+                             route=lambda row: row["user_id"]))
+    for user_id in users:
+        queue.submit("last_seen", {"user_id": user_id, "seen_at": NOW})
+    queue.flush()
+    queue.close()
+    assert queue.commits == 2
+    assert router.scatter(lambda session: session.scalar(select(User.last_seen_at))) == [NOW, NOW]
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from stock_search_index import InMemoryStockSearchIndex, DatabaseStockSearch
+from portfolio_pilot_backend.models import Base, Stock
+
+
+def make_stock(stock_id, symbol, name, isin=None, wkn=None, exchange=None):
+    stock = Stock(symbol=symbol, name=name, isin=isin, wkn=wkn, exchange=exchange)
+    stock.id = stock_id
+    return stock
+
+@pytest.fixture(scope="function")
+def index():
+    index = InMemoryStockSearchIndex()
+    index.rebuild([
+        make_stock(1, "AAPL", "Apple Inc.", isin="US0378331005", wkn="865985", exchange="NASDAQ"),
+        make_stock(2, "BMW.DE", "Bayerische Motoren Werke AG", isin="DE0005190003", wkn="519000", exchange="XETRA"),
+        make_stock(3, "MSFT", "Microsoft Corp.", isin="US5949181045", wkn="870747", exchange="NASDAQ"),
+        make_stock(4, "AMZN", "Amazon.com Inc.", isin="US0231351067", wkn="906866", exchange="NASDAQ"),
+        make_stock(5, "AAP", "Advance Auto Parts", exchange="NYSE"),
+    ])
+    return index
+
+def test_exact_symbol_ranks_before_prefix(index):
+    hits = index.search("aap")
+    assert [hit.symbol for hit in hits[:2]] == ["AAP", "AAPL"]
+    assert hits[0].matched_field == "symbol"
+
+def test_search_by_isin_wkn_and_name_word(index):
+    assert index.search("US59491")[0].symbol == "MSFT"
+    assert index.search("5190")[0].symbol == "BMW.DE"
+    assert index.search("motoren")[0].symbol == "BMW.DE"
+    assert index.search("Bayerische Mot")[0].symbol == "BMW.DE"
+
+def test_fuzzy_match_for_typos(index):
+    hits = index.search("microsfot")
+    assert hits and hits[0].symbol == "MSFT"
+    assert hits[0].matched_field == "fuzzy"
+
+def test_limit_and_empty_query(index):
+    assert len(index.search("a", limit=2)) == 2
+    assert index.search("   ") == []
+
+def test_incremental_upsert_and_remove(index):
+    index.upsert(make_stock(6, "NVDA", "NVIDIA Corporation"))
+    assert index.search("nvid")[0].stock_id == 6
+
+    index.upsert(make_stock(3, "MSFT", "Microsoft Corporation", isin="US5949181045"))
+    assert index.search("870747") == []
+    assert index.search("microsoft corporation")[0].stock_id == 3
+
+    index.remove(1)
+    assert all(hit.stock_id != 1 for hit in index.search("apple"))
+    assert len(index) == 5
+
+def test_database_search_with_sqlite_fts5():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    search = DatabaseStockSearch(engine, session_factory)
+    search.ensure_schema()
+    with session_factory() as session:
+        session.add_all([Stock(symbol="SAP", name="SAP SE"), Stock(symbol="SIE", name="Siemens AG")])
+        session.commit()
+
+    hits = search.search("siem")
+    assert [hit.symbol for hit in hits] == ["SIE"]
+    engine.dispose()
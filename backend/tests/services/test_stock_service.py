@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from stock_service import StockService
+from stock_search_index import InMemoryStockSearchIndex
+from portfolio_pilot_backend.repositories.stock_repository import StockRepositoryFactory
+from portfolio_pilot_backend.models import Base, HistoricalData, User, Watchlist
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def stock_service(session):
+    return StockService(StockRepositoryFactory(), InMemoryStockSearchIndex())
+
+def test_create_stock_updates_search_index(stock_service, session):
+    stock, msg = stock_service.create_new_stock(session, "SAP", "SAP SE", isin="DE0007164600")
+    assert msg is None
+    assert stock.id is not None
+    assert stock_service.search_stocks("DE000716")[0].stock_id == stock.id
+
+def test_create_stock_with_duplicate_isin_creates_error_msg(stock_service, session):
+    stock_service.create_new_stock(session, "SAP", "SAP SE", isin="DE0007164600")
+    stock, msg = stock_service.create_new_stock(session, "SAP2", "SAP Zwei", isin="DE0007164600")
+    assert stock is None
+    assert msg == "ISIN bereits registriert."
+
+def test_create_stock_without_symbol_creates_error_msg(stock_service, session):
+    stock, msg = stock_service.create_new_stock(session, None, "Namenlos")
+    assert stock is None
+    assert msg is not None
+
+def test_update_stock_reindexes(stock_service, session):
+    stock, _ = stock_service.create_new_stock(session, "FB", "Facebook Inc.")
+    updated, msg = stock_service.update_stock(session, stock.id, symbol="META", name="Meta Platforms")
+    assert msg is None
+    assert updated.symbol == "META"
+    assert stock_service.search_stocks("facebook") == []
+    assert stock_service.search_stocks("meta")[0].symbol == "META"
+
+def test_delete_stock_removes_from_index(stock_service, session):
+    stock, _ = stock_service.create_new_stock(session, "TSLA", "Tesla, Inc.")
+    assert stock_service.delete_stock(session, stock.id) == (True, None)
+    assert stock_service.search_stocks("tesla") == []
+    assert stock_service.delete_stock(session, stock.id) == (False, None)
+
+def test_delete_stock_with_history_or_watchlist_creates_error_msg(stock_service, session):
+    stock, _ = stock_service.create_new_stock(session, "SAP", "SAP SE")
+    user = User("anna", "anna@example.com", "hash")
+    session.add(user)
+    session.flush()
+    session.add_all([Watchlist(user_id=user.id, stock_id=stock.id),
+                     HistoricalData(stock.id, datetime(2024, 1, 2), 100.0, 101.0, 99.0, 100.5, 100.5, 1000)])
+    session.commit()
+    assert stock_service.delete_stock(session, stock.id) == \
+        (False, "Die Aktie wird noch verwendet (Kursdaten, Watchlists) und kann nicht gelöscht werden.")
+    assert stock_service.search_stocks("sap")[0].stock_id == stock.id
+
+def test_rebuild_search_index_from_database(stock_service, session):
+    stock_service.create_new_stock(session, "SIE", "Siemens AG")
+    fresh_service = StockService(StockRepositoryFactory(), InMemoryStockSearchIndex())
+    fresh_service.rebuild_search_index(session)
+    assert fresh_service.search_stocks("siemens")[0].symbol == "SIE"
@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from revocation_list import RevocationList
+from token_service import ACCESS, REFRESH, TokenService
+from portfolio_pilot_backend.models import Base, RevokedToken
+from portfolio_pilot_backend.repositories.revoked_token_repository import RevokedTokenRepositoryFactory
+
+engine = create_engine('sqlite:///:memory:')
+SessionLocal = sessionmaker(bind=engine)
+
+SECRET = b"k" * 32
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture(scope="function")
+def session():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+@pytest.fixture(scope="function")
+def clock():
+    return Clock()
+
+@pytest.fixture(scope="function")
+def token_service(clock):
+    return TokenService(SECRET, RevocationList(RevokedTokenRepositoryFactory(), SessionLocal, clock=clock),
+                        access_ttl=60, refresh_ttl=3600, clock=clock)
+
+def test_issued_token_verifies(token_service):
+    token, issued = token_service.issue(7, ACCESS)
+    claims, msg = token_service.verify(token)
+    assert msg is None
+    assert claims == issued
+    assert claims.user_id == 7
+
+def test_tampered_or_foreign_tokens_are_rejected(token_service, clock):
+    token, _ = token_service.issue(7, ACCESS)
+    payload, signature = token.split(".")
+    forged = token_service.issue(8, ACCESS)[0].split(".")[0] + "." + signature
+    assert token_service.verify(forged) == (None, "Ungültige Signatur.")
+    assert token_service.verify("garbage")[0] is None
+    assert token_service.verify(None)[0] is None
+    other = TokenService(b"x" * 32, token_service.revocation_list, clock=clock)
+    assert other.verify(token)[0] is None
+
+def test_token_type_and_expiry(token_service, clock):
+    tokens = token_service.issue_pair(7)
+    assert tokens["expires_in"] == 60
+    assert token_service.verify(tokens["refresh_token"], ACCESS)[1] == "Falscher Tokentyp."
+    assert token_service.verify(tokens["refresh_token"], REFRESH)[0] is not None
+    clock.now += 61
+    assert token_service.verify(tokens["access_token"])[1] == "Token abgelaufen."
+    assert token_service.verify(tokens["refresh_token"], REFRESH)[0] is not None
+
+def test_revocation_is_persisted_and_synced_into_other_lists(session, token_service, clock):
+    token, claims = token_service.issue(7, REFRESH)
+    token_service.revoke(session, claims)
+    session.commit()
+    assert token_service.verify(token, REFRESH)[1] == "Token wurde widerrufen."
+
+    other_process = RevocationList(RevokedTokenRepositoryFactory(), SessionLocal, sync_interval=30, clock=clock)
+    assert other_process.is_revoked(claims.jti)
+    assert len(other_process) == 1
+
+def test_second_revocation_of_a_token_is_refused(session, token_service, clock):
+    _, claims = token_service.issue(7, REFRESH)
+    other_process = RevocationList(RevokedTokenRepositoryFactory(), SessionLocal, sync_interval=30, clock=clock)
+    assert not other_process.is_revoked(claims.jti)
+    assert token_service.revoke(session, claims)
+    session.commit()
+
+    # Der andere Prozess hat noch nicht abgeglichen, die Datenbank kennt die Sperre aber schon.
+    assert not other_process.is_revoked(claims.jti)
+    assert not other_process.revoke(session, claims.jti, claims.user_id, claims.expires_at)
+    session.commit()
+    assert session.query(RevokedToken).count() == 1
+
+def test_expired_revocations_are_dropped(session, token_service, clock):
+    _, claims = token_service.issue(7, ACCESS)
+    token_service.revoke(session, claims)
+    session.commit()
+    clock.now += 120
+    _, later = token_service.issue(7, ACCESS)
+    token_service.revoke(session, later)
+    session.commit()
+    assert [row.jti for row in session.query(RevokedToken)] == [later.jti]
+
+    revocation_list = RevocationList(RevokedTokenRepositoryFactory(), SessionLocal, clock=clock)
+    assert not revocation_list.is_revoked(claims.jti)
+    assert revocation_list.is_revoked(later.jti)
+
+def test_short_secret_is_refused(token_service):
+    with pytest.raises(ValueError):
+        TokenService(b"short", token_service.revocation_list)
@@ -0,0 +1,90 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from trading_calendar import MONTHLY, WEEKLY, TradingCalendar, canonical_exchange, easter_sunday, holidays, \
+    period_ends
+
+
+@pytest.fixture(scope="module")
+def nyse():
+    return TradingCalendar.build("NYSE", 2020, 2025)
+
+
+def closed_weekdays(calendar, start, end):
+    days = np.arange(np.datetime64(start), np.datetime64(end) + 1, dtype="datetime64[D]")
+    return np.datetime_as_string(np.setdiff1d(days[np.is_busday(days)], calendar.sessions), unit="D").tolist()
+
+
+def test_easter_sunday():
+    assert [easter_sunday(year) for year in (2000, 2019, 2024, 2025)] == [
+        date(2000, 4, 23), date(2019, 4, 21), date(2024, 3, 31), date(2025, 4, 20)]
+
+
+def test_nyse_holidays_2024(nyse):
+    assert closed_weekdays(nyse, "2024-01-01", "2024-12-31") == [
+        "2024-01-01", "2024-01-15", "2024-02-19", "2024-03-29", "2024-05-27", "2024-06-19", "2024-07-04",
+        "2024-09-02", "2024-11-28", "2024-12-25"]
+
+
+def test_nyse_weekend_observance(nyse):
+    # Juneteenth 2022 fiel auf einen Sonntag, Weihnachten 2021 auf einen Samstag, Neujahr 2022 wird nicht verlegt.
+    assert nyse.session_index("2022-06-20") is None
+    assert nyse.session_index("2021-12-24") is None
+    assert nyse.session_index("2021-12-31") is not None
+    assert nyse.session_index("2025-01-09") is None
+
+
+def test_lse_substitute_days():
+    closed = holidays("LSE", 2021, 2022)
+    # Weihnachten und Boxing Day 2021 am Wochenende: Ersatz am 27. und 28., Neujahr 2022 am 3. Januar.
+    assert {date(2021, 12, 27), date(2021, 12, 28), date(2022, 1, 3)} <= closed
+    # 2022 lag der Spring Bank Holiday wegen des Thronjubiläums am 2. Juni statt am 30. Mai.
+    assert date(2022, 5, 30) not in closed and date(2022, 6, 2) in closed
+
+
+def test_xetra_and_unknown_exchanges():
+    xetra = TradingCalendar.build(canonical_exchange("xetr"), 2024, 2024)
+    assert closed_weekdays(xetra, "2024-01-01", "2024-12-31") == [
+        "2024-01-01", "2024-03-29", "2024-04-01", "2024-05-01", "2024-12-24", "2024-12-25", "2024-12-26",
+        "2024-12-31"]
+    weekdays = TradingCalendar.build(canonical_exchange("Tradegate"), 2024, 2024)
+    assert closed_weekdays(weekdays, "2024-01-01", "2024-12-31") == []
+
+
+def test_locate_maps_dates_to_previous_session(nyse):
+    index = nyse.session_index("2024-07-03")
+    dates = np.array(["2019-12-31", "2024-07-03", "2024-07-04", "2024-07-06", "2024-07-08"], dtype="datetime64[s]")
+    assert nyse.locate(dates).tolist() == [-1, index, index, index + 1, index + 2]
+    with pytest.raises(ValueError):
+        nyse.locate(np.array(["2026-01-02"], dtype="datetime64[D]"))
+
+
+def test_bounds(nyse):
+    lo, hi = nyse.bounds(datetime(2024, 7, 4), datetime(2024, 7, 7))
+    assert np.datetime_as_string(nyse.sessions[lo:hi]).tolist() == ["2024-07-05"]
+    assert nyse.bounds(None, None) == (0, len(nyse))
+    assert nyse.bounds("2024-07-06", "2024-07-07")[0] == nyse.bounds("2024-07-06", "2024-07-07")[1]
+
+
+def test_scatter_and_union(nyse):
+    xetra = TradingCalendar.build("XETRA", 2020, 2025)
+    union = TradingCalendar.union([nyse, xetra])
+    # Am 4. Juli handelt nur XETRA, am Karfreitag keine der beiden Börsen.
+    assert union.session_index("2024-07-04") is not None
+    assert union.session_index("2024-03-29") is None
+
+    lo, hi = nyse.bounds("2024-07-02", "2024-07-08")
+    dense = nyse.scatter(np.array([0, 0, 1]), np.array(["2024-07-03", "2024-07-04", "2024-07-08"],
+                                                       dtype="datetime64[s]"), np.array([1.0, 2.0, 3.0]), 2, lo, hi)
+    assert np.array_equal(dense, [[np.nan, 1.0, np.nan, np.nan], [np.nan, np.nan, np.nan, 3.0]], equal_nan=True)
+
+
+def test_period_ends(nyse):
+    lo, hi = nyse.bounds("2024-06-24", "2024-08-02")
+    sessions = nyse.sessions[lo:hi]
+    assert np.datetime_as_string(sessions[period_ends(sessions, WEEKLY)]).tolist() == [
+        "2024-06-28", "2024-07-05", "2024-07-12", "2024-07-19", "2024-07-26", "2024-08-02"]
+    assert np.datetime_as_string(sessions[period_ends(sessions, MONTHLY)]).tolist() == [
+        "2024-06-28", "2024-07-31", "2024-08-02"]
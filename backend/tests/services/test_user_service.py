@@ -116,3 +116,13 @@ def test_get_all_users(user_service, session):
     assert len(all_users) == 2
     assert any(user.username == "Test1" for user in all_users)
     assert any(user.username == "Test2" for user in all_users)
+
+def test_authenticate_user_upgrades_legacy_plain_password(user_service, session):
+    session.add(User(username="Alt", email="alt@example.com", password_hash="klartext"))
+    session.commit()
+    assert user_service.authenticate_user(session, "Alt", "falsch") is None
+
+    user = user_service.authenticate_user(session, "Alt", "klartext")
+    assert user is not None
+    assert user.password_hash.startswith("scrypt$")
+    assert user_service.authenticate_user(session, "Alt", "klartext") is not None
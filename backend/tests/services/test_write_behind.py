@@ -0,0 +1,196 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from activity_service import AUDIT_EVENT, ActivityService
+from watchlist_service import WatchlistService
+from write_behind import ASYNC, SYNC, WriteBehindQueue, WriteQueueFullError, WriteType
+from portfolio_pilot_backend.models import AuditEvent, Base, Stock, User
+from portfolio_pilot_backend.repositories.audit_event_repository import AuditEventRepositoryFactory
+from portfolio_pilot_backend.repositories.user_repository import UserRepositoryFactory
+from portfolio_pilot_backend.repositories.watchlist_repository import WatchlistRepositoryFactory
+
+@pytest.fixture(scope="function")
+def session_factory(tmp_path):
+    # Dateibasiert, damit der Schreib-Thread dieselbe Datenbank sieht.
+    engine = create_engine(f"sqlite:///{tmp_path / 'write_behind.db'}")
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+@pytest.fixture(scope="function")
+def ids(session_factory):
+    with session_factory() as session:
+        users = [User("anna", "anna@example.com", "hash"), User("ben", "ben@example.com", "hash")]
+        stocks = [Stock(symbol="AAPL", name="Apple Inc."), Stock(symbol="MSFT", name="Microsoft Corp.")]
+        session.add_all(users + stocks)
+        session.commit()
+        return [user.id for user in users], [stock.id for stock in stocks]
+
+def recording_type(name, batches, durability=ASYNC, coalesce_key=None, fail=False):
+    def apply(session, payloads):
+        batches.append((name, list(payloads)))
+        if fail:
+            raise RuntimeError("boom")
+    return WriteType(name, apply, durability, coalesce_key)
+
+def test_async_writes_are_grouped_into_one_commit(session_factory):
+    batches = []
+    queue = WriteBehindQueue(session_factory, flush_interval=10)
+    queue.register(recording_type("event", batches))
+    for i in range(5):
+        queue.submit("event", i)
+    assert queue.pending == 5
+    queue.flush()
+    assert batches == [("event", [0, 1, 2, 3, 4])]
+    assert (queue.commits, queue.committed, queue.pending) == (1, 5, 0)
+    queue.close()
+
+def test_max_batch_triggers_commit_before_interval(session_factory):
+    committed = threading.Event()
+    queue = WriteBehindQueue(session_factory, flush_interval=60, max_batch=3)
+    queue.register(WriteType("event", lambda session, payloads: committed.set()))
+    for i in range(3):
+        queue.submit("event", i)
+    assert committed.wait(5)
+    queue.close()
+
+def test_coalesce_key_keeps_latest_payload(session_factory):
+    batches = []
+    queue = WriteBehindQueue(session_factory, flush_interval=10)
+    queue.register(recording_type("seen", batches, coalesce_key=lambda payload: payload[0]))
+    for payload in [(1, "a"), (2, "b"), (1, "c")]:
+        queue.submit("seen", payload)
+    assert queue.pending == 2
+    queue.close()
+    assert batches == [("seen", [(1, "c"), (2, "b")])]
+
+def test_sync_write_raises_when_its_commit_fails(session_factory):
+    batches = []
+    queue = WriteBehindQueue(session_factory, flush_interval=10)
+    queue.register(recording_type("bad", batches, SYNC, fail=True))
+    with pytest.raises(RuntimeError, match="bad"):
+        queue.submit("bad", 1)
+    assert queue.failed == 1
+    queue.close()
+
+def test_failing_type_does_not_lose_other_types(session_factory):
+    batches = []
+    queue = WriteBehindQueue(session_factory, flush_interval=10)
+    queue.register(recording_type("good", batches))
+    queue.register(recording_type("bad", batches, fail=True))
+    queue.submit("good", 1)
+    queue.submit("bad", 2)
+    queue.close()
+    # Erst gemeinsam, dann nach dem Rollback je Typ einzeln.
+    assert batches == [("good", [1]), ("bad", [2]), ("good", [1]), ("bad", [2])]
+    assert (queue.committed, queue.failed) == (1, 1)
+
+def test_failing_payload_does_not_lose_its_batch(session_factory):
+    committed = []
+
+    def apply(session, payloads):
+        if 3 in payloads:
+            raise RuntimeError("boom")
+        committed.extend(payloads)
+    queue = WriteBehindQueue(session_factory, flush_interval=10)
+    queue.register(WriteType("event", apply))
+    for i in range(6):
+        queue.submit("event", i)
+    queue.close()
+    # Die Gruppe wird halbiert, bis die fehlerhafte Nutzlast allein übrig bleibt.
+    assert sorted(committed) == [0, 1, 2, 4, 5]
+    assert (queue.committed, queue.failed) == (5, 1)
+
+def test_full_queue_rejects_writes(session_factory):
+    queue = WriteBehindQueue(session_factory, flush_interval=60, max_batch=1, max_pending=2, submit_timeout=0.05)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_apply(session, payloads):
+        started.set()
+        release.wait(5)
+    queue.register(WriteType("event", blocking_apply))
+    queue.submit("event", 0)
+    assert started.wait(5)
+    queue.submit("event", 1)
+    queue.submit("event", 2)
+    with pytest.raises(WriteQueueFullError):
+        queue.submit("event", 3)
+    release.set()
+    queue.close()
+
+def test_close_flushes_and_rejects_further_writes(session_factory):
+    batches = []
+    queue = WriteBehindQueue(session_factory, flush_interval=60)
+    queue.register(recording_type("event", batches))
+    queue.submit("event", 1)
+    queue.close()
+    assert batches == [("event", [1])]
+    with pytest.raises(RuntimeError):
+        queue.submit("event", 2)
+
+def test_unknown_durability_is_rejected(session_factory):
+    queue = WriteBehindQueue(session_factory)
+    with pytest.raises(ValueError):
+        queue.register(WriteType("event", lambda session, payloads: None, "eventually"))
+    with pytest.raises(ValueError):
+        queue.set_durability("missing", ASYNC)
+
+def test_watchlist_edits_are_committed_before_returning(session_factory, ids):
+    (anna, ben), (aapl, msft) = ids
+    queue = WriteBehindQueue(session_factory, flush_interval=10)
+    service = WatchlistService(WatchlistRepositoryFactory(), queue)
+    with session_factory() as session:
+        service.add_stock(session, anna, aapl)
+        service.add_stock(session, anna, aapl)
+        service.add_stock(session, ben, msft)
+        assert service.get_stock_ids(session, anna) == [aapl]
+        service.remove_stock(session, anna, aapl)
+        assert service.get_stock_ids(session, anna) == []
+        assert service.get_stock_ids(session, ben) == [msft]
+    queue.close()
+
+def test_watchlist_without_queue_commits_directly(session_factory, ids):
+    (anna, _), (aapl, msft) = ids
+    service = WatchlistService(WatchlistRepositoryFactory())
+    with session_factory() as session:
+        service.add_stock(session, anna, aapl)
+        service.add_stock(session, anna, msft)
+    with session_factory() as session:
+        assert service.get_stock_ids(session, anna) == [aapl, msft]
+
+def test_activity_is_written_on_close(session_factory, ids):
+    (anna, ben), _ = ids
+    queue = WriteBehindQueue(session_factory, flush_interval=60)
+    service = ActivityService(UserRepositoryFactory(), AuditEventRepositoryFactory(), queue)
+    with session_factory() as session:
+        before = session.execute(select(User.version, User.updated_at).where(User.id == anna)).one()
+    service.touch_last_seen(anna)
+    service.touch_last_seen(anna)
+    service.record_event(anna, "login", {"remote_addr": "127.0.0.1"})
+    service.record_event(None, "login_failed")
+    assert queue.pending == 3
+    queue.close()
+    with session_factory() as session:
+        user = session.get(User, anna)
+        assert user.last_seen_at is not None
+        # Der Zeitstempel verändert weder Zeilenversion noch updated_at (und damit keinen ETag).
+        assert (user.version, user.updated_at) == tuple(before)
+        assert session.get(User, ben).last_seen_at is None
+        events = AuditEventRepositoryFactory().create(session).list_for_user(anna)
+        assert [(event.action, event.details) for event in events] == [("login", '{"remote_addr": "127.0.0.1"}')]
+        assert session.scalar(select(AuditEvent.action).where(AuditEvent.user_id.is_(None))) == "login_failed"
+
+def test_audit_durability_can_be_made_sync(session_factory, ids):
+    (anna, _), _ = ids
+    queue = WriteBehindQueue(session_factory, flush_interval=60)
+    service = ActivityService(UserRepositoryFactory(), AuditEventRepositoryFactory(), queue)
+    queue.set_durability(AUDIT_EVENT, SYNC)
+    service.record_event(anna, "logout")
+    with session_factory() as session:
+        assert [event.action for event in AuditEventRepositoryFactory().create(session).list_for_user(anna)] == \
+            ["logout"]
+    queue.close()